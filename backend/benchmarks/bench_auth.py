@@ -0,0 +1,103 @@
+"""
+Microbenchmark: per-request cost of bearer token authentication
+
+Two routes driven in-process with the same token:
+
+    baseline  no dependencies (ASGI + routing overhead only)
+    auth      Depends(get_current_user), run with the decoded token cache
+              disabled (jwt.decode + signature check on every request) and
+              enabled (TokenCache in cache.py)
+
+Reports the mean time per request and the overhead above baseline.
+
+Run from backend/:
+    python -m benchmarks.bench_auth [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+# Settings are required at import time; the benchmark never talks to Supabase
+for _name, _value in {
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "benchmark",
+    "JWT_SECRET_KEY": "benchmark",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_EXPIRATION_MINUTES": "60",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from src.utils.auth import get_current_user  # noqa: E402
+from src.utils.cache import get_token_cache  # noqa: E402
+from src.utils.config import get_settings  # noqa: E402
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/baseline")
+    async def baseline():
+        return {}
+
+    @app.get("/auth")
+    async def authenticated(current_user: dict = Depends(get_current_user)):
+        return {}
+
+    return app
+
+
+def make_token() -> str:
+    settings = get_settings()
+    payload = {
+        "id": "00000000-0000-0000-0000-000000000001",
+        "role": "student",
+        "exp": datetime.utcnow() + timedelta(hours=1),
+    }
+    return jwt.encode(
+        payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
+    )
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    """Mean microseconds per request"""
+    for _ in range(min(requests, 200)):
+        await client.get(path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await client.get(path)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    cache = get_token_cache()
+    capacity = cache.max_entries
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://app", headers=headers
+    ) as client:
+        results = {"baseline": await measure(client, "/baseline", args.requests)}
+        cache.max_entries = 0
+        cache.clear()
+        results["auth uncached"] = await measure(client, "/auth", args.requests)
+        cache.max_entries = capacity
+        results["auth cached"] = await measure(client, "/auth", args.requests)
+
+    print(f"{'route':<14} {'us/request':>11} {'overhead us':>12}")
+    for name, mean in results.items():
+        print(f"{name:<14} {mean:>11.1f} {mean - results['baseline']:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Benchmark: Supabase (PostgREST) brokers vs asyncpg brokers on the same data
+
+Runs the same broker calls through both backends against the benchmark stack
+(see stack/docker-compose.yml) with --concurrency callers each, and reports
+p50/p95 latency, calls/s and database round trips per call.
+
+Run from backend/ with the stack up and seeded:
+    python -m benchmarks.bench_backends [--duration 10] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import time
+
+from .load import percentile
+from .stack import STACK_DATABASE_URL, STACK_URL, configure_environment, service_key
+
+
+def build_brokers(database_url: str, stack_url: str) -> dict[str, dict]:
+    from supabase import ClientOptions, create_client
+
+    from src.Brokers.bookBroker import BookBroker
+    from src.Brokers.loanBroker import LoanBroker
+    from src.Brokers.pgBookBroker import PgBookBroker
+    from src.Brokers.pgLoanBroker import PgLoanBroker
+    from src.Brokers.pgStatsBroker import PgStatsBroker
+    from src.Brokers.pgUserBroker import PgUserBroker
+    from src.Brokers.statsBroker import StatsBroker
+    from src.Brokers.userBroker import UserBroker
+    from src.utils.database import Database
+    from src.utils.instrumentation import instrumented_http_client
+
+    client = create_client(
+        stack_url,
+        service_key(),
+        options=ClientOptions(httpx_client=instrumented_http_client()),
+    )
+    db = Database(database_url, min_size=4, max_size=20)
+    return {
+        "supabase": {
+            "books": BookBroker(client),
+            "loans": LoanBroker(client),
+            "users": UserBroker(client),
+            "stats": StatsBroker(client),
+        },
+        "postgres": {
+            "books": PgBookBroker(db),
+            "loans": PgLoanBroker(db),
+            "users": PgUserBroker(db),
+            "stats": PgStatsBroker(db),
+        },
+    }
+
+
+# name -> call(brokers)
+CALLS = {
+    "SelectAllBooks": lambda b: b["books"].SelectAllBooks(0, 20),
+    "SearchBooks": lambda b: b["books"].SearchBooks("Data"),
+    "SelectAllBooksWithStats": lambda b: b["books"].SelectAllBooksWithStats(0, 50),
+    "SelectAllBooksWithStatsAndCourses": (
+        lambda b: b["books"].SelectAllBooksWithStatsAndCourses(0, 20)
+    ),
+    "SelectLoansByStatusWithBookInfo": (
+        lambda b: b["loans"].SelectLoansByStatusWithBookInfo("pending", 0, 20)
+    ),
+    "SelectAllUsers": lambda b: b["users"].SelectAllUsers(0, 20),
+    "get_loans_by_status": lambda b: b["stats"].get_loans_by_status(),
+    "get_top_borrowers": lambda b: b["stats"].get_top_borrowers(10),
+}
+
+
+async def measure(call, brokers: dict, concurrency: int, duration: float) -> dict:
+    from src.utils.instrumentation import begin_query_stats
+
+    latencies: list[float] = []
+    # Callers inherit this context, so every round trip lands in one QueryStats
+    stats = begin_query_stats()
+    deadline = time.perf_counter() + duration
+
+    async def caller():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await call(brokers)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "queries": stats.queries / len(latencies) if latencies else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per call")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--stack-url", default=STACK_URL)
+    parser.add_argument("--database-url", default=STACK_DATABASE_URL)
+    parser.add_argument("--call", choices=list(CALLS), action="append")
+    args = parser.parse_args()
+
+    configure_environment(args.stack_url)
+    backends = build_brokers(args.database_url, args.stack_url)
+
+    print(
+        f"{'call':<36} {'backend':<9} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'queries':>8}"
+    )
+    for name in args.call or CALLS:
+        for backend, brokers in backends.items():
+            # One untimed call warms connections and asyncpg's statement cache
+            await CALLS[name](brokers)
+            row = await measure(CALLS[name], brokers, args.concurrency, args.duration)
+            print(
+                f"{name:<36} {backend:<9} {row['rps']:>9.1f} {row['p50']:>8.1f} "
+                f"{row['p95']:>8.1f} {row['queries']:>8.1f}"
+            )
+
+    await backends["postgres"]["books"].db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Microbenchmark: per-request cost of resolving services
+
+Three routes that do nothing but inject a service, driven in-process:
+
+    baseline     no dependencies (ASGI + routing overhead only)
+    per-request  the previous wiring: sync getters building a new client ->
+                 broker -> service chain on every request (get_loan_service
+                 alone resolved four brokers)
+    container    the app container (dependencies.py): async getters returning
+                 the instances built once per worker
+
+Reports the mean time per request and the overhead above baseline.
+
+Run from backend/:
+    python -m benchmarks.bench_dependencies [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+# Settings are required at import time; the benchmark never talks to Supabase
+for _name, _value in {
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "benchmark",
+    "JWT_SECRET_KEY": "benchmark",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_EXPIRATION_MINUTES": "60",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+
+from src.Brokers.bookCopyBroker import BookCopyBroker  # noqa: E402
+from src.Brokers.courseBroker import CourseBroker  # noqa: E402
+from src.Brokers.loanBroker import LoanBroker  # noqa: E402
+from src.Brokers.userBroker import UserBroker  # noqa: E402
+from src.Services.loanService import LoanService  # noqa: E402
+from src.utils.dependencies import get_db_client, get_loan_service  # noqa: E402
+
+CLIENT = object()  # brokers only store the client; nothing is queried
+
+
+# The wiring before the container, for comparison
+def legacy_db_client():
+    return CLIENT
+
+
+def legacy_user_broker(client=Depends(legacy_db_client)):
+    return UserBroker(client)
+
+
+def legacy_copy_broker(client=Depends(legacy_db_client)):
+    return BookCopyBroker(client)
+
+
+def legacy_course_broker(client=Depends(legacy_db_client)):
+    return CourseBroker(client)
+
+
+def legacy_loan_broker(client=Depends(legacy_db_client)):
+    return LoanBroker(client)
+
+
+def legacy_loan_service(
+    loan_broker=Depends(legacy_loan_broker),
+    user_broker=Depends(legacy_user_broker),
+    copy_broker=Depends(legacy_copy_broker),
+    course_broker=Depends(legacy_course_broker),
+):
+    return LoanService(loan_broker, user_broker, copy_broker, course_broker)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/baseline")
+    async def baseline():
+        return {}
+
+    @app.get("/per-request")
+    async def per_request(service=Depends(legacy_loan_service)):
+        return {}
+
+    @app.get("/container")
+    async def container(service=Depends(get_loan_service)):
+        return {}
+
+    async def db_client():
+        return CLIENT
+
+    app.dependency_overrides[get_db_client] = db_client
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    """Mean microseconds per request"""
+    for _ in range(min(requests, 200)):
+        await client.get(path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await client.get(path)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        results = {
+            path: await measure(client, f"/{path}", args.requests)
+            for path in ("baseline", "per-request", "container")
+        }
+
+    print(f"{'route':<12} {'us/request':>11} {'overhead us':>12}")
+    for path, mean in results.items():
+        print(f"{path:<12} {mean:>11.1f} {mean - results['baseline']:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
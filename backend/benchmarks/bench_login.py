@@ -0,0 +1,125 @@
+"""
+Benchmark: login password checks on the event loop vs the hashing pool
+
+Runs --logins password verifications with --concurrency concurrent callers,
+as the login endpoint does, in two ways:
+
+    inline   check_password_hash called inside the coroutine (the previous
+             UserService.AuthenticateUser)
+    pool     verify_password (passwords.py): HASHING_POOL_WORKERS processes
+
+Alongside the logins a probe task sleeps 1 ms in a loop and records how late
+it wakes up, i.e. how long any other request would have waited for the event
+loop. Reports logins/s and the probe's p50 / p99 / max lag.
+
+Run from backend/ (no database needed):
+    python -m benchmarks.bench_login [--logins 200] [--concurrency 20]
+        [--method scrypt] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+# Settings are required at import time; the benchmark never talks to Supabase
+for _name, _value in {
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "benchmark",
+    "JWT_SECRET_KEY": "benchmark",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_EXPIRATION_MINUTES": "60",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from werkzeug.security import check_password_hash, generate_password_hash  # noqa: E402
+
+from .load import percentile  # noqa: E402
+
+PASSWORD = "benchmark"
+PROBE_INTERVAL = 0.001
+
+
+async def probe(lags: list, stop: asyncio.Event) -> None:
+    """Record how late a 1 ms sleep wakes up while the logins run"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def inline_login(hashed: str) -> bool:
+    return check_password_hash(hashed, PASSWORD)
+
+
+async def pool_login(hashed: str) -> bool:
+    from src.utils.passwords import verify_password
+
+    valid, _ = await verify_password(hashed, PASSWORD)
+    return valid
+
+
+async def measure(login, hashed: str, logins: int, concurrency: int) -> dict:
+    remaining = iter(range(logins))
+    lags: list = []
+    stop = asyncio.Event()
+
+    async def caller():
+        for _ in remaining:
+            assert await login(hashed)
+
+    prober = asyncio.create_task(probe(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    lags.sort()
+    return {
+        "logins/s": logins / elapsed,
+        "lag p50 ms": percentile(lags, 0.50) * 1000,
+        "lag p99 ms": percentile(lags, 0.99) * 1000,
+        "lag max ms": (lags[-1] if lags else 0.0) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--method", default="scrypt")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        os.environ["HASHING_POOL_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_METHOD"] = args.method
+    os.environ.setdefault("HASHING_POOL_QUEUE", str(args.logins))
+
+    from src.utils.executors import HASHING, get_executor, shutdown_executors
+    from src.utils.passwords import warm_hashing
+
+    hashed = generate_password_hash(PASSWORD, args.method)
+    # Start every worker process before timing
+    await asyncio.gather(
+        *(warm_hashing() for _ in range(get_executor(HASHING).max_workers))
+    )
+
+    results = {}
+    try:
+        for name, login in (("inline", inline_login), ("pool", pool_login)):
+            results[name] = await measure(
+                login, hashed, args.logins, args.concurrency
+            )
+    finally:
+        shutdown_executors()
+
+    columns = list(results["inline"])
+    print(f"{'':<8}" + "".join(f"{column:>13}" for column in columns))
+    for name, row in results.items():
+        print(f"{name:<8}" + "".join(f"{row[column]:>13.1f}" for column in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
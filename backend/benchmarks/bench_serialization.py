@@ -0,0 +1,154 @@
+"""
+Microbenchmark: /books/with-stats-and-courses serialization
+
+Both paths build the response the same way BookService does (one validated
+BookWithStatsAndCoursesResponse per row). They differ in what happens next:
+
+    validated  FastAPI's response_model handling: dump the models, validate
+               the dicts again, then render JSON (FAST_SERIALIZATION off)
+    fast       serialize the models once with pydantic-core (FAST_SERIALIZATION on)
+
+Run from backend/:
+    python -m benchmarks.bench_serialization [--rows 100] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import copy
+import os
+import statistics
+import time
+from typing import List
+from uuid import uuid4
+
+# Settings are required at import time; the benchmark never talks to Supabase
+for _name, _value in {
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "benchmark",
+    "JWT_SECRET_KEY": "benchmark",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_EXPIRATION_MINUTES": "60",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import fastapi.utils  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+from src.Models.Books import BookWithStatsAndCoursesResponse  # noqa: E402
+from src.Services.bookService import BookService  # noqa: E402
+from src.utils.serialization import dump_json  # noqa: E402
+
+RESPONSE_MODEL = List[BookWithStatsAndCoursesResponse]
+
+
+class RowsBroker:
+    """Returns fixed RPC-shaped rows in place of BookBroker"""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+
+    async def SelectAllBooksWithStatsAndCourses(self, skip=0, limit=100, fields=None):
+        # The service mutates the rows it receives
+        return copy.deepcopy(self.rows)
+
+
+def make_rows(count: int) -> list[dict]:
+    """Rows shaped like the get_books_with_stats_and_courses RPC output"""
+    return [
+        {
+            "id": str(uuid4()),
+            "isbn": f"978-0-00-{index:06d}-0",
+            "book_number": f"{index:04d}",
+            "call_number": "QA76.73",
+            "title": f"Book {index}",
+            "author": "Author Name",
+            "faculty": "Engineering",
+            "publisher": "Publisher",
+            "publication_year": 2020,
+            "book_pic_url": None,
+            "created_at": "2024-01-01T10:00:00+00:00",
+            "copy_stats": {
+                "total": 5,
+                "available": 3,
+                "reference": 1,
+                "circulating": 4,
+                "checked_out": 1,
+            },
+            "courses": [
+                {
+                    "course_code": f"CS{course}",
+                    "course_name": "Course",
+                    "faculty": "Engineering",
+                    "term": "Fall",
+                }
+                for course in range(2)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def _response_field():
+    # Renamed from create_response_field in newer FastAPI releases
+    create = getattr(fastapi.utils, "create_model_field", None) or getattr(
+        fastapi.utils, "create_response_field"
+    )
+    return create(name="Response_books", type_=RESPONSE_MODEL, mode="serialization")
+
+
+async def validated(models, field) -> bytes:
+    content = await serialize_response(
+        field=field, response_content=models, exclude_unset=True
+    )
+    if isinstance(content, bytes):
+        return content
+    return JSONResponse(content).body
+
+
+async def fast(models, field) -> bytes:
+    return dump_json(RESPONSE_MODEL, models, exclude_unset=True)
+
+
+async def run(label, serialize, service, field, repeat) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        models = await service.RetrieveBooksWithStatsAndCourses()
+        start = time.perf_counter()
+        await serialize(models, field)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(
+        f"{label:<10} median {statistics.median(timings):7.3f} ms   "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:7.3f} ms"
+    )
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    service = BookService(RowsBroker(make_rows(args.rows)))
+    field = _response_field()
+
+    # Service-side validation is identical for both paths, so time it once
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        await service.RetrieveBooksWithStatsAndCourses()
+    build_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    print(f"{args.rows} rows x {args.repeat} runs")
+    print(f"service    mean   {build_ms:7.3f} ms   (rows -> models, same for both paths)")
+    before = await run("validated", validated, service, field, args.repeat)
+    after = await run("fast", fast, service, field, args.repeat)
+    print(
+        f"speedup    {statistics.median(before) / statistics.median(after):.1f}x "
+        "on serialization"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
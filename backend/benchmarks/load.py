@@ -0,0 +1,362 @@
+"""
+Load test: realistic traffic against the backend on the benchmark stack
+
+Scenarios (each runs for --duration seconds with --users virtual users):
+
+    catalog     students browsing: book lists, search, detail, copy availability
+    dashboard   admins refreshing the dashboard and the pending / overdue queues
+    loan-rush   registration week: students search and request course books
+                while one in ten users is an admin approving the pending queue
+
+Reports p50/p95/p99 latency, throughput and errors per endpoint. With
+--baseline, endpoints whose p95 grew or whose throughput fell by more than
+--tolerance fail the run (exit status 1); --update-baseline records this run
+instead. Baselines only compare runs with the same scale, users and target.
+
+By default the app runs in-process (one event loop, like a single uvicorn
+worker); --url drives an already running server instead.
+
+Run from backend/ with the stack up and seeded (see stack/docker-compose.yml):
+    python -m benchmarks.load [--scenario all] [--users 50] [--duration 30]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from jose import jwt
+
+from .stack import (
+    APP_JWT_ALGORITHM,
+    APP_JWT_SECRET,
+    STACK_URL,
+    configure_environment,
+    service_key,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines.json"
+SEARCH_TERMS = ["Data", "Systems", "Theory", "Design", "Calculus", "Security"]
+
+
+# ==================== RESULTS ====================
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.client_errors = 0
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "errors": self.errors,
+            "client_errors": self.client_errors,
+        }
+
+
+class Recorder:
+    """Latencies per endpoint, keyed by route template (e.g. GET /books/{id})"""
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        url: str,
+        token: str,
+        **kwargs,
+    ) -> Optional[httpx.Response]:
+        method = endpoint.split(" ", 1)[0]
+        stats = self.endpoints.setdefault(endpoint, EndpointStats())
+        headers = {"Authorization": f"Bearer {token}"}
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            return None
+        stats.latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 500:
+            stats.errors += 1
+        elif response.status_code >= 400:
+            # Expected under contention, e.g. a copy requested twice
+            stats.client_errors += 1
+        return response
+
+
+# ==================== SCENARIOS ====================
+
+
+class Fixtures:
+    """Ids sampled from the seeded database"""
+
+    def __init__(self, admins, students, books, copies):
+        self.admins = admins
+        self.students = students
+        self.books = books
+        self.copies = copies
+
+
+def load_fixtures(url: str) -> Fixtures:
+    from supabase import create_client
+
+    client = create_client(url, service_key())
+
+    def ids(query) -> list[str]:
+        return [row["id"] for row in query.execute().data]
+
+    fixtures = Fixtures(
+        admins=ids(client.table("users").select("id").eq("role", "admin")),
+        students=ids(
+            client.table("users").select("id").eq("role", "student").limit(1000)
+        ),
+        books=ids(client.table("books").select("id").limit(2000)),
+        copies=ids(
+            client.table("book_copies")
+            .select("id")
+            .eq("is_reference", False)
+            .eq("status", "available")
+            .limit(5000)
+        ),
+    )
+    if not (fixtures.admins and fixtures.students and fixtures.books):
+        raise SystemExit("The stack has no data; run python -m benchmarks.seed first")
+    return fixtures
+
+
+def make_token(user_id: str, role: str) -> str:
+    expires = datetime.now(timezone.utc) + timedelta(hours=2)
+    return jwt.encode(
+        {"id": user_id, "role": role, "exp": expires},
+        APP_JWT_SECRET,
+        algorithm=APP_JWT_ALGORITHM,
+    )
+
+
+class VirtualUser:
+    def __init__(
+        self,
+        index: int,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        fixtures: Fixtures,
+        role: str,
+    ):
+        self.rng = random.Random(index)
+        self.client = client
+        self.recorder = recorder
+        self.fixtures = fixtures
+        self.role = role
+        pool = fixtures.admins if role == "admin" else fixtures.students
+        self.token = make_token(pool[index % len(pool)], role)
+
+    async def call(self, endpoint: str, url: str, **kwargs):
+        return await self.recorder.request(
+            self.client, endpoint, url, self.token, **kwargs
+        )
+
+
+def search_term(rng: random.Random) -> str:
+    return rng.choice(SEARCH_TERMS)
+
+
+async def catalog(user: VirtualUser) -> None:
+    rng = user.rng
+    book_id = rng.choice(user.fixtures.books)
+    await user.call("GET /books/", f"/books/?skip={rng.randint(0, 500)}&limit=20")
+    await user.call(
+        "GET /books/with-stats", f"/books/with-stats?skip={rng.randint(0, 500)}"
+    )
+    await user.call(
+        "GET /books/with-stats-and-courses",
+        f"/books/with-stats-and-courses?skip={rng.randint(0, 500)}&limit=20",
+    )
+    await user.call("GET /books/search/", f"/books/search/?q={search_term(rng)}")
+    await user.call("GET /books/{id}", f"/books/{book_id}")
+    await user.call("GET /book-copies/book/{id}", f"/book-copies/book/{book_id}")
+
+
+async def dashboard(user: VirtualUser) -> None:
+    await user.call("GET /stats/dashboard", "/stats/dashboard")
+    await user.call("GET /stats/loans", "/stats/loans")
+    await user.call("GET /loans/status/{status}", "/loans/status/pending")
+    await user.call("GET /loans/overdue", "/loans/overdue")
+
+
+async def loan_rush(user: VirtualUser) -> None:
+    rng = user.rng
+    if user.role == "admin":
+        response = await user.call(
+            "GET /loans/status/{status}", "/loans/status/pending?limit=20"
+        )
+        pending = response.json() if response and response.status_code == 200 else []
+        for loan in pending[:5]:
+            await user.call("POST /loans/{id}/approve", f"/loans/{loan['id']}/approve")
+        return
+
+    await user.call("GET /books/search/", f"/books/search/?q={search_term(rng)}")
+    await user.call(
+        "POST /loans/request",
+        f"/loans/request?copy_id={rng.choice(user.fixtures.copies)}",
+    )
+    await user.call("GET /users/me/dashboard", "/users/me/dashboard")
+
+
+# name -> (iteration, role of virtual user n)
+SCENARIOS: dict[str, tuple[Callable[[VirtualUser], Awaitable[None]], Callable]] = {
+    "catalog": (catalog, lambda index: "student"),
+    "dashboard": (dashboard, lambda index: "admin"),
+    "loan-rush": (loan_rush, lambda index: "admin" if index % 10 == 0 else "student"),
+}
+
+
+async def run_scenario(
+    name: str,
+    client: httpx.AsyncClient,
+    fixtures: Fixtures,
+    users: int,
+    duration: float,
+) -> dict:
+    iteration, role_of = SCENARIOS[name]
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(index: int):
+        user = VirtualUser(index, client, recorder, fixtures, role_of(index))
+        while time.perf_counter() < deadline:
+            await iteration(user)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(index) for index in range(users)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        endpoint: stats.summary(elapsed)
+        for endpoint, stats in sorted(recorder.endpoints.items())
+    }
+
+
+# ==================== REPORTING ====================
+
+
+def print_report(name: str, results: dict) -> None:
+    print(f"\n== {name}")
+    print(
+        f"{'endpoint':<36} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'5xx':>5} {'4xx':>5}"
+    )
+    for endpoint, row in results.items():
+        print(
+            f"{endpoint:<36} {row['requests']:>6} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['errors']:>5} {row['client_errors']:>5}"
+        )
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> list[str]:
+    """Regressions of this run against the stored baseline"""
+    regressions = []
+    for endpoint, row in results.items():
+        base = baseline.get(endpoint)
+        if base is None:
+            continue
+        if row["errors"]:
+            regressions.append(f"{endpoint}: {row['errors']} server errors")
+        if row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{endpoint}: p95 {row['p95_ms']:.1f} ms "
+                f"(baseline {base['p95_ms']:.1f} ms)"
+            )
+        if row["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: {row['rps']:.1f} req/s (baseline {base['rps']:.1f})"
+            )
+    return regressions
+
+
+# ==================== MAIN ====================
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--scale", type=float, default=1.0, help="Seeded --scale")
+    parser.add_argument("--stack-url", default=STACK_URL)
+    parser.add_argument("--url", help="Drive a running server instead of in-process")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    configure_environment(args.stack_url)
+    fixtures = load_fixtures(args.stack_url)
+
+    if args.url:
+        transport, base_url, target = None, args.url, "server"
+    else:
+        # Imported after configure_environment(): settings are read on import
+        from src.main import app
+
+        transport, base_url, target = httpx.ASGITransport(app=app), "http://app", "asgi"
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = []
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=60.0
+    ) as client:
+        for name in names:
+            results = await run_scenario(
+                name, client, fixtures, args.users, args.duration
+            )
+            print_report(name, results)
+
+            key = f"{name}|scale={args.scale:g}|users={args.users}|{target}"
+            if args.update_baseline:
+                baselines[key] = results
+            elif key in baselines:
+                regressions += [
+                    f"{name} {line}"
+                    for line in compare(baselines[key], results, args.tolerance)
+                ]
+            else:
+                print(f"(no baseline for {key})")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaselines written to {args.baseline}")
+    elif regressions:
+        print("\nREGRESSIONS")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
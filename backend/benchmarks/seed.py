@@ -0,0 +1,214 @@
+"""
+Seed the benchmark stack with a synthetic catalog, users and loan history
+
+Sizes scale linearly with --scale (1 = a mid-sized university library):
+
+    books 2000, copies ~7000, courses 40, students 2000, staff 100,
+    enrollments ~8000, loans 6000 (history, active, overdue and pending)
+
+Generation is deterministic for a given --seed. Expects a fresh stack
+(docker compose down && up); it refuses to seed a database that has books.
+
+Run from backend/:
+    python -m benchmarks.seed [--scale 1] [--seed 42]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from postgrest.types import ReturnMethod
+from supabase import create_client
+from werkzeug.security import generate_password_hash
+
+from .stack import STACK_URL, service_key
+
+CHUNK_SIZE = 1000
+SEMESTER = "Fall 2026"
+FACULTIES = ["Engineering", "Computer Science", "Business", "Arts", "Medicine"]
+WORDS = [
+    "Data", "Systems", "Introduction", "Advanced", "Theory", "Networks",
+    "Design", "Analysis", "Modern", "Applied", "Principles", "Algorithms",
+    "Economics", "History", "Calculus", "Physics", "Chemistry", "Biology",
+    "Management", "Marketing", "Databases", "Security", "Learning", "Signals",
+]  # fmt: skip
+FIRST_NAMES = ["Omar", "Sara", "Youssef", "Mariam", "Ali", "Nour", "Karim", "Laila"]
+LAST_NAMES = ["Hassan", "Nagy", "Fathy", "Saleh", "Mostafa", "Adel", "Kamal", "Ezz"]
+
+BENCHMARK_PASSWORD = "benchmark"
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat()
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def build_dataset(scale: float, rng: random.Random) -> dict[str, list[dict]]:
+    """Rows per table, in insertion order"""
+    now = datetime.now(timezone.utc)
+    hashed_password = generate_password_hash(BENCHMARK_PASSWORD)
+
+    courses = []
+    for index in range(int(40 * scale)):
+        faculty = FACULTIES[index % len(FACULTIES)]
+        courses.append(
+            {
+                "code": f"C-{faculty[:2].upper()}{100 + index}",
+                "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+                "term": "Fall",
+                "faculty": faculty,
+                "course_loan_days": 90,
+            }
+        )
+
+    def user(index: int, role: str) -> dict:
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return {
+            "id": _uuid(rng),
+            "university_id": f"{21 + index % 5}-{index:06d}",
+            "full_name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}.{index}@eui.edu",
+            "hashed_password": hashed_password,
+            "role": role,
+            "faculty": rng.choice(FACULTIES),
+            "academic_year": rng.randint(1, 5) if role == "student" else None,
+        }
+
+    students = [user(index, "student") for index in range(int(2000 * scale))]
+    staff = [
+        user(len(students) + index, rng.choice(["professor", "ta"]))
+        for index in range(int(100 * scale))
+    ]
+    admins = [user(len(students) + len(staff) + index, "admin") for index in range(5)]
+    users = admins + students + staff
+
+    books = [
+        {
+            "id": _uuid(rng),
+            "isbn": f"978-1-{index:07d}-{index % 10}",
+            "book_number": f"{index:05d}",
+            "call_number": f"QA{rng.randint(1, 999)}.{rng.randint(1, 99)}",
+            "title": " ".join(rng.sample(WORDS, 3)),
+            "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "faculty": rng.choice(FACULTIES),
+            "publisher": "EUI Press",
+            "publication_year": rng.randint(1990, 2026),
+        }
+        for index in range(int(2000 * scale))
+    ]
+
+    copies = []
+    for book in books:
+        for _ in range(rng.randint(1, 6)):
+            copies.append(
+                {
+                    "id": _uuid(rng),
+                    "book_id": book["id"],
+                    "is_reference": rng.random() < 0.2,
+                    "status": "available" if rng.random() < 0.97 else "maintenance",
+                }
+            )
+
+    course_books = []
+    for course in courses:
+        for book in rng.sample(books, min(len(books), rng.randint(5, 15))):
+            course_books.append({"course_code": course["code"], "book_id": book["id"]})
+
+    enrollments = []
+    for student in students:
+        for course in rng.sample(courses, min(len(courses), rng.randint(3, 5))):
+            enrollments.append(
+                {
+                    "student_id": student["id"],
+                    "course_code": course["code"],
+                    "semester": SEMESTER,
+                }
+            )
+
+    # Open loans (pending / pending_pickup / active / overdue) each hold a
+    # distinct circulating copy; history can reuse copies freely
+    circulating = [
+        copy
+        for copy in copies
+        if not copy["is_reference"] and copy["status"] == "available"
+    ]
+    rng.shuffle(circulating)
+    borrowers = students + staff
+    loans = []
+    for index in range(int(6000 * scale)):
+        requested = now - timedelta(days=rng.uniform(0, 365))
+        loan = {
+            "user_id": rng.choice(borrowers)["id"],
+            "request_date": _iso(requested),
+        }
+        if index < len(circulating) // 4:
+            loan["copy_id"] = circulating[index]["id"]
+            loan["status"] = rng.choices(
+                ["pending", "pending_pickup", "active", "overdue"], [2, 1, 6, 1]
+            )[0]
+            if loan["status"] == "pending":
+                loan["request_date"] = _iso(now - timedelta(hours=rng.uniform(0, 72)))
+            else:
+                approved = requested + timedelta(hours=rng.uniform(1, 48))
+                loan["approval_date"] = _iso(approved)
+                due_offset = -rng.uniform(1, 30) if loan["status"] == "overdue" else 14
+                loan["due_date"] = _iso(now + timedelta(days=due_offset))
+        else:
+            loan["copy_id"] = rng.choice(circulating)["id"]
+            loan["status"] = rng.choices(
+                ["returned", "canceled", "rejected"], [8, 1, 1]
+            )[0]
+            if loan["status"] == "returned":
+                approved = requested + timedelta(hours=rng.uniform(1, 48))
+                loan["approval_date"] = _iso(approved)
+                loan["due_date"] = _iso(approved + timedelta(days=14))
+                returned = approved + timedelta(days=rng.uniform(1, 20))
+                loan["return_date"] = _iso(returned)
+        loans.append(loan)
+
+    return {
+        "courses": courses,
+        "users": users,
+        "books": books,
+        "book_copies": copies,
+        "course_books": course_books,
+        "enrollments": enrollments,
+        "loans": loans,
+    }
+
+
+def insert_all(client, table: str, rows: list[dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        client.table(table).insert(
+            rows[start : start + CHUNK_SIZE], returning=ReturnMethod.minimal
+        ).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", default=STACK_URL, help="Stack gateway URL")
+    args = parser.parse_args()
+
+    client = create_client(args.url, service_key())
+    existing = client.table("books").select("id", count="exact").limit(1).execute()
+    if existing.count:
+        raise SystemExit(
+            f"Database already has {existing.count} books; recreate the stack first"
+        )
+
+    dataset = build_dataset(args.scale, random.Random(args.seed))
+    for table, rows in dataset.items():
+        start = time.perf_counter()
+        insert_all(client, table, rows)
+        print(f"{table:<14} {len(rows):>8} rows  {time.perf_counter() - start:6.1f} s")
+
+
+if __name__ == "__main__":
+    main()
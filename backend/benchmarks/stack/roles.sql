@@ -0,0 +1,19 @@
+-- Benchmark-only additions on top of creationDB.sql
+
+-- Columns the brokers read that creationDB.sql predates
+ALTER TABLE books ADD COLUMN IF NOT EXISTS faculty TEXT;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS book_pic_url TEXT;
+
+-- PostgREST roles, mirroring Supabase's anon / service_role split.
+-- The backend authenticates with a service_role JWT, as in production.
+CREATE ROLE anon NOLOGIN;
+CREATE ROLE service_role NOLOGIN;
+CREATE ROLE authenticator LOGIN PASSWORD 'authenticator' NOINHERIT;
+GRANT anon, service_role TO authenticator;
+
+GRANT USAGE ON SCHEMA public TO anon, service_role;
+GRANT ALL ON ALL TABLES IN SCHEMA public TO service_role;
+GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON TABLES TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON SEQUENCES TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT EXECUTE ON FUNCTIONS TO service_role;
@@ -4,7 +4,7 @@ Pytest configuration and fixtures
 import pytest
 import asyncio
 from typing import AsyncGenerator
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import DEFAULT, AsyncMock, MagicMock
 from uuid import uuid4
 from datetime import datetime, timedelta
 
@@ -29,10 +29,29 @@ def mock_supabase_client():
     client.delete = MagicMock(return_value=client)
     client.eq = MagicMock(return_value=client)
     client.range = MagicMock(return_value=client)
-    client.execute = MagicMock()
+    # Each execute() is one round trip, so query budgets work with the mock too
+    client.execute = MagicMock(side_effect=_count_query)
     return client
 
 
+def _count_query(*args, **kwargs):
+    from src.utils.instrumentation import record_query
+
+    record_query(0.0)
+    return DEFAULT
+
+
+# In-memory PostgREST emulator: real filters, joins and constraints, no network
+@pytest.fixture
+def sqlite_client():
+    """Empty SqliteClient (tests/fakes/postgrest_sqlite.py) with the full schema"""
+    from tests.fakes.postgrest_sqlite import SqliteClient
+
+    client = SqliteClient()
+    yield client
+    client.close()
+
+
 # Mock Book Data
 @pytest.fixture
 def sample_book_dict():
@@ -170,3 +189,45 @@ def mock_db_response():
     response = MagicMock()
     response.data = []
     return response
+
+
+# Catalog response cache is process-wide; keep tests isolated from each other
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Clear cached catalog responses before each test"""
+    from src.utils.cache import (
+        get_accession_cache,
+        get_response_cache,
+        get_token_cache,
+        get_user_status_cache,
+    )
+
+    get_response_cache().clear()
+    get_accession_cache().clear()
+    get_token_cache().clear()
+    get_user_status_cache().clear()
+    # Circuit breakers are per process too; a test's failures mustn't trip the next
+    from src.utils.resilience import reset_circuits
+
+    reset_circuits()
+    yield
+
+
+# Query budgets: fail when an endpoint makes more database round trips than expected
+@pytest.fixture
+def assert_max_queries():
+    """
+    Check the X-DB-Queries header of a TestClient response
+
+    Usage: assert_max_queries(client.get("/books/"), 1)
+    """
+
+    def _assert(response, max_queries: int) -> int:
+        queries = int(response.headers["X-DB-Queries"])
+        assert queries <= max_queries, (
+            f"{response.request.method} {response.request.url.path} made "
+            f"{queries} database queries (budget: {max_queries})"
+        )
+        return queries
+
+    return _assert
@@ -12,10 +12,19 @@ class IBookBroker(ABC):
     """Abstract interface for Book database operations"""
 
     @abstractmethod
-    async def SelectAllBooks(self, skip: int = 0, limit: int = 10) -> list[dict]:
+    async def SelectAllBooks(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Retrieve all books with pagination"""
         pass
 
+    @abstractmethod
+    async def SelectBooksPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Retrieve the next page of books after a given id"""
+        pass
+
     @abstractmethod
     async def SelectBookById(self, book_id: UUID) -> Optional[dict]:
         """Retrieve a book by ID"""
@@ -31,6 +40,16 @@ class IBookBroker(ABC):
         """Insert a new book"""
         pass
 
+    @abstractmethod
+    async def InsertBooksBulk(self, books_data: list[dict]) -> list[dict]:
+        """Insert many books, skipping ISBNs that already exist"""
+        pass
+
+    @abstractmethod
+    async def SelectAllIsbns(self, page_size: int = 1000) -> list[str]:
+        """Retrieve every ISBN in the catalog"""
+        pass
+
     @abstractmethod
     async def UpdateBook(self, book_id: UUID, update_data: dict) -> Optional[dict]:
         """Update a book by ID"""
@@ -42,20 +61,22 @@ class IBookBroker(ABC):
         pass
 
     @abstractmethod
-    async def SearchBooks(self, query: str) -> list[dict]:
+    async def SearchBooks(
+        self, query: str, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Search books by title, author, or ISBN"""
         pass
 
     @abstractmethod
     async def SelectAllBooksWithStats(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[list[str]] = None
     ) -> list[dict]:
         """Get all books with copy statistics"""
         pass
 
     @abstractmethod
     async def SelectAllBooksWithStatsAndCourses(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, fields: Optional[list[str]] = None
     ) -> list[dict]:
         """Get all books with copy statistics and associated courses"""
         pass
@@ -64,6 +85,13 @@ class IBookBroker(ABC):
 class IBookCopyBroker(ABC):
     """Abstract interface for BookCopy database operations"""
 
+    @abstractmethod
+    async def SelectCopiesPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Retrieve the next page of copies after a given id"""
+        pass
+
     @abstractmethod
     async def SelectAllCopiesByBookId(self, book_id: UUID) -> list[dict]:
         """Get all copies of a specific book"""
@@ -109,10 +137,19 @@ class IUserBroker(ABC):
     """Abstract interface for User database operations"""
 
     @abstractmethod
-    async def SelectAllUsers(self, skip: int = 0, limit: int = 50) -> list[dict]:
+    async def SelectAllUsers(
+        self, skip: int = 0, limit: int = 50, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Get all users with pagination"""
         pass
 
+    @abstractmethod
+    async def SelectUsersPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of users after a given id"""
+        pass
+
     @abstractmethod
     async def SelectUserById(self, user_id: UUID) -> Optional[dict]:
         """Get a user by ID"""
@@ -144,8 +181,14 @@ class IUserBroker(ABC):
         pass
 
     @abstractmethod
-    async def SearchUsers(self, query: str) -> list[dict]:
-        """Search users by name, email, or university ID"""
+    async def SearchUsers(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[dict] = None,
+        fields: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """Search users by name, email, or university ID (ranked, keyset-paged)"""
         pass
 
     @abstractmethod
@@ -168,10 +211,25 @@ class ILoanBroker(ABC):
     """Abstract interface for Loan database operations"""
 
     @abstractmethod
-    async def SelectAllLoans(self, skip: int = 0, limit: int = 50) -> list[dict]:
+    async def SelectAllLoans(
+        self, skip: int = 0, limit: int = 50, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Get all loans with pagination"""
         pass
 
+    @abstractmethod
+    async def SelectLoansPage(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000,
+        user_id: Optional[UUID] = None,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Get the next page of loans after a given id, with search filters"""
+        pass
+
     @abstractmethod
     async def SelectLoanById(self, loan_id: UUID) -> Optional[dict]:
         """Get a loan by ID"""
@@ -219,12 +277,26 @@ class ILoanBroker(ABC):
         """Count active loans for a user"""
         pass
 
+    @abstractmethod
+    async def DeskReturnCopies(
+        self, accession_numbers: list[int], increment_infractions: bool = False
+    ) -> list[dict]:
+        """Return the open loans of scanned copies in one transaction"""
+        pass
+
+    @abstractmethod
+    async def DeskCheckoutCopies(self, accession_numbers: list[int]) -> list[dict]:
+        """Check out the pending_pickup loans of scanned copies in one transaction"""
+        pass
+
 
 class ICourseBroker(ABC):
     """Abstract interface for Course database operations"""
 
     @abstractmethod
-    async def SelectAllCourses(self, skip: int = 0, limit: int = 50) -> list[dict]:
+    async def SelectAllCourses(
+        self, skip: int = 0, limit: int = 50, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Get all courses with pagination"""
         pass
 
@@ -291,3 +363,34 @@ class IStatsBroker(ABC):
     async def GetUserStats(self) -> dict:
         """Get user-related statistics"""
         pass
+
+
+class IStocktakeBroker(ABC):
+    """Abstract interface for Stocktake database operations"""
+
+    @abstractmethod
+    async def InsertSession(self, session_data: dict) -> dict:
+        """Open a new stocktake session"""
+        pass
+
+    @abstractmethod
+    async def SelectSessionById(self, session_id: UUID) -> Optional[dict]:
+        """Get a stocktake session by ID"""
+        pass
+
+    @abstractmethod
+    async def InsertScanChunk(
+        self, session_id: UUID, accession_numbers: list[int]
+    ) -> None:
+        """Store one chunk of scans as a single array row"""
+        pass
+
+    @abstractmethod
+    async def ReconcileSession(self, session_id: UUID) -> Optional[dict]:
+        """Compare the session's scans with book_copies"""
+        pass
+
+    @abstractmethod
+    async def ApplySession(self, session_id: UUID) -> int:
+        """Apply every proposed status change in one UPDATE"""
+        pass
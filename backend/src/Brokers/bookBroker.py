@@ -1,44 +1,89 @@
-import asyncio
 from typing import Optional
 from uuid import UUID
 
 from supabase import Client
 
+from ..utils.cache import BOOKS, COPIES, COURSES, bump_catalog_version
+from ..utils.executors import CATALOG, to_thread, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import replica_reads
+from ..utils.resilience import is_transient, resilient
 from .IBroker import IBookBroker
 
-
+# Per-endpoint field sets. marc_data is a potentially large JSONB blob,
+# so it is only fetched for the single-book detail view.
+BOOK_DETAIL_COLUMNS = "*"
+BOOK_LIST_COLUMNS = (
+    "id, isbn, book_number, call_number, title, author, faculty, publisher, "
+    "publication_year, book_pic_url, created_at"
+)
+COPY_STATS_COLUMNS = "is_reference, status"
+COURSE_INFO_COLUMNS = "code, name, faculty, term"
+
+
+@workload(CATALOG)
+@replica_reads
+@resilient
+@instrument_broker
 class BookBroker(IBookBroker):
     def __init__(self, client: Client):
         self.client = client
 
-    async def SelectAllBooks(self, skip: int = 0, limit: int = 10) -> list[dict]:
+    async def SelectAllBooks(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        columns = select_columns(fields, BOOK_LIST_COLUMNS)
+
         def _fetch():
             return (
                 self.client.table("books")
-                .select("*")
+                .select(columns)
                 .range(skip, skip + limit - 1)
                 .execute()
             )
 
-        books = await asyncio.to_thread(_fetch)
+        books = await to_thread(_fetch)
         return books.data
 
+    async def SelectBooksPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of books ordered by id (keyset pagination)"""
+
+        def _fetch():
+            query = self.client.table("books").select(BOOK_LIST_COLUMNS)
+            if after_id:
+                query = query.gt("id", after_id)
+            return query.order("id").limit(limit).execute()
+
+        response = await to_thread(_fetch)
+        return response.data if response.data else []
+
     async def SelectBookById(self, book_id: UUID) -> Optional[dict]:
         def _fetch():
             return (
-                self.client.table("books").select("*").eq("id", str(book_id)).execute()
+                self.client.table("books")
+                .select(BOOK_DETAIL_COLUMNS)
+                .eq("id", str(book_id))
+                .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def SelectBookByIsbn(self, isbn: str) -> Optional[dict]:
         """Get a book by ISBN"""
 
         def _fetch():
-            return self.client.table("books").select("*").eq("isbn", isbn).execute()
+            return (
+                self.client.table("books")
+                .select(BOOK_LIST_COLUMNS)
+                .eq("isbn", isbn)
+                .execute()
+            )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         if response.data:
             return response.data[0]
         return None
@@ -47,7 +92,49 @@ class BookBroker(IBookBroker):
         def _insert():
             return self.client.table("books").insert(book_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        inserted = (await to_thread(_insert)).data[0]
+        bump_catalog_version(BOOKS)
+        return inserted
+
+    async def InsertBooksBulk(self, books_data: list[dict]) -> list[dict]:
+        """
+        Insert many books in one request
+
+        Rows whose ISBN already exists are skipped rather than failing the batch;
+        only the rows actually inserted are returned.
+        """
+
+        def _insert():
+            return (
+                self.client.table("books")
+                .upsert(books_data, on_conflict="isbn", ignore_duplicates=True)
+                .execute()
+            )
+
+        response = await to_thread(_insert)
+        bump_catalog_version(BOOKS)
+        return response.data if response.data else []
+
+    async def SelectAllIsbns(self, page_size: int = 1000) -> list[str]:
+        """Get every ISBN in the catalog (paged, ISBN column only)"""
+        isbns: list[str] = []
+        while True:
+            start = len(isbns)
+
+            def _fetch():
+                return (
+                    self.client.table("books")
+                    .select("isbn")
+                    .order("isbn")
+                    .range(start, start + page_size - 1)
+                    .execute()
+                )
+
+            response = await to_thread(_fetch)
+            page = response.data if response.data else []
+            isbns.extend(row["isbn"] for row in page)
+            if len(page) < page_size:
+                return isbns
 
     async def UpdateBook(self, book_id: UUID, update_data: dict) -> Optional[dict]:
         """Update a book by ID"""
@@ -60,7 +147,8 @@ class BookBroker(IBookBroker):
                 .execute()
             )
 
-        response = await asyncio.to_thread(_update)
+        response = await to_thread(_update)
+        bump_catalog_version(BOOKS)
         if response.data:
             return response.data[0]
         return None
@@ -69,17 +157,22 @@ class BookBroker(IBookBroker):
         def _delete():
             return self.client.table("books").delete().eq("id", str(book_id)).execute()
 
-        response = await asyncio.to_thread(_delete)
+        response = await to_thread(_delete)
+        # Deleting a book cascades to its copies and course links
+        bump_catalog_version(BOOKS, COPIES, COURSES)
         return len(response.data) > 0
 
-    async def SearchBooks(self, query: str) -> list[dict]:
+    async def SearchBooks(
+        self, query: str, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Search books by title, author, or ISBN (case-insensitive)"""
+        columns = select_columns(fields, BOOK_LIST_COLUMNS)
 
         def _search():
             # Search in title, author, and ISBN fields
             return (
                 self.client.table("books")
-                .select("*")
+                .select(columns)
                 .or_(
                     f"title.ilike.%{query}%,"
                     f"author.ilike.%{query}%,"
@@ -88,36 +181,44 @@ class BookBroker(IBookBroker):
                 .execute()
             )
 
-        response = await asyncio.to_thread(_search)
+        response = await to_thread(_search)
         return response.data if response.data else []
 
     async def SelectAllBooksWithStats(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[list[str]] = None
     ) -> list[dict]:
         """Get all books with copy statistics in a single query using RPC"""
+        columns = select_columns(fields, BOOK_LIST_COLUMNS)
 
         def _fetch():
             # Use a custom RPC function to get books with stats efficiently
-            return self.client.rpc(
-                "get_books_with_stats", {"offset_param": skip, "limit_param": limit}
-            ).execute()
+            return (
+                self.client.rpc(
+                    "get_books_with_stats",
+                    {"offset_param": skip, "limit_param": limit},
+                )
+                .select(f"{columns}, copy_stats")
+                .execute()
+            )
 
         try:
-            response = await asyncio.to_thread(_fetch)
+            response = await to_thread(_fetch)
             return response.data if response.data else []
-        except Exception:
+        except Exception as exc:
+            if is_transient(exc):
+                raise
             # Fallback: Fetch books and calculate stats manually
-            return await self._fetch_books_with_stats_fallback(skip, limit)
+            return await self._fetch_books_with_stats_fallback(skip, limit, columns)
 
     async def _fetch_books_with_stats_fallback(
-        self, skip: int, limit: int
+        self, skip: int, limit: int, columns: str = BOOK_LIST_COLUMNS
     ) -> list[dict]:
         """Fallback method to calculate stats manually if RPC doesn't exist"""
 
         def _fetch_books():
             return (
                 self.client.table("books")
-                .select("*")
+                .select(columns)
                 .range(skip, skip + limit - 1)
                 .execute()
             )
@@ -125,17 +226,17 @@ class BookBroker(IBookBroker):
         def _fetch_copies(book_id: str):
             return (
                 self.client.table("book_copies")
-                .select("*")
+                .select(COPY_STATS_COLUMNS)
                 .eq("book_id", book_id)
                 .execute()
             )
 
-        books_response = await asyncio.to_thread(_fetch_books)
+        books_response = await to_thread(_fetch_books)
         books = books_response.data if books_response.data else []
 
         result = []
         for book in books:
-            copies_response = await asyncio.to_thread(_fetch_copies, str(book["id"]))
+            copies_response = await to_thread(_fetch_copies, str(book["id"]))
             copies = copies_response.data if copies_response.data else []
 
             total = len(copies)
@@ -164,14 +265,15 @@ class BookBroker(IBookBroker):
         return result
 
     async def SelectAllBooksWithStatsAndCourses(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, fields: Optional[list[str]] = None
     ) -> list[dict]:
         """Get all books with copy statistics and associated courses"""
+        columns = select_columns(fields, BOOK_LIST_COLUMNS)
 
         def _fetch_books():
             return (
                 self.client.table("books")
-                .select("*")
+                .select(columns)
                 .range(skip, skip + limit - 1)
                 .execute()
             )
@@ -179,7 +281,7 @@ class BookBroker(IBookBroker):
         def _fetch_copies(book_id: str):
             return (
                 self.client.table("book_copies")
-                .select("*")
+                .select(COPY_STATS_COLUMNS)
                 .eq("book_id", book_id)
                 .execute()
             )
@@ -195,12 +297,12 @@ class BookBroker(IBookBroker):
         def _fetch_course_info(course_code: str):
             return (
                 self.client.table("courses")
-                .select("*")
+                .select(COURSE_INFO_COLUMNS)
                 .eq("code", course_code)
                 .execute()
             )
 
-        books_response = await asyncio.to_thread(_fetch_books)
+        books_response = await to_thread(_fetch_books)
         books = books_response.data if books_response.data else []
 
         result = []
@@ -208,7 +310,7 @@ class BookBroker(IBookBroker):
             book_id = str(book["id"])
 
             # Fetch copy stats
-            copies_response = await asyncio.to_thread(_fetch_copies, book_id)
+            copies_response = await to_thread(_fetch_copies, book_id)
             copies = copies_response.data if copies_response.data else []
 
             total = len(copies)
@@ -222,9 +324,7 @@ class BookBroker(IBookBroker):
             checked_out = sum(1 for c in copies if c.get("status") == "loaned")
 
             # Fetch associated courses
-            course_books_response = await asyncio.to_thread(
-                _fetch_course_books, book_id
-            )
+            course_books_response = await to_thread(_fetch_course_books, book_id)
             course_books = (
                 course_books_response.data if course_books_response.data else []
             )
@@ -233,9 +333,7 @@ class BookBroker(IBookBroker):
             for cb in course_books:
                 course_code = cb.get("course_code")
                 if course_code:
-                    course_response = await asyncio.to_thread(
-                        _fetch_course_info, course_code
-                    )
+                    course_response = await to_thread(_fetch_course_info, course_code)
                     if course_response.data:
                         course_data = course_response.data[0]
                         courses.append(
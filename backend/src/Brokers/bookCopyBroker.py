@@ -1,28 +1,60 @@
-import asyncio
 from typing import List, Optional
 from uuid import UUID
 
 from supabase import Client
 
+from ..Models.Loans import OPEN_LOAN_STATUSES
+from ..utils.cache import COPIES, bump_catalog_version, get_accession_cache
+from ..utils.executors import CATALOG, to_thread, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import on_primary, replica_reads
+from ..utils.resilience import resilient
+from .bookBroker import BOOK_LIST_COLUMNS
+from .loanBroker import LOAN_COLUMNS
 
+COPY_COLUMNS = "id, book_id, accession_number, is_reference, status, created_at"
+
+
+@workload(CATALOG)
+@replica_reads
+@resilient
+@instrument_broker
 class BookCopyBroker:
     def __init__(self, client: Client):
         self.client = client
 
-    async def SelectAllCopies(self, skip: int = 0, limit: int = 10) -> list[dict]:
+    async def SelectAllCopies(
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
+    ) -> list[dict]:
         """Get all book copies with pagination"""
+        columns = select_columns(fields, COPY_COLUMNS)
 
         def _fetch():
             return (
                 self.client.table("book_copies")
-                .select("*")
+                .select(columns)
                 .range(skip, skip + limit - 1)
                 .execute()
             )
 
-        copies = await asyncio.to_thread(_fetch)
+        copies = await to_thread(_fetch)
         return copies.data
 
+    async def SelectCopiesPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of book copies ordered by id (keyset pagination)"""
+
+        def _fetch():
+            query = self.client.table("book_copies").select(COPY_COLUMNS)
+            if after_id:
+                query = query.gt("id", after_id)
+            return query.order("id").limit(limit).execute()
+
+        response = await to_thread(_fetch)
+        return response.data if response.data else []
+
     async def SelectCopiesByBookId(self, book_id: UUID) -> list[dict]:
         """Get all copies of a specific book"""
 
@@ -34,7 +66,7 @@ class BookCopyBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectCopiesByBookIdWithBorrowerInfo(
@@ -57,7 +89,7 @@ class BookCopyBroker:
 
             return query.execute()
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         if not response.data:
             return []
 
@@ -105,7 +137,7 @@ class BookCopyBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectCopyById(self, copy_id: UUID) -> Optional[dict]:
@@ -119,7 +151,7 @@ class BookCopyBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def SelectCopyByAccessionNumber(
@@ -135,24 +167,101 @@ class BookCopyBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
+    async def SelectCopiesByAccessionNumbers(
+        self, accession_numbers: List[int]
+    ) -> list[dict]:
+        """
+        Get copies for a batch of scanned barcodes in one query
+
+        Each copy comes with its book ("book") and its open loan, if any
+        ("current_loan"). Barcodes in the accession cache are looked up by
+        copy id and only the misses by accession number; a cached id that no
+        longer carries its barcode is dropped and looked up again.
+        """
+        cache = get_accession_cache()
+        cached, missing = cache.split(accession_numbers)
+
+        def _fetch(copy_ids: List[str], numbers: List[int]):
+            request = self.client.table("book_copies").select(
+                f"{COPY_COLUMNS}, books({BOOK_LIST_COLUMNS}), "
+                f"loans!left({LOAN_COLUMNS})"
+            )
+            if copy_ids and numbers:
+                request = request.or_(
+                    f"id.in.({','.join(copy_ids)}),"
+                    f"accession_number.in.({','.join(map(str, numbers))})"
+                )
+            elif copy_ids:
+                request = request.in_("id", copy_ids)
+            else:
+                request = request.in_("accession_number", numbers)
+            return request.in_("loans.status", OPEN_LOAN_STATUSES).execute()
+
+        response = await to_thread(_fetch, list(cached.values()), missing)
+        rows = response.data or []
+        found = {copy["accession_number"] for copy in rows}
+        stale = [number for number in cached if number not in found]
+        if stale:
+            for number in stale:
+                cache.invalidate_copy(cached[number])
+            response = await to_thread(_fetch, [], stale)
+            rows += response.data or []
+
+        requested = set(accession_numbers)
+        copies = []
+        for copy in rows:
+            if copy["accession_number"] not in requested:
+                continue
+            book = copy.pop("books", None)
+            loans = copy.pop("loans", None) or []
+            cache.set(copy["accession_number"], copy["id"])
+            copies.append(
+                {
+                    **copy,
+                    "book": book,
+                    "current_loan": loans[0] if loans else None,
+                }
+            )
+        return copies
+
     async def InsertCopy(self, copy_data: dict) -> dict:
         """Insert a single book copy"""
 
         def _insert():
             return self.client.table("book_copies").insert(copy_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        inserted = (await to_thread(_insert)).data[0]
+        bump_catalog_version(COPIES)
+        return inserted
 
-    async def InsertCopiesBulk(self, copies_data: List[dict]) -> List[dict]:
-        """Insert multiple book copies at once"""
+    # Checked before inserting copies, so a just-added book must not be missed
+    # on a lagging replica
+    @on_primary
+    async def SelectExistingBookIds(self, book_ids: List[str]) -> set[str]:
+        """The given book ids that exist in books"""
+
+        def _fetch():
+            return self.client.table("books").select("id").in_("id", book_ids).execute()
+
+        response = await to_thread(_fetch)
+        return {str(book["id"]) for book in response.data or []}
+
+    async def InsertCopiesBulk(
+        self, copies_data: List[dict], columns: Optional[str] = None
+    ) -> List[dict]:
+        """Insert multiple book copies at once, optionally returning only some columns"""
 
         def _insert():
-            return self.client.table("book_copies").insert(copies_data).execute()
+            query = self.client.table("book_copies").insert(copies_data)
+            if columns:
+                query = query.select(columns)
+            return query.execute()
 
-        result = await asyncio.to_thread(_insert)
+        result = await to_thread(_insert)
+        bump_catalog_version(COPIES)
         return result.data
 
     async def UpdateCopy(self, copy_id: UUID, update_data: dict) -> Optional[dict]:
@@ -166,7 +275,9 @@ class BookCopyBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_update)
+        response = await to_thread(_update)
+        bump_catalog_version(COPIES)
+        get_accession_cache().invalidate_copy(copy_id)
         if response.data:
             return response.data[0]
         return None
@@ -186,7 +297,9 @@ class BookCopyBroker:
                 .execute()
             )
 
-        result = await asyncio.to_thread(_delete)
+        result = await to_thread(_delete)
+        bump_catalog_version(COPIES)
+        get_accession_cache().invalidate_copy(copy_id)
         return len(result.data) > 0
 
     async def CountCopiesByBookId(self, book_id: UUID) -> dict:
@@ -196,12 +309,12 @@ class BookCopyBroker:
             # Fetch copies with their active loans
             return (
                 self.client.table("book_copies")
-                .select("*," "loans!left(id, status)")
+                .select("status, is_reference, loans!left(id, status)")
                 .eq("book_id", str(book_id))
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch_all)
+        response = await to_thread(_fetch_all)
         copies = response.data if response.data else []
 
         total = len(copies)
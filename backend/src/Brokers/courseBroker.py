@@ -1,28 +1,43 @@
-import asyncio
 from typing import Optional
 from uuid import UUID
 
 from supabase import Client
 
+from ..utils.cache import COURSES, bump_catalog_version
+from ..utils.executors import CATALOG, to_thread, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import replica_reads
+from ..utils.resilience import resilient
 
+COURSE_COLUMNS = "code, name, term, faculty, course_loan_days"
+
+
+@workload(CATALOG)
+@replica_reads
+@resilient
+@instrument_broker
 class CourseBroker:
     def __init__(self, client: Client):
         self.client = client
 
     # ==================== COURSES ====================
 
-    async def SelectAllCourses(self, skip: int = 0, limit: int = 10) -> list[dict]:
+    async def SelectAllCourses(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Get all courses with pagination"""
+        columns = select_columns(fields, COURSE_COLUMNS)
 
         def _fetch():
             return (
                 self.client.table("courses")
-                .select("*")
+                .select(columns)
                 .range(skip, skip + limit - 1)
                 .execute()
             )
 
-        courses = await asyncio.to_thread(_fetch)
+        courses = await to_thread(_fetch)
         return courses.data
 
     async def SelectCourseByCode(self, code: str) -> Optional[dict]:
@@ -31,7 +46,7 @@ class CourseBroker:
         def _fetch():
             return self.client.table("courses").select("*").eq("code", code).execute()
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def SelectCoursesByFaculty(self, faculty: str) -> list[dict]:
@@ -45,7 +60,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def InsertCourse(self, course_data: dict) -> dict:
@@ -54,7 +69,9 @@ class CourseBroker:
         def _insert():
             return self.client.table("courses").insert(course_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        inserted = (await to_thread(_insert)).data[0]
+        bump_catalog_version(COURSES)
+        return inserted
 
     async def UpdateCourse(self, code: str, update_data: dict) -> Optional[dict]:
         """Update a course by code"""
@@ -67,7 +84,8 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_update)
+        response = await to_thread(_update)
+        bump_catalog_version(COURSES)
         if response.data:
             return response.data[0]
         return None
@@ -78,7 +96,8 @@ class CourseBroker:
         def _delete():
             return self.client.table("courses").delete().eq("code", code).execute()
 
-        result = await asyncio.to_thread(_delete)
+        result = await to_thread(_delete)
+        bump_catalog_version(COURSES)
         return len(result.data) > 0
 
     # ==================== ENROLLMENTS ====================
@@ -94,7 +113,7 @@ class CourseBroker:
                 .execute()
             )
 
-        enrollments = await asyncio.to_thread(_fetch)
+        enrollments = await to_thread(_fetch)
         return enrollments.data
 
     async def SelectEnrollmentById(self, enrollment_id: UUID) -> Optional[dict]:
@@ -108,7 +127,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def SelectEnrollmentsByStudent(self, student_id: UUID) -> list[dict]:
@@ -122,7 +141,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectEnrollmentsByCourse(self, course_code: str) -> list[dict]:
@@ -136,7 +155,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def CheckEnrollmentExists(self, student_id: UUID, course_code: str) -> bool:
@@ -151,7 +170,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return len(response.data) > 0
 
     async def InsertEnrollment(self, enrollment_data: dict) -> dict:
@@ -160,7 +179,7 @@ class CourseBroker:
         def _insert():
             return self.client.table("enrollments").insert(enrollment_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        return (await to_thread(_insert)).data[0]
 
     async def DeleteEnrollment(self, enrollment_id: UUID) -> bool:
         """Delete an enrollment"""
@@ -173,7 +192,7 @@ class CourseBroker:
                 .execute()
             )
 
-        result = await asyncio.to_thread(_delete)
+        result = await to_thread(_delete)
         return len(result.data) > 0
 
     async def DeleteEnrollmentByStudentCourse(
@@ -190,7 +209,7 @@ class CourseBroker:
                 .execute()
             )
 
-        result = await asyncio.to_thread(_delete)
+        result = await to_thread(_delete)
         return len(result.data) > 0
 
     # ==================== COURSE BOOKS ====================
@@ -206,7 +225,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectCoursesByBook(self, book_id: UUID) -> list[dict]:
@@ -220,7 +239,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def CheckCourseBookExists(self, course_code: str, book_id: UUID) -> bool:
@@ -235,7 +254,7 @@ class CourseBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return len(response.data) > 0
 
     async def InsertCourseBook(self, course_book_data: dict) -> dict:
@@ -244,7 +263,9 @@ class CourseBroker:
         def _insert():
             return self.client.table("course_books").insert(course_book_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        inserted = (await to_thread(_insert)).data[0]
+        bump_catalog_version(COURSES)
+        return inserted
 
     async def DeleteCourseBook(self, course_code: str, book_id: UUID) -> bool:
         """Remove book from course"""
@@ -258,5 +279,6 @@ class CourseBroker:
                 .execute()
             )
 
-        result = await asyncio.to_thread(_delete)
+        result = await to_thread(_delete)
+        bump_catalog_version(COURSES)
         return len(result.data) > 0
@@ -1,31 +1,87 @@
-import asyncio
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
 from supabase import Client
 
-
+from ..utils.cache import COPIES, LOAN_POLICIES, bump_catalog_version
+from ..utils.executors import CIRCULATION, to_thread, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import replica_reads
+from ..utils.resilience import resilient
+
+LOAN_COLUMNS = (
+    "id, user_id, copy_id, status, request_date, approval_date, due_date, return_date"
+)
+
+
+def _apply_search_filters(query, user_id, status, from_date, to_date):
+    """Apply the loan search filters shared by SearchLoans and exports"""
+    if user_id:
+        query = query.eq("user_id", str(user_id))
+    if status:
+        query = query.eq("status", status)
+    if from_date:
+        query = query.gte("request_date", from_date)
+    if to_date:
+        query = query.lte("request_date", to_date)
+    return query
+
+
+@workload(CIRCULATION)
+@replica_reads
+@resilient
+@instrument_broker
 class LoanBroker:
     def __init__(self, client: Client):
         self.client = client
 
     # ==================== LOANS ====================
 
-    async def SelectAllLoans(self, skip: int = 0, limit: int = 10) -> list[dict]:
+    async def SelectAllLoans(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
         """Get all loans with pagination"""
+        columns = select_columns(fields, LOAN_COLUMNS)
 
         def _fetch():
             return (
                 self.client.table("loans")
-                .select("*")
+                .select(columns)
                 .range(skip, skip + limit - 1)
                 .execute()
             )
 
-        loans = await asyncio.to_thread(_fetch)
+        loans = await to_thread(_fetch)
         return loans.data
 
+    async def SelectLoansPage(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000,
+        user_id: Optional[UUID] = None,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Get the next page of loans ordered by id, with the SearchLoans filters"""
+
+        def _fetch():
+            query = _apply_search_filters(
+                self.client.table("loans").select(LOAN_COLUMNS),
+                user_id,
+                status,
+                from_date,
+                to_date,
+            )
+            if after_id:
+                query = query.gt("id", after_id)
+            return query.order("id").limit(limit).execute()
+
+        response = await to_thread(_fetch)
+        return response.data if response.data else []
+
     async def SelectLoanById(self, loan_id: UUID) -> Optional[dict]:
         """Get a specific loan by ID"""
 
@@ -34,7 +90,7 @@ class LoanBroker:
                 self.client.table("loans").select("*").eq("id", str(loan_id)).execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def SelectLoansByUser(
@@ -48,7 +104,7 @@ class LoanBroker:
                 query = query.eq("status", status)
             return query.execute()
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectLoansByUserWithBookInfo(
@@ -72,7 +128,7 @@ class LoanBroker:
                 query = query.eq("status", status)
             return query.order("request_date", desc=True).execute()
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         if not response.data:
             return []
 
@@ -113,7 +169,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectLoansByStatus(
@@ -130,7 +186,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def SelectLoansByStatusWithBookInfo(
@@ -156,7 +212,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         if not response.data:
             return []
 
@@ -198,7 +254,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def CheckUserHasCopyOnLoan(self, user_id: UUID, copy_id: UUID) -> bool:
@@ -214,7 +270,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return len(response.data) > 0
 
     async def SelectOverdueLoans(self) -> list[dict]:
@@ -230,7 +286,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def InsertLoan(self, loan_data: dict) -> dict:
@@ -239,7 +295,7 @@ class LoanBroker:
         def _insert():
             return self.client.table("loans").insert(loan_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        return (await to_thread(_insert)).data[0]
 
     async def UpdateLoan(self, loan_id: UUID, update_data: dict) -> Optional[dict]:
         """Update a loan by ID"""
@@ -252,7 +308,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_update)
+        response = await to_thread(_update)
         if response.data:
             return response.data[0]
         return None
@@ -263,9 +319,40 @@ class LoanBroker:
         def _delete():
             return self.client.table("loans").delete().eq("id", str(loan_id)).execute()
 
-        result = await asyncio.to_thread(_delete)
+        result = await to_thread(_delete)
         return len(result.data) > 0
 
+    # ==================== DESK CIRCULATION ====================
+
+    async def DeskReturnCopies(
+        self, accession_numbers: list[int], increment_infractions: bool = False
+    ) -> list[dict]:
+        """Return the open loans of scanned copies in one transaction (RPC)"""
+
+        def _update():
+            return self.client.rpc(
+                "desk_return_copies",
+                {
+                    "accession_numbers": accession_numbers,
+                    "increment_infractions": increment_infractions,
+                },
+            ).execute()
+
+        response = await to_thread(_update)
+        bump_catalog_version(COPIES)
+        return response.data if response.data else []
+
+    async def DeskCheckoutCopies(self, accession_numbers: list[int]) -> list[dict]:
+        """Check out the pending_pickup loans of scanned copies in one transaction (RPC)"""
+
+        def _update():
+            return self.client.rpc(
+                "desk_checkout_copies", {"accession_numbers": accession_numbers}
+            ).execute()
+
+        response = await to_thread(_update)
+        return response.data if response.data else []
+
     # ==================== LOAN POLICIES ====================
 
     async def SelectLoanPolicy(self, role: str) -> Optional[dict]:
@@ -279,7 +366,7 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def SelectAllLoanPolicies(self) -> list[dict]:
@@ -288,7 +375,7 @@ class LoanBroker:
         def _fetch():
             return self.client.table("loan_policies").select("*").execute()
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data if response.data else []
 
     async def UpdateLoanPolicy(self, role: str, update_data: dict) -> Optional[dict]:
@@ -302,7 +389,8 @@ class LoanBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_update)
+        response = await to_thread(_update)
+        bump_catalog_version(LOAN_POLICIES)
         return response.data[0] if response.data else None
 
     async def SearchLoans(
@@ -316,17 +404,9 @@ class LoanBroker:
 
         def _search():
             query = self.client.table("loans").select("*")
+            return _apply_search_filters(
+                query, user_id, status, from_date, to_date
+            ).execute()
 
-            if user_id:
-                query = query.eq("user_id", str(user_id))
-            if status:
-                query = query.eq("status", status)
-            if from_date:
-                query = query.gte("request_date", from_date)
-            if to_date:
-                query = query.lte("request_date", to_date)
-
-            return query.execute()
-
-        response = await asyncio.to_thread(_search)
+        response = await to_thread(_search)
         return response.data if response.data else []
@@ -0,0 +1,149 @@
+from typing import Optional
+from uuid import UUID
+
+from ..utils.cache import BOOKS, COPIES, COURSES, bump_catalog_version
+from ..utils.database import Database, column_list, insert_rows, update_rows
+from ..utils.executors import CATALOG, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import replica_reads
+from ..utils.resilience import resilient
+from .bookBroker import BOOK_DETAIL_COLUMNS, BOOK_LIST_COLUMNS
+from .IBroker import IBookBroker
+
+# Same keys as the get_books_with_stats RPC's copy_stats
+COPY_STATS_SQL = """
+    jsonb_build_object(
+        'total', count(bc.id)::int,
+        'available', count(bc.id) FILTER (
+            WHERE NOT bc.is_reference AND bc.status = 'available')::int,
+        'reference', count(bc.id) FILTER (WHERE bc.is_reference)::int,
+        'circulating', count(bc.id) FILTER (WHERE NOT bc.is_reference)::int,
+        'checked_out', count(bc.id) FILTER (WHERE bc.status::text = 'loaned')::int
+    )
+"""
+
+
+@workload(CATALOG)
+@replica_reads
+@resilient
+@instrument_broker
+class PgBookBroker(IBookBroker):
+    """BookBroker over asyncpg (DATABASE_BACKEND=postgres)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def SelectAllBooks(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        columns = column_list(select_columns(fields, BOOK_LIST_COLUMNS))
+        return await self.db.fetch(
+            f"SELECT {columns} FROM books OFFSET $1 LIMIT $2",  # nosec B608 - fields_query allowlist, ident()-quoted
+            skip,
+            limit,
+        )
+
+    async def SelectBooksPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of books ordered by id (keyset pagination)"""
+        return await self.db.fetch(
+            f"SELECT {column_list(BOOK_LIST_COLUMNS)} FROM books "  # nosec B608 - constant columns, ident()-quoted
+            "WHERE $1::uuid IS NULL OR id > $1::uuid ORDER BY id LIMIT $2",
+            after_id,
+            limit,
+        )
+
+    async def SelectBookById(self, book_id: UUID) -> Optional[dict]:
+        return await self.db.fetchrow(
+            f"SELECT {column_list(BOOK_DETAIL_COLUMNS)} FROM books"  # nosec B608 - constant columns, ident()-quoted
+            " WHERE id = $1",
+            str(book_id),
+        )
+
+    async def SelectBookByIsbn(self, isbn: str) -> Optional[dict]:
+        """Get a book by ISBN"""
+        return await self.db.fetchrow(
+            f"SELECT {column_list(BOOK_LIST_COLUMNS)} FROM books"  # nosec B608 - constant columns, ident()-quoted
+            " WHERE isbn = $1",
+            isbn,
+        )
+
+    async def InsertBook(self, book_data: dict) -> dict:
+        inserted = (await insert_rows(self.db, "books", [book_data]))[0]
+        bump_catalog_version(BOOKS)
+        return inserted
+
+    async def InsertBooksBulk(self, books_data: list[dict]) -> list[dict]:
+        """
+        Insert many books in one statement
+
+        Rows whose ISBN already exists are skipped rather than failing the batch;
+        only the rows actually inserted are returned.
+        """
+        inserted = await insert_rows(self.db, "books", books_data, on_conflict="isbn")
+        bump_catalog_version(BOOKS)
+        return inserted
+
+    async def SelectAllIsbns(self, page_size: int = 1000) -> list[str]:
+        """Get every ISBN in the catalog (one query; rows stream off the pool)"""
+        rows = await self.db.fetch("SELECT isbn FROM books ORDER BY isbn")
+        return [row["isbn"] for row in rows]
+
+    async def UpdateBook(self, book_id: UUID, update_data: dict) -> Optional[dict]:
+        """Update a book by ID"""
+        rows = await update_rows(self.db, "books", update_data, "id = $2", str(book_id))
+        bump_catalog_version(BOOKS)
+        return rows[0] if rows else None
+
+    async def DeleteBook(self, book_id: UUID) -> bool:
+        deleted = await self.db.fetch(
+            "DELETE FROM books WHERE id = $1 RETURNING id", str(book_id)
+        )
+        # Deleting a book cascades to its copies and course links
+        bump_catalog_version(BOOKS, COPIES, COURSES)
+        return len(deleted) > 0
+
+    async def SearchBooks(
+        self, query: str, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Search books by title, author, or ISBN (case-insensitive)"""
+        columns = column_list(select_columns(fields, BOOK_LIST_COLUMNS))
+        return await self.db.fetch(
+            f"SELECT {columns} FROM books "  # nosec B608 - fields_query allowlist, ident()-quoted
+            "WHERE title ILIKE $1 OR author ILIKE $1 OR isbn ILIKE $1",
+            f"%{query}%",
+        )
+
+    async def SelectAllBooksWithStats(
+        self, skip: int = 0, limit: int = 50, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Get a page of books with copy statistics in one grouped query"""
+        columns = column_list(select_columns(fields, BOOK_LIST_COLUMNS), alias="b")
+        return await self.db.fetch(
+            f"SELECT {columns}, {COPY_STATS_SQL} AS copy_stats "  # nosec B608 - fields_query allowlist, ident()-quoted
+            "FROM books b LEFT JOIN book_copies bc ON bc.book_id = b.id "
+            "GROUP BY b.id ORDER BY b.created_at DESC OFFSET $1 LIMIT $2",
+            skip,
+            limit,
+        )
+
+    async def SelectAllBooksWithStatsAndCourses(
+        self, skip: int = 0, limit: int = 100, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Get a page of books with copy statistics and courses in one query"""
+        columns = column_list(select_columns(fields, BOOK_LIST_COLUMNS), alias="b")
+        return await self.db.fetch(
+            f"SELECT {columns}, "  # nosec B608 - fields_query allowlist, ident()-quoted
+            f"(SELECT {COPY_STATS_SQL} FROM book_copies bc "
+            " WHERE bc.book_id = b.id) AS copy_stats, "
+            "(SELECT coalesce(jsonb_agg(jsonb_build_object("
+            "   'course_code', c.code, 'course_name', c.name,"
+            "   'faculty', c.faculty, 'term', c.term)), '[]'::jsonb)"
+            " FROM course_books cb JOIN courses c ON c.code = cb.course_code"
+            " WHERE cb.book_id = b.id) AS courses "
+            "FROM books b OFFSET $1 LIMIT $2",
+            skip,
+            limit,
+        )
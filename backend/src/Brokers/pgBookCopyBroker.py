@@ -0,0 +1,204 @@
+from typing import List, Optional
+from uuid import UUID
+
+from ..Models.Loans import OPEN_LOAN_STATUSES
+from ..utils.cache import COPIES, bump_catalog_version, get_accession_cache
+from ..utils.database import Database, column_list, insert_rows, update_rows
+from ..utils.executors import CATALOG, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import on_primary, replica_reads
+from ..utils.resilience import resilient
+from .bookBroker import BOOK_LIST_COLUMNS
+from .bookCopyBroker import COPY_COLUMNS
+from .loanBroker import LOAN_COLUMNS
+
+
+@workload(CATALOG)
+@replica_reads
+@resilient
+@instrument_broker
+class PgBookCopyBroker:
+    """BookCopyBroker over asyncpg (DATABASE_BACKEND=postgres)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def SelectAllCopies(
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
+    ) -> list[dict]:
+        """Get all book copies with pagination"""
+        columns = column_list(select_columns(fields, COPY_COLUMNS))
+        return await self.db.fetch(
+            f"SELECT {columns} FROM book_copies"  # nosec B608 - fields_query allowlist, ident()-quoted
+            " OFFSET $1 LIMIT $2",
+            skip,
+            limit,
+        )
+
+    async def SelectCopiesPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of book copies ordered by id (keyset pagination)"""
+        return await self.db.fetch(
+            f"SELECT {column_list(COPY_COLUMNS)} FROM book_copies "  # nosec B608 - constant columns, ident()-quoted
+            "WHERE $1::uuid IS NULL OR id > $1::uuid ORDER BY id LIMIT $2",
+            after_id,
+            limit,
+        )
+
+    async def SelectCopiesByBookId(self, book_id: UUID) -> list[dict]:
+        """Get all copies of a specific book"""
+        return await self.db.fetch(
+            "SELECT * FROM book_copies WHERE book_id = $1", str(book_id)
+        )
+
+    async def SelectCopiesByBookIdWithBorrowerInfo(
+        self, book_id: UUID, available_only: bool = False
+    ) -> list[dict]:
+        """Get copies with borrower information"""
+        return await self.db.fetch(
+            "SELECT bc.*,"
+            " u.full_name AS current_borrower_name,"
+            " u.university_id AS current_borrower_id,"
+            " active.id AS current_loan_id "
+            "FROM book_copies bc"
+            " LEFT JOIN LATERAL ("
+            "   SELECT l.id, l.user_id FROM loans l"
+            "   WHERE l.copy_id = bc.id AND l.status = 'active' LIMIT 1"
+            " ) active ON true"
+            " LEFT JOIN users u ON u.id = active.user_id "
+            "WHERE bc.book_id = $1"
+            " AND (NOT $2 OR (NOT bc.is_reference AND bc.status = 'available'))",
+            str(book_id),
+            available_only,
+        )
+
+    async def SelectAvailableCopiesByBookId(self, book_id: UUID) -> list[dict]:
+        """Get all available copies of a specific book"""
+        return await self.db.fetch(
+            "SELECT * FROM book_copies WHERE book_id = $1 AND status = 'available'",
+            str(book_id),
+        )
+
+    async def SelectCopyById(self, copy_id: UUID) -> Optional[dict]:
+        """Get a specific copy by ID"""
+        return await self.db.fetchrow(
+            "SELECT * FROM book_copies WHERE id = $1", str(copy_id)
+        )
+
+    async def SelectCopyByAccessionNumber(
+        self, accession_number: int
+    ) -> Optional[dict]:
+        """Get a copy by its barcode/accession number"""
+        return await self.db.fetchrow(
+            "SELECT * FROM book_copies WHERE accession_number = $1", accession_number
+        )
+
+    async def SelectCopiesByAccessionNumbers(
+        self, accession_numbers: List[int]
+    ) -> list[dict]:
+        """
+        Get copies for a batch of scanned barcodes in one query
+
+        Each copy comes with its book ("book") and its open loan, if any
+        ("current_loan"). Barcodes in the accession cache are looked up by
+        copy id and only the misses by accession number; a cached id that no
+        longer carries its barcode is dropped and looked up again.
+        """
+        cache = get_accession_cache()
+        cached, missing = cache.split(accession_numbers)
+
+        async def _fetch(copy_ids: List[str], numbers: List[int]) -> list[dict]:
+            return await self.db.fetch(
+                f"SELECT {column_list(COPY_COLUMNS, alias='bc')},"  # nosec B608 - constant columns, ident()-quoted
+                " to_jsonb(b) AS book, to_jsonb(open_loan) AS current_loan "
+                "FROM book_copies bc"
+                f" LEFT JOIN LATERAL (SELECT {column_list(BOOK_LIST_COLUMNS)}"
+                "   FROM books WHERE books.id = bc.book_id) b ON true"
+                f" LEFT JOIN LATERAL (SELECT {column_list(LOAN_COLUMNS)}"
+                "   FROM loans WHERE loans.copy_id = bc.id"
+                "   AND loans.status = ANY($3::loan_status[]) LIMIT 1)"
+                " open_loan ON true "
+                "WHERE (bc.id = ANY($1::uuid[])"
+                " OR bc.accession_number = ANY($2::bigint[]))"
+                " AND bc.accession_number = ANY($4::bigint[])",
+                copy_ids,
+                numbers,
+                OPEN_LOAN_STATUSES,
+                accession_numbers,
+            )
+
+        copies = await _fetch(list(cached.values()), missing)
+        found = {copy["accession_number"] for copy in copies}
+        stale = [number for number in cached if number not in found]
+        if stale:
+            for number in stale:
+                cache.invalidate_copy(cached[number])
+            copies += await _fetch([], stale)
+
+        for copy in copies:
+            cache.set(copy["accession_number"], str(copy["id"]))
+        return copies
+
+    async def InsertCopy(self, copy_data: dict) -> dict:
+        """Insert a single book copy"""
+        inserted = (await insert_rows(self.db, "book_copies", [copy_data]))[0]
+        bump_catalog_version(COPIES)
+        return inserted
+
+    # Checked before inserting copies, so a just-added book must not be missed
+    # on a lagging replica
+    @on_primary
+    async def SelectExistingBookIds(self, book_ids: List[str]) -> set[str]:
+        """The given book ids that exist in books"""
+        rows = await self.db.fetch(
+            "SELECT id FROM books WHERE id = ANY($1::uuid[])", book_ids
+        )
+        return {str(row["id"]) for row in rows}
+
+    async def InsertCopiesBulk(
+        self, copies_data: List[dict], columns: Optional[str] = None
+    ) -> List[dict]:
+        """Insert multiple book copies at once, optionally returning only some columns"""
+        returning = column_list(columns) if columns else "*"
+        inserted = await insert_rows(
+            self.db, "book_copies", copies_data, returning=returning
+        )
+        bump_catalog_version(COPIES)
+        return inserted
+
+    async def UpdateCopy(self, copy_id: UUID, update_data: dict) -> Optional[dict]:
+        """Update a book copy by ID"""
+        rows = await update_rows(
+            self.db, "book_copies", update_data, "id = $2", str(copy_id)
+        )
+        bump_catalog_version(COPIES)
+        get_accession_cache().invalidate_copy(copy_id)
+        return rows[0] if rows else None
+
+    async def UpdateCopyStatus(self, copy_id: UUID, status: str) -> Optional[dict]:
+        """Update a book copy's status"""
+        return await self.UpdateCopy(copy_id, {"status": status})
+
+    async def DeleteCopy(self, copy_id: UUID) -> bool:
+        """Delete a book copy"""
+        deleted = await self.db.fetch(
+            "DELETE FROM book_copies WHERE id = $1 RETURNING id", str(copy_id)
+        )
+        bump_catalog_version(COPIES)
+        get_accession_cache().invalidate_copy(copy_id)
+        return len(deleted) > 0
+
+    async def CountCopiesByBookId(self, book_id: UUID) -> dict:
+        """Count total, available, and reference copies for a book"""
+        counts = await self.db.fetchrow(
+            "SELECT count(*)::int AS total,"
+            " count(*) FILTER (WHERE bc.status = 'available' AND NOT EXISTS ("
+            "   SELECT 1 FROM loans l WHERE l.copy_id = bc.id"
+            "   AND l.status IN ('active', 'pending_pickup')))::int AS available,"
+            " count(*) FILTER (WHERE bc.is_reference)::int AS reference "
+            "FROM book_copies bc WHERE bc.book_id = $1",
+            str(book_id),
+        )
+        return {**counts, "circulating": counts["total"] - counts["reference"]}
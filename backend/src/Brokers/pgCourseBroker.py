@@ -0,0 +1,161 @@
+from typing import Optional
+from uuid import UUID
+
+from ..utils.cache import COURSES, bump_catalog_version
+from ..utils.database import Database, column_list, insert_rows, update_rows
+from ..utils.executors import CATALOG, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import replica_reads
+from ..utils.resilience import resilient
+from .courseBroker import COURSE_COLUMNS
+
+
+@workload(CATALOG)
+@replica_reads
+@resilient
+@instrument_broker
+class PgCourseBroker:
+    """CourseBroker over asyncpg (DATABASE_BACKEND=postgres)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    # ==================== COURSES ====================
+
+    async def SelectAllCourses(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Get all courses with pagination"""
+        columns = column_list(select_columns(fields, COURSE_COLUMNS))
+        return await self.db.fetch(
+            f"SELECT {columns} FROM courses OFFSET $1 LIMIT $2",  # nosec B608 - fields_query allowlist, ident()-quoted
+            skip,
+            limit,
+        )
+
+    async def SelectCourseByCode(self, code: str) -> Optional[dict]:
+        """Get a course by its code (primary key)"""
+        return await self.db.fetchrow("SELECT * FROM courses WHERE code = $1", code)
+
+    async def SelectCoursesByFaculty(self, faculty: str) -> list[dict]:
+        """Get all courses for a specific faculty"""
+        return await self.db.fetch("SELECT * FROM courses WHERE faculty = $1", faculty)
+
+    async def InsertCourse(self, course_data: dict) -> dict:
+        """Insert a new course"""
+        inserted = (await insert_rows(self.db, "courses", [course_data]))[0]
+        bump_catalog_version(COURSES)
+        return inserted
+
+    async def UpdateCourse(self, code: str, update_data: dict) -> Optional[dict]:
+        """Update a course by code"""
+        rows = await update_rows(self.db, "courses", update_data, "code = $2", code)
+        bump_catalog_version(COURSES)
+        return rows[0] if rows else None
+
+    async def DeleteCourse(self, code: str) -> bool:
+        """Delete a course"""
+        deleted = await self.db.fetch(
+            "DELETE FROM courses WHERE code = $1 RETURNING code", code
+        )
+        bump_catalog_version(COURSES)
+        return len(deleted) > 0
+
+    # ==================== ENROLLMENTS ====================
+
+    async def SelectAllEnrollments(self, skip: int = 0, limit: int = 10) -> list[dict]:
+        """Get all enrollments with pagination"""
+        return await self.db.fetch(
+            "SELECT * FROM enrollments OFFSET $1 LIMIT $2", skip, limit
+        )
+
+    async def SelectEnrollmentById(self, enrollment_id: UUID) -> Optional[dict]:
+        """Get an enrollment by ID"""
+        return await self.db.fetchrow(
+            "SELECT * FROM enrollments WHERE id = $1", str(enrollment_id)
+        )
+
+    async def SelectEnrollmentsByStudent(self, student_id: UUID) -> list[dict]:
+        """Get all enrollments for a specific student"""
+        return await self.db.fetch(
+            "SELECT * FROM enrollments WHERE student_id = $1", str(student_id)
+        )
+
+    async def SelectEnrollmentsByCourse(self, course_code: str) -> list[dict]:
+        """Get all enrollments for a specific course"""
+        return await self.db.fetch(
+            "SELECT * FROM enrollments WHERE course_code = $1", course_code
+        )
+
+    async def CheckEnrollmentExists(self, student_id: UUID, course_code: str) -> bool:
+        """Check if a student is enrolled in a course"""
+        return await self.db.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM enrollments "
+            "WHERE student_id = $1 AND course_code = $2)",
+            str(student_id),
+            course_code,
+        )
+
+    async def InsertEnrollment(self, enrollment_data: dict) -> dict:
+        """Insert a new enrollment"""
+        return (await insert_rows(self.db, "enrollments", [enrollment_data]))[0]
+
+    async def DeleteEnrollment(self, enrollment_id: UUID) -> bool:
+        """Delete an enrollment"""
+        deleted = await self.db.fetch(
+            "DELETE FROM enrollments WHERE id = $1 RETURNING id", str(enrollment_id)
+        )
+        return len(deleted) > 0
+
+    async def DeleteEnrollmentByStudentCourse(
+        self, student_id: UUID, course_code: str
+    ) -> bool:
+        """Delete enrollment by student and course"""
+        deleted = await self.db.fetch(
+            "DELETE FROM enrollments WHERE student_id = $1 AND course_code = $2 "
+            "RETURNING id",
+            str(student_id),
+            course_code,
+        )
+        return len(deleted) > 0
+
+    # ==================== COURSE BOOKS ====================
+
+    async def SelectBooksByCourse(self, course_code: str) -> list[dict]:
+        """Get all books for a specific course"""
+        return await self.db.fetch(
+            "SELECT * FROM course_books WHERE course_code = $1", course_code
+        )
+
+    async def SelectCoursesByBook(self, book_id: UUID) -> list[dict]:
+        """Get all courses that require a specific book"""
+        return await self.db.fetch(
+            "SELECT * FROM course_books WHERE book_id = $1", str(book_id)
+        )
+
+    async def CheckCourseBookExists(self, course_code: str, book_id: UUID) -> bool:
+        """Check if a book is already associated with a course"""
+        return await self.db.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM course_books "
+            "WHERE course_code = $1 AND book_id = $2)",
+            course_code,
+            str(book_id),
+        )
+
+    async def InsertCourseBook(self, course_book_data: dict) -> dict:
+        """Associate a book with a course"""
+        inserted = (await insert_rows(self.db, "course_books", [course_book_data]))[0]
+        bump_catalog_version(COURSES)
+        return inserted
+
+    async def DeleteCourseBook(self, course_code: str, book_id: UUID) -> bool:
+        """Remove book from course"""
+        deleted = await self.db.fetch(
+            "DELETE FROM course_books WHERE course_code = $1 AND book_id = $2 "
+            "RETURNING book_id",
+            course_code,
+            str(book_id),
+        )
+        bump_catalog_version(COURSES)
+        return len(deleted) > 0
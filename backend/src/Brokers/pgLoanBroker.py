@@ -0,0 +1,251 @@
+from typing import Optional
+from uuid import UUID
+
+from ..utils.cache import COPIES, LOAN_POLICIES, bump_catalog_version
+from ..utils.database import Database, column_list, insert_rows, update_rows
+from ..utils.executors import CIRCULATION, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import replica_reads
+from ..utils.resilience import resilient
+from .loanBroker import LOAN_COLUMNS
+
+# Flattened like LoanBroker's *WithBookInfo results
+LOANS_WITH_BOOK_INFO_SQL = """
+    SELECT l.*,
+           bc.accession_number AS copy_accession_number,
+           b.id AS book_id,
+           b.title AS book_title,
+           b.author AS book_author,
+           b.isbn AS book_isbn,
+           b.publisher AS book_publisher,
+           b.book_pic_url
+    FROM loans l
+    JOIN book_copies bc ON bc.id = l.copy_id
+    JOIN books b ON b.id = bc.book_id
+"""
+OPEN_REQUEST_STATUSES = ["pending", "pending_pickup", "active"]
+
+
+def _search_filters(
+    user_id: Optional[UUID],
+    status: Optional[str],
+    from_date: Optional[str],
+    to_date: Optional[str],
+    args: list,
+) -> list[str]:
+    """WHERE clauses for the loan search filters, appending their parameters"""
+    clauses = []
+    if user_id:
+        args.append(str(user_id))
+        clauses.append(f"user_id = ${len(args)}")
+    if status:
+        args.append(status)
+        clauses.append(f"status = ${len(args)}::loan_status")
+    if from_date:
+        args.append(str(from_date))
+        clauses.append(f"request_date >= ${len(args)}::text::timestamptz")
+    if to_date:
+        args.append(str(to_date))
+        clauses.append(f"request_date <= ${len(args)}::text::timestamptz")
+    return clauses
+
+
+@workload(CIRCULATION)
+@replica_reads
+@resilient
+@instrument_broker
+class PgLoanBroker:
+    """LoanBroker over asyncpg (DATABASE_BACKEND=postgres)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    # ==================== LOANS ====================
+
+    async def SelectAllLoans(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Get all loans with pagination"""
+        columns = column_list(select_columns(fields, LOAN_COLUMNS))
+        return await self.db.fetch(
+            f"SELECT {columns} FROM loans OFFSET $1 LIMIT $2",  # nosec B608 - fields_query allowlist, ident()-quoted
+            skip,
+            limit,
+        )
+
+    async def SelectLoansPage(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 1000,
+        user_id: Optional[UUID] = None,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Get the next page of loans ordered by id, with the SearchLoans filters"""
+        args: list = []
+        clauses = _search_filters(user_id, status, from_date, to_date, args)
+        if after_id:
+            args.append(after_id)
+            clauses.append(f"id > ${len(args)}::uuid")
+        args.append(limit)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return await self.db.fetch(
+            f"SELECT {column_list(LOAN_COLUMNS)} FROM loans {where}"  # nosec B608 - fixed clauses, values bound as $n
+            f"ORDER BY id LIMIT ${len(args)}",
+            *args,
+        )
+
+    async def SelectLoanById(self, loan_id: UUID) -> Optional[dict]:
+        """Get a specific loan by ID"""
+        return await self.db.fetchrow("SELECT * FROM loans WHERE id = $1", str(loan_id))
+
+    async def SelectLoansByUser(
+        self, user_id: UUID, status: Optional[str] = None
+    ) -> list[dict]:
+        """Get all loans for a specific user, optionally filtered by status"""
+        return await self.db.fetch(
+            "SELECT * FROM loans WHERE user_id = $1 "
+            "AND ($2::text IS NULL OR status = $2::text::loan_status)",
+            str(user_id),
+            status,
+        )
+
+    async def SelectLoansByUserWithBookInfo(
+        self, user_id: UUID, status: Optional[str] = None
+    ) -> list[dict]:
+        """Get all loans for a user with book details (JOIN)"""
+        return await self.db.fetch(
+            f"{LOANS_WITH_BOOK_INFO_SQL} WHERE l.user_id = $1 "
+            "AND ($2::text IS NULL OR l.status = $2::text::loan_status) "
+            "ORDER BY l.request_date DESC",
+            str(user_id),
+            status,
+        )
+
+    async def SelectLoansByCopy(self, copy_id: UUID) -> list[dict]:
+        """Get all loans for a specific book copy"""
+        return await self.db.fetch(
+            "SELECT * FROM loans WHERE copy_id = $1", str(copy_id)
+        )
+
+    async def SelectLoansByStatus(
+        self, status: str, skip: int = 0, limit: int = 100
+    ) -> list[dict]:
+        """Get all loans with a specific status"""
+        return await self.db.fetch(
+            "SELECT * FROM loans WHERE status = $1::loan_status OFFSET $2 LIMIT $3",
+            status,
+            skip,
+            limit,
+        )
+
+    async def SelectLoansByStatusWithBookInfo(
+        self, status: str, skip: int = 0, limit: int = 100
+    ) -> list[dict]:
+        """Get all loans with a specific status with book details (JOIN)"""
+        return await self.db.fetch(
+            f"{LOANS_WITH_BOOK_INFO_SQL} WHERE l.status = $1::loan_status "
+            "ORDER BY l.request_date DESC OFFSET $2 LIMIT $3",
+            status,
+            skip,
+            limit,
+        )
+
+    async def SelectActiveLoansByUser(self, user_id: UUID) -> list[dict]:
+        """Get all active loans for a user (pending, pending_pickup, or active status)"""
+        return await self.db.fetch(
+            "SELECT * FROM loans "
+            "WHERE user_id = $1 AND status = ANY($2::loan_status[])",
+            str(user_id),
+            OPEN_REQUEST_STATUSES,
+        )
+
+    async def CheckUserHasCopyOnLoan(self, user_id: UUID, copy_id: UUID) -> bool:
+        """Check if user already has this specific copy on loan (active, pending, or pending_pickup)"""
+        return await self.db.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM loans WHERE user_id = $1 AND copy_id = $2 "
+            "AND status = ANY($3::loan_status[]))",
+            str(user_id),
+            str(copy_id),
+            OPEN_REQUEST_STATUSES,
+        )
+
+    async def SelectOverdueLoans(self) -> list[dict]:
+        """Get all loans that are overdue (due_date < now and status = active)"""
+        return await self.db.fetch(
+            "SELECT * FROM loans WHERE status = 'active' AND due_date < now()"
+        )
+
+    async def InsertLoan(self, loan_data: dict) -> dict:
+        """Insert a new loan request"""
+        return (await insert_rows(self.db, "loans", [loan_data]))[0]
+
+    async def UpdateLoan(self, loan_id: UUID, update_data: dict) -> Optional[dict]:
+        """Update a loan by ID"""
+        rows = await update_rows(self.db, "loans", update_data, "id = $2", str(loan_id))
+        return rows[0] if rows else None
+
+    async def DeleteLoan(self, loan_id: UUID) -> bool:
+        """Delete a loan"""
+        deleted = await self.db.fetch(
+            "DELETE FROM loans WHERE id = $1 RETURNING id", str(loan_id)
+        )
+        return len(deleted) > 0
+
+    # ==================== DESK CIRCULATION ====================
+
+    async def DeskReturnCopies(
+        self, accession_numbers: list[int], increment_infractions: bool = False
+    ) -> list[dict]:
+        """Return the open loans of scanned copies in one transaction"""
+        outcomes = await self.db.fetch(
+            "SELECT * FROM desk_return_copies($1::bigint[], $2)",
+            accession_numbers,
+            increment_infractions,
+        )
+        bump_catalog_version(COPIES)
+        return outcomes
+
+    async def DeskCheckoutCopies(self, accession_numbers: list[int]) -> list[dict]:
+        """Check out the pending_pickup loans of scanned copies in one transaction"""
+        return await self.db.fetch(
+            "SELECT * FROM desk_checkout_copies($1::bigint[])", accession_numbers
+        )
+
+    # ==================== LOAN POLICIES ====================
+
+    async def SelectLoanPolicy(self, role: str) -> Optional[dict]:
+        """Get loan policy for a specific role"""
+        return await self.db.fetchrow(
+            "SELECT * FROM loan_policies WHERE role = $1::user_role", role
+        )
+
+    async def SelectAllLoanPolicies(self) -> list[dict]:
+        """Get all loan policies"""
+        return await self.db.fetch("SELECT * FROM loan_policies")
+
+    async def UpdateLoanPolicy(self, role: str, update_data: dict) -> Optional[dict]:
+        """Update loan policy for a specific role"""
+        rows = await update_rows(
+            self.db, "loan_policies", update_data, "role = $2::user_role", role
+        )
+        bump_catalog_version(LOAN_POLICIES)
+        return rows[0] if rows else None
+
+    async def SearchLoans(
+        self,
+        user_id: Optional[UUID] = None,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Search loans with multiple filters"""
+        args: list = []
+        clauses = _search_filters(user_id, status, from_date, to_date, args)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return await self.db.fetch(
+            f"SELECT * FROM loans{where}",  # nosec B608 - fixed clauses, values bound as $n
+            *args,
+        )
@@ -0,0 +1,160 @@
+from datetime import datetime
+
+from ..utils.database import Database
+from ..utils.executors import REPORTS, workload
+from ..utils.metrics import instrument_broker
+from ..utils.replicas import replica_reads
+from ..utils.resilience import resilient
+
+MONTH_NAMES = [
+    "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+]  # fmt: skip
+
+
+@workload(REPORTS)
+@replica_reads
+@resilient
+@instrument_broker
+class PgStatsBroker:
+    """
+    StatsBroker over asyncpg (DATABASE_BACKEND=postgres)
+
+    Counts and groupings are aggregated in Postgres instead of fetching rows;
+    results match StatsBroker's.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def _count(self, sql: str, *args) -> int:
+        return await self.db.fetchval(sql, *args) or 0
+
+    # ==================== DASHBOARD STATISTICS ====================
+
+    async def get_total_books(self) -> int:
+        """Get total number of books in catalog"""
+        return await self._count("SELECT count(*) FROM books")
+
+    async def get_total_copies(self) -> int:
+        """Get total number of book copies"""
+        return await self._count("SELECT count(*) FROM book_copies")
+
+    async def get_available_copies(self) -> int:
+        """Get number of available copies"""
+        return await self._count(
+            "SELECT count(*) FROM book_copies WHERE status = 'available'"
+        )
+
+    async def get_total_users(self) -> int:
+        """Get total number of users"""
+        return await self._count("SELECT count(*) FROM users")
+
+    async def get_users_by_role(self) -> dict:
+        """Get user count grouped by role"""
+        rows = await self.db.fetch(
+            "SELECT role, count(*)::int AS count FROM users GROUP BY role"
+        )
+        return {row["role"]: row["count"] for row in rows}
+
+    async def get_total_active_loans(self) -> int:
+        """Get number of currently active loans"""
+        return await self._count("SELECT count(*) FROM loans WHERE status = 'active'")
+
+    async def get_total_overdue_loans(self) -> int:
+        """Get number of overdue loans"""
+        return await self._count("SELECT count(*) FROM loans WHERE status = 'overdue'")
+
+    async def get_total_pending_requests(self) -> int:
+        """Get number of pending loan requests"""
+        return await self._count("SELECT count(*) FROM loans WHERE status = 'pending'")
+
+    async def get_blacklisted_users_count(self) -> int:
+        """Get number of blacklisted users"""
+        return await self._count("SELECT count(*) FROM users WHERE is_blacklisted")
+
+    # ==================== BOOK STATISTICS ====================
+
+    async def get_most_borrowed_books(self, limit: int = 10) -> list[dict]:
+        """Get most borrowed books with their borrow count"""
+        return await self.db.fetch(
+            "SELECT b.id AS book_id, b.title, b.author, b.isbn,"
+            " count(*)::int AS borrow_count "
+            "FROM loans l"
+            " JOIN book_copies bc ON bc.id = l.copy_id"
+            " JOIN books b ON b.id = bc.book_id "
+            "WHERE l.status IN ('active', 'returned', 'overdue') "
+            "GROUP BY b.id ORDER BY borrow_count DESC LIMIT $1",
+            limit,
+        )
+
+    async def get_books_by_status(self) -> dict:
+        """Get book copy count by status"""
+        status_counts = {"available": 0, "checked_out": 0, "lost": 0, "damaged": 0}
+        rows = await self.db.fetch(
+            "SELECT status, count(*)::int AS count FROM book_copies GROUP BY status"
+        )
+        for row in rows:
+            status_counts[row["status"] or "available"] = row["count"]
+        return status_counts
+
+    # ==================== LOAN STATISTICS ====================
+
+    async def get_loans_by_status(self) -> dict:
+        """Get loan count by status"""
+        status_counts = {
+            "pending": 0,
+            "active": 0,
+            "returned": 0,
+            "overdue": 0,
+            "rejected": 0,
+        }
+        rows = await self.db.fetch(
+            "SELECT status, count(*)::int AS count FROM loans GROUP BY status"
+        )
+        for row in rows:
+            status_counts[row["status"] or "pending"] = row["count"]
+        return status_counts
+
+    async def get_loans_by_month(self, year: int = None) -> list[dict]:
+        """Get loan count by month for the current or specified year"""
+        if year is None:
+            year = datetime.now().year
+
+        rows = await self.db.fetch(
+            "SELECT extract(month FROM request_date AT TIME ZONE 'UTC')::int"
+            " AS month, count(*)::int AS count "
+            "FROM loans "
+            "WHERE request_date >= $1::text::timestamptz"
+            " AND request_date <= $2::text::timestamptz "
+            "GROUP BY 1",
+            f"{year}-01-01",
+            f"{year}-12-31",
+        )
+        month_counts = {row["month"]: row["count"] for row in rows}
+        return [
+            {"month": name, "count": month_counts.get(index + 1, 0)}
+            for index, name in enumerate(MONTH_NAMES)
+        ]
+
+    async def get_top_borrowers(self, limit: int = 10) -> list[dict]:
+        """Get users with most loans"""
+        return await self.db.fetch(
+            "SELECT u.id AS user_id, u.full_name, u.email, u.university_id,"
+            " u.role, top.loan_count "
+            "FROM (SELECT user_id, count(*)::int AS loan_count FROM loans"
+            "      WHERE user_id IS NOT NULL"
+            "      GROUP BY user_id ORDER BY loan_count DESC LIMIT $1) top"
+            " JOIN users u ON u.id = top.user_id "
+            "ORDER BY top.loan_count DESC",
+            limit,
+        )
+
+    # ==================== USER STATISTICS ====================
+
+    async def get_users_with_infractions(self) -> list[dict]:
+        """Get users with infractions > 0"""
+        return await self.db.fetch(
+            "SELECT id, full_name, university_id, infractions_count "
+            "FROM users WHERE infractions_count > 0"
+        )
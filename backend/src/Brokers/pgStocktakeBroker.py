@@ -0,0 +1,95 @@
+from typing import Optional
+from uuid import UUID
+
+from ..utils.cache import COPIES, bump_catalog_version
+from ..utils.database import Database, insert_rows, update_rows
+from ..utils.executors import CATALOG, workload
+from ..utils.metrics import instrument_broker
+from ..utils.resilience import resilient
+
+
+@workload(CATALOG)
+@resilient
+@instrument_broker
+class PgStocktakeBroker:
+    """StocktakeBroker over asyncpg (DATABASE_BACKEND=postgres)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    # ==================== SESSIONS ====================
+
+    async def InsertSession(self, session_data: dict) -> dict:
+        """Open a new stocktake session"""
+        return (await insert_rows(self.db, "stocktake_sessions", [session_data]))[0]
+
+    async def SelectSessions(self, skip: int = 0, limit: int = 20) -> list[dict]:
+        """Get stocktake sessions, newest first"""
+        return await self.db.fetch(
+            "SELECT * FROM stocktake_sessions ORDER BY created_at DESC "
+            "OFFSET $1 LIMIT $2",
+            skip,
+            limit,
+        )
+
+    async def SelectSessionById(self, session_id: UUID) -> Optional[dict]:
+        """Get a stocktake session by ID"""
+        return await self.db.fetchrow(
+            "SELECT * FROM stocktake_sessions WHERE id = $1", str(session_id)
+        )
+
+    async def UpdateSession(
+        self, session_id: UUID, update_data: dict
+    ) -> Optional[dict]:
+        """Update a stocktake session by ID"""
+        rows = await update_rows(
+            self.db, "stocktake_sessions", update_data, "id = $2", str(session_id)
+        )
+        return rows[0] if rows else None
+
+    # ==================== SCANS ====================
+
+    async def InsertScanChunk(
+        self, session_id: UUID, accession_numbers: list[int]
+    ) -> None:
+        """Store one chunk of scans as a single array row"""
+        await self.db.execute(
+            "INSERT INTO stocktake_scans (session_id, accession_numbers) "
+            "VALUES ($1, $2::bigint[])",
+            str(session_id),
+            accession_numbers,
+        )
+
+    # ==================== RECONCILIATION ====================
+
+    async def ReconcileSession(self, session_id: UUID) -> Optional[dict]:
+        """Compare the session's scans with book_copies"""
+        return await self.db.fetchrow(
+            "SELECT * FROM stocktake_reconcile($1)", str(session_id)
+        )
+
+    async def SelectDiscrepancies(
+        self,
+        session_id: UUID,
+        kind: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> list[dict]:
+        """Get a reconciled session's discrepancies in accession order"""
+        return await self.db.fetch(
+            "SELECT accession_number, copy_id, kind, current_status,"
+            " proposed_status, loan_id "
+            "FROM stocktake_discrepancies "
+            "WHERE session_id = $1 AND ($2::text IS NULL OR kind = $2) "
+            "ORDER BY accession_number OFFSET $3 LIMIT $4",
+            str(session_id),
+            kind,
+            skip,
+            limit,
+        )
+
+    async def ApplySession(self, session_id: UUID) -> int:
+        """Apply every proposed status change in one UPDATE"""
+        applied = await self.db.fetchval("SELECT stocktake_apply($1)", str(session_id))
+        bump_catalog_version(COPIES)
+        return applied or 0
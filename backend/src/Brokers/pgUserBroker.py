@@ -0,0 +1,133 @@
+from typing import Optional
+from uuid import UUID
+
+from ..utils.database import Database, column_list, insert_rows, update_rows
+from ..utils.executors import CIRCULATION, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import on_primary, replica_reads
+from ..utils.resilience import resilient
+from .userBroker import USER_AUTH_COLUMNS, USER_COLUMNS
+
+
+@workload(CIRCULATION)
+@replica_reads
+@resilient
+@instrument_broker
+class PgUserBroker:
+    """UserBroker over asyncpg (DATABASE_BACKEND=postgres)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def SelectAllUsers(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        columns = column_list(select_columns(fields, USER_COLUMNS), alias="u")
+        # Loan counts are aggregated per page row instead of shipping every loan
+        return await self.db.fetch(
+            f"SELECT {columns},"  # nosec B608 - fields_query allowlist, ident()-quoted
+            " counts.active_loans_count, counts.total_loans_count "
+            "FROM (SELECT * FROM users OFFSET $1 LIMIT $2) u, LATERAL ("
+            "  SELECT count(*) FILTER (WHERE l.status IN "
+            "    ('pending', 'pending_pickup', 'active'))::int AS active_loans_count,"
+            "    count(*)::int AS total_loans_count"
+            "  FROM loans l WHERE l.user_id = u.id) counts",
+            skip,
+            limit,
+        )
+
+    async def SelectUsersPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of users ordered by id (keyset pagination)"""
+        return await self.db.fetch(
+            f"SELECT {column_list(USER_COLUMNS)} FROM users "  # nosec B608 - constant columns, ident()-quoted
+            "WHERE $1::uuid IS NULL OR id > $1::uuid ORDER BY id LIMIT $2",
+            after_id,
+            limit,
+        )
+
+    # Lookups by key back authentication and uniqueness checks, so they read
+    # the primary rather than a lagging replica
+    @on_primary
+    async def SelectUserById(self, user_id: UUID) -> Optional[dict]:
+        return await self.db.fetchrow(
+            f"SELECT {column_list(USER_COLUMNS)} FROM users"  # nosec B608 - constant columns, ident()-quoted
+            " WHERE id = $1",
+            str(user_id),
+        )
+
+    @on_primary
+    async def SelectUserByEmail(self, email: str) -> Optional[dict]:
+        """Get a user by email"""
+        return await self.db.fetchrow(
+            f"SELECT {column_list(USER_AUTH_COLUMNS)} FROM users"  # nosec B608 - constant columns, ident()-quoted
+            " WHERE email = $1",
+            email,
+        )
+
+    @on_primary
+    async def SelectUserByUniversityId(self, university_id: str) -> Optional[dict]:
+        """Get a user by university ID"""
+        return await self.db.fetchrow(
+            f"SELECT {column_list(USER_COLUMNS)} FROM users"  # nosec B608 - constant columns, ident()-quoted
+            " WHERE university_id = $1",
+            university_id,
+        )
+
+    async def InsertUser(self, user_data: dict) -> dict:
+        return (await insert_rows(self.db, "users", [user_data]))[0]
+
+    async def UpdateUser(self, user_id: UUID, update_data: dict) -> Optional[dict]:
+        """Update a user by ID"""
+        rows = await update_rows(self.db, "users", update_data, "id = $2", str(user_id))
+        return rows[0] if rows else None
+
+    async def DeleteUser(self, user_id: UUID) -> bool:
+        deleted = await self.db.fetch(
+            "DELETE FROM users WHERE id = $1 RETURNING id", str(user_id)
+        )
+        return len(deleted) > 0
+
+    async def SearchUsers(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[dict] = None,
+        fields: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Search users by name, email, or university ID (case-insensitive)
+
+        Same ranking and keyset cursor as UserBroker.SearchUsers (search_users).
+        """
+        columns = column_list(select_columns(fields, USER_COLUMNS))
+        cursor = cursor or {}
+        return await self.db.fetch(
+            f"SELECT {columns}, search_rank "  # nosec B608 - fields_query allowlist, ident()-quoted
+            "FROM search_users($1, $2, $3, $4, $5::uuid)",
+            query,
+            limit,
+            cursor.get("rank"),
+            cursor.get("full_name"),
+            cursor.get("id") and str(cursor["id"]),
+        )
+
+    async def SelectUserDashboardStats(self, user_id: UUID) -> dict:
+        """Get user dashboard statistics in one query"""
+        stats = await self.db.fetchrow(
+            "SELECT"
+            " count(l.id) FILTER (WHERE l.status = 'active')::int AS active_loans,"
+            " count(l.id)::int AS total_loans,"
+            " count(l.id) FILTER (WHERE l.status = 'overdue')::int"
+            "   AS overdue_loans,"
+            " coalesce(max(u.infractions_count), 0) AS infractions,"
+            " count(l.id) FILTER (WHERE l.status = 'pending')::int"
+            "   AS pending_requests "
+            "FROM (SELECT $1::uuid AS id) target"
+            " LEFT JOIN users u ON u.id = target.id"
+            " LEFT JOIN loans l ON l.user_id = target.id",
+            str(user_id),
+        )
+        return dict(stats)
@@ -0,0 +1,149 @@
+from typing import Optional
+from uuid import UUID
+
+from postgrest.types import ReturnMethod
+from supabase import Client
+
+from ..utils.cache import COPIES, bump_catalog_version
+from ..utils.executors import CATALOG, to_thread, workload
+from ..utils.metrics import instrument_broker
+from ..utils.resilience import resilient
+
+
+@workload(CATALOG)
+@resilient
+@instrument_broker
+class StocktakeBroker:
+    def __init__(self, client: Client):
+        self.client = client
+
+    # ==================== SESSIONS ====================
+
+    async def InsertSession(self, session_data: dict) -> dict:
+        """Open a new stocktake session"""
+
+        def _insert():
+            return (
+                self.client.table("stocktake_sessions").insert(session_data).execute()
+            )
+
+        return (await to_thread(_insert)).data[0]
+
+    async def SelectSessions(self, skip: int = 0, limit: int = 20) -> list[dict]:
+        """Get stocktake sessions, newest first"""
+
+        def _fetch():
+            return (
+                self.client.table("stocktake_sessions")
+                .select("*")
+                .order("created_at", desc=True)
+                .range(skip, skip + limit - 1)
+                .execute()
+            )
+
+        response = await to_thread(_fetch)
+        return response.data if response.data else []
+
+    async def SelectSessionById(self, session_id: UUID) -> Optional[dict]:
+        """Get a stocktake session by ID"""
+
+        def _fetch():
+            return (
+                self.client.table("stocktake_sessions")
+                .select("*")
+                .eq("id", str(session_id))
+                .execute()
+            )
+
+        response = await to_thread(_fetch)
+        return response.data[0] if response.data else None
+
+    async def UpdateSession(
+        self, session_id: UUID, update_data: dict
+    ) -> Optional[dict]:
+        """Update a stocktake session by ID"""
+
+        def _update():
+            return (
+                self.client.table("stocktake_sessions")
+                .update(update_data)
+                .eq("id", str(session_id))
+                .execute()
+            )
+
+        response = await to_thread(_update)
+        return response.data[0] if response.data else None
+
+    # ==================== SCANS ====================
+
+    async def InsertScanChunk(
+        self, session_id: UUID, accession_numbers: list[int]
+    ) -> None:
+        """Store one chunk of scans as a single array row"""
+
+        def _insert():
+            return (
+                self.client.table("stocktake_scans")
+                .insert(
+                    {
+                        "session_id": str(session_id),
+                        "accession_numbers": accession_numbers,
+                    },
+                    returning=ReturnMethod.minimal,
+                )
+                .execute()
+            )
+
+        await to_thread(_insert)
+
+    # ==================== RECONCILIATION ====================
+
+    async def ReconcileSession(self, session_id: UUID) -> Optional[dict]:
+        """Compare the session's scans with book_copies (RPC)"""
+
+        def _fetch():
+            return self.client.rpc(
+                "stocktake_reconcile", {"target_session": str(session_id)}
+            ).execute()
+
+        response = await to_thread(_fetch)
+        return response.data[0] if response.data else None
+
+    async def SelectDiscrepancies(
+        self,
+        session_id: UUID,
+        kind: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> list[dict]:
+        """Get a reconciled session's discrepancies in accession order"""
+
+        def _fetch():
+            query = (
+                self.client.table("stocktake_discrepancies")
+                .select(
+                    "accession_number, copy_id, kind, current_status, "
+                    "proposed_status, loan_id"
+                )
+                .eq("session_id", str(session_id))
+            )
+            if kind:
+                query = query.eq("kind", kind)
+            return (
+                query.order("accession_number").range(skip, skip + limit - 1).execute()
+            )
+
+        response = await to_thread(_fetch)
+        return response.data if response.data else []
+
+    async def ApplySession(self, session_id: UUID) -> int:
+        """Apply every proposed status change in one UPDATE (RPC)"""
+
+        def _update():
+            return self.client.rpc(
+                "stocktake_apply", {"target_session": str(session_id)}
+            ).execute()
+
+        response = await to_thread(_update)
+        bump_catalog_version(COPIES)
+        return response.data or 0
@@ -1,25 +1,58 @@
-import asyncio
 from typing import Optional
 from uuid import UUID
 
 from supabase import Client
 
+from ..utils.executors import CIRCULATION, to_thread, workload
+from ..utils.metrics import instrument_broker
+from ..utils.projection import select_columns
+from ..utils.replicas import on_primary, replica_reads
+from ..utils.resilience import resilient
 
+# Per-endpoint field sets. hashed_password is only read when authenticating.
+USER_COLUMNS = (
+    "id, university_id, full_name, email, role, faculty, academic_year, "
+    "infractions_count, is_blacklisted, blacklist_note, created_at"
+)
+USER_AUTH_COLUMNS = f"{USER_COLUMNS}, hashed_password"
+
+# "Function does not exist" from PostgREST / Postgres: search_users isn't installed
+MISSING_RPC_CODES = ("PGRST202", "42883")
+
+
+def _like_escape(text: str) -> str:
+    """Escape LIKE wildcards so text matches literally (as search_users.sql)"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _quote(value: str) -> str:
+    """Double-quote a PostgREST filter value so , ( ) aren't read as syntax"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@workload(CIRCULATION)
+@replica_reads
+@resilient
+@instrument_broker
 class UserBroker:
     def __init__(self, client: Client):
         self.client = client
 
-    async def SelectAllUsers(self, skip: int = 0, limit: int = 10) -> list[dict]:
+    async def SelectAllUsers(
+        self, skip: int = 0, limit: int = 10, fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        columns = select_columns(fields, USER_COLUMNS)
+
         def _fetch():
             # Fetch users with loan counts using aggregation
             return (
                 self.client.table("users")
-                .select("*," "loans!left(id, status)")
+                .select(f"{columns}, loans!left(id, status)")
                 .range(skip, skip + limit - 1)
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
 
         # Calculate loan counts for each user
         users = []
@@ -42,43 +75,70 @@ class UserBroker:
 
         return users
 
+    async def SelectUsersPage(
+        self, after_id: Optional[str] = None, limit: int = 1000
+    ) -> list[dict]:
+        """Get the next page of users ordered by id (keyset pagination)"""
+
+        def _fetch():
+            query = self.client.table("users").select(USER_COLUMNS)
+            if after_id:
+                query = query.gt("id", after_id)
+            return query.order("id").limit(limit).execute()
+
+        response = await to_thread(_fetch)
+        return response.data if response.data else []
+
+    # Lookups by key back authentication and uniqueness checks, so they read
+    # the primary rather than a lagging replica
+    @on_primary
     async def SelectUserById(self, user_id: UUID) -> Optional[dict]:
         def _fetch():
             return (
-                self.client.table("users").select("*").eq("id", str(user_id)).execute()
+                self.client.table("users")
+                .select(USER_COLUMNS)
+                .eq("id", str(user_id))
+                .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
+    @on_primary
     async def SelectUserByEmail(self, email: str) -> Optional[dict]:
         """Get a user by email"""
 
         def _fetch():
-            return self.client.table("users").select("*").eq("email", email).execute()
+            return (
+                self.client.table("users")
+                .select(USER_AUTH_COLUMNS)
+                .eq("email", email)
+                .execute()
+            )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
+    @on_primary
     async def SelectUserByUniversityId(self, university_id: str) -> Optional[dict]:
         """Get a user by university ID"""
 
         def _fetch():
             return (
                 self.client.table("users")
-                .select("*")
+                .select(USER_COLUMNS)
                 .eq("university_id", university_id)
                 .execute()
             )
 
-        response = await asyncio.to_thread(_fetch)
+        response = await to_thread(_fetch)
         return response.data[0] if response.data else None
 
     async def InsertUser(self, user_data: dict) -> dict:
         def _insert():
             return self.client.table("users").insert(user_data).execute()
 
-        return (await asyncio.to_thread(_insert)).data[0]
+        return (await to_thread(_insert)).data[0]
 
     async def UpdateUser(self, user_id: UUID, update_data: dict) -> Optional[dict]:
         """Update a user by ID"""
@@ -91,33 +151,122 @@ class UserBroker:
                 .execute()
             )
 
-        response = await asyncio.to_thread(_update)
+        response = await to_thread(_update)
         return response.data[0] if response.data else None
 
     async def DeleteUser(self, user_id: UUID) -> bool:
         def _delete():
             return self.client.table("users").delete().eq("id", str(user_id)).execute()
 
-        response = await asyncio.to_thread(_delete)
+        response = await to_thread(_delete)
         return len(response.data) > 0
 
-    async def SearchUsers(self, query: str) -> list[dict]:
-        """Search users by name, email, or university ID (case-insensitive)"""
+    async def SearchUsers(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[dict] = None,
+        fields: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Search users by name, email, or university ID (case-insensitive)
+
+        Uses the trigram-indexed search_users RPC, ranked by exact university ID,
+        then email prefix, then any other match. Pages with a keyset cursor
+        (dict with rank, full_name and id of the last row already seen).
+        """
+        columns = select_columns(fields, USER_COLUMNS)
 
         def _search():
+            params = {"query_param": query, "limit_param": limit}
+            if cursor:
+                params.update(
+                    {
+                        "after_rank": cursor["rank"],
+                        "after_name": cursor["full_name"],
+                        "after_id": cursor["id"],
+                    }
+                )
             return (
-                self.client.table("users")
-                .select("*")
-                .or_(
-                    f"full_name.ilike.%{query}%,"
-                    f"email.ilike.%{query}%,"
-                    f"university_id.ilike.%{query}%"
+                self.client.rpc("search_users", params)
+                .select(f"{columns}, search_rank")
+                .execute()
+            )
+
+        try:
+            response = await to_thread(_search)
+            return response.data if response.data else []
+        except Exception as exc:
+            if getattr(exc, "code", None) not in MISSING_RPC_CODES:
+                raise
+            # Fallback: plain filters if the RPC isn't installed yet
+            return await self._search_users_fallback(query, limit, cursor, columns)
+
+    async def _search_users_fallback(
+        self, query: str, limit: int, cursor: Optional[dict], columns: str
+    ) -> list[dict]:
+        """
+        Search without the RPC, ranked and paged like search_users
+
+        One query per rank (exact university ID, email prefix, any other
+        match), each in (full_name, id) order, until the page is full. The
+        cursor's rank skips the ranks already served.
+        """
+        # Match the query literally, as search_users does: escape LIKE
+        # wildcards, and quote the or=() values PostgREST would split on
+        pattern = _like_escape(query)
+        prefix = f"{pattern}%"
+        contains = _quote(f"%{pattern}%")
+        ranks = (
+            lambda request: request.eq("university_id", query),
+            lambda request: request.ilike("email", prefix).neq("university_id", query),
+            lambda request: request.or_(
+                f"full_name.ilike.{contains},"
+                f"email.ilike.{contains},"
+                f"university_id.ilike.{contains}"
+            )
+            .filter("email", "not.ilike", prefix)
+            .neq("university_id", query),
+        )
+
+        def _search(matching, remaining: int, after: Optional[dict]):
+            def request():
+                return matching(self.client.table("users").select(columns))
+
+            rows = []
+            later = request()
+            if after:
+                # (full_name, id) > (after name, after id), as two range queries
+                same_name = (
+                    request()
+                    .eq("full_name", after["full_name"])
+                    .gt("id", str(after["id"]))
+                    .order("id")
+                    .limit(remaining)
+                    .execute()
                 )
+                rows = same_name.data or []
+                if len(rows) == remaining:
+                    return rows
+                later = later.gt("full_name", after["full_name"])
+            response = (
+                later.order("full_name")
+                .order("id")
+                .limit(remaining - len(rows))
                 .execute()
             )
+            return rows + (response.data or [])
 
-        response = await asyncio.to_thread(_search)
-        return response.data if response.data else []
+        users = []
+        for rank, matching in enumerate(ranks):
+            if cursor and rank < cursor["rank"]:
+                continue
+            after = cursor if cursor and rank == cursor["rank"] else None
+            rows = await to_thread(_search, matching, limit - len(users), after)
+            users.extend({**row, "search_rank": rank} for row in rows)
+            if len(users) == limit:
+                break
+        return users
 
     async def SelectUserDashboardStats(self, user_id: UUID) -> dict:
         """Get user dashboard statistics efficiently"""
@@ -157,32 +306,19 @@ class UserBroker:
                 .execute()
             )
 
-        try:
-            active_response = await asyncio.to_thread(_fetch_active_loans)
-            total_response = await asyncio.to_thread(_fetch_total_loans)
-            overdue_response = await asyncio.to_thread(_fetch_overdue_loans)
-            pending_response = await asyncio.to_thread(_fetch_pending_requests)
-
-            user_data = await self.SelectUserById(user_id)
-
-            return {
-                "active_loans": active_response.count if active_response.count else 0,
-                "total_loans": total_response.count if total_response.count else 0,
-                "overdue_loans": (
-                    overdue_response.count if overdue_response.count else 0
-                ),
-                "infractions": (
-                    user_data.get("infractions_count", 0) if user_data else 0
-                ),
-                "pending_requests": (
-                    pending_response.count if pending_response.count else 0
-                ),
-            }
-        except Exception:
-            return {
-                "active_loans": 0,
-                "total_loans": 0,
-                "overdue_loans": 0,
-                "infractions": 0,
-                "pending_requests": 0,
-            }
+        active_response = await to_thread(_fetch_active_loans)
+        total_response = await to_thread(_fetch_total_loans)
+        overdue_response = await to_thread(_fetch_overdue_loans)
+        pending_response = await to_thread(_fetch_pending_requests)
+
+        user_data = await self.SelectUserById(user_id)
+
+        return {
+            "active_loans": active_response.count if active_response.count else 0,
+            "total_loans": total_response.count if total_response.count else 0,
+            "overdue_loans": overdue_response.count if overdue_response.count else 0,
+            "infractions": user_data.get("infractions_count", 0) if user_data else 0,
+            "pending_requests": (
+                pending_response.count if pending_response.count else 0
+            ),
+        }
@@ -2,7 +2,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import UUID4, BaseModel
+from pydantic import UUID4, BaseModel, Field
+
+from .Loans import LoanResponse
 
 
 # --- ENUMS ---
@@ -96,8 +98,96 @@ class BookCopyWithBorrowerInfo(BookCopyBase):
     current_loan_id: Optional[UUID4] = None
 
 
+# --- CATALOG IMPORT ---
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    MARC = "marc"  # MARC21 / ISO 2709
+    MARCXML = "marcxml"
+
+
+class ImportRowStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    ERROR = "error"
+
+
+class BookImportRowResult(BaseModel):
+    row: int  # 1-based record number in the uploaded file
+    isbn: Optional[str] = None
+    status: ImportRowStatus
+    book_id: Optional[UUID4] = None
+    copies_created: int = 0
+    error: Optional[str] = None
+
+
+class BookImportReport(BaseModel):
+    total: int = 0
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    copies_created: int = 0
+    rows: List[BookImportRowResult] = []
+
+
 # --- LOGIC INPUTS ---
 class AddInventoryRequest(BaseModel):
     book_id: UUID4
     quantity: int = 1  # How many copies to add?
     # Logic determines 30% reference automatically
+
+
+class AccessionResolveRequest(BaseModel):
+    accession_numbers: List[int] = Field(..., min_length=1, max_length=200)
+
+
+class CopyResolution(BaseModel):
+    """One scanned barcode: the copy, its book and its open loan (if any)"""
+
+    accession_number: int
+    found: bool
+    book_copy: Optional[BookCopyResponse] = None
+    book: Optional[BookResponse] = None
+    current_loan: Optional[LoanResponse] = None
+
+
+# --- BULK ACQUISITION ---
+class AcquisitionItem(BaseModel):
+    book_id: UUID4
+    quantity: int = Field(..., gt=0, le=10000)
+    # Overrides the request-wide reference percentage for this title
+    reference_percentage: Optional[int] = Field(None, ge=0, le=100)
+
+
+class BulkAcquisitionRequest(BaseModel):
+    items: List[AcquisitionItem] = Field(..., min_length=1, max_length=500)
+    reference_percentage: int = Field(30, ge=0, le=100)
+
+
+class AccessionRange(BaseModel):
+    first: int
+    last: int
+
+
+class AcquisitionTitleResult(BaseModel):
+    book_id: UUID4
+    created: int = 0
+    # Usually a single range; concurrent inserts can interleave numbers
+    accession_ranges: List[AccessionRange] = []
+    copies: Optional[List[BookCopyResponse]] = None
+
+
+class AcquisitionProgress(BaseModel):
+    """Streamed after each inserted chunk"""
+
+    event: str = "progress"
+    inserted: int
+    total: int
+
+
+class AcquisitionReport(BaseModel):
+    event: str = "done"
+    total: int
+    inserted: int = 0
+    titles: List[AcquisitionTitleResult] = []
+    # Set when a chunk failed; earlier chunks stay inserted
+    error: Optional[str] = None
@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+# --- ENUMS ---
+class ExportResource(str, Enum):
+    LOANS = "loans"
+    BOOKS = "books"
+    COPIES = "copies"
+    USERS = "users"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
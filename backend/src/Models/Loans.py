@@ -1,8 +1,8 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import UUID4, BaseModel
+from pydantic import UUID4, BaseModel, Field
 
 
 # --- ENUMS ---
@@ -16,6 +16,14 @@ class LoanStatus(str, Enum):
     REJECTED = "rejected"
 
 
+# Loans that currently hold a copy (approved and not yet returned)
+OPEN_LOAN_STATUSES = [
+    LoanStatus.PENDING_PICKUP.value,
+    LoanStatus.ACTIVE.value,
+    LoanStatus.OVERDUE.value,
+]
+
+
 # --- POLICIES ---
 class LoanPolicyResponse(BaseModel):
     role: str
@@ -93,3 +101,42 @@ class LoanWithBookInfo(BaseModel):
     book_publisher: Optional[str] = None
     book_pic_url: Optional[str] = None
     copy_accession_number: int
+
+
+# --- DESK CIRCULATION ---
+class DeskAction(str, Enum):
+    RETURN = "return"
+    CHECKOUT = "checkout"
+
+
+class DeskOutcome(str, Enum):
+    RETURNED = "returned"
+    CHECKED_OUT = "checked_out"
+    NO_OPEN_LOAN = "no_open_loan"
+    NO_PENDING_PICKUP = "no_pending_pickup"
+    NOT_FOUND = "not_found"
+
+
+class DeskBatchRequest(BaseModel):
+    """A batch of scanned accession numbers to process at the circulation desk"""
+
+    action: DeskAction
+    accession_numbers: List[int] = Field(..., min_length=1, max_length=200)
+    increment_infractions: bool = False
+
+
+class DeskItemResult(BaseModel):
+    accession_number: int
+    outcome: DeskOutcome
+    loan_id: Optional[UUID4] = None
+    user_id: Optional[UUID4] = None
+    was_overdue: bool = False
+
+
+class DeskBatchResult(BaseModel):
+    """Per-scan outcomes, in scan order"""
+
+    action: DeskAction
+    processed: int = 0
+    skipped: int = 0
+    items: List[DeskItemResult] = []
@@ -0,0 +1,74 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import UUID4, BaseModel, Field
+
+from .Books import BookStatus
+
+
+# --- ENUMS ---
+class StocktakeStatus(str, Enum):
+    OPEN = "open"
+    RECONCILED = "reconciled"
+    APPLIED = "applied"
+
+
+class DiscrepancyKind(str, Enum):
+    MISSING = "missing"
+    FOUND_LOST = "found_lost"
+    SCANNED_ON_LOAN = "scanned_on_loan"
+    UNKNOWN = "unknown"
+
+
+# --- SESSIONS ---
+class StocktakeSessionCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    notes: Optional[str] = None
+
+
+class StocktakeSessionResponse(BaseModel):
+    id: UUID4
+    name: str
+    notes: Optional[str] = None
+    status: StocktakeStatus
+    created_by: Optional[UUID4] = None
+    created_at: datetime
+    reconciled_at: Optional[datetime] = None
+    applied_at: Optional[datetime] = None
+
+    # Filled in once the session is reconciled
+    scanned_count: Optional[int] = None
+    expected_count: Optional[int] = None
+    missing_count: Optional[int] = None
+    found_lost_count: Optional[int] = None
+    on_loan_count: Optional[int] = None
+    unknown_count: Optional[int] = None
+
+
+# --- SCANS ---
+class StocktakeScanChunk(BaseModel):
+    """One upload of shelf scans; send as many chunks as needed"""
+
+    accession_numbers: List[int] = Field(..., min_length=1, max_length=10000)
+
+
+class StocktakeScanReceipt(BaseModel):
+    session_id: UUID4
+    received: int
+    stored: int
+
+
+# --- RECONCILIATION ---
+class StocktakeDiscrepancy(BaseModel):
+    accession_number: int
+    copy_id: Optional[UUID4] = None
+    kind: DiscrepancyKind
+    current_status: Optional[BookStatus] = None
+    proposed_status: Optional[BookStatus] = None
+    loan_id: Optional[UUID4] = None
+
+
+class StocktakeApplyResult(BaseModel):
+    session: StocktakeSessionResponse
+    copies_updated: int
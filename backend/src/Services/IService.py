@@ -4,7 +4,7 @@ Defines interfaces for all service classes to enable dependency injection and te
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
 from ..Models.Books import (
@@ -28,7 +28,7 @@ class IBookService(ABC):
 
     @abstractmethod
     async def RetrieveAllBooks(
-        self, skip: int = 0, limit: int = 10
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
     ) -> List[BookResponse]:
         """Get all books with pagination"""
         pass
@@ -56,20 +56,22 @@ class IBookService(ABC):
         pass
 
     @abstractmethod
-    async def SearchBooks(self, query: str) -> List[BookResponse]:
+    async def SearchBooks(
+        self, query: str, fields: Optional[List[str]] = None
+    ) -> List[BookResponse]:
         """Search books by title, author, or ISBN"""
         pass
 
     @abstractmethod
     async def RetrieveBooksWithStats(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[List[str]] = None
     ) -> List[BookWithStatsResponse]:
         """Get books with copy statistics"""
         pass
 
     @abstractmethod
     async def RetrieveBooksWithStatsAndCourses(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None
     ) -> List[BookWithStatsAndCoursesResponse]:
         """Get books with copy statistics and associated courses"""
         pass
@@ -80,7 +82,7 @@ class IUserService(ABC):
 
     @abstractmethod
     async def RetrieveAllUsers(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[List[str]] = None
     ) -> List[UserResponse]:
         """Get all users with pagination"""
         pass
@@ -112,6 +114,17 @@ class IUserService(ABC):
         """Search users by name, email, or university ID"""
         pass
 
+    @abstractmethod
+    async def SearchUsersPage(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[UserResponse], Optional[str]]:
+        """Search users one page at a time, returning the next page cursor"""
+        pass
+
     @abstractmethod
     async def AddToBlacklist(
         self, user_id: UUID, reason: str
@@ -135,7 +148,7 @@ class ILoanService(ABC):
 
     @abstractmethod
     async def RetrieveAllLoans(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[List[str]] = None
     ) -> List[LoanResponse]:
         """Get all loans with pagination"""
         pass
@@ -200,7 +213,7 @@ class ICourseService(ABC):
 
     @abstractmethod
     async def RetrieveAllCourses(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[List[str]] = None
     ) -> List[CourseResponse]:
         """Get all courses with pagination"""
         pass
@@ -1,25 +1,76 @@
-from typing import List, Optional
+import logging
+from itertools import islice
+from typing import AsyncIterator, Iterator, List, Optional, Union
 from uuid import UUID
 
+from postgrest.exceptions import APIError
+
 from ..Brokers.bookCopyBroker import BookCopyBroker
 from ..Models.Books import (
+    AccessionRange,
+    AcquisitionItem,
+    AcquisitionProgress,
+    AcquisitionReport,
+    AcquisitionTitleResult,
     BookCopyCreate,
     BookCopyResponse,
     BookCopyUpdate,
     BookCopyWithBorrowerInfo,
+    BookResponse,
     BookStatus,
+    CopyResolution,
 )
+from ..Models.Loans import LoanResponse
+from ..utils.executors import CATALOG, workload
+
+logger = logging.getLogger(__name__)
+
+
+def build_copy_rows(book_id, quantity: int, reference_percentage: int) -> List[dict]:
+    """Copy rows for one title, split into reference and circulating copies"""
+    # Calculate how many should be reference
+    reference_count = int((quantity * reference_percentage) / 100)
+    circulating_count = quantity - reference_count
+
+    # Reference copies first, then circulating copies
+    return [
+        {"book_id": str(book_id), "is_reference": True, "status": "available"}
+        for _ in range(reference_count)
+    ] + [
+        {"book_id": str(book_id), "is_reference": False, "status": "available"}
+        for _ in range(circulating_count)
+    ]
+
+
+def accession_ranges(accession_numbers: List[int]) -> List[AccessionRange]:
+    """Collapse accession numbers into contiguous first..last ranges"""
+    ranges: List[AccessionRange] = []
+    for number in sorted(accession_numbers):
+        if ranges and number == ranges[-1].last + 1:
+            ranges[-1].last = number
+        else:
+            ranges.append(AccessionRange(first=number, last=number))
+    return ranges
 
 
+def _chunks(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+@workload(CATALOG)
 class BookCopyService:
-    def __init__(self, broker: BookCopyBroker):
+    def __init__(self, broker: BookCopyBroker, chunk_size: int = 1000):
         self.broker = broker
+        self.chunk_size = chunk_size
 
     async def RetrieveAllCopies(
-        self, skip: int = 0, limit: int = 10
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
     ) -> List[BookCopyResponse]:
         """Get all book copies with pagination"""
-        copies = await self.broker.SelectAllCopies(skip=skip, limit=limit)
+        copies = await self.broker.SelectAllCopies(
+            skip=skip, limit=limit, fields=fields
+        )
         return [BookCopyResponse(**copy) for copy in copies]
 
     async def RetrieveCopiesByBookId(self, book_id: UUID) -> List[BookCopyResponse]:
@@ -55,6 +106,42 @@ class BookCopyService:
         copy_data = await self.broker.SelectCopyByAccessionNumber(accession_number)
         return BookCopyResponse(**copy_data) if copy_data else None
 
+    async def ResolveAccessionNumbers(
+        self, accession_numbers: List[int]
+    ) -> List[CopyResolution]:
+        """Resolve a batch of scanned barcodes, in scan order, with one query"""
+        copies = await self.broker.SelectCopiesByAccessionNumbers(
+            list(dict.fromkeys(accession_numbers))
+        )
+        by_accession = {copy["accession_number"]: copy for copy in copies}
+
+        result = []
+        for accession_number in accession_numbers:
+            copy_data = by_accession.get(accession_number)
+            if copy_data is None:
+                result.append(
+                    CopyResolution(accession_number=accession_number, found=False)
+                )
+                continue
+            book = copy_data.get("book")
+            loan = copy_data.get("current_loan")
+            result.append(
+                CopyResolution(
+                    accession_number=accession_number,
+                    found=True,
+                    book_copy=BookCopyResponse(
+                        **{
+                            key: value
+                            for key, value in copy_data.items()
+                            if key not in ("book", "current_loan")
+                        }
+                    ),
+                    book=BookResponse(**book) if book else None,
+                    current_loan=LoanResponse(**loan) if loan else None,
+                )
+            )
+        return result
+
     async def RetrieveCopyStats(self, book_id: UUID) -> dict:
         """Get statistics for book copies"""
         return await self.broker.CountCopiesByBookId(book_id)
@@ -87,28 +174,114 @@ class BookCopyService:
         if reference_percentage < 0 or reference_percentage > 100:
             raise ValueError("Reference percentage must be between 0 and 100")
 
-        # Calculate how many should be reference
-        reference_count = int((quantity * reference_percentage) / 100)
-        circulating_count = quantity - reference_count
+        copies_data = build_copy_rows(book_id, quantity, reference_percentage)
 
-        # Prepare copy data
-        copies_data = []
+        # Bounded request bodies even for large quantities
+        created_copies = []
+        for chunk in _chunks(iter(copies_data), self.chunk_size):
+            created_copies.extend(await self.broker.InsertCopiesBulk(chunk))
+        return [BookCopyResponse(**copy) for copy in created_copies]
+
+    async def AcquireCopies(
+        self,
+        items: List[AcquisitionItem],
+        reference_percentage: int = 30,
+        include_copies: bool = False,
+    ) -> AsyncIterator[Union[AcquisitionProgress, AcquisitionReport]]:
+        """
+        Create copies for many titles, inserting in chunks of chunk_size
+
+        Validates up front, including that every book exists (so errors surface
+        before anything is streamed), and returns an async iterator yielding an AcquisitionProgress after every
+        chunk and the AcquisitionReport last. Unless include_copies is set, only
+        book_id and accession_number come back from the database and each title
+        reports its accession number ranges.
+        """
+        if not items:
+            raise ValueError("No titles to acquire")
+        for item in items:
+            if item.quantity <= 0:
+                raise ValueError("Quantity must be greater than 0")
+        if reference_percentage < 0 or reference_percentage > 100:
+            raise ValueError("Reference percentage must be between 0 and 100")
+        book_ids = list(dict.fromkeys(str(item.book_id) for item in items))
+        existing = await self.broker.SelectExistingBookIds(book_ids)
+        unknown = [book_id for book_id in book_ids if book_id not in existing]
+        if unknown:
+            raise ValueError(f"Books not found: {', '.join(unknown)}")
 
-        # Add reference copies first
-        for _ in range(reference_count):
-            copies_data.append(
-                {"book_id": str(book_id), "is_reference": True, "status": "available"}
+        return self._AcquireChunks(items, reference_percentage, include_copies)
+
+    async def AddCopiesForTitles(
+        self,
+        items: List[AcquisitionItem],
+        reference_percentage: int = 30,
+        include_copies: bool = False,
+    ) -> AcquisitionReport:
+        """Run a bulk acquisition to completion and return its report"""
+        async for event in await self.AcquireCopies(
+            items, reference_percentage, include_copies
+        ):
+            report = event
+        return report
+
+    async def _AcquireChunks(
+        self,
+        items: List[AcquisitionItem],
+        reference_percentage: int,
+        include_copies: bool,
+    ) -> AsyncIterator[Union[AcquisitionProgress, AcquisitionReport]]:
+        titles = {}
+        for item in items:
+            titles.setdefault(
+                str(item.book_id), AcquisitionTitleResult(book_id=item.book_id)
             )
+        numbers = {book_id: [] for book_id in titles}
+        report = AcquisitionReport(total=sum(item.quantity for item in items))
 
-        # Add circulating copies
-        for _ in range(circulating_count):
-            copies_data.append(
-                {"book_id": str(book_id), "is_reference": False, "status": "available"}
+        rows = (
+            row
+            for item in items
+            for row in build_copy_rows(
+                item.book_id,
+                item.quantity,
+                (
+                    item.reference_percentage
+                    if item.reference_percentage is not None
+                    else reference_percentage
+                ),
             )
+        )
+        columns = None if include_copies else "book_id, accession_number"
 
-        # Insert all at once
-        created_copies = await self.broker.InsertCopiesBulk(copies_data)
-        return [BookCopyResponse(**copy) for copy in created_copies]
+        for chunk in _chunks(rows, self.chunk_size):
+            try:
+                created = await self.broker.InsertCopiesBulk(chunk, columns=columns)
+            except APIError:
+                # Outages (DatabaseUnavailableError) propagate; a rejected chunk
+                # ends the run and earlier chunks stay inserted
+                logger.exception(
+                    "Bulk acquisition insert failed after %d copies", report.inserted
+                )
+                report.error = f"Insert failed after {report.inserted} copies"
+                break
+
+            for copy in created:
+                book_id = str(copy["book_id"])
+                title = titles[book_id]
+                title.created += 1
+                numbers[book_id].append(copy["accession_number"])
+                if include_copies:
+                    if title.copies is None:
+                        title.copies = []
+                    title.copies.append(BookCopyResponse(**copy))
+            report.inserted += len(created)
+            yield AcquisitionProgress(inserted=report.inserted, total=report.total)
+
+        for book_id, title in titles.items():
+            title.accession_ranges = accession_ranges(numbers[book_id])
+        report.titles = list(titles.values())
+        yield report
 
     async def ModifyCopy(
         self, copy_id: UUID, copy_update: BookCopyUpdate
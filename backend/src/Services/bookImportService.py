@@ -0,0 +1,276 @@
+import csv
+import io
+import re
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from defusedxml import DefusedXmlException
+from defusedxml.ElementTree import ParseError
+from pydantic import ValidationError
+
+from ..Brokers.bookBroker import BookBroker
+from ..Brokers.bookCopyBroker import BookCopyBroker
+from ..Models.Books import (
+    BookCreate,
+    BookImportReport,
+    BookImportRowResult,
+    ImportFormat,
+    ImportRowStatus,
+)
+from ..utils.executors import CATALOG, workload
+from ..utils.marc import MarcError, iter_iso2709, iter_marcxml, marc_to_book
+from ..utils.streaming import iterate_in_thread
+from .bookCopyService import build_copy_rows
+
+# Copies one import may create per title, from the query or a CSV "copies" cell
+MAX_COPIES_PER_TITLE = 100
+
+FORMAT_EXTENSIONS = {
+    ".csv": ImportFormat.CSV,
+    ".mrc": ImportFormat.MARC,
+    ".marc": ImportFormat.MARC,
+    ".dat": ImportFormat.MARC,
+    ".xml": ImportFormat.MARCXML,
+}
+
+
+def detect_import_format(filename: Optional[str]) -> ImportFormat:
+    """Infer the upload format from its file extension"""
+    name = (filename or "").lower()
+    for extension, import_format in FORMAT_EXTENSIONS.items():
+        if name.endswith(extension):
+            return import_format
+    raise ValueError(
+        "Cannot infer the import format from the file name; "
+        "pass format=csv, marc or marcxml"
+    )
+
+
+def normalize_isbn(isbn: Optional[str]) -> str:
+    """Compare ISBNs without hyphens, spaces or case differences"""
+    return re.sub(r"[^0-9X]", "", (isbn or "").upper())
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[dict]:
+    """Read CSV rows one at a time; headers are matched case-insensitively"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        yield {
+            key.strip().lower(): (value.strip() or None) if value else None
+            for key, value in row.items()
+            if key
+        }
+
+
+def iter_records(stream: BinaryIO, import_format: ImportFormat) -> Iterator:
+    """Yield one book dict (or MarcError) per record in the upload"""
+    if import_format == ImportFormat.CSV:
+        yield from iter_csv_rows(stream)
+    elif import_format == ImportFormat.MARC:
+        for record in iter_iso2709(stream):
+            yield record if isinstance(record, MarcError) else marc_to_book(record)
+    else:
+        for record in iter_marcxml(stream):
+            yield marc_to_book(record)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+@workload(CATALOG)
+class BookImportService:
+    """Bulk catalog import: parse incrementally, dedupe by ISBN, insert in chunks"""
+
+    def __init__(
+        self,
+        book_broker: BookBroker,
+        copy_broker: BookCopyBroker,
+        chunk_size: int = 500,
+    ):
+        self.book_broker = book_broker
+        self.copy_broker = copy_broker
+        self.chunk_size = chunk_size
+
+    async def ImportBooks(
+        self,
+        stream: BinaryIO,
+        import_format: ImportFormat,
+        copies: int = 0,
+        reference_percentage: int = 30,
+    ) -> BookImportReport:
+        """
+        Import a CSV, MARC21 or MARCXML catalog file
+
+        Args:
+            stream: The uploaded file
+            import_format: How to parse it
+            copies: Copies to create for each new title (a CSV "copies" column
+                overrides this per row)
+            reference_percentage: Share of those copies marked as reference
+
+        Returns:
+            A report with one entry per record in the file
+        """
+        if copies < 0 or copies > MAX_COPIES_PER_TITLE:
+            raise ValueError(f"Copies must be between 0 and {MAX_COPIES_PER_TITLE}")
+        if reference_percentage < 0 or reference_percentage > 100:
+            raise ValueError("Reference percentage must be between 0 and 100")
+
+        # One ISBN query for the whole import instead of one per row
+        seen = {
+            normalize_isbn(isbn) for isbn in await self.book_broker.SelectAllIsbns()
+        }
+
+        report = BookImportReport()
+        pending: List[Tuple[BookImportRowResult, dict, int]] = []
+        row_number = 0
+
+        try:
+            async for batch in iterate_in_thread(
+                iter_records(stream, import_format), self.chunk_size
+            ):
+                for record in batch:
+                    row_number += 1
+                    result = self._PrepareRow(row_number, record, copies, seen, pending)
+                    report.rows.append(result)
+
+                    if len(pending) >= self.chunk_size:
+                        await self._FlushChunk(pending, reference_percentage)
+        except (ParseError, DefusedXmlException, csv.Error, UnicodeDecodeError) as e:
+            report.rows.append(
+                BookImportRowResult(
+                    row=row_number + 1,
+                    status=ImportRowStatus.ERROR,
+                    error=f"File could not be parsed past this point: {e}",
+                )
+            )
+
+        await self._FlushChunk(pending, reference_percentage)
+
+        for result in report.rows:
+            if result.status == ImportRowStatus.CREATED:
+                report.created += 1
+            elif result.status == ImportRowStatus.DUPLICATE:
+                report.duplicates += 1
+            else:
+                report.errors += 1
+            report.copies_created += result.copies_created
+        report.total = row_number
+        return report
+
+    def _PrepareRow(
+        self,
+        row_number: int,
+        record,
+        copies: int,
+        seen: set,
+        pending: List[Tuple[BookImportRowResult, dict, int]],
+    ) -> BookImportRowResult:
+        """Validate one record and queue it for insertion unless it is a duplicate"""
+        if isinstance(record, Exception):
+            return BookImportRowResult(
+                row=row_number, status=ImportRowStatus.ERROR, error=str(record)
+            )
+
+        isbn = record.get("isbn")
+        quantity = copies
+        raw_copies = record.pop("copies", None)
+        if raw_copies is not None:
+            try:
+                quantity = int(raw_copies)
+            except ValueError:
+                quantity = -1
+            if quantity < 0 or quantity > MAX_COPIES_PER_TITLE:
+                return BookImportRowResult(
+                    row=row_number,
+                    isbn=isbn,
+                    status=ImportRowStatus.ERROR,
+                    error=(
+                        f"Invalid copies value: {raw_copies} "
+                        f"(0 to {MAX_COPIES_PER_TITLE})"
+                    ),
+                )
+
+        try:
+            book = BookCreate(**record)
+        except ValidationError as e:
+            return BookImportRowResult(
+                row=row_number,
+                isbn=isbn,
+                status=ImportRowStatus.ERROR,
+                error=_validation_message(e),
+            )
+
+        key = normalize_isbn(book.isbn)
+        if not key:
+            return BookImportRowResult(
+                row=row_number,
+                isbn=book.isbn,
+                status=ImportRowStatus.ERROR,
+                error="Missing ISBN",
+            )
+        if key in seen:
+            return BookImportRowResult(
+                row=row_number,
+                isbn=book.isbn,
+                status=ImportRowStatus.DUPLICATE,
+                error="ISBN already exists",
+            )
+
+        seen.add(key)
+        result = BookImportRowResult(
+            row=row_number, isbn=book.isbn, status=ImportRowStatus.CREATED
+        )
+        pending.append((result, book.model_dump(), quantity))
+        return result
+
+    async def _FlushChunk(
+        self,
+        pending: List[Tuple[BookImportRowResult, dict, int]],
+        reference_percentage: int,
+    ) -> None:
+        """Insert queued books in one request, then all of their copies in another"""
+        if not pending:
+            return
+        chunk = list(pending)
+        pending.clear()
+
+        try:
+            inserted = await self.book_broker.InsertBooksBulk(
+                [book_data for _, book_data, _ in chunk]
+            )
+        except Exception as e:
+            for result, _, _ in chunk:
+                result.status = ImportRowStatus.ERROR
+                result.error = f"Insert failed: {e}"
+            return
+
+        book_ids = {normalize_isbn(book["isbn"]): book["id"] for book in inserted}
+        copy_rows = []
+        with_copies = []
+        for result, book_data, quantity in chunk:
+            book_id = book_ids.get(normalize_isbn(book_data["isbn"]))
+            if book_id is None:
+                # Added by someone else since the ISBNs were preloaded
+                result.status = ImportRowStatus.DUPLICATE
+                result.error = "ISBN already exists"
+                continue
+            result.book_id = book_id
+            if quantity:
+                copy_rows.extend(
+                    build_copy_rows(book_id, quantity, reference_percentage)
+                )
+                result.copies_created = quantity
+                with_copies.append(result)
+
+        if not copy_rows:
+            return
+        try:
+            await self.copy_broker.InsertCopiesBulk(copy_rows)
+        except Exception as e:
+            for result in with_copies:
+                result.copies_created = 0
+                result.error = f"Book created but copies failed: {e}"
@@ -10,19 +10,23 @@ from ..Models.Books import (
     BookWithStatsResponse,
     CourseInfo,
 )
+from ..utils.executors import CATALOG, workload
 from .IService import IBookService
 
 
+@workload(CATALOG)
 class BookService(IBookService):
     def __init__(self, broker: BookBroker):
         self.broker = broker
 
     async def RetrieveAllBooks(
-        self, skip: int = 0, limit: int = 10
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
     ) -> List[BookResponse]:
         return [
             BookResponse(**book)
-            for book in await self.broker.SelectAllBooks(skip=skip, limit=limit)
+            for book in await self.broker.SelectAllBooks(
+                skip=skip, limit=limit, fields=fields
+            )
         ]
 
     async def RetrieveBookById(self, book_id: UUID) -> Optional[BookResponse]:
@@ -48,17 +52,19 @@ class BookService(IBookService):
     async def RemoveBook(self, book_id: UUID) -> bool:
         return await self.broker.DeleteBook(book_id)
 
-    async def SearchBooks(self, query: str) -> List[BookResponse]:
+    async def SearchBooks(
+        self, query: str, fields: Optional[List[str]] = None
+    ) -> List[BookResponse]:
         """Search books by title, author, or ISBN"""
-        books = await self.broker.SearchBooks(query)
+        books = await self.broker.SearchBooks(query, fields=fields)
         return [BookResponse(**book) for book in books]
 
     async def RetrieveBooksWithStats(
-        self, skip: int = 0, limit: int = 50
+        self, skip: int = 0, limit: int = 50, fields: Optional[List[str]] = None
     ) -> List[BookWithStatsResponse]:
         """Get books with copy statistics"""
         books_with_stats = await self.broker.SelectAllBooksWithStats(
-            skip=skip, limit=limit
+            skip=skip, limit=limit, fields=fields
         )
         result = []
         for book_data in books_with_stats:
@@ -70,11 +76,11 @@ class BookService(IBookService):
         return result
 
     async def RetrieveBooksWithStatsAndCourses(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None
     ) -> List[BookWithStatsAndCoursesResponse]:
         """Get books with copy statistics and associated courses"""
         books_data = await self.broker.SelectAllBooksWithStatsAndCourses(
-            skip=skip, limit=limit
+            skip=skip, limit=limit, fields=fields
         )
         result = []
         for book_data in books_data:
@@ -11,8 +11,10 @@ from ..Models.Courses import (
     EnrollmentCreate,
     EnrollmentResponse,
 )
+from ..utils.executors import CATALOG, workload
 
 
+@workload(CATALOG)
 class CourseService:
     def __init__(self, broker: CourseBroker):
         self.broker = broker
@@ -20,10 +22,12 @@ class CourseService:
     # ==================== COURSES ====================
 
     async def RetrieveAllCourses(
-        self, skip: int = 0, limit: int = 10
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
     ) -> List[CourseResponse]:
         """Get all courses with pagination"""
-        courses = await self.broker.SelectAllCourses(skip=skip, limit=limit)
+        courses = await self.broker.SelectAllCourses(
+            skip=skip, limit=limit, fields=fields
+        )
         return [CourseResponse(**course) for course in courses]
 
     async def RetrieveCourseByCode(self, code: str) -> Optional[CourseResponse]:
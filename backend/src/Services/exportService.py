@@ -0,0 +1,96 @@
+from datetime import date
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
+
+from ..Brokers.bookBroker import BOOK_LIST_COLUMNS, BookBroker
+from ..Brokers.bookCopyBroker import COPY_COLUMNS, BookCopyBroker
+from ..Brokers.loanBroker import LOAN_COLUMNS, LoanBroker
+from ..Brokers.userBroker import USER_COLUMNS, UserBroker
+from ..Models.Exports import ExportFormat, ExportResource
+from ..utils.executors import REPORTS, workload
+from ..utils.projection import parse_columns
+from ..utils.streaming import csv_chunks, ndjson_chunks
+
+EXPORT_COLUMNS = {
+    ExportResource.LOANS: parse_columns(LOAN_COLUMNS),
+    ExportResource.BOOKS: parse_columns(BOOK_LIST_COLUMNS),
+    ExportResource.COPIES: parse_columns(COPY_COLUMNS),
+    ExportResource.USERS: parse_columns(USER_COLUMNS),
+}
+
+
+@workload(REPORTS)
+class ExportService:
+    """Streams whole tables page by page, so memory use is one page at a time"""
+
+    def __init__(
+        self,
+        book_broker: BookBroker,
+        copy_broker: BookCopyBroker,
+        user_broker: UserBroker,
+        loan_broker: LoanBroker,
+        page_size: int = 1000,
+    ):
+        self.book_broker = book_broker
+        self.copy_broker = copy_broker
+        self.user_broker = user_broker
+        self.loan_broker = loan_broker
+        self.page_size = page_size
+
+    def ExportRows(
+        self,
+        resource: ExportResource,
+        export_format: ExportFormat,
+        user_id: Optional[UUID] = None,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Validate an export request and return its encoded chunks
+
+        Validation happens here, before the first chunk is produced, so errors
+        can still be reported as a 400 instead of a truncated stream.
+        """
+        filters = {
+            "user_id": user_id,
+            "status": status,
+            "from_date": from_date,
+            "to_date": to_date,
+        }
+        if resource != ExportResource.LOANS:
+            if any(value is not None for value in filters.values()):
+                raise ValueError("Filters are only supported for loan exports")
+            filters = {}
+        for name in ("from_date", "to_date"):
+            if filters.get(name) is not None:
+                try:
+                    filters[name] = date.fromisoformat(filters[name]).isoformat()
+                except ValueError:
+                    raise ValueError(f"{name} must be a date (YYYY-MM-DD)") from None
+
+        pages = self.IteratePages(resource, **filters)
+        if export_format == ExportFormat.CSV:
+            return csv_chunks(pages, EXPORT_COLUMNS[resource])
+        return ndjson_chunks(pages)
+
+    async def IteratePages(
+        self, resource: ExportResource, **filters
+    ) -> AsyncIterator[List[dict]]:
+        """Yield pages of rows ordered by id, using the last id as the cursor"""
+        fetch_page = {
+            ExportResource.LOANS: self.loan_broker.SelectLoansPage,
+            ExportResource.BOOKS: self.book_broker.SelectBooksPage,
+            ExportResource.COPIES: self.copy_broker.SelectCopiesPage,
+            ExportResource.USERS: self.user_broker.SelectUsersPage,
+        }[resource]
+
+        after_id = None
+        while True:
+            page = await fetch_page(after_id=after_id, limit=self.page_size, **filters)
+            if not page:
+                return
+            yield page
+            if len(page) < self.page_size:
+                return
+            after_id = page[-1]["id"]
@@ -7,6 +7,10 @@ from ..Brokers.courseBroker import CourseBroker
 from ..Brokers.loanBroker import LoanBroker
 from ..Brokers.userBroker import UserBroker
 from ..Models.Loans import (
+    DeskAction,
+    DeskBatchResult,
+    DeskItemResult,
+    DeskOutcome,
     LoanPolicyResponse,
     LoanPolicyUpdate,
     LoanResponse,
@@ -14,8 +18,13 @@ from ..Models.Loans import (
     LoanUpdate,
     LoanWithBookInfo,
 )
+from ..utils.executors import CIRCULATION, workload
+from ..utils.replicas import on_primary
 
 
+# Write paths are @on_primary: the checks they make before writing (policy
+# limits, copy status, loan state) must not read a lagging replica
+@workload(CIRCULATION)
 class LoanService:
     def __init__(
         self,
@@ -31,9 +40,13 @@ class LoanService:
 
     # ==================== QUERIES ====================
 
-    async def get_all_loans(self, skip: int = 0, limit: int = 10) -> List[LoanResponse]:
+    async def get_all_loans(
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
+    ) -> List[LoanResponse]:
         """Get all loans with pagination"""
-        loans = await self.loan_broker.SelectAllLoans(skip=skip, limit=limit)
+        loans = await self.loan_broker.SelectAllLoans(
+            skip=skip, limit=limit, fields=fields
+        )
         return [LoanResponse(**loan) for loan in loans]
 
     async def get_loan_by_id(self, loan_id: UUID) -> Optional[LoanResponse]:
@@ -118,6 +131,7 @@ class LoanService:
         policy_data = await self.loan_broker.SelectLoanPolicy(role)
         return LoanPolicyResponse(**policy_data) if policy_data else None
 
+    @on_primary
     async def update_loan_policy(
         self, role: str, policy_update: LoanPolicyUpdate
     ) -> Optional[LoanPolicyResponse]:
@@ -137,6 +151,7 @@ class LoanService:
 
     # ==================== LOAN CREATION ====================
 
+    @on_primary
     async def create_loan_request(self, user_id: UUID, copy_id: UUID) -> LoanResponse:
         """
         Create a new loan request with full validation
@@ -286,6 +301,7 @@ class LoanService:
 
     # ==================== LOAN APPROVAL ====================
 
+    @on_primary
     async def approve_loan(self, loan_id: UUID) -> LoanResponse:
         """
         Approve a loan request
@@ -326,6 +342,7 @@ class LoanService:
 
     # ==================== LOAN CHECKOUT (PICKUP) ====================
 
+    @on_primary
     async def checkout_loan(self, loan_id: UUID) -> LoanResponse:
         """
         Mark a loan as checked out (patron picked up the book)
@@ -355,6 +372,7 @@ class LoanService:
 
     # ==================== LOAN REJECTION ====================
 
+    @on_primary
     async def reject_loan(self, loan_id: UUID) -> LoanResponse:
         """Reject a loan request (Admin only)"""
         loan = await self.loan_broker.SelectLoanById(loan_id)
@@ -374,6 +392,7 @@ class LoanService:
 
     # ==================== LOAN CANCELLATION ====================
 
+    @on_primary
     async def cancel_loan(
         self, loan_id: UUID, user_id: Optional[UUID] = None
     ) -> LoanResponse:
@@ -411,6 +430,7 @@ class LoanService:
 
     # ==================== LOAN RETURN ====================
 
+    @on_primary
     async def return_loan(
         self, loan_id: UUID, increment_infractions: bool = False
     ) -> LoanResponse:
@@ -462,20 +482,70 @@ class LoanService:
 
         return LoanResponse(**updated_loan) if updated_loan else None
 
+    # ==================== DESK CIRCULATION ====================
+
+    @on_primary
+    async def process_desk_batch(
+        self,
+        action: DeskAction,
+        accession_numbers: List[int],
+        increment_infractions: bool = False,
+    ) -> DeskBatchResult:
+        """
+        Return or check out a batch of scanned copies in one round trip
+
+        Applies the same rules as return_loan / checkout_loan to every copy's
+        open loan inside a single database transaction. Copies without a
+        matching loan are reported and skipped rather than failing the batch.
+        """
+        # Repeated scans of the same barcode are processed once
+        scanned = list(dict.fromkeys(accession_numbers))
+        if not scanned:
+            raise ValueError("No accession numbers provided")
+
+        if action == DeskAction.RETURN:
+            rows = await self.loan_broker.DeskReturnCopies(
+                scanned, increment_infractions
+            )
+            applied = DeskOutcome.RETURNED
+        else:
+            rows = await self.loan_broker.DeskCheckoutCopies(scanned)
+            applied = DeskOutcome.CHECKED_OUT
+
+        by_accession = {row["accession_number"]: row for row in rows}
+        result = DeskBatchResult(action=action)
+        for accession_number in scanned:
+            row = by_accession.get(accession_number)
+            item = (
+                DeskItemResult(**row)
+                if row
+                else DeskItemResult(
+                    accession_number=accession_number, outcome=DeskOutcome.NOT_FOUND
+                )
+            )
+            if item.outcome == applied:
+                result.processed += 1
+            else:
+                result.skipped += 1
+            result.items.append(item)
+
+        return result
+
     # ==================== OVERDUE DETECTION ====================
 
+    @on_primary
     async def mark_overdue_loans(self) -> List[LoanResponse]:
         """
         Mark all active loans past their due date as overdue
 
-        This should be run periodically (e.g., daily cron job)
+        Run periodically by the overdue job (see lifecycle.py)
         """
-        overdue_loans = await self.loan_broker.select_overdue_loans()
+        overdue_loans = await self.loan_broker.SelectOverdueLoans()
         updated_loans = []
 
         for loan in overdue_loans:
             update_data = {"status": "overdue"}
-            updated_loan = await self.loan_broker.update_loan(
+            updated_loan = await self.loan_broker.UpdateLoan(
                 UUID(loan["id"]), update_data
             )
             if updated_loan:
@@ -485,6 +555,7 @@ class LoanService:
 
     # ==================== GENERAL UPDATE ====================
 
+    @on_primary
     async def update_loan(
         self, loan_id: UUID, loan_update: LoanUpdate
     ) -> Optional[LoanResponse]:
@@ -511,6 +582,7 @@ class LoanService:
         updated_loan = await self.loan_broker.UpdateLoan(loan_id, update_data)
         return LoanResponse(**updated_loan) if updated_loan else None
 
+    @on_primary
     async def delete_loan(self, loan_id: UUID) -> bool:
         """Delete a loan (admin only, use with caution)"""
         return await self.loan_broker.DeleteLoan(loan_id)
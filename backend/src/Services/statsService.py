@@ -1,16 +1,36 @@
-from typing import List
+import time
+from typing import List, Optional
 
 from ..Brokers.statsBroker import StatsBroker
+from ..utils.executors import REPORTS, workload
 
 
+@workload(REPORTS)
 class StatsService:
-    def __init__(self, broker: StatsBroker):
+    def __init__(self, broker: StatsBroker, rollup_max_age: float = 0.0):
         self.broker = broker
+        # Dashboard rollup refreshed by the background job (see lifecycle.py);
+        # served while younger than rollup_max_age seconds, 0 disables it
+        self.rollup_max_age = rollup_max_age
+        self._dashboard: Optional[dict] = None
+        self._dashboard_at = 0.0
 
     # ==================== DASHBOARD STATISTICS ====================
 
     async def get_dashboard_stats(self) -> dict:
         """Get comprehensive dashboard statistics"""
+        age = time.monotonic() - self._dashboard_at
+        if self._dashboard is not None and age < self.rollup_max_age:
+            return self._dashboard
+        return await self._compute_dashboard_stats()
+
+    async def refresh_dashboard_stats(self) -> dict:
+        """Recompute the dashboard rollup"""
+        self._dashboard = await self._compute_dashboard_stats()
+        self._dashboard_at = time.monotonic()
+        return self._dashboard
+
+    async def _compute_dashboard_stats(self) -> dict:
         return {
             "books": {
                 "total_books": await self.broker.get_total_books(),
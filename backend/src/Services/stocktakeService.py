@@ -0,0 +1,122 @@
+from typing import List, Optional
+from uuid import UUID
+
+from ..Brokers.stocktakeBroker import StocktakeBroker
+from ..Models.Stocktake import (
+    DiscrepancyKind,
+    StocktakeApplyResult,
+    StocktakeDiscrepancy,
+    StocktakeScanReceipt,
+    StocktakeSessionCreate,
+    StocktakeSessionResponse,
+    StocktakeStatus,
+)
+from ..utils.executors import CATALOG, workload
+
+
+class SessionNotFoundError(ValueError):
+    """The stocktake session doesn't exist (404 rather than a bad request)"""
+
+
+@workload(CATALOG)
+class StocktakeService:
+    """Inventory stocktake: collect shelf scans, reconcile, apply status changes"""
+
+    def __init__(self, broker: StocktakeBroker):
+        self.broker = broker
+
+    async def OpenSession(
+        self, session: StocktakeSessionCreate, created_by: Optional[UUID] = None
+    ) -> StocktakeSessionResponse:
+        """Start a new stocktake session"""
+        session_data = session.model_dump()
+        session_data["status"] = StocktakeStatus.OPEN.value
+        if created_by:
+            session_data["created_by"] = str(created_by)
+        created = await self.broker.InsertSession(session_data)
+        return StocktakeSessionResponse(**created)
+
+    async def RetrieveSessions(
+        self, skip: int = 0, limit: int = 20
+    ) -> List[StocktakeSessionResponse]:
+        """Get stocktake sessions, newest first"""
+        sessions = await self.broker.SelectSessions(skip=skip, limit=limit)
+        return [StocktakeSessionResponse(**session) for session in sessions]
+
+    async def RetrieveSession(
+        self, session_id: UUID
+    ) -> Optional[StocktakeSessionResponse]:
+        """Get a stocktake session by ID"""
+        session = await self.broker.SelectSessionById(session_id)
+        return StocktakeSessionResponse(**session) if session else None
+
+    async def AddScans(
+        self, session_id: UUID, accession_numbers: List[int]
+    ) -> StocktakeScanReceipt:
+        """
+        Store a chunk of shelf scans
+
+        The chunk is de-duplicated and sorted before it is stored as one array
+        row. Adding scans to a reconciled session reopens it.
+        """
+        session = await self._RequireSession(session_id)
+        if session["status"] == StocktakeStatus.APPLIED.value:
+            raise ValueError("Stocktake session has already been applied")
+
+        numbers = sorted(set(accession_numbers))
+        await self.broker.InsertScanChunk(session_id, numbers)
+
+        if session["status"] == StocktakeStatus.RECONCILED.value:
+            await self.broker.UpdateSession(
+                session_id, {"status": StocktakeStatus.OPEN.value}
+            )
+
+        return StocktakeScanReceipt(
+            session_id=session_id,
+            received=len(accession_numbers),
+            stored=len(numbers),
+        )
+
+    async def Reconcile(self, session_id: UUID) -> StocktakeSessionResponse:
+        """Flag missing, found-while-lost, on-loan and unknown copies"""
+        session = await self._RequireSession(session_id)
+        if session["status"] == StocktakeStatus.APPLIED.value:
+            raise ValueError("Stocktake session has already been applied")
+
+        reconciled = await self.broker.ReconcileSession(session_id)
+        return StocktakeSessionResponse(**reconciled)
+
+    async def RetrieveDiscrepancies(
+        self,
+        session_id: UUID,
+        kind: Optional[DiscrepancyKind] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[StocktakeDiscrepancy]:
+        """Get the discrepancies found by the last reconciliation"""
+        await self._RequireSession(session_id)
+        rows = await self.broker.SelectDiscrepancies(
+            session_id, kind.value if kind else None, skip=skip, limit=limit
+        )
+        return [StocktakeDiscrepancy(**row) for row in rows]
+
+    async def ApplyChanges(self, session_id: UUID) -> StocktakeApplyResult:
+        """Apply the proposed copy status changes of a reconciled session"""
+        session = await self._RequireSession(session_id)
+        if session["status"] != StocktakeStatus.RECONCILED.value:
+            raise ValueError(
+                "Only reconciled stocktake sessions can be applied. "
+                f"Current status: {session['status']}"
+            )
+
+        updated = await self.broker.ApplySession(session_id)
+        applied = await self.broker.SelectSessionById(session_id)
+        return StocktakeApplyResult(
+            session=StocktakeSessionResponse(**applied), copies_updated=updated
+        )
+
+    async def _RequireSession(self, session_id: UUID) -> dict:
+        session = await self.broker.SelectSessionById(session_id)
+        if not session:
+            raise SessionNotFoundError("Stocktake session not found")
+        return session
@@ -1,8 +1,9 @@
-from typing import List, Optional
+import base64
+import json
+import logging
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from werkzeug.security import check_password_hash, generate_password_hash
-
 from ..Brokers.userBroker import UserBroker
 from ..Models.Users import (
     UserCreate,
@@ -11,29 +12,37 @@ from ..Models.Users import (
     UserStats,
     UserUpdate,
 )
+from ..utils.executors import AUTH, CIRCULATION, workload
+from ..utils.passwords import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
 
 
+@workload(CIRCULATION)
 class UserService:
     def __init__(self, broker: UserBroker):
         self.broker = broker
 
     async def RetrieveAllUsers(
-        self, skip: int = 0, limit: int = 10
+        self, skip: int = 0, limit: int = 10, fields: Optional[List[str]] = None
     ) -> List[UserResponse]:
         return [
             UserResponse(**user)
-            for user in await self.broker.SelectAllUsers(skip=skip, limit=limit)
+            for user in await self.broker.SelectAllUsers(
+                skip=skip, limit=limit, fields=fields
+            )
         ]
 
     async def RetrieveUserById(self, user_id: UUID) -> Optional[UserResponse]:
         user_data = await self.broker.SelectUserById(user_id)
         return UserResponse(**user_data) if user_data is not None else None
 
+    @workload(AUTH)
     async def AddUser(self, user: UserCreate) -> UserResponse:
         existing_user = await self.broker.SelectUserByUniversityId(user.university_id)
         if existing_user:
             raise ValueError(f"University ID {user.university_id} already exists")
-        hashed_password = generate_password_hash(user.password)
+        hashed_password = await hash_password(user.password)
         user_data = {
             "university_id": user.university_id,
             "role": user.role.value,
@@ -52,7 +61,7 @@ class UserService:
             return None
         update_data = user.model_dump(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = generate_password_hash(
+            update_data["hashed_password"] = await hash_password(
                 update_data.pop("password")
             )
         updated_user = await self.broker.UpdateUser(user_id, update_data)
@@ -61,6 +70,7 @@ class UserService:
     async def RemoveUser(self, user_id: UUID) -> bool:
         return await self.broker.DeleteUser(user_id)
 
+    @workload(AUTH)
     async def AuthenticateUser(
         self, email: str, password: str
     ) -> Optional[UserResponse]:
@@ -69,9 +79,21 @@ class UserService:
         if not user_data or "hashed_password" not in user_data:
             return None
 
-        if not check_password_hash(user_data["hashed_password"], password):
+        valid, new_hash = await verify_password(user_data["hashed_password"], password)
+        if not valid:
             return None
 
+        if new_hash is not None:
+            # Stored with an older method or cost; upgrade while we have the password
+            try:
+                await self.broker.UpdateUser(
+                    UUID(user_data["id"]), {"hashed_password": new_hash}
+                )
+            except Exception:
+                logger.exception(
+                    "Rehashing the password of user %s failed", user_data["id"]
+                )
+
         return UserResponse(**user_data)
 
     async def SearchUsers(self, query: str) -> List[UserResponse]:
@@ -79,6 +101,37 @@ class UserService:
         users = await self.broker.SearchUsers(query)
         return [UserResponse(**user) for user in users]
 
+    async def SearchUsersPage(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[UserResponse], Optional[str]]:
+        """
+        Search users one page at a time
+
+        Returns the matching users and an opaque cursor for the next page
+        (None when there are no more results).
+        """
+        after = _decode_search_cursor(cursor) if cursor else None
+        users = await self.broker.SearchUsers(
+            query, limit=limit, cursor=after, fields=fields
+        )
+
+        next_cursor = None
+        if len(users) == limit:
+            last = users[-1]
+            next_cursor = _encode_search_cursor(
+                {
+                    "rank": last.get("search_rank", 2),
+                    "full_name": last["full_name"],
+                    "id": str(last["id"]),
+                }
+            )
+
+        return [UserResponse(**user) for user in users], next_cursor
+
     async def RetrieveUserDashboard(
         self, user_id: UUID
     ) -> Optional[UserDashboardResponse]:
@@ -92,3 +145,22 @@ class UserService:
         return UserDashboardResponse(
             user=UserResponse(**user_data), stats=UserStats(**stats_data)
         )
+
+
+def _encode_search_cursor(position: dict) -> str:
+    """Encode the last seen search position as an opaque URL-safe cursor"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_search_cursor(cursor: str) -> dict:
+    """Decode a cursor produced by _encode_search_cursor"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            "rank": int(position["rank"]),
+            "full_name": str(position["full_name"]),
+            "id": str(UUID(position["id"])),
+        }
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid search cursor")
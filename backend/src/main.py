@@ -1,14 +1,66 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from scalar_fastapi import get_scalar_api_reference
 
 from .routers.bookCopyRouter import router as book_copy_router
 from .routers.bookRouter import router as book_router
 from .routers.courseRouter import router as course_router
+from .routers.diagnosticsRouter import router as diagnostics_router
+from .routers.exportRouter import router as export_router
 from .routers.loanRouter import router as loan_router
 from .routers.statsRouter import router as stats_router
+from .routers.stocktakeRouter import router as stocktake_router
 from .routers.userRouter import router as user_router
-from .utils.config import get_supabase
+from .utils.config import get_settings
+from .utils.database import close_database
+from .utils.dependencies import get_container, get_db_client, reset_container
+from .utils.executors import shutdown_executors
+from .utils.instrumentation import QueryStatsMiddleware
+from .utils.lifecycle import get_lifecycle
+from .utils.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from .utils.profiling import ProfileMiddleware
+from .utils.resilience import DeadlineMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+async def _release_resources() -> None:
+    reset_container()
+    await close_database()
+    shutdown_executors()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up this worker on startup, drain and clean up on shutdown"""
+    settings = get_settings()
+    lifecycle = get_lifecycle()
+    logger.info("Library System API starting up")
+    try:
+        # Builds the client and every broker / service once for this worker,
+        # warms the pool and caches and starts the background jobs
+        container = await get_container(await get_db_client())
+        await lifecycle.startup(container, settings)
+    except Exception:
+        # Abort the worker rather than serve without a database
+        logger.exception("Library System API failed to start")
+        await _release_resources()
+        raise
+    logger.info(
+        "Library System API ready (docs at /docs, metrics at /metrics, "
+        "readiness at /readyz)"
+    )
+
+    yield
+
+    logger.info("Library System API shutting down")
+    await lifecycle.shutdown(settings)
+    await _release_resources()
+
 
 app = FastAPI(
     title="Library System API",
@@ -18,6 +70,7 @@ app = FastAPI(
     """,
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -26,7 +79,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "ETag",
+        "X-DB-Queries",
+        "Server-Timing",
+        "X-Profile-Id",
+    ],
 )
+# Innermost, so profiling and instrumentation overhead don't eat the deadline
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfileMiddleware)
 
 app.include_router(user_router)
 app.include_router(book_router)
@@ -34,6 +99,9 @@ app.include_router(book_copy_router)
 app.include_router(course_router)
 app.include_router(loan_router)
 app.include_router(stats_router)
+app.include_router(export_router)
+app.include_router(stocktake_router)
+app.include_router(diagnostics_router)
 
 
 @app.get("/docs", include_in_schema=False)
@@ -45,29 +113,23 @@ async def scalar_html():
     )
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    print("=" * 60)
-    print("🚀 Library System API starting up...")
-    print("=" * 60)
-    try:
-        get_supabase()
-        print("✅ Database connection initialized successfully")
-        print("📍 API Docs available at: http://localhost:8000/docs")
-        print("📍 User endpoints available at: http://localhost:8000/users")
-        print("=" * 60)
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-        print("=" * 60)
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    print("=" * 60)
-    print("👋 Library System API shutting down...")
-    print("=" * 60)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (per worker process)"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker is up and serving requests"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: pool warmed and not shutting down (503 otherwise)"""
+    lifecycle = get_lifecycle()
+    return JSONResponse(lifecycle.status(), status_code=200 if lifecycle.ready else 503)
 
 
 # ============================================
@@ -1,32 +1,45 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from ..Models.Books import (
+    AccessionResolveRequest,
+    AcquisitionReport,
     AddInventoryRequest,
     BookCopyCreate,
     BookCopyResponse,
     BookCopyUpdate,
     BookCopyWithBorrowerInfo,
     BookStatus,
+    BulkAcquisitionRequest,
+    CopyResolution,
 )
 from ..Services.bookCopyService import BookCopyService
 from ..utils.auth import get_current_user, require_admin
-from ..utils.dependencies import get_book_copy_service
+from ..utils.dependencies import get_book_copy_service, get_copy_list_fields
+from ..utils.serialization import json_response
 
 router = APIRouter(prefix="/book-copies", tags=["book-copies"])
 
 
-@router.get("/", response_model=List[BookCopyResponse])
+@router.get(
+    "/", response_model=List[BookCopyResponse], response_model_exclude_unset=True
+)
 async def get_all_copies(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[List[str]] = Depends(get_copy_list_fields),
     service: BookCopyService = Depends(get_book_copy_service),
     current_user: dict = Depends(get_current_user),
 ):
     """Get all book copies with pagination"""
-    return await service.RetrieveAllCopies(skip=skip, limit=limit)
+    return json_response(
+        List[BookCopyResponse],
+        await service.RetrieveAllCopies(skip=skip, limit=limit, fields=fields),
+        exclude_unset=True,
+    )
 
 
 @router.get("/book/{book_id}", response_model=List[BookCopyWithBorrowerInfo])
@@ -39,7 +52,10 @@ async def get_copies_by_book(
     current_user: dict = Depends(get_current_user),
 ):
     """Get all copies of a specific book with borrower info"""
-    return await service.RetrieveCopiesByBookIdWithBorrowerInfo(book_id, available_only)
+    return json_response(
+        List[BookCopyWithBorrowerInfo],
+        await service.RetrieveCopiesByBookIdWithBorrowerInfo(book_id, available_only),
+    )
 
 
 @router.get("/book/{book_id}/stats")
@@ -52,6 +68,21 @@ async def get_copy_stats(
     return await service.RetrieveCopyStats(book_id)
 
 
+@router.post("/accession/resolve", response_model=List[CopyResolution])
+async def resolve_accession_numbers(
+    request: AccessionResolveRequest,
+    service: BookCopyService = Depends(get_book_copy_service),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Resolve a batch of scanned barcodes in one call
+
+    Returns one entry per accession number, in the order given, with the copy,
+    its book and its open loan. Unknown numbers come back with found=false.
+    """
+    return await service.ResolveAccessionNumbers(request.accession_numbers)
+
+
 @router.get("/accession/{accession_number}", response_model=BookCopyResponse)
 async def get_copy_by_barcode(
     accession_number: int,
@@ -126,6 +157,58 @@ async def create_bulk_copies(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post(
+    "/bulk/acquisition",
+    response_model=AcquisitionReport,
+    status_code=status.HTTP_201_CREATED,
+)
+async def acquire_copies(
+    request: BulkAcquisitionRequest,
+    stream: bool = Query(
+        False, description="Stream NDJSON progress events, then the final report"
+    ),
+    include_copies: bool = Query(
+        False, description="Return full copy objects, not just accession ranges"
+    ),
+    service: BookCopyService = Depends(get_book_copy_service),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Create copies for many titles at once (Admin only)
+
+    Copies are inserted in chunks (BULK_COPY_CHUNK_SIZE). Each title reports the
+    accession number ranges it received. If a chunk fails, the report carries an
+    error and the copies from earlier chunks remain; without streaming the report
+    then comes with a 500.
+    """
+    try:
+        if not stream:
+            report = await service.AddCopiesForTitles(
+                request.items, request.reference_percentage, include_copies
+            )
+            if report.error:
+                return JSONResponse(
+                    report.model_dump(mode="json"),
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+            return report
+        events = await service.AcquireCopies(
+            request.items, request.reference_percentage, include_copies
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def _lines():
+        async for event in events:
+            yield event.model_dump_json() + "\n"
+
+    return StreamingResponse(
+        _lines(),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/x-ndjson",
+    )
+
+
 @router.patch("/{copy_id}", response_model=BookCopyResponse)
 async def update_copy(
     copy_id: UUID,
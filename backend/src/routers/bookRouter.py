@@ -1,53 +1,107 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
 
 from ..Models.Books import (
     BookCreate,
+    BookImportReport,
     BookResponse,
     BookWithStatsAndCoursesResponse,
     BookWithStatsResponse,
+    ImportFormat,
+)
+from ..Services.bookImportService import (
+    MAX_COPIES_PER_TITLE,
+    BookImportService,
+    detect_import_format,
 )
 from ..Services.bookService import BookService
 from ..utils.auth import get_current_user, require_admin
-from ..utils.dependencies import get_book_service
+from ..utils.cache import BOOKS, COPIES, COURSES, cached_json_response
+from ..utils.dependencies import (
+    get_book_import_service,
+    get_book_list_fields,
+    get_book_service,
+)
+from ..utils.serialization import json_response
 
 router = APIRouter(prefix="/books", tags=["books"])
 
 
-@router.get("/", response_model=List[BookResponse])
+@router.get("/", response_model=List[BookResponse], response_model_exclude_unset=True)
 async def get_books(
+    request: Request,
     skip: int = 0,
     limit: int = 10,
+    fields: Optional[List[str]] = Depends(get_book_list_fields),
     service: BookService = Depends(get_book_service),
     current_user: dict = Depends(get_current_user),
 ):
-    return await service.RetrieveAllBooks(skip=skip, limit=limit)
+    return await cached_json_response(
+        request,
+        [BOOKS],
+        List[BookResponse],
+        lambda: service.RetrieveAllBooks(skip=skip, limit=limit, fields=fields),
+        exclude_unset=True,
+    )
 
 
-@router.get("/with-stats", response_model=List[BookWithStatsResponse])
+@router.get(
+    "/with-stats",
+    response_model=List[BookWithStatsResponse],
+    response_model_exclude_unset=True,
+)
 async def get_books_with_stats(
+    request: Request,
     skip: int = 0,
     limit: int = 50,
+    fields: Optional[List[str]] = Depends(get_book_list_fields),
     service: BookService = Depends(get_book_service),
     current_user: dict = Depends(get_current_user),
 ):
     """Get books with copy statistics in one call"""
-    return await service.RetrieveBooksWithStats(skip=skip, limit=limit)
+    return await cached_json_response(
+        request,
+        [BOOKS, COPIES],
+        List[BookWithStatsResponse],
+        lambda: service.RetrieveBooksWithStats(skip=skip, limit=limit, fields=fields),
+        exclude_unset=True,
+    )
 
 
 @router.get(
-    "/with-stats-and-courses", response_model=List[BookWithStatsAndCoursesResponse]
+    "/with-stats-and-courses",
+    response_model=List[BookWithStatsAndCoursesResponse],
+    response_model_exclude_unset=True,
 )
 async def get_books_with_stats_and_courses(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[List[str]] = Depends(get_book_list_fields),
     service: BookService = Depends(get_book_service),
     current_user: dict = Depends(get_current_user),
 ):
     """Get books with copy statistics and associated courses in one call"""
-    return await service.RetrieveBooksWithStatsAndCourses(skip=skip, limit=limit)
+    return await cached_json_response(
+        request,
+        [BOOKS, COPIES, COURSES],
+        List[BookWithStatsAndCoursesResponse],
+        lambda: service.RetrieveBooksWithStatsAndCourses(
+            skip=skip, limit=limit, fields=fields
+        ),
+        exclude_unset=True,
+    )
 
 
 @router.get("/{book_id}", response_model=BookResponse)
@@ -56,6 +110,7 @@ async def get_book(
     service: BookService = Depends(get_book_service),
     current_user: dict = Depends(get_current_user),
 ):
+    """Get a single book, including its MARC data (list views omit it)"""
     book = await service.RetrieveBookById(book_id)
     if book is None:
         raise HTTPException(status_code=404, detail="Book not found")
@@ -76,6 +131,43 @@ async def create_book(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/import", response_model=BookImportReport)
+async def import_books(
+    file: UploadFile = File(..., description="CSV, MARC21 (.mrc) or MARCXML file"),
+    format: Optional[ImportFormat] = Query(
+        None, description="csv, marc or marcxml (inferred from the file name)"
+    ),
+    copies: int = Query(
+        0,
+        ge=0,
+        le=MAX_COPIES_PER_TITLE,
+        description="Copies per new title (CSV 'copies' overrides)",
+    ),
+    reference_percentage: int = Query(
+        30, ge=0, le=100, description="Percentage of copies to mark as reference"
+    ),
+    service: BookImportService = Depends(get_book_import_service),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Bulk import a catalog file (Admin only)
+
+    The file is parsed record by record, ISBNs are checked against the existing
+    catalog and the rest of the file, and new books are inserted in chunks.
+    Returns a per-row report (created / duplicate / error).
+    """
+    try:
+        import_format = format or detect_import_format(file.filename)
+        return await service.ImportBooks(
+            file.file,
+            import_format,
+            copies=copies,
+            reference_percentage=reference_percentage,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.put("/{book_id}", response_model=BookResponse)
 async def update_book(
     book_id: UUID,
@@ -133,9 +225,12 @@ async def delete_book(
     return None
 
 
-@router.get("/search/", response_model=List[BookResponse])
+@router.get(
+    "/search/", response_model=List[BookResponse], response_model_exclude_unset=True
+)
 async def search_books(
     q: str,
+    fields: Optional[List[str]] = Depends(get_book_list_fields),
     service: BookService = Depends(get_book_service),
     current_user: dict = Depends(get_current_user),
 ):
@@ -145,4 +240,8 @@ async def search_books(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Search query must be at least 2 characters",
         )
-    return await service.SearchBooks(q)
+    return json_response(
+        List[BookResponse],
+        await service.SearchBooks(q, fields=fields),
+        exclude_unset=True,
+    )
@@ -1,7 +1,7 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from ..Models.Courses import (
     CourseBookCreate,
@@ -14,22 +14,31 @@ from ..Models.Courses import (
 )
 from ..Services.courseService import CourseService
 from ..utils.auth import get_current_user, require_admin
-from ..utils.dependencies import get_course_service
+from ..utils.cache import COURSES, cached_json_response
+from ..utils.dependencies import get_course_list_fields, get_course_service
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
 # ==================== COURSES ====================
 
 
-@router.get("/", response_model=List[CourseResponse])
+@router.get("/", response_model=List[CourseResponse], response_model_exclude_unset=True)
 async def get_all_courses(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[List[str]] = Depends(get_course_list_fields),
     service: CourseService = Depends(get_course_service),
     current_user: dict = Depends(get_current_user),
 ):
     """Get all courses with pagination"""
-    return await service.RetrieveAllCourses(skip=skip, limit=limit)
+    return await cached_json_response(
+        request,
+        [COURSES],
+        List[CourseResponse],
+        lambda: service.RetrieveAllCourses(skip=skip, limit=limit, fields=fields),
+        exclude_unset=True,
+    )
 
 
 @router.get("/faculty/{faculty}", response_model=List[CourseResponse])
@@ -0,0 +1,68 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ..utils.auth import require_admin
+from ..utils.profiling import get_profile_store
+from ..utils.tracing import get_tracer
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
+
+
+@router.get("/traces")
+async def get_traces(
+    limit: int = Query(100, ge=1, le=1000),
+    slow_only: bool = Query(False, description="Only calls over the slow threshold"),
+    table: Optional[str] = Query(None, description="e.g. loans or rpc/search_users"),
+    operation: Optional[str] = Query(
+        None, description="e.g. LoanBroker.SelectLoansByStatusWithBookInfo"
+    ),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Recent broker database calls, newest first (Admin only)
+
+    Each span has the broker operation, the calling service method, the request
+    path, table, filter chain, row count and duration. Spans are per worker
+    process and only the most recent TRACE_BUFFER_SIZE are kept.
+    """
+    tracer = get_tracer()
+    return {
+        "slow_threshold_ms": tracer.slow_threshold_ms,
+        "spans": tracer.recent(
+            limit=limit, slow_only=slow_only, table=table, operation=operation
+        ),
+    }
+
+
+@router.get("/profiles")
+async def get_profiles(current_user: dict = Depends(require_admin)):
+    """
+    Recent request profiles, newest first (Admin only)
+
+    Send any request with `X-Profile: 1` as an admin to profile it; the response's
+    X-Profile-Id header identifies the entry.
+    """
+    return [profile.summary() for profile in get_profile_store().recent()]
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("summary", pattern="^(summary|collapsed)$"),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    One request profile (Admin only)
+
+    format=collapsed returns folded stacks for flamegraph.pl or speedscope.
+    """
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return profile.summary()
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from ..Models.Exports import ExportFormat, ExportResource
+from ..Models.Loans import LoanStatus
+from ..Services.exportService import ExportService
+from ..utils.auth import require_admin
+from ..utils.dependencies import get_export_service
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+@router.get("/{resource}")
+async def export_table(
+    resource: ExportResource,
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson or csv"),
+    user_id: Optional[UUID] = Query(None, description="Loans only: filter by user"),
+    loan_status: Optional[LoanStatus] = Query(
+        None, alias="status", description="Loans only: filter by status"
+    ),
+    from_date: Optional[str] = Query(
+        None, description="Loans only: request date from (YYYY-MM-DD)"
+    ),
+    to_date: Optional[str] = Query(
+        None, description="Loans only: request date to (YYYY-MM-DD)"
+    ),
+    service: ExportService = Depends(get_export_service),
+    current_user: dict = Depends(require_admin),
+):
+    """Stream a full table export as NDJSON or CSV (Admin only)"""
+    try:
+        chunks = service.ExportRows(
+            resource,
+            format,
+            user_id=user_id,
+            status=loan_status.value if loan_status else None,
+            from_date=from_date,
+            to_date=to_date,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    filename = f"{resource.value}-{stamp}.{format.value}"
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,9 +1,11 @@
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from ..Models.Loans import (
+    DeskBatchRequest,
+    DeskBatchResult,
     LoanPolicyResponse,
     LoanResponse,
     LoanStatus,
@@ -12,22 +14,29 @@ from ..Models.Loans import (
 )
 from ..Services.loanService import LoanService
 from ..utils.auth import get_current_user, require_admin
-from ..utils.dependencies import get_loan_service
+from ..utils.cache import LOAN_POLICIES, cached_json_response
+from ..utils.dependencies import get_loan_list_fields, get_loan_service
+from ..utils.serialization import json_response
 
 router = APIRouter(prefix="/loans", tags=["loans"])
 
 # ==================== LOAN QUERIES ====================
 
 
-@router.get("/", response_model=List[LoanResponse])
+@router.get("/", response_model=List[LoanResponse], response_model_exclude_unset=True)
 async def get_all_loans(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[List[str]] = Depends(get_loan_list_fields),
     service: LoanService = Depends(get_loan_service),
     current_user: dict = Depends(get_current_user),
 ):
     """Get all loans with pagination"""
-    return await service.get_all_loans(skip=skip, limit=limit)
+    return json_response(
+        List[LoanResponse],
+        await service.get_all_loans(skip=skip, limit=limit, fields=fields),
+        exclude_unset=True,
+    )
 
 
 @router.get("/status/{status}", response_model=List[LoanWithBookInfo])
@@ -39,7 +48,10 @@ async def get_loans_by_status(
     current_user: dict = Depends(get_current_user),
 ):
     """Get all loans with a specific status with book and user details"""
-    return await service.get_loans_by_status_with_book_info(status, skip, limit)
+    return json_response(
+        List[LoanWithBookInfo],
+        await service.get_loans_by_status_with_book_info(status, skip, limit),
+    )
 
 
 @router.get("/user/{user_id}", response_model=List[LoanWithBookInfo])
@@ -50,7 +62,10 @@ async def get_user_loans(
     current_user: dict = Depends(get_current_user),
 ):
     """Get all loans for a specific user with book details"""
-    return await service.get_loans_by_user_with_book_info(user_id, status)
+    return json_response(
+        List[LoanWithBookInfo],
+        await service.get_loans_by_user_with_book_info(user_id, status),
+    )
 
 
 @router.get("/overdue", response_model=List[LoanResponse])
@@ -59,7 +74,7 @@ async def get_overdue_loans(
     current_user: dict = Depends(get_current_user),
 ):
     """Get all loans that are overdue"""
-    return await service.get_overdue_loans()
+    return json_response(List[LoanResponse], await service.get_overdue_loans())
 
 
 @router.get("/calculate-due-date/{copy_id}")
@@ -97,11 +112,17 @@ async def get_loan(
 
 @router.get("/policies/all", response_model=List[LoanPolicyResponse])
 async def get_all_loan_policies(
+    request: Request,
     service: LoanService = Depends(get_loan_service),
     current_user: dict = Depends(get_current_user),
 ):
     """Get all loan policies (max books and loan duration by role)"""
-    return await service.get_all_loan_policies()
+    return await cached_json_response(
+        request,
+        [LOAN_POLICIES],
+        List[LoanPolicyResponse],
+        service.get_all_loan_policies,
+    )
 
 
 @router.get("/policies/{role}", response_model=LoanPolicyResponse)
@@ -262,6 +283,32 @@ async def return_loan(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+# ==================== DESK CIRCULATION ====================
+
+
+@router.post("/desk", response_model=DeskBatchResult)
+async def process_desk_batch(
+    batch: DeskBatchRequest,
+    service: LoanService = Depends(get_loan_service),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Return or check out a batch of scanned accession numbers (Admin only)
+
+    - action=return: active/overdue loans are returned and copies made available,
+      optionally counting an infraction for each late return
+    - action=checkout: pending_pickup loans become active
+
+    Everything is applied in one transaction; unmatched scans are reported per item.
+    """
+    try:
+        return await service.process_desk_batch(
+            batch.action, batch.accession_numbers, batch.increment_infractions
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 # ==================== OVERDUE MANAGEMENT ====================
 
 
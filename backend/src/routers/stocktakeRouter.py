@@ -0,0 +1,141 @@
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..Models.Stocktake import (
+    DiscrepancyKind,
+    StocktakeApplyResult,
+    StocktakeDiscrepancy,
+    StocktakeScanChunk,
+    StocktakeScanReceipt,
+    StocktakeSessionCreate,
+    StocktakeSessionResponse,
+)
+from ..Services.stocktakeService import SessionNotFoundError, StocktakeService
+from ..utils.auth import require_admin
+from ..utils.dependencies import get_stocktake_service
+
+router = APIRouter(prefix="/stocktake", tags=["stocktake"])
+
+# ==================== SESSIONS ====================
+
+
+@router.post(
+    "/", response_model=StocktakeSessionResponse, status_code=status.HTTP_201_CREATED
+)
+async def open_session(
+    session: StocktakeSessionCreate,
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """Open a new stocktake session (Admin only)"""
+    return await service.OpenSession(session, UUID(current_user["id"]))
+
+
+@router.get("/", response_model=List[StocktakeSessionResponse])
+async def get_sessions(
+    skip: int = 0,
+    limit: int = 20,
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """Get stocktake sessions, newest first (Admin only)"""
+    return await service.RetrieveSessions(skip=skip, limit=limit)
+
+
+@router.get("/{session_id}", response_model=StocktakeSessionResponse)
+async def get_session(
+    session_id: UUID,
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """Get a stocktake session and its reconciliation counts (Admin only)"""
+    session = await service.RetrieveSession(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Stocktake session not found")
+    return session
+
+
+# ==================== SCANS ====================
+
+
+@router.post("/{session_id}/scans", response_model=StocktakeScanReceipt)
+async def add_scans(
+    session_id: UUID,
+    chunk: StocktakeScanChunk,
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Upload a chunk of scanned accession numbers (Admin only)
+
+    Send the shelf scans in as many chunks as needed (up to 10,000 each);
+    duplicates across chunks are fine.
+    """
+    try:
+        return await service.AddScans(session_id, chunk.accession_numbers)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+# ==================== RECONCILIATION ====================
+
+
+@router.post("/{session_id}/reconcile", response_model=StocktakeSessionResponse)
+async def reconcile_session(
+    session_id: UUID,
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Compare the scans with the catalog (Admin only)
+
+    - missing: not scanned and not on loan (proposed status: lost)
+    - found_lost: scanned but marked lost (proposed status: available)
+    - scanned_on_loan: scanned while its loan is still active or overdue
+    - unknown: scanned number that matches no copy
+    """
+    try:
+        return await service.Reconcile(session_id)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/{session_id}/discrepancies", response_model=List[StocktakeDiscrepancy])
+async def get_discrepancies(
+    session_id: UUID,
+    kind: Optional[DiscrepancyKind] = Query(None, description="Filter by kind"),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """Get the discrepancies found by the last reconciliation (Admin only)"""
+    try:
+        return await service.RetrieveDiscrepancies(
+            session_id, kind, skip=skip, limit=limit
+        )
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/{session_id}/apply", response_model=StocktakeApplyResult)
+async def apply_session(
+    session_id: UUID,
+    service: StocktakeService = Depends(get_stocktake_service),
+    current_user: dict = Depends(require_admin),
+):
+    """Apply all proposed copy status changes in one update (Admin only)"""
+    try:
+        return await service.ApplyChanges(session_id)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
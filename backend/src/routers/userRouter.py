@@ -1,8 +1,8 @@
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from jose import jwt
 
 from ..Models.Users import (
@@ -14,21 +14,28 @@ from ..Models.Users import (
     UserUpdate,
 )
 from ..Services.userService import UserService
+from ..utils.access import invalidate_user_status
 from ..utils.auth import get_current_user, require_admin
 from ..utils.config import get_settings
-from ..utils.dependencies import get_user_service
+from ..utils.dependencies import get_user_list_fields, get_user_service
+from ..utils.serialization import json_response
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=List[UserResponse], response_model_exclude_unset=True)
 async def get_users(
     skip: int = 0,
     limit: int = 10,
+    fields: Optional[List[str]] = Depends(get_user_list_fields),
     service: UserService = Depends(get_user_service),
     current_user: dict = Depends(require_admin),
 ):
-    return await service.RetrieveAllUsers(skip=skip, limit=limit)
+    return json_response(
+        List[UserResponse],
+        await service.RetrieveAllUsers(skip=skip, limit=limit, fields=fields),
+        exclude_unset=True,
+    )
 
 
 @router.post("/login", response_model=Token)
@@ -90,7 +97,8 @@ async def get_user(
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
-    user: UserCreate, service: UserService = Depends(get_user_service),
+    user: UserCreate,
+    service: UserService = Depends(get_user_service),
     current_user: dict = Depends(require_admin),
 ):
     """Create a new user"""
@@ -113,6 +121,8 @@ async def update_user(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with id {user_id} not found",
             )
+        # Role changes apply to the user's next request, in every worker
+        await invalidate_user_status(user_id)
         return updated_user
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -131,6 +141,7 @@ async def delete_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
         )
+    await invalidate_user_status(user_id)
     return None
 
 
@@ -166,6 +177,7 @@ async def add_to_blacklist(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
         )
+    await invalidate_user_status(user_id)
     return user
 
 
@@ -184,19 +196,41 @@ async def remove_from_blacklist(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
         )
+    await invalidate_user_status(user_id)
     return user
 
 
-@router.get("/search/", response_model=List[UserResponse])
+@router.get(
+    "/search/", response_model=List[UserResponse], response_model_exclude_unset=True
+)
 async def search_users(
     q: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    fields: Optional[List[str]] = Depends(get_user_list_fields),
     service: UserService = Depends(get_user_service),
     current_user: dict = Depends(get_current_user),
 ):
-    """Search users by name, email, or university ID"""
+    """
+    Search users by name, email, or university ID
+
+    Exact university ID matches come first, then email prefix matches.
+    When more results exist, the next page cursor is returned in X-Next-Cursor.
+    """
     if not q or len(q.strip()) < 2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Search query must be at least 2 characters",
         )
-    return await service.SearchUsers(q)
+    try:
+        users, next_cursor = await service.SearchUsersPage(
+            q.strip(), limit=limit, cursor=cursor, fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return users
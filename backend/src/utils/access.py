@@ -0,0 +1,104 @@
+"""
+Per-user access status for authenticated requests
+
+get_current_active_user (auth.py) checks on every authenticated request that
+the token's user still exists and is not blacklisted, and takes their role
+from the users table rather than the token, so blacklisting or demoting
+someone takes effect before their token expires. Reading the user on every
+request would double the queries of most endpoints, so each worker keeps the
+status in UserStatusCache (cache.py) for USER_STATUS_TTL_SECONDS.
+
+The userRouter endpoints that change a user (role or password updates,
+blacklisting, deletion) call invalidate_user_status(). It drops the entry in
+this worker, bumps the token revocation version so cached token payloads are
+decoded again, and sends a Postgres NOTIFY on CHANNEL. Every worker LISTENs on
+a dedicated connection (StatusListener, started by the lifespan) and does the
+same. Both need DATABASE_URL: through Supabase alone there is nothing to
+broadcast on, so the cache is disabled and every request reads the user.
+"""
+
+import logging
+from typing import Optional
+
+from .cache import UserStatus, bump_revocation_version, get_user_status_cache
+from .config import get_settings
+from .database import get_database
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "user_status"
+
+
+async def load_user_status(user_id: str, user_broker) -> UserStatus:
+    """Cached status of user_id, read through user_broker on a miss"""
+    cache = get_user_status_cache()
+    user_status = cache.get(user_id)
+    if user_status is None:
+        generation = cache.generation
+        user = await user_broker.SelectUserById(user_id)
+        user_status = UserStatus(
+            exists=user is not None,
+            is_blacklisted=bool(user and user.get("is_blacklisted")),
+            role=user.get("role") if user else None,
+        )
+        cache.set(user_id, user_status, generation)
+    return user_status
+
+
+async def invalidate_user_status(user_id) -> None:
+    """Forget the cached status of user_id in this and every other worker"""
+    user_id = str(user_id)
+    get_user_status_cache().invalidate(user_id)
+    bump_revocation_version()
+    if not get_settings().DATABASE_URL:
+        return
+    try:
+        await get_database().execute("SELECT pg_notify($1, $2)", CHANNEL, user_id)
+    except Exception:
+        # The change is saved; other workers pick it up within the TTL
+        logger.exception("Broadcasting the status change of %s failed", user_id)
+
+
+class StatusListener:
+    """LISTENs for invalidations from other workers on its own connection"""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._connection = None
+
+    @property
+    def listening(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self) -> None:
+        # Only needed with DATABASE_URL set
+        import asyncpg
+
+        self._connection = await asyncpg.connect(self.dsn)
+        self._connection.add_termination_listener(self._on_lost)
+        await self._connection.add_listener(CHANNEL, self._on_notify)
+
+    async def stop(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            connection.remove_termination_listener(self._on_lost)
+            await connection.close()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        get_user_status_cache().invalidate(payload)
+        bump_revocation_version()
+
+    def _on_lost(self, connection) -> None:
+        # Invalidations sent from now on are missed; stop trusting what we have
+        # and fall back to reading every user until the worker restarts
+        logger.warning("Lost the %s listener connection", CHANNEL)
+        cache = get_user_status_cache()
+        cache.clear()
+        cache.ttl_seconds = 0
+
+
+def build_status_listener(settings) -> Optional[StatusListener]:
+    """The worker's listener, or None when there is no Postgres to listen on"""
+    if not settings.DATABASE_URL:
+        return None
+    return StatusListener(settings.DATABASE_URL)
@@ -5,8 +5,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
+from ..Brokers.userBroker import UserBroker
 from ..Models.Users import UserRole
+from .access import load_user_status
+from .cache import get_token_cache, token_key
 from .config import get_settings
+from .dependencies import get_user_broker
 
 security = HTTPBearer()
 
@@ -14,24 +18,37 @@ security = HTTPBearer()
 def verify_token(token: str) -> dict:
     """
     Verify JWT token and return payload
+
+    Valid payloads are cached until the token's exp (see TokenCache), so the
+    parallel requests of one page load decode the token once.
     """
+    cache = get_token_cache()
+    key = token_key(token)
+    payload = cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
     settings = get_settings()
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # jwt.decode rejects expired tokens; ones without exp are not cached
+    if isinstance(payload.get("exp"), (int, float)):
+        cache.set(key, payload, payload["exp"])
+    return dict(payload)
 
 
-def get_current_user(
+def get_token_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
+    """The user named by the bearer token, without checking their status"""
     token = credentials.credentials
     payload = verify_token(token)
     exp = payload.get("exp")
@@ -55,13 +72,34 @@ def get_current_user(
     }
 
 
-def get_current_active_user(current_user: dict = Depends(get_current_user)) -> dict:
+async def get_current_active_user(
+    current_user: dict = Depends(get_token_user),
+    user_broker: UserBroker = Depends(get_user_broker),
+) -> dict:
     """
-    Dependency to get current active user (can add blacklist check here)
+    Dependency to get the current user, if they still exist and aren't blacklisted
+
+    The role comes from the user's current status, not the token, so a demoted
+    admin loses access at once. Statuses are cached per worker (see access.py).
     """
-    # You can add additional checks here like:
-    # - Check if user is blacklisted
-    # - Check if user account is active
+    user_status = await load_user_status(current_user["id"], user_broker)
+    if not user_status.exists:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User no longer exists",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if user_status.is_blacklisted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="User is blacklisted"
+        )
+    return {"id": current_user["id"], "role": user_status.role}
+
+
+async def get_current_user(
+    current_user: dict = Depends(get_current_active_user),
+) -> dict:
+    """Dependency for every authenticated route: the current, active user"""
     return current_user
 
 
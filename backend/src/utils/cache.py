@@ -0,0 +1,413 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from fastapi import Request, Response, status
+
+from .config import get_settings
+from .serialization import dump_json
+
+# ==================== CATALOG VERSIONS ====================
+# Monotonic per-process counters bumped by broker write paths.
+# A cached body is only reused while every scope it depends on is unchanged.
+
+BOOKS = "books"
+COPIES = "copies"
+COURSES = "courses"
+LOAN_POLICIES = "loan_policies"
+
+_catalog_versions: dict[str, int] = {}
+
+
+def bump_catalog_version(*scopes: str) -> None:
+    """Mark cached catalog reads depending on these scopes as stale"""
+    for scope in scopes:
+        _catalog_versions[scope] = _catalog_versions.get(scope, 0) + 1
+
+
+def get_catalog_versions(scopes: Iterable[str]) -> tuple:
+    """Snapshot the current version of each scope"""
+    return tuple(_catalog_versions.get(scope, 0) for scope in scopes)
+
+
+# ==================== RESPONSE CACHE ====================
+
+
+class CachedBody:
+    def __init__(self, body: bytes, etag: str, versions: tuple, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.versions = versions
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU of serialized JSON bodies keyed by path + query
+
+    Entries expire after ttl_seconds even without a version bump, which bounds
+    staleness when another worker process handled the write.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedBody] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, versions: tuple) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry.versions != versions
+            or entry.expires_at <= time.monotonic()
+        ):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, body: bytes, versions: tuple) -> CachedBody:
+        entry = CachedBody(
+            body=body,
+            etag=make_etag(body),
+            versions=versions,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the singleton response cache"""
+    global _response_cache
+    if _response_cache is None:
+        settings = get_settings()
+        _response_cache = ResponseCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+    return _response_cache
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the serialized body"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (may list several tags, or be '*')"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cache_key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+async def _cached_body(
+    key: str,
+    scopes: Iterable[str],
+    response_model: Any,
+    produce: Callable[[], Awaitable[Any]],
+    exclude_unset: bool,
+) -> CachedBody:
+    cache = get_response_cache()
+    # Snapshot before producing so a concurrent write can't be cached as current
+    versions = get_catalog_versions(tuple(scopes))
+
+    entry = cache.get(key, versions)
+    if entry is None:
+        data = await produce()
+        body = dump_json(response_model, data, exclude_unset=exclude_unset)
+        entry = cache.set(key, body, versions)
+    return entry
+
+
+async def warm_response_cache(
+    path: str,
+    scopes: Iterable[str],
+    response_model: Any,
+    produce: Callable[[], Awaitable[Any]],
+    exclude_unset: bool = False,
+) -> None:
+    """
+    Fill the cache entry a GET of path (no query string) would use
+
+    Arguments must match the endpoint's cached_json_response call.
+    """
+    await _cached_body(f"{path}?", scopes, response_model, produce, exclude_unset)
+
+
+async def cached_json_response(
+    request: Request,
+    scopes: Iterable[str],
+    response_model: Any,
+    produce: Callable[[], Awaitable[Any]],
+    exclude_unset: bool = False,
+) -> Response:
+    """
+    Serve a catalog read from the response cache, with ETag / 304 support
+
+    Must be called from inside the endpoint (after auth dependencies have run).
+    On a miss, produce() is awaited and its result serialized once with the
+    route's response model; later hits skip both the DB and serialization.
+    """
+    entry = await _cached_body(
+        cache_key(request), scopes, response_model, produce, exclude_unset
+    )
+
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+# ==================== ACCESSION NUMBERS ====================
+
+
+class AccessionCache:
+    """
+    Bounded LRU of accession number -> copy id, for barcode scanning
+
+    Keeps a reverse index so brokers can invalidate by copy id when a copy is
+    updated or deleted.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._copy_ids: OrderedDict[int, str] = OrderedDict()
+        self._accessions: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, accession_number: int) -> Optional[str]:
+        copy_id = self._copy_ids.get(accession_number)
+        if copy_id is None:
+            self.misses += 1
+            return None
+        self._copy_ids.move_to_end(accession_number)
+        self.hits += 1
+        return copy_id
+
+    def split(self, accession_numbers: list[int]) -> tuple[dict[int, str], list[int]]:
+        """Cached copy ids by accession number, and the numbers not cached"""
+        cached: dict[int, str] = {}
+        missing: list[int] = []
+        for accession_number in accession_numbers:
+            copy_id = self.get(accession_number)
+            if copy_id is None:
+                missing.append(accession_number)
+            else:
+                cached[accession_number] = copy_id
+        return cached, missing
+
+    def set(self, accession_number: int, copy_id: str) -> None:
+        self.invalidate_copy(copy_id)
+        previous = self._copy_ids.pop(accession_number, None)
+        if previous is not None:
+            self._accessions.pop(previous, None)
+        self._copy_ids[accession_number] = copy_id
+        self._copy_ids.move_to_end(accession_number)
+        self._accessions[copy_id] = accession_number
+        while len(self._copy_ids) > self.max_entries:
+            _, evicted = self._copy_ids.popitem(last=False)
+            self._accessions.pop(evicted, None)
+
+    def invalidate_copy(self, copy_id) -> None:
+        accession_number = self._accessions.pop(str(copy_id), None)
+        if accession_number is not None:
+            self._copy_ids.pop(accession_number, None)
+
+    def clear(self) -> None:
+        self._copy_ids.clear()
+        self._accessions.clear()
+
+
+_accession_cache: AccessionCache | None = None
+
+
+def get_accession_cache() -> AccessionCache:
+    """Returns the singleton accession number cache"""
+    global _accession_cache
+    if _accession_cache is None:
+        _accession_cache = AccessionCache(
+            max_entries=get_settings().ACCESSION_CACHE_MAX_ENTRIES
+        )
+    return _accession_cache
+
+
+# ==================== TOKEN CACHE ====================
+# Decoded JWT payloads, so parallel requests with the same bearer token skip
+# jwt.decode and the signature check. bump_revocation_version() drops every
+# cached payload at once, e.g. when a user's access changes.
+
+_revocation_version = 0
+
+
+def bump_revocation_version() -> None:
+    """Stop trusting cached token payloads; they are decoded again on next use"""
+    global _revocation_version
+    _revocation_version += 1
+
+
+def get_revocation_version() -> int:
+    return _revocation_version
+
+
+def token_key(token: str) -> bytes:
+    """Cache key for a token (raw tokens are never kept)"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """
+    Bounded in-process LRU of decoded JWT payloads keyed by token hash
+
+    An entry is served until the token's exp, and only while the revocation
+    version it was stored under is still current. verify_token runs in sync
+    dependencies on the threadpool, so the LRU is guarded by a lock.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[dict, float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, expires_at, version = entry
+                if version == _revocation_version and time.time() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: bytes, payload: dict, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (payload, expires_at, _revocation_version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_token_cache: TokenCache | None = None
+
+
+def get_token_cache() -> TokenCache:
+    """Returns the singleton decoded token cache"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(max_entries=get_settings().TOKEN_CACHE_MAX_ENTRIES)
+    return _token_cache
+
+
+# ==================== USER STATUS CACHE ====================
+# Whether a user still exists, is blacklisted and their current role, checked
+# on every authenticated request (see access.py). Entries expire after
+# ttl_seconds; invalidate() drops one as soon as an admin changes the user.
+# Other workers only hear of that change through Postgres NOTIFY, so without
+# DATABASE_URL the cache is disabled and every request reads the user.
+
+
+class UserStatus:
+    def __init__(self, exists: bool, is_blacklisted: bool, role: Optional[str]):
+        self.exists = exists
+        self.is_blacklisted = is_blacklisted
+        self.role = role
+
+
+class UserStatusCache:
+    """
+    Bounded in-process LRU of user id -> UserStatus
+
+    Lookups snapshot generation before reading the user, and set() ignores the
+    result if any invalidation happened meanwhile, so a read racing an admin
+    change can't put the old status back.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[UserStatus, float]] = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[UserStatus]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            user_status, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return user_status
+            del self._entries[user_id]
+        self.misses += 1
+        return None
+
+    def set(self, user_id: str, user_status: UserStatus, generation: int) -> None:
+        if (
+            self.max_entries <= 0
+            or self.ttl_seconds <= 0
+            or generation != self.generation
+        ):
+            return
+        self._entries[user_id] = (user_status, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self.generation += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+_user_status_cache: UserStatusCache | None = None
+
+
+def get_user_status_cache() -> UserStatusCache:
+    """Returns the singleton user status cache"""
+    global _user_status_cache
+    if _user_status_cache is None:
+        settings = get_settings()
+        _user_status_cache = UserStatusCache(
+            max_entries=settings.USER_STATUS_CACHE_MAX_ENTRIES,
+            ttl_seconds=(
+                settings.USER_STATUS_TTL_SECONDS if settings.DATABASE_URL else 0
+            ),
+        )
+    return _user_status_cache
@@ -2,7 +2,9 @@ from functools import lru_cache
 from pathlib import Path
 
 from pydantic_settings import BaseSettings
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
+
+from .instrumentation import instrumented_http_client
 
 # Get the absolute path to the .env file in the same directory as this config.py
 env_path = Path(__file__).parent / ".env"
@@ -15,6 +17,105 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str
     JWT_EXPIRATION_MINUTES: int
 
+    # Catalog response cache (per worker process)
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    ACCESSION_CACHE_MAX_ENTRIES: int = 10000
+    # Decoded JWTs, kept until the token expires (0 disables)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    # Blacklist / role / existence of each authenticated user (see access.py);
+    # only cached with DATABASE_URL set, which carries admin changes to the
+    # other workers at once (0 disables the cache)
+    USER_STATUS_TTL_SECONDS: float = 30.0
+    USER_STATUS_CACHE_MAX_ENTRIES: int = 10000
+
+    # Serialize list responses directly instead of letting FastAPI re-validate
+    # the models services already built. Off by default so tests and development
+    # keep FastAPI's response validation.
+    FAST_SERIALIZATION: bool = False
+
+    # Rows per insert request when creating copies in bulk
+    BULK_COPY_CHUNK_SIZE: int = 1000
+
+    # Broker call tracing: spans kept in memory (GET /diagnostics/traces),
+    # optionally appended to a JSON lines file. Calls at or above the threshold
+    # are logged with their full filter chain.
+    TRACE_BUFFER_SIZE: int = 1000
+    SLOW_CALL_THRESHOLD_MS: float = 500.0
+    TRACE_EXPORT_PATH: str = ""
+
+    # On-demand profiling (admin requests with X-Profile: 1)
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    PROFILE_MAX_STORED: int = 20
+
+    # Broker backend: "supabase" (PostgREST over HTTP) or "postgres" (asyncpg
+    # straight to DATABASE_URL, see database.py)
+    DATABASE_BACKEND: str = "supabase"
+    DATABASE_URL: str = ""
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_STATEMENT_CACHE_SIZE: int = 256
+
+    # Read replica for read-only broker methods (replicas.py): the replica's
+    # API URL (same SUPABASE_KEY), or its Postgres DSN with
+    # DATABASE_BACKEND=postgres. After a broker writes, its reads stay on the
+    # primary for REPLICA_STICKY_SECONDS in that worker.
+    SUPABASE_REPLICA_URL: str = ""
+    DATABASE_REPLICA_URL: str = ""
+    REPLICA_STICKY_SECONDS: float = 2.0
+
+    # Workload pools for blocking broker calls (executors.py): concurrent calls,
+    # calls allowed to wait, and how long one may wait before a 503
+    CIRCULATION_POOL_WORKERS: int = 16
+    CIRCULATION_POOL_QUEUE: int = 64
+    CIRCULATION_POOL_TIMEOUT_SECONDS: float = 5.0
+    CATALOG_POOL_WORKERS: int = 16
+    CATALOG_POOL_QUEUE: int = 128
+    CATALOG_POOL_TIMEOUT_SECONDS: float = 10.0
+    REPORTS_POOL_WORKERS: int = 4
+    REPORTS_POOL_QUEUE: int = 16
+    REPORTS_POOL_TIMEOUT_SECONDS: float = 30.0
+    AUTH_POOL_WORKERS: int = 4
+    AUTH_POOL_QUEUE: int = 64
+    AUTH_POOL_TIMEOUT_SECONDS: float = 10.0
+    # Password hashing runs in worker processes (passwords.py)
+    HASHING_POOL_WORKERS: int = 2
+    HASHING_POOL_QUEUE: int = 256
+    HASHING_POOL_TIMEOUT_SECONDS: float = 10.0
+
+    # Database resilience (resilience.py): each request gets
+    # REQUEST_DEADLINE_SECONDS until its response starts, and each database
+    # round trip at most BROKER_CALL_TIMEOUT_SECONDS of it (0 disables either).
+    # Read-only broker calls are retried BROKER_READ_RETRIES times on
+    # transient errors, waiting a random time up to base * 2^attempt (capped).
+    # A table or RPC failing CIRCUIT_FAILURE_THRESHOLD calls in a row fails
+    # fast with a 503 for CIRCUIT_RESET_SECONDS.
+    REQUEST_DEADLINE_SECONDS: float = 30.0
+    BROKER_CALL_TIMEOUT_SECONDS: float = 10.0
+    BROKER_READ_RETRIES: int = 2
+    BROKER_RETRY_BASE_SECONDS: float = 0.05
+    BROKER_RETRY_MAX_SECONDS: float = 1.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # werkzeug hash method for new passwords, e.g. "scrypt" or
+    # "pbkdf2:sha256:600000". Stored hashes made with another method or cost
+    # are upgraded on the user's next login.
+    PASSWORD_HASH_METHOD: str = "scrypt"
+
+    # Background jobs started by the lifespan manager (lifecycle.py); 0 disables.
+    # Every worker runs the jobs it has enabled, so the overdue job is off by
+    # default: set it on one instance only (e.g. a single-worker job process).
+    # The dashboard serves the stats rollup while it is younger than twice the
+    # rollup interval.
+    OVERDUE_JOB_INTERVAL_SECONDS: float = 0.0
+    STATS_ROLLUP_INTERVAL_SECONDS: float = 300.0
+
+    # Shutdown: wait this long for in-flight requests, then write the final
+    # metrics to METRICS_SNAPSHOT_PATH (skipped when empty)
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 25.0
+    METRICS_SNAPSHOT_PATH: str = ""
+
     class Config:
         env_file = str(env_path)
         env_file_encoding = "utf-8"
@@ -40,9 +141,34 @@ def get_supabase() -> Client:
         settings = get_settings()
         try:
             _supabase_client = create_client(
-                settings.SUPABASE_URL, settings.SUPABASE_KEY
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                # Counts queries / DB time per request (see instrumentation.py)
+                options=ClientOptions(httpx_client=instrumented_http_client()),
             )
         except Exception as e:
             raise RuntimeError(f"Failed to initialize Supabase client: {str(e)}")
 
     return _supabase_client
+
+
+_supabase_replica: Client | None = None
+
+
+def get_supabase_replica() -> Client | None:
+    """
+    Returns the singleton client for the read replica, if one is configured
+    """
+    global _supabase_replica
+    settings = get_settings()
+    if _supabase_replica is None and settings.SUPABASE_REPLICA_URL:
+        try:
+            _supabase_replica = create_client(
+                settings.SUPABASE_REPLICA_URL,
+                settings.SUPABASE_KEY,
+                options=ClientOptions(httpx_client=instrumented_http_client()),
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to initialize replica client: {str(e)}")
+
+    return _supabase_replica
@@ -0,0 +1,57 @@
+"""
+App-scoped brokers and services
+
+Brokers and services are stateless wrappers around the database client, so
+one instance of each per worker process is enough. The Container builds them
+on first use from a table of factories (see dependencies.py) and then hands
+out the same objects on every request, which lets them hold per-process state
+such as caches, loaders or pools.
+
+Hooks registered with on_build() see every instance as it is built (and any
+already built), e.g. to attach a cache or wrap methods with metrics.
+"""
+
+from typing import Any, Callable, Dict, List
+
+BuildHook = Callable[[str, Any], None]
+
+
+class Container:
+    """Lazily built, cached broker and service instances for one client"""
+
+    def __init__(self, client: Any, factories: Dict[str, Callable[["Container"], Any]]):
+        self.client = client
+        self._factories = factories
+        self._instances: Dict[str, Any] = {}
+        self._hooks: List[BuildHook] = []
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            # Factories may get() their own dependencies (services -> brokers)
+            instance = self._factories[name](self)
+            for hook in self._hooks:
+                hook(name, instance)
+            self._instances[name] = instance
+        return instance
+
+    def on_build(self, hook: BuildHook) -> None:
+        """Call hook(name, instance) for every instance, built now or later"""
+        self._hooks.append(hook)
+        for name, instance in self._instances.items():
+            hook(name, instance)
+
+    def build_all(self) -> None:
+        """Build every registered instance up front (e.g. at startup)"""
+        for name in self._factories:
+            self.get(name)
+
+    def with_instances(self, instances: Dict[str, Any]) -> "Container":
+        """A container with the same factories and some instances swapped in"""
+        container = Container(self.client, self._factories)
+        container._instances.update(instances)
+        return container
+
+    @property
+    def instances(self) -> Dict[str, Any]:
+        return dict(self._instances)
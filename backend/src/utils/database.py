@@ -0,0 +1,297 @@
+"""
+Direct Postgres access for the asyncpg broker backend (DATABASE_BACKEND=postgres)
+
+One asyncpg pool per worker process, opened on first use inside the running
+event loop. asyncpg prepares every statement and keeps it in a per-connection
+cache (DB_STATEMENT_CACHE_SIZE), so the Pg brokers use fixed SQL text with $n
+parameters. Writes of service-built dicts go through jsonb_populate_record(set),
+as PostgREST does, so Postgres casts the same text values (ISO timestamps, UUID
+strings, enum labels) the Supabase backend accepts.
+
+Rows come back in PostgREST's JSON shapes (UUIDs and timestamps as strings,
+jsonb decoded) so services and models behave the same on both backends. The
+Pg brokers call the SQL functions in src/utils/*.sql directly and expect them
+to be installed; they have no fallbacks for a bare schema.
+"""
+
+import asyncio
+import json
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional
+from uuid import UUID
+
+from .config import get_settings
+from .executors import pool_slot
+from .instrumentation import current_query_stats, record_query
+from .projection import parse_columns
+from .resilience import call_timeout, get_circuit, is_transient, statement_target
+from .tracing import record_statement_span
+
+IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def ident(name: str) -> str:
+    """Quote a table or column name, rejecting anything but plain identifiers"""
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f'"{name}"'
+
+
+def column_list(columns: str, alias: Optional[str] = None) -> str:
+    """PostgREST select string ("id, title") -> quoted SQL column list"""
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(
+        f"{prefix}*" if column == "*" else f"{prefix}{ident(column)}"
+        for column in parse_columns(columns)
+    )
+
+
+def to_json(value: Any) -> Any:
+    """asyncpg value -> the value PostgREST would have returned in its JSON"""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value: Any) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+async def _init_connection(connection) -> None:
+    for type_name in ("json", "jsonb"):
+        await connection.set_type_codec(
+            type_name, encoder=encode_json, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+def _row_count(method: str, result: Any) -> Optional[int]:
+    """Rows a statement returned or affected, for its tracing span"""
+    if method == "fetch":
+        return len(result)
+    if method == "fetchrow":
+        return 0 if result is None else 1
+    if method == "execute":
+        # Command tag, e.g. "UPDATE 3" or "INSERT 0 1"
+        count = result.rsplit(" ", 1)[-1] if isinstance(result, str) else ""
+        return int(count) if count.isdigit() else None
+    return None
+
+
+class Database:
+    """asyncpg connection pool with PostgREST-shaped results"""
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        statement_cache_size: int = 256,
+    ):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    # Only needed with DATABASE_BACKEND=postgres
+                    import asyncpg
+
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        init=_init_connection,
+                    )
+        return self._pool
+
+    async def _run(self, method: str, sql: str, args: tuple):
+        # Deadline, per-call timeout and the table's circuit (resilience.py)
+        timeout = call_timeout()
+        target = statement_target(sql)
+        circuit = get_circuit(target) if target else None
+        if circuit is not None:
+            circuit.before_call()
+        # The caller's workload pool bounds how many connections it can hold
+        async with pool_slot():
+            started = time.perf_counter()
+            rows = None
+            try:
+                pool = await self.pool()
+                result = await getattr(pool, method)(sql, *args, timeout=timeout)
+            except Exception as exc:
+                if circuit is not None:
+                    if is_transient(exc):
+                        circuit.record_failure()
+                    else:
+                        circuit.record_success()
+                raise
+            else:
+                if circuit is not None:
+                    circuit.record_success()
+                rows = _row_count(method, result)
+                return result
+            finally:
+                # One statement is one round trip, as one PostgREST call is
+                duration = time.perf_counter() - started
+                record_query(duration)
+                stats = current_query_stats()
+                record_statement_span(
+                    sql,
+                    target,
+                    rows,
+                    duration,
+                    request_path=stats.path if stats is not None else None,
+                )
+
+    async def fetch(self, sql: str, *args) -> list[dict]:
+        records = await self._run("fetch", sql, args)
+        return [
+            {key: to_json(value) for key, value in record.items()} for record in records
+        ]
+
+    async def fetchrow(self, sql: str, *args) -> Optional[dict]:
+        record = await self._run("fetchrow", sql, args)
+        if record is None:
+            return None
+        return {key: to_json(value) for key, value in record.items()}
+
+    async def fetchval(self, sql: str, *args) -> Any:
+        return to_json(await self._run("fetchval", sql, args))
+
+    async def execute(self, sql: str, *args) -> str:
+        return await self._run("execute", sql, args)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+# ==================== WRITES ====================
+
+
+async def insert_rows(
+    db: Database,
+    table: str,
+    rows: list[dict],
+    returning: Optional[str] = "*",
+    on_conflict: Optional[str] = None,
+) -> list[dict]:
+    """
+    Insert dicts in one statement, like a PostgREST bulk insert
+
+    Keys missing from some rows are NULL; columns missing from every row get
+    their default. With on_conflict, conflicting rows are skipped.
+    """
+    if not rows:
+        return []
+    columns = ", ".join(
+        ident(name) for name in dict.fromkeys(key for row in rows for key in row)
+    )
+    sql = (
+        f"INSERT INTO {ident(table)} ({columns}) "  # nosec B608 - names quoted by ident(), values bound
+        f"SELECT {columns} FROM jsonb_populate_recordset(NULL::{ident(table)}, $1)"
+    )
+    if on_conflict:
+        sql += f" ON CONFLICT ({ident(on_conflict)}) DO NOTHING"
+    if returning:
+        sql += f" RETURNING {returning}"
+        return await db.fetch(sql, rows)
+    await db.execute(sql, rows)
+    return []
+
+
+async def update_rows(
+    db: Database, table: str, values: dict, where: str, *args
+) -> list[dict]:
+    """
+    UPDATE table SET <values> WHERE <where> RETURNING *
+
+    $1 is taken by the values; placeholders in where start at $2.
+    """
+    if not values:
+        # Nothing to set: return the matching rows, keeping the numbering
+        return await db.fetch(
+            f"SELECT * FROM {ident(table)}"  # nosec B608 - names quoted by ident(), values bound
+            f" WHERE $1::jsonb IS NOT NULL AND ({where})",
+            values,
+            *args,
+        )
+    columns = ", ".join(ident(name) for name in values)
+    return await db.fetch(
+        f"UPDATE {ident(table)} SET ({columns}) = "  # nosec B608 - names quoted by ident(), values bound
+        f"(SELECT {columns} FROM jsonb_populate_record(NULL::{ident(table)}, $1)) "
+        f"WHERE {where} RETURNING *",
+        values,
+        *args,
+    )
+
+
+# ==================== SINGLETON ====================
+
+_database: Database | None = None
+
+
+def get_database() -> Database:
+    """Returns the singleton Postgres pool wrapper (connects lazily)"""
+    global _database
+    if _database is None:
+        settings = get_settings()
+        if not settings.DATABASE_URL:
+            raise RuntimeError("DATABASE_BACKEND=postgres requires DATABASE_URL")
+        _database = Database(
+            settings.DATABASE_URL,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        )
+    return _database
+
+
+_replica: Database | None = None
+
+
+def get_database_replica() -> Database | None:
+    """Returns the singleton pool for the read replica, if one is configured"""
+    global _replica
+    settings = get_settings()
+    if _replica is None and settings.DATABASE_REPLICA_URL:
+        _replica = Database(
+            settings.DATABASE_REPLICA_URL,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        )
+    return _replica
+
+
+async def close_database() -> None:
+    for database in (_database, _replica):
+        if database is not None:
+            await database.close()
@@ -1,80 +1,269 @@
+from typing import Any, Optional
+
 from fastapi import Depends
 from supabase import Client
 
-from ..Brokers.bookBroker import BookBroker
-from ..Brokers.bookCopyBroker import BookCopyBroker
-from ..Brokers.courseBroker import CourseBroker
-from ..Brokers.loanBroker import LoanBroker
+from ..Brokers.bookBroker import BOOK_LIST_COLUMNS, BookBroker
+from ..Brokers.bookCopyBroker import COPY_COLUMNS, BookCopyBroker
+from ..Brokers.courseBroker import COURSE_COLUMNS, CourseBroker
+from ..Brokers.loanBroker import LOAN_COLUMNS, LoanBroker
+from ..Brokers.pgBookBroker import PgBookBroker
+from ..Brokers.pgBookCopyBroker import PgBookCopyBroker
+from ..Brokers.pgCourseBroker import PgCourseBroker
+from ..Brokers.pgLoanBroker import PgLoanBroker
+from ..Brokers.pgStatsBroker import PgStatsBroker
+from ..Brokers.pgStocktakeBroker import PgStocktakeBroker
+from ..Brokers.pgUserBroker import PgUserBroker
 from ..Brokers.statsBroker import StatsBroker
-from ..Brokers.userBroker import UserBroker
+from ..Brokers.stocktakeBroker import StocktakeBroker
+from ..Brokers.userBroker import USER_COLUMNS, UserBroker
+from ..Models.Books import BookCopyResponse, BookResponse
+from ..Models.Courses import CourseResponse
+from ..Models.Loans import LoanResponse
+from ..Models.Users import UserResponse
 from ..Services.bookCopyService import BookCopyService
+from ..Services.bookImportService import BookImportService
 from ..Services.bookService import BookService
 from ..Services.courseService import CourseService
+from ..Services.exportService import ExportService
 from ..Services.loanService import LoanService
 from ..Services.statsService import StatsService
+from ..Services.stocktakeService import StocktakeService
 from ..Services.userService import UserService
-from .config import get_supabase
+from .config import get_settings, get_supabase, get_supabase_replica
+from .container import Container
+from .database import Database, get_database, get_database_replica
+from .projection import fields_query
+from .replicas import read_router
 
 
-# 1. Inject the Singleton Client
-def get_db_client() -> Client:
+# 1. Inject the Singleton Client (Supabase, or the asyncpg pool when
+#    DATABASE_BACKEND=postgres). The getters in this module are async so
+#    FastAPI calls them on the event loop instead of in its threadpool.
+async def get_db_client() -> Client | Database:
+    if get_settings().DATABASE_BACKEND == "postgres":
+        return get_database()
     return get_supabase()
 
 
-# 2. Inject the Broker (initialized with the client)
-def get_user_broker(client: Client = Depends(get_db_client)) -> UserBroker:
-    return UserBroker(client)
+def _make_broker(supabase_broker, postgres_broker, client):
+    """
+    Pick the broker class matching the injected client
+
+    With a read replica configured the broker gets a ReadRouter, which sends
+    its @replica_reads methods to the replica (see replicas.py).
+    """
+    if isinstance(client, Database):
+        return postgres_broker(read_router(client, get_database_replica()))
+    return supabase_broker(read_router(client, get_supabase_replica()))
+
+
+# 2. Brokers and services are built once per worker by the app container
+FACTORIES = {
+    # Brokers (initialized with the client)
+    "user_broker": lambda c: _make_broker(UserBroker, PgUserBroker, c.client),
+    "book_broker": lambda c: _make_broker(BookBroker, PgBookBroker, c.client),
+    "book_copy_broker": lambda c: _make_broker(
+        BookCopyBroker, PgBookCopyBroker, c.client
+    ),
+    "course_broker": lambda c: _make_broker(CourseBroker, PgCourseBroker, c.client),
+    "loan_broker": lambda c: _make_broker(LoanBroker, PgLoanBroker, c.client),
+    "stats_broker": lambda c: _make_broker(StatsBroker, PgStatsBroker, c.client),
+    "stocktake_broker": lambda c: _make_broker(
+        StocktakeBroker, PgStocktakeBroker, c.client
+    ),
+    # Services (initialized with the brokers)
+    "user_service": lambda c: UserService(c.get("user_broker")),
+    "book_service": lambda c: BookService(c.get("book_broker")),
+    "book_copy_service": lambda c: BookCopyService(
+        c.get("book_copy_broker"), chunk_size=get_settings().BULK_COPY_CHUNK_SIZE
+    ),
+    "book_import_service": lambda c: BookImportService(
+        c.get("book_broker"), c.get("book_copy_broker")
+    ),
+    "course_service": lambda c: CourseService(c.get("course_broker")),
+    "loan_service": lambda c: LoanService(
+        c.get("loan_broker"),
+        c.get("user_broker"),
+        c.get("book_copy_broker"),
+        c.get("course_broker"),
+    ),
+    "stats_service": lambda c: StatsService(
+        c.get("stats_broker"),
+        rollup_max_age=2 * get_settings().STATS_ROLLUP_INTERVAL_SECONDS,
+    ),
+    "export_service": lambda c: ExportService(
+        c.get("book_broker"),
+        c.get("book_copy_broker"),
+        c.get("user_broker"),
+        c.get("loan_broker"),
+    ),
+    "stocktake_service": lambda c: StocktakeService(c.get("stocktake_broker")),
+}
+
+_container: Optional[Container] = None
+
+
+async def get_container(client: Client = Depends(get_db_client)) -> Container:
+    """
+    Returns the app container for the injected client
+
+    The production client is a singleton, so the container is built once per
+    worker. Overriding get_db_client (e.g. with a mock in tests) swaps in a
+    fresh container for that client; overriding any broker or service getter
+    below also works, and an overridden broker reaches the services using it.
+    """
+    global _container
+    if _container is None or _container.client is not client:
+        _container = Container(client, FACTORIES)
+    return _container
+
+
+def reset_container() -> None:
+    """Drop the app container (shutdown, or tests that change settings)"""
+    global _container
+    _container = None
+
+
+# 3. Inject the Broker
+async def get_user_broker(container: Container = Depends(get_container)) -> UserBroker:
+    return container.get("user_broker")
+
+
+async def get_book_broker(container: Container = Depends(get_container)) -> BookBroker:
+    return container.get("book_broker")
 
 
-def get_book_broker(client: Client = Depends(get_db_client)) -> BookBroker:
-    return BookBroker(client)
+async def get_book_copy_broker(
+    container: Container = Depends(get_container),
+) -> BookCopyBroker:
+    return container.get("book_copy_broker")
 
 
-def get_book_copy_broker(client: Client = Depends(get_db_client)) -> BookCopyBroker:
-    return BookCopyBroker(client)
+async def get_course_broker(
+    container: Container = Depends(get_container),
+) -> CourseBroker:
+    return container.get("course_broker")
 
 
-def get_course_broker(client: Client = Depends(get_db_client)) -> CourseBroker:
-    return CourseBroker(client)
+async def get_loan_broker(container: Container = Depends(get_container)) -> LoanBroker:
+    return container.get("loan_broker")
 
 
-def get_loan_broker(client: Client = Depends(get_db_client)) -> LoanBroker:
-    return LoanBroker(client)
+async def get_stats_broker(
+    container: Container = Depends(get_container),
+) -> StatsBroker:
+    return container.get("stats_broker")
 
 
-def get_stats_broker(client: Client = Depends(get_db_client)) -> StatsBroker:
-    return StatsBroker(client)
+async def get_stocktake_broker(
+    container: Container = Depends(get_container),
+) -> StocktakeBroker:
+    return container.get("stocktake_broker")
 
 
-# 3. Inject the Service (initialized with the broker)
-def get_user_service(broker: UserBroker = Depends(get_user_broker)) -> UserService:
-    return UserService(broker)
+# 4. Inject the Service. Services depend on the broker getters, so overriding
+#    e.g. get_book_broker also reaches get_book_service; otherwise the
+#    container's instance is returned.
+def _service(container: Container, name: str, **brokers) -> Any:
+    """The container's service, or one built around overridden brokers"""
+    if all(container.get(key) is broker for key, broker in brokers.items()):
+        return container.get(name)
+    return container.with_instances(brokers).get(name)
 
 
-def get_book_service(broker: BookBroker = Depends(get_book_broker)) -> BookService:
-    return BookService(broker)
+async def get_user_service(
+    container: Container = Depends(get_container),
+    user_broker: UserBroker = Depends(get_user_broker),
+) -> UserService:
+    return _service(container, "user_service", user_broker=user_broker)
+
 
+async def get_book_service(
+    container: Container = Depends(get_container),
+    book_broker: BookBroker = Depends(get_book_broker),
+) -> BookService:
+    return _service(container, "book_service", book_broker=book_broker)
 
-def get_book_copy_service(
-    broker: BookCopyBroker = Depends(get_book_copy_broker),
+
+async def get_book_copy_service(
+    container: Container = Depends(get_container),
+    book_copy_broker: BookCopyBroker = Depends(get_book_copy_broker),
 ) -> BookCopyService:
-    return BookCopyService(broker)
+    return _service(container, "book_copy_service", book_copy_broker=book_copy_broker)
+
 
+async def get_book_import_service(
+    container: Container = Depends(get_container),
+    book_broker: BookBroker = Depends(get_book_broker),
+    book_copy_broker: BookCopyBroker = Depends(get_book_copy_broker),
+) -> BookImportService:
+    return _service(
+        container,
+        "book_import_service",
+        book_broker=book_broker,
+        book_copy_broker=book_copy_broker,
+    )
 
-def get_course_service(
-    broker: CourseBroker = Depends(get_course_broker),
+
+async def get_course_service(
+    container: Container = Depends(get_container),
+    course_broker: CourseBroker = Depends(get_course_broker),
 ) -> CourseService:
-    return CourseService(broker)
+    return _service(container, "course_service", course_broker=course_broker)
 
 
-def get_loan_service(
+async def get_loan_service(
+    container: Container = Depends(get_container),
     loan_broker: LoanBroker = Depends(get_loan_broker),
     user_broker: UserBroker = Depends(get_user_broker),
-    copy_broker: BookCopyBroker = Depends(get_book_copy_broker),
+    book_copy_broker: BookCopyBroker = Depends(get_book_copy_broker),
     course_broker: CourseBroker = Depends(get_course_broker),
 ) -> LoanService:
-    return LoanService(loan_broker, user_broker, copy_broker, course_broker)
+    return _service(
+        container,
+        "loan_service",
+        loan_broker=loan_broker,
+        user_broker=user_broker,
+        book_copy_broker=book_copy_broker,
+        course_broker=course_broker,
+    )
+
+
+async def get_stats_service(
+    container: Container = Depends(get_container),
+    stats_broker: StatsBroker = Depends(get_stats_broker),
+) -> StatsService:
+    return _service(container, "stats_service", stats_broker=stats_broker)
+
+
+async def get_export_service(
+    container: Container = Depends(get_container),
+    book_broker: BookBroker = Depends(get_book_broker),
+    book_copy_broker: BookCopyBroker = Depends(get_book_copy_broker),
+    user_broker: UserBroker = Depends(get_user_broker),
+    loan_broker: LoanBroker = Depends(get_loan_broker),
+) -> ExportService:
+    return _service(
+        container,
+        "export_service",
+        book_broker=book_broker,
+        book_copy_broker=book_copy_broker,
+        user_broker=user_broker,
+        loan_broker=loan_broker,
+    )
+
+
+async def get_stocktake_service(
+    container: Container = Depends(get_container),
+    stocktake_broker: StocktakeBroker = Depends(get_stocktake_broker),
+) -> StocktakeService:
+    return _service(container, "stocktake_service", stocktake_broker=stocktake_broker)
 
 
-def get_stats_service(broker: StatsBroker = Depends(get_stats_broker)) -> StatsService:
-    return StatsService(broker)
+# 5. Inject ?fields= projections for list endpoints (validated per field set)
+get_book_list_fields = fields_query(BookResponse, BOOK_LIST_COLUMNS)
+get_copy_list_fields = fields_query(BookCopyResponse, COPY_COLUMNS)
+get_user_list_fields = fields_query(UserResponse, USER_COLUMNS)
+get_loan_list_fields = fields_query(LoanResponse, LOAN_COLUMNS)
+get_course_list_fields = fields_query(CourseResponse, COURSE_COLUMNS)
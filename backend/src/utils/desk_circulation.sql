@@ -0,0 +1,126 @@
+-- Barcode-driven desk circulation: return or check out a batch of scanned copies
+-- Each call is one transaction and touches every row set-based
+-- (one UPDATE per table instead of several requests per scanned book)
+-- Run this in your Supabase SQL Editor after creationDB.sql
+
+-- Open loans are looked up by copy and status on every scan
+CREATE INDEX IF NOT EXISTS idx_loans_copy_id_status
+    ON loans (copy_id, status);
+
+-- Same rules as LoanService.return_loan:
+--   active/overdue loan -> 'returned' with return_date, copy -> 'available',
+--   and one infraction per late return when increment_infractions is set
+CREATE OR REPLACE FUNCTION desk_return_copies(
+    accession_numbers BIGINT[],
+    increment_infractions BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (
+    accession_number BIGINT,
+    outcome TEXT,
+    loan_id UUID,
+    user_id UUID,
+    was_overdue BOOLEAN
+) AS $$
+#variable_conflict use_column
+BEGIN
+    -- Data-modifying CTEs all run, in one statement, against the same snapshot
+    RETURN QUERY
+    WITH targets AS (
+        SELECT
+            c.accession_number,
+            c.id AS copy_id,
+            l.id AS loan_id,
+            l.user_id,
+            (l.due_date IS NOT NULL AND l.due_date < NOW()) AS was_overdue
+        FROM book_copies c
+        JOIN loans l
+          ON l.copy_id = c.id
+         AND l.status IN ('active', 'overdue')
+        WHERE c.accession_number = ANY(accession_numbers)
+    ),
+    returned AS (
+        UPDATE loans l
+           SET status = 'returned', return_date = NOW()
+          FROM targets t
+         WHERE l.id = t.loan_id
+        RETURNING l.id
+    ),
+    released AS (
+        UPDATE book_copies c
+           SET status = 'available'
+          FROM targets t
+         WHERE c.id = t.copy_id
+        RETURNING c.id
+    ),
+    penalized AS (
+        UPDATE users u
+           SET infractions_count = u.infractions_count + late.returns
+          FROM (
+              SELECT t.user_id, COUNT(*) AS returns
+              FROM targets t
+              WHERE t.was_overdue
+              GROUP BY t.user_id
+          ) late
+         WHERE increment_infractions
+           AND u.id = late.user_id
+        RETURNING u.id
+    )
+    SELECT
+        s.accession_number,
+        CASE
+            WHEN t.loan_id IS NOT NULL THEN 'returned'
+            WHEN c.id IS NOT NULL THEN 'no_open_loan'
+            ELSE 'not_found'
+        END,
+        t.loan_id,
+        t.user_id,
+        COALESCE(t.was_overdue, FALSE)
+    FROM (SELECT DISTINCT unnest(accession_numbers) AS accession_number) s
+    LEFT JOIN book_copies c ON c.accession_number = s.accession_number
+    LEFT JOIN targets t ON t.accession_number = s.accession_number;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same rules as LoanService.checkout_loan:
+--   pending_pickup loan -> 'active'; the copy stays unavailable until returned
+CREATE OR REPLACE FUNCTION desk_checkout_copies(
+    accession_numbers BIGINT[]
+)
+RETURNS TABLE (
+    accession_number BIGINT,
+    outcome TEXT,
+    loan_id UUID,
+    user_id UUID,
+    was_overdue BOOLEAN
+) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH checked_out AS (
+        UPDATE loans l
+           SET status = 'active'
+          FROM book_copies c
+         WHERE c.accession_number = ANY(accession_numbers)
+           AND l.copy_id = c.id
+           AND l.status = 'pending_pickup'
+        RETURNING c.accession_number, l.id AS loan_id, l.user_id
+    )
+    SELECT
+        s.accession_number,
+        CASE
+            WHEN t.loan_id IS NOT NULL THEN 'checked_out'
+            WHEN c.id IS NOT NULL THEN 'no_pending_pickup'
+            ELSE 'not_found'
+        END,
+        t.loan_id,
+        t.user_id,
+        FALSE
+    FROM (SELECT DISTINCT unnest(accession_numbers) AS accession_number) s
+    LEFT JOIN book_copies c ON c.accession_number = s.accession_number
+    LEFT JOIN checked_out t ON t.accession_number = s.accession_number;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example usage:
+-- SELECT * FROM desk_return_copies(ARRAY[10001, 10002, 10003], TRUE);
+-- SELECT * FROM desk_checkout_copies(ARRAY[10004, 10005]);
@@ -0,0 +1,279 @@
+"""
+Bounded executors per workload class (bulkheads)
+
+Blocking broker calls used to share asyncio's default to_thread executor, so a
+few slow report queries could occupy every thread and stall the circulation
+desk. Each workload class now has its own pool:
+
+    circulation   loans and user lookups at the desk
+    catalog       books, copies, courses, imports and stocktakes
+    reports       statistics and exports
+    auth          login and registration
+    hashing       password hashing, in worker processes (see passwords.py)
+
+A pool runs at most <POOL>_POOL_WORKERS calls at once. Further calls wait in
+line; once <POOL>_POOL_QUEUE calls are waiting, or a call has waited
+<POOL>_POOL_TIMEOUT_SECONDS, it fails fast with a 503 instead of piling up.
+
+Brokers and services are tagged with @workload(POOL) (classes or single
+methods). The outermost tagged call wins, so a broker used by a report
+service runs on the reports pool. Brokers call to_thread() from this module
+instead of asyncio.to_thread; untagged calls still use the default executor.
+With DATABASE_BACKEND=postgres there are no threads, and Database holds a
+pool slot for the duration of each statement instead.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from .config import get_settings
+from .metrics import EXECUTOR_QUEUE_WAIT, EXECUTOR_REJECTIONS
+from .tracing import passthrough
+
+T = TypeVar("T")
+
+CIRCULATION = "circulation"
+CATALOG = "catalog"
+REPORTS = "reports"
+AUTH = "auth"
+HASHING = "hashing"
+
+# Pools brokers and services can be tagged with
+POOLS = (CIRCULATION, CATALOG, REPORTS, AUTH)
+# Pools running CPU-bound work in processes instead of threads
+PROCESS_POOLS = (HASHING,)
+
+
+class PoolBusyError(HTTPException):
+    """Raised when a pool's queue is full or a call waited too long for it"""
+
+    def __init__(self, pool: str, reason: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"The server is busy ({pool}), please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+        self.pool = pool
+        self.reason = reason
+
+
+class BoundedExecutor:
+    """A thread (or process) pool with a bounded, timed wait line in front of it"""
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: float,
+        processes: bool = False,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.processes = processes
+        self.queued = 0
+        self.active = 0
+        self._slots = asyncio.Semaphore(max_workers)
+        self._workers: Optional[Executor] = None
+
+    def _reject(self, reason: str) -> PoolBusyError:
+        EXECUTOR_REJECTIONS.inc(self.name, reason)
+        return PoolBusyError(self.name, reason)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the pool's max_workers slots"""
+        if self._slots.locked():
+            if self.queued >= self.max_queue:
+                raise self._reject("queue_full")
+            self.queued += 1
+            started = time.perf_counter()
+            try:
+                # Unlike wait_for, a timeout that lands just as the acquire
+                # returns can't drop the permit: it only cancels a pending wait
+                async with asyncio.timeout(self.queue_timeout):
+                    await self._slots.acquire()
+            except TimeoutError:
+                raise self._reject("timeout") from None
+            finally:
+                self.queued -= 1
+                EXECUTOR_QUEUE_WAIT.observe(time.perf_counter() - started, self.name)
+        else:
+            await self._slots.acquire()
+            EXECUTOR_QUEUE_WAIT.observe(0.0, self.name)
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def _executor(self) -> Executor:
+        if self._workers is None:
+            if self.processes:
+                # spawn: forking a process that runs threads is unsafe
+                self._workers = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._workers = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix=f"{self.name}-pool"
+                )
+        return self._workers
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Like asyncio.to_thread (contextvars included), on this pool
+
+        For process pools func and its arguments must be picklable (a module
+        level function) and contextvars are not carried over.
+        """
+        async with self.slot():
+            if self.processes:
+                call = functools.partial(func, *args, **kwargs)
+            else:
+                context = contextvars.copy_context()
+                call = functools.partial(context.run, func, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor(), call
+            )
+
+    def shutdown(self) -> None:
+        if self._workers is not None:
+            self._workers.shutdown(wait=False, cancel_futures=True)
+            self._workers = None
+
+
+# ==================== REGISTRY ====================
+
+_executors: Dict[str, BoundedExecutor] = {}
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    executor = _executors.get(name)
+    if executor is None:
+        settings = get_settings()
+        prefix = name.upper()
+        executor = _executors[name] = BoundedExecutor(
+            name,
+            max_workers=getattr(settings, f"{prefix}_POOL_WORKERS"),
+            max_queue=getattr(settings, f"{prefix}_POOL_QUEUE"),
+            queue_timeout=getattr(settings, f"{prefix}_POOL_TIMEOUT_SECONDS"),
+            processes=name in PROCESS_POOLS,
+        )
+    return executor
+
+
+def get_executors() -> Dict[str, BoundedExecutor]:
+    """Executors created so far, by pool name"""
+    return dict(_executors)
+
+
+def shutdown_executors() -> None:
+    """Stop every pool's threads and processes (on shutdown, or between tests)"""
+    for executor in _executors.values():
+        executor.shutdown()
+    _executors.clear()
+
+
+# ==================== ROUTING ====================
+
+_current_pool: ContextVar[Optional[str]] = ContextVar("executor_pool", default=None)
+
+
+def current_pool() -> Optional[str]:
+    """Pool of the outermost tagged call in progress, if any"""
+    return _current_pool.get()
+
+
+async def to_thread(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call on the current workload's pool"""
+    pool = _current_pool.get()
+    if pool is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return await get_executor(pool).run(func, *args, **kwargs)
+
+
+@asynccontextmanager
+async def pool_slot() -> AsyncIterator[None]:
+    """Hold a slot of the current workload's pool for non-thread work"""
+    pool = _current_pool.get()
+    if pool is None:
+        yield
+        return
+    async with get_executor(pool).slot():
+        yield
+
+
+def _routed(pool: str, func):
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def generator(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    # Set around each step only: between items the consumer runs
+                    token = _current_pool.set(_current_pool.get() or pool)
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _current_pool.reset(token)
+                    yield item
+            finally:
+                await iterator.aclose()
+
+        generator.__workload__ = pool
+        return generator
+
+    @passthrough
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _current_pool.set(_current_pool.get() or pool)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _current_pool.reset(token)
+
+    wrapper.__workload__ = pool
+    return wrapper
+
+
+def workload(pool: str):
+    """
+    Route blocking work done by a class's (or one method's) calls to pool
+
+    On a class, every public async method and async generator is tagged,
+    except methods that carry their own @workload.
+    """
+    if pool not in POOLS:
+        raise ValueError(f"Unknown pool {pool!r}")
+
+    def decorate(target):
+        if not inspect.isclass(target):
+            return _routed(pool, target)
+        for name, member in list(vars(target).items()):
+            if name.startswith("_") or hasattr(member, "__workload__"):
+                continue
+            if inspect.iscoroutinefunction(member) or inspect.isasyncgenfunction(
+                member
+            ):
+                setattr(target, name, _routed(pool, member))
+        return target
+
+    return decorate
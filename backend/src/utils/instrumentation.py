@@ -0,0 +1,165 @@
+"""
+Per-request database round-trip accounting
+
+Every PostgREST call made by a broker goes through the shared httpx client
+built by instrumented_http_client(). Its transport records the call on the
+QueryStats of the current request (held in a contextvar, which asyncio.to_thread
+copies into the worker thread), and QueryStatsMiddleware reports the totals as
+`X-DB-Queries` and `Server-Timing` response headers. Each call is also recorded
+as a tracing span (see tracing.py).
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_TIMEOUT
+
+from .profiling import profiled_thread
+from .tracing import REST_PATH, record_span
+
+
+class QueryStats:
+    """Round trips, DB wall time and bytes received during one request"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.queries = 0
+        self.db_time = 0.0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+
+    def record(self, duration: float, size: int) -> None:
+        # Brokers may run several queries concurrently (asyncio.gather)
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            self.bytes_received += size
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def begin_query_stats(path: Optional[str] = None) -> QueryStats:
+    """Start collecting for the current context (request or test)"""
+    stats = QueryStats(path)
+    _query_stats.set(stats)
+    return stats
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+def record_query(duration: float, size: int = 0) -> None:
+    """Count one database round trip against the current request, if any"""
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(duration, size)
+
+
+# ==================== HTTP CLIENT ====================
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Times PostgREST requests, including reading the response body"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if REST_PATH not in request.url.path:
+            return self.transport.handle_request(request)
+
+        started = time.perf_counter()
+        response = None
+        size = 0
+        try:
+            with profiled_thread():
+                response = self.transport.handle_request(request)
+                response.read()
+            size = response.num_bytes_downloaded
+            return response
+        finally:
+            # Failed calls still cost a round trip
+            duration = time.perf_counter() - started
+            record_query(duration, size)
+            stats = current_query_stats()
+            status_code = content_range = None
+            if response is not None:
+                status_code = response.status_code
+                content_range = response.headers.get("content-range")
+            record_span(
+                request.method,
+                request.url.path,
+                request.url.query,
+                status_code,
+                content_range,
+                duration,
+                size,
+                request_path=stats.path if stats is not None else None,
+            )
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def instrumented_http_client() -> httpx.Client:
+    """httpx client for the Supabase client (same defaults as postgrest-py)"""
+    # Imported lazily: config -> instrumentation -> resilience -> config
+    from .resilience import ResilientTransport
+
+    return httpx.Client(
+        transport=ResilientTransport(
+            InstrumentedTransport(httpx.HTTPTransport(http2=True))
+        ),
+        timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+# ==================== MIDDLEWARE ====================
+
+
+def timing_headers(stats: QueryStats, elapsed: float) -> list[tuple[bytes, bytes]]:
+    db_ms = stats.db_time * 1000
+    server_timing = (
+        f'db;dur={db_ms:.1f};desc="{stats.queries} queries, '
+        f'{stats.bytes_received} bytes", app;dur={elapsed * 1000:.1f}'
+    )
+    return [
+        (b"x-db-queries", str(stats.queries).encode()),
+        (b"server-timing", server_timing.encode()),
+    ]
+
+
+class QueryStatsMiddleware:
+    """
+    Adds X-DB-Queries and Server-Timing headers to every HTTP response
+
+    Plain ASGI (not BaseHTTPMiddleware) so streaming responses are untouched;
+    for those the headers cover the queries made before the first chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = begin_query_stats(scope["path"])
+        started = time.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                message["headers"] = list(message.get("headers", [])) + (
+                    timing_headers(stats, elapsed)
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
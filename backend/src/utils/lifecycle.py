@@ -0,0 +1,271 @@
+"""
+Worker startup and shutdown
+
+The lifespan manager in main.py drives one Lifecycle per worker process:
+
+    startup   build the container, open the database pool / HTTP connection
+              with a cheap query, start a password hashing process, preload
+              the hot catalog reads into the response cache, listen for user
+              status changes (access.py) and start the periodic jobs
+    shutdown  report not-ready, stop the jobs and the listener, wait for
+              in-flight requests (up to SHUTDOWN_DRAIN_TIMEOUT_SECONDS), write
+              the final metrics and close the pool
+
+If the pool can't be opened startup fails and the lifespan aborts the worker.
+Later steps (hashing pool, cache preload, status listener) only log their
+failures. /readyz answers 503 while a worker is draining, so a load balancer
+stops routing to it, while /healthz keeps answering for the liveness probe.
+
+The periodic jobs run in every worker that enables them. The stats rollup is
+per process; the overdue job is off by default (OVERDUE_JOB_INTERVAL_SECONDS)
+and should be enabled on one instance only.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..Models.Books import BookResponse, BookWithStatsResponse
+from ..Models.Courses import CourseResponse
+from ..Models.Loans import LoanPolicyResponse
+from .access import StatusListener, build_status_listener
+from .cache import BOOKS, COPIES, COURSES, LOAN_POLICIES, warm_response_cache
+from .container import Container
+from .database import Database
+from .metrics import JOB_LATENCY, JOB_RUNS, REQUESTS_IN_FLIGHT, flush_metrics
+from .passwords import warm_hashing
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== PERIODIC JOBS ====================
+
+
+class PeriodicJob:
+    """Runs func every interval seconds (first run right away) until stopped"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable[Any]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.last_success: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop(), name=f"job:{self.name}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> bool:
+        started = time.perf_counter()
+        try:
+            await self.func()
+        except Exception:
+            # A failed run is retried on the next tick
+            logger.exception("Background job %s failed", self.name)
+            JOB_RUNS.inc(self.name, "error")
+            return False
+        finally:
+            JOB_LATENCY.observe(time.perf_counter() - started, self.name)
+        JOB_RUNS.inc(self.name, "success")
+        self.last_success = time.time()
+        return True
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+
+def build_jobs(container: Container, settings) -> List[PeriodicJob]:
+    """Periodic jobs enabled in settings"""
+    jobs = []
+    if settings.OVERDUE_JOB_INTERVAL_SECONDS > 0:
+        loan_service = container.get("loan_service")
+        jobs.append(
+            PeriodicJob(
+                "mark_overdue_loans",
+                settings.OVERDUE_JOB_INTERVAL_SECONDS,
+                loan_service.mark_overdue_loans,
+            )
+        )
+    if settings.STATS_ROLLUP_INTERVAL_SECONDS > 0:
+        stats_service = container.get("stats_service")
+        jobs.append(
+            PeriodicJob(
+                "stats_rollup",
+                settings.STATS_ROLLUP_INTERVAL_SECONDS,
+                stats_service.refresh_dashboard_stats,
+            )
+        )
+    return jobs
+
+
+# ==================== WARM-UP ====================
+
+
+async def warm_pool(client: Any) -> None:
+    """Open the connections the first requests would otherwise wait for"""
+    if isinstance(client, Database):
+        # Creating the pool opens DB_POOL_MIN_SIZE connections
+        await client.fetchval("SELECT 1")
+        return
+
+    def _fetch():
+        return client.table("loan_policies").select("role").limit(1).execute()
+
+    await asyncio.to_thread(_fetch)
+
+
+def _hot_reads(container: Container) -> Dict[str, tuple]:
+    """
+    First pages of the most requested catalog reads, keyed by route path
+
+    Each entry mirrors the endpoint's cached_json_response call without query
+    parameters, so the warmed body is the one a plain GET of the path returns.
+    """
+    loan_service = container.get("loan_service")
+    course_service = container.get("course_service")
+    book_service = container.get("book_service")
+    return {
+        "/loans/policies/all": (
+            [LOAN_POLICIES],
+            List[LoanPolicyResponse],
+            loan_service.get_all_loan_policies,
+            False,
+        ),
+        "/courses/": (
+            [COURSES],
+            List[CourseResponse],
+            lambda: course_service.RetrieveAllCourses(skip=0, limit=100),
+            True,
+        ),
+        "/books/": (
+            [BOOKS],
+            List[BookResponse],
+            lambda: book_service.RetrieveAllBooks(skip=0, limit=10),
+            True,
+        ),
+        "/books/with-stats": (
+            [BOOKS, COPIES],
+            List[BookWithStatsResponse],
+            lambda: book_service.RetrieveBooksWithStats(skip=0, limit=50),
+            True,
+        ),
+    }
+
+
+async def preload_caches(container: Container) -> Dict[str, bool]:
+    """Fill the response cache with the hot reads; returns path -> loaded"""
+    loaded = {}
+    for path, (scopes, model, produce, exclude_unset) in _hot_reads(container).items():
+        try:
+            await warm_response_cache(path, scopes, model, produce, exclude_unset)
+            loaded[path] = True
+        except Exception:
+            logger.exception("Preloading %s failed", path)
+            loaded[path] = False
+    return loaded
+
+
+async def drain_requests(timeout: float, poll_interval: float = 0.05) -> bool:
+    """Wait until no request is in flight; False if the timeout ran out"""
+    deadline = time.monotonic() + timeout
+    while REQUESTS_IN_FLIGHT.value() > 0:
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(poll_interval)
+    return True
+
+
+# ==================== LIFECYCLE ====================
+
+
+class Lifecycle:
+    """Startup / shutdown steps and the readiness they report"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.pool_ready = False
+        self.caches: Dict[str, bool] = {}
+        self.draining = False
+        self.jobs: List[PeriodicJob] = []
+        self.status_listener: Optional[StatusListener] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.pool_ready and not self.draining
+
+    def status(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "not ready",
+            "pool": self.pool_ready,
+            "caches": self.caches,
+            "draining": self.draining,
+            "in_flight": int(REQUESTS_IN_FLIGHT.value()),
+            "jobs": {job.name: job.last_success for job in self.jobs},
+            "user_status_listener": bool(
+                self.status_listener and self.status_listener.listening
+            ),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+        }
+
+    async def startup(self, container: Container, settings) -> None:
+        container.build_all()
+        await warm_pool(container.client)
+        self.pool_ready = True
+        try:
+            await warm_hashing()
+        except Exception:
+            # Logins still work; the first one pays for starting the process
+            logger.exception("Starting the password hashing pool failed")
+        self.caches = await preload_caches(container)
+        self.status_listener = build_status_listener(settings)
+        if self.status_listener is not None:
+            try:
+                await self.status_listener.start()
+            except Exception:
+                # Other workers' user changes then reach this one within the TTL
+                logger.exception("Listening for user status changes failed")
+        self.jobs = build_jobs(container, settings)
+        for job in self.jobs:
+            job.start()
+
+    async def shutdown(self, settings) -> None:
+        self.draining = True
+        for job in self.jobs:
+            await job.stop()
+        if self.status_listener is not None:
+            await self.status_listener.stop()
+        if not await drain_requests(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS):
+            logger.warning(
+                "Shutting down with %d requests still in flight",
+                REQUESTS_IN_FLIGHT.value(),
+            )
+        try:
+            flush_metrics(settings.METRICS_SNAPSHOT_PATH)
+        except OSError:
+            logger.exception("Writing the metrics snapshot failed")
+
+
+_lifecycle = Lifecycle()
+
+
+def get_lifecycle() -> Lifecycle:
+    return _lifecycle
+
+
+def reset_lifecycle() -> Lifecycle:
+    """Start over (tests, or a new lifespan in the same process)"""
+    global _lifecycle
+    _lifecycle = Lifecycle()
+    return _lifecycle
@@ -0,0 +1,247 @@
+"""
+Incremental MARC readers for catalog imports
+
+Records are returned in MARC-in-JSON form, which is what books.marc_data stores:
+
+    {"leader": "...", "fields": [{"001": "..."},
+     {"245": {"ind1": "1", "ind2": "0", "subfields": [{"a": "Title"}]}}]}
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterator, List, Optional
+
+from defusedxml.ElementTree import iterparse
+
+RECORD_TERMINATOR = b"\x1d"
+FIELD_TERMINATOR = b"\x1e"
+SUBFIELD_DELIMITER = b"\x1f"
+
+MARCXML_NS = "{http://www.loc.gov/MARC21/slim}"
+
+
+class MarcError(ValueError):
+    """A record that cannot be decoded"""
+
+
+# ==================== ISO 2709 (MARC21 binary) ====================
+
+
+def _decode(data: bytes, unicode: bool) -> str:
+    # Leader/09 = 'a' marks UCS/Unicode; MARC-8 records are decoded leniently
+    return data.decode("utf-8" if unicode else "latin-1", errors="replace")
+
+
+def parse_iso2709(raw: bytes) -> dict:
+    """Decode one ISO 2709 record (including its record terminator)"""
+    if len(raw) < 25:
+        raise MarcError("Record is shorter than its leader")
+
+    leader = raw[:24].decode("ascii", errors="replace")
+    unicode = leader[9] == "a"
+    try:
+        base_address = int(leader[12:17])
+    except ValueError:
+        raise MarcError("Invalid base address in leader")
+
+    directory = raw[24 : base_address - 1]
+    if len(directory) % 12:
+        raise MarcError("Malformed directory")
+
+    fields = []
+    for offset in range(0, len(directory), 12):
+        entry = directory[offset : offset + 12].decode("ascii", errors="replace")
+        tag = entry[:3]
+        try:
+            length = int(entry[3:7])
+            start = int(entry[7:12])
+        except ValueError:
+            raise MarcError(f"Malformed directory entry for tag {tag}")
+
+        data = raw[base_address + start : base_address + start + length]
+        data = data.rstrip(FIELD_TERMINATOR)
+
+        if tag < "010":
+            fields.append({tag: _decode(data, unicode)})
+            continue
+
+        indicators = _decode(data[:2], unicode).ljust(2)
+        subfields = [
+            {_decode(chunk[:1], unicode): _decode(chunk[1:], unicode)}
+            for chunk in data[2:].split(SUBFIELD_DELIMITER)
+            if chunk
+        ]
+        fields.append(
+            {
+                tag: {
+                    "ind1": indicators[0],
+                    "ind2": indicators[1],
+                    "subfields": subfields,
+                }
+            }
+        )
+
+    return {"leader": leader, "fields": fields}
+
+
+def iter_iso2709(stream: BinaryIO) -> Iterator[dict | MarcError]:
+    """
+    Read ISO 2709 records one at a time from a binary stream
+
+    Undecodable records are yielded as MarcError so the caller can report them
+    and carry on with the next record.
+    """
+    while True:
+        length_bytes = stream.read(5)
+        if not length_bytes.strip():
+            return
+        try:
+            length = int(length_bytes)
+        except ValueError:
+            # Lost sync with the record boundaries; skip to the next terminator
+            while (byte := stream.read(1)) and byte != RECORD_TERMINATOR:
+                pass
+            yield MarcError("Invalid record length")
+            continue
+
+        raw = length_bytes + stream.read(length - 5)
+        try:
+            yield parse_iso2709(raw)
+        except MarcError as e:
+            yield e
+
+
+# ==================== MARCXML ====================
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _xml_record(element: ET.Element) -> dict:
+    leader = ""
+    fields = []
+    for child in element:
+        name = _local(child.tag)
+        if name == "leader":
+            leader = child.text or ""
+        elif name == "controlfield":
+            fields.append({child.get("tag", ""): child.text or ""})
+        elif name == "datafield":
+            fields.append(
+                {
+                    child.get("tag", ""): {
+                        "ind1": child.get("ind1", " "),
+                        "ind2": child.get("ind2", " "),
+                        "subfields": [
+                            {sub.get("code", ""): sub.text or ""}
+                            for sub in child
+                            if _local(sub.tag) == "subfield"
+                        ],
+                    }
+                }
+            )
+    return {"leader": leader, "fields": fields}
+
+
+def iter_marcxml(stream: BinaryIO) -> Iterator[dict]:
+    """Read MARCXML records one at a time, discarding each once it is parsed"""
+    # defusedxml refuses entity declarations and external references in uploads
+    context = iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    if _local(root.tag) == "record":
+        # A single-record document: the root is the record itself
+        for event, element in context:
+            pass
+        yield _xml_record(root)
+        return
+
+    for event, element in context:
+        if event == "end" and _local(element.tag) == "record":
+            yield _xml_record(element)
+            # Drop parsed records so memory stays flat on large collections
+            root.clear()
+
+
+# ==================== MARC -> BOOK ====================
+
+
+def _subfields(record: dict, tag: str) -> Optional[dict]:
+    for field in record["fields"]:
+        value = field.get(tag)
+        if isinstance(value, dict):
+            merged: dict = {}
+            for subfield in value["subfields"]:
+                for code, text in subfield.items():
+                    merged.setdefault(code, text)
+            return merged
+    return None
+
+
+def _control(record: dict, tag: str) -> Optional[str]:
+    for field in record["fields"]:
+        value = field.get(tag)
+        if isinstance(value, str):
+            return value
+    return None
+
+
+def _clean(text: Optional[str]) -> Optional[str]:
+    """Strip ISBD punctuation that MARC leaves at the end of subfields"""
+    if text is None:
+        return None
+    text = text.strip().rstrip(" /:;,=").strip()
+    if text.endswith(".") and not re.search(r"\b[A-Z]\.$", text):
+        text = text[:-1]
+    return text or None
+
+
+def _first(record: dict, tags: List[str], code: str) -> Optional[str]:
+    for tag in tags:
+        subfields = _subfields(record, tag)
+        if subfields and subfields.get(code):
+            return subfields[code]
+    return None
+
+
+def marc_to_book(record: dict) -> dict:
+    """Map a MARC-in-JSON record onto the books table columns"""
+    isbn = _first(record, ["020"], "a")
+    if isbn:
+        # "0306406152 (pbk.)" -> "0306406152"
+        isbn = isbn.split()[0]
+
+    title_fields = _subfields(record, "245") or {}
+    title = " ".join(
+        part for part in (_clean(title_fields.get("a")), title_fields.get("b")) if part
+    )
+
+    year = None
+    date = _first(record, ["264", "260"], "c")
+    match = re.search(r"\d{4}", date or "")
+    if match:
+        year = int(match.group())
+    else:
+        fixed = _control(record, "008") or ""
+        if fixed[7:11].isdigit():
+            year = int(fixed[7:11])
+
+    call_number = None
+    for tag in ("050", "090", "082"):
+        subfields = _subfields(record, tag)
+        if subfields and subfields.get("a"):
+            call_number = " ".join(
+                part for part in (subfields.get("a"), subfields.get("b")) if part
+            )
+            break
+
+    return {
+        "isbn": isbn,
+        "title": _clean(title) or None,
+        "author": _clean(_first(record, ["100", "110", "111", "700"], "a")),
+        "publisher": _clean(_first(record, ["264", "260"], "b")),
+        "publication_year": year,
+        "call_number": call_number,
+        "book_number": _control(record, "001"),
+        "marc_data": record,
+    }
@@ -0,0 +1,481 @@
+"""
+In-process metrics in the Prometheus text exposition format
+
+Latency histograms per route and per broker method, in-flight requests, error
+counts, reads served by the replica, retries and circuit breakers
+(resilience.py), cache hit ratios and the depth of the workload pools broker
+calls run on (executors.py) and of asyncio's default thread pool. Values are
+per worker process; scrape each worker (or run a single worker) to see the
+whole picture.
+"""
+
+import asyncio
+import functools
+import inspect
+import sys
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+
+from .tracing import broker_call, caller_name
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ==================== METRIC TYPES ====================
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Set directly, or computed at scrape time when given a collect callback"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple = (),
+        collect: Optional[Callable[[], dict[tuple, float]]] = None,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, *label_values) -> None:
+        self._values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        values = self.collect() if self.collect else self._values
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(values.items()):
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * (bucket_count + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labels: tuple = (), buckets=DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, _HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = _HistogramSeries(len(self.buckets))
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return series.count if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labels, label_values, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series.sum!r}")
+            lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ==================== APPLICATION METRICS ====================
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to the first response byte, per route",
+        labels=("method", "route", "status"),
+    )
+)
+REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge("http_requests_in_flight", "Requests currently being handled")
+)
+REQUESTS_IN_FLIGHT.set(0)
+REQUEST_ERRORS = REGISTRY.register(
+    Counter(
+        "http_request_errors_total",
+        "Responses with a 5xx status or unhandled exceptions, per route",
+        labels=("method", "route"),
+    )
+)
+BROKER_LATENCY = REGISTRY.register(
+    Histogram(
+        "broker_call_duration_seconds",
+        "Broker method latency, including thread pool wait",
+        labels=("broker", "method"),
+    )
+)
+BROKER_ERRORS = REGISTRY.register(
+    Counter(
+        "broker_call_errors_total",
+        "Broker method calls that raised",
+        labels=("broker", "method"),
+    )
+)
+BROKER_READS = REGISTRY.register(
+    Counter(
+        "broker_reads_total",
+        "Read-only broker calls with a replica configured, by where they ran "
+        "(replica, or primary after a recent write or inside on_primary)",
+        labels=("target",),
+    )
+)
+BROKER_RETRIES = REGISTRY.register(
+    Counter(
+        "broker_retries_total",
+        "Read-only broker calls retried after a transient database error",
+        labels=("broker", "method"),
+    )
+)
+BROKER_UNAVAILABLE = REGISTRY.register(
+    Counter(
+        "broker_unavailable_total",
+        "Broker calls answered with a 503: circuit open, request deadline "
+        "passed, or a transient error that retries didn't cure",
+        labels=("broker", "method", "reason"),
+    )
+)
+CIRCUIT_REJECTIONS = REGISTRY.register(
+    Counter(
+        "circuit_rejections_total",
+        "Database calls refused without trying because their circuit was open",
+        labels=("circuit",),
+    )
+)
+JOB_RUNS = REGISTRY.register(
+    Counter(
+        "background_job_runs_total",
+        "Periodic background job runs, by outcome",
+        labels=("job", "result"),
+    )
+)
+JOB_LATENCY = REGISTRY.register(
+    Histogram(
+        "background_job_duration_seconds",
+        "Periodic background job run time",
+        labels=("job",),
+    )
+)
+EXECUTOR_QUEUE_WAIT = REGISTRY.register(
+    Histogram(
+        "executor_queue_wait_seconds",
+        "Time a call waited for a slot in its workload pool",
+        labels=("pool",),
+    )
+)
+EXECUTOR_REJECTIONS = REGISTRY.register(
+    Counter(
+        "executor_rejections_total",
+        "Calls turned away with a 503 because their pool's queue was full or "
+        "they waited too long",
+        labels=("pool", "reason"),
+    )
+)
+
+
+def _thread_pool_stats() -> dict[tuple, float]:
+    """Default executor used by asyncio.to_thread (created lazily by the loop)"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return {}
+    executor = getattr(loop, "_default_executor", None)
+    if executor is None:
+        return {("queued",): 0, ("threads",): 0, ("max_threads",): 0}
+    return {
+        ("queued",): executor._work_queue.qsize(),
+        ("threads",): len(executor._threads),
+        ("max_threads",): executor._max_workers,
+    }
+
+
+def _executor_stats() -> dict[tuple, float]:
+    from .executors import get_executors
+
+    stats = {}
+    for name, executor in get_executors().items():
+        stats[(name, "queued")] = executor.queued
+        stats[(name, "active")] = executor.active
+        stats[(name, "max_workers")] = executor.max_workers
+    return stats
+
+
+def _circuit_stats() -> dict[tuple, float]:
+    from .resilience import HALF_OPEN, OPEN, get_circuits
+
+    levels = {OPEN: 2, HALF_OPEN: 1}
+    return {
+        (name,): levels.get(circuit.state, 0)
+        for name, circuit in get_circuits().items()
+    }
+
+
+def _cache_stats() -> dict[tuple, float]:
+    from .cache import (
+        get_accession_cache,
+        get_response_cache,
+        get_token_cache,
+        get_user_status_cache,
+    )
+
+    stats = {}
+    for name, cache in (
+        ("response", get_response_cache()),
+        ("accession", get_accession_cache()),
+        ("token", get_token_cache()),
+        ("user_status", get_user_status_cache()),
+    ):
+        lookups = cache.hits + cache.misses
+        stats[(name,)] = cache.hits / lookups if lookups else 0.0
+    return stats
+
+
+def _cache_lookups() -> dict[tuple, float]:
+    from .cache import (
+        get_accession_cache,
+        get_response_cache,
+        get_token_cache,
+        get_user_status_cache,
+    )
+
+    stats = {}
+    for name, cache in (
+        ("response", get_response_cache()),
+        ("accession", get_accession_cache()),
+        ("token", get_token_cache()),
+        ("user_status", get_user_status_cache()),
+    ):
+        stats[(name, "hit")] = cache.hits
+        stats[(name, "miss")] = cache.misses
+    return stats
+
+
+REGISTRY.register(
+    Gauge(
+        "thread_pool_workers",
+        "asyncio.to_thread pool: queued work items, live threads and the cap",
+        labels=("state",),
+        collect=_thread_pool_stats,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "executor_workers",
+        "Workload pools: calls waiting for a slot, calls running and the cap",
+        labels=("pool", "state"),
+        collect=_executor_stats,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "circuit_state",
+        "Per table or RPC: 0 closed, 1 half-open (probing), 2 open",
+        labels=("circuit",),
+        collect=_circuit_stats,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "cache_hit_ratio",
+        "Hits / lookups since the process started",
+        labels=("cache",),
+        collect=_cache_stats,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "cache_lookups",
+        "Cache lookups since the process started, by result",
+        labels=("cache", "result"),
+        collect=_cache_lookups,
+    )
+)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def flush_metrics(path: str) -> None:
+    """Write the final exposition to path (e.g. on shutdown, after the last scrape)"""
+    if not path:
+        return
+    with open(path, "w", encoding="utf-8") as snapshot:
+        snapshot.write(render_metrics())
+
+
+# ==================== BROKER INSTRUMENTATION ====================
+
+
+def _timed(broker: str, method: str, func):
+    operation = f"{broker}.{method}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        # While this coroutine runs, f_back is the frame awaiting it
+        caller = caller_name(sys._getframe().f_back)
+        started = time.perf_counter()
+        try:
+            with broker_call(operation, caller):
+                return await func(*args, **kwargs)
+        except Exception:
+            BROKER_ERRORS.inc(broker, method)
+            raise
+        finally:
+            BROKER_LATENCY.observe(time.perf_counter() - started, broker, method)
+
+    return wrapper
+
+
+def instrument_broker(cls):
+    """
+    Class decorator: time and trace every public async method of a broker
+
+    Recorded as broker_call_duration_seconds with broker="BookBroker" and
+    method="SearchBooks" labels.
+    Async generators (streaming exports) are left alone since their duration is
+    governed by the client reading the response.
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(member):
+            continue
+        setattr(cls, name, _timed(cls.__name__, name, member))
+    return cls
+
+
+# ==================== MIDDLEWARE ====================
+
+
+def _route_label(scope) -> str:
+    # Route templates keep label cardinality bounded (no ids in the path)
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Records per-route latency, in-flight requests and error counts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                REQUEST_LATENCY.observe(
+                    time.perf_counter() - started,
+                    method,
+                    _route_label(scope),
+                    str(status_code),
+                )
+                if status_code >= 500:
+                    REQUEST_ERRORS.inc(method, _route_label(scope))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            if status_code is None:
+                REQUEST_ERRORS.inc(method, _route_label(scope))
+            raise
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
@@ -0,0 +1,71 @@
+"""
+Password hashing off the event loop
+
+werkzeug's password hashes are deliberately slow key derivations (scrypt by
+default). Computed inside a request they block the event loop, so at peak
+login times every other request stalls behind them. They run on the hashing
+pool instead (executors.py): HASHING_POOL_WORKERS processes, with the same
+queue limit and timeout handling as the other pools.
+
+verify_password also reports when a stored hash was made with a different
+method or cost than PASSWORD_HASH_METHOD, returning a fresh hash to store, so
+raising the cost upgrades users as they log in.
+
+The functions run in the worker processes are plain module-level functions
+so they can be pickled.
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .config import get_settings
+from .executors import HASHING, get_executor
+
+# ==================== WORKER PROCESS SIDE ====================
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    """Method as stored, with werkzeug's defaults ("scrypt" -> "scrypt:32768:8:1")"""
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def _hash(password: str, method: str) -> str:
+    return generate_password_hash(password, method)
+
+
+def _verify(hashed: str, password: str, method: str) -> Tuple[bool, Optional[str]]:
+    if not check_password_hash(hashed, password):
+        return False, None
+    if hashed.split("$", 1)[0] == _method_prefix(method):
+        return True, None
+    return True, generate_password_hash(password, method)
+
+
+# ==================== EVENT LOOP SIDE ====================
+
+
+async def hash_password(password: str) -> str:
+    """Hash a new password with PASSWORD_HASH_METHOD"""
+    return await get_executor(HASHING).run(
+        _hash, password, get_settings().PASSWORD_HASH_METHOD
+    )
+
+
+async def verify_password(hashed: str, password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its stored hash
+
+    Returns (valid, new_hash); new_hash is set when the password is valid but
+    the stored hash should be replaced because the configured method changed.
+    """
+    return await get_executor(HASHING).run(
+        _verify, hashed, password, get_settings().PASSWORD_HASH_METHOD
+    )
+
+
+async def warm_hashing() -> None:
+    """Start a hashing process ahead of the first login"""
+    await get_executor(HASHING).run(_method_prefix, get_settings().PASSWORD_HASH_METHOD)
@@ -0,0 +1,290 @@
+"""
+On-demand sampling profiler for single requests
+
+An admin sends `X-Profile: 1`; ProfileMiddleware then samples the stacks of the
+event loop thread, and of any worker thread while it runs a PostgREST call for
+that request, every PROFILE_SAMPLE_INTERVAL_MS. The result is kept in memory as
+collapsed stacks ("frame;frame;frame weight", readable by flamegraph.pl and
+speedscope) plus a per-category breakdown: Pydantic validation, JWT decoding,
+broker waits, idle event loop and other application code.
+
+The event loop thread is shared, so coroutines of concurrent requests can show
+up in a profile; profile on a quiet worker for clean numbers.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+PROFILE_HEADER = b"x-profile"
+LOOP_THREAD = "event-loop"
+BROKER_THREAD = "broker-thread"
+
+# Sample categories; the innermost matching frame decides
+JWT = "jwt"
+PYDANTIC = "pydantic"
+BROKER = "broker"
+IDLE = "idle"
+APP = "app"
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _stack(frame) -> list[str]:
+    """Frame names from the outermost call to the innermost"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def categorize(stack: list[str], thread: str) -> str:
+    if thread == BROKER_THREAD:
+        return BROKER
+    for name in reversed(stack):
+        if name.startswith("jose.") or name.endswith(".verify_token"):
+            return JWT
+        if name.startswith(("pydantic.", "pydantic_core.")):
+            return PYDANTIC
+    # Event loop parked in select() with nothing to run: awaiting I/O or threads
+    if stack and stack[-1].startswith(("selectors.", "asyncio.base_events")):
+        return IDLE
+    return APP
+
+
+class RequestProfile:
+    """Samples collected for one request"""
+
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self.categories: Counter[str] = Counter()
+        self._threads: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def watch_thread(self, ident: int, label: str) -> None:
+        with self._lock:
+            self._threads[ident] = label
+
+    def unwatch_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def sample(self, elapsed: float) -> None:
+        """Attribute elapsed seconds (since the previous sample) to each stack"""
+        weight = max(1, round(elapsed * 1_000_000))
+        with self._lock:
+            threads = list(self._threads.items())
+        frames = sys._current_frames()
+        for ident, label in threads:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = _stack(frame)
+            self.samples += 1
+            self.stacks[";".join([label] + stack)] += weight
+            self.categories[categorize(stack, label)] += weight
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded stack format, weighted in microseconds"""
+        return "".join(f"{stack} {weight}\n" for stack, weight in self.stacks.items())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "sample_interval_ms": self.interval * 1000,
+            # Broker time sums over all worker threads, so it can exceed duration
+            "time_ms_by_category": {
+                category: round(weight / 1000, 3)
+                for category, weight in self.categories.most_common()
+            },
+        }
+
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "active_profile", default=None
+)
+
+
+@contextmanager
+def profiled_thread(label: str = BROKER_THREAD) -> Iterator[None]:
+    """Sample the current (worker) thread while the request is being profiled"""
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profile.watch_thread(ident, label)
+    try:
+        yield
+    finally:
+        profile.unwatch_thread(ident)
+
+
+class Sampler(threading.Thread):
+    def __init__(self, profile: RequestProfile):
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        # The GIL switch interval (5 ms) usually stretches the gap between
+        # samples, so each one is weighted by the time actually elapsed
+        last = time.perf_counter()
+        while not self._stopped.wait(self.profile.interval):
+            now = time.perf_counter()
+            self.profile.sample(now - last)
+            last = now
+
+    async def stop(self) -> None:
+        # The thread may be mid-wait for up to one interval; join off the loop
+        self._stopped.set()
+        await asyncio.to_thread(self.join)
+
+
+# ==================== STORAGE ====================
+
+
+class ProfileStore:
+    """Most recent profiles, bounded; one request is profiled at a time"""
+
+    def __init__(self, max_profiles: int = 20, sample_interval_ms: float = 1.0):
+        self.sample_interval = sample_interval_ms / 1000
+        self._profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+        self._max_profiles = max_profiles
+        self._running = threading.Lock()
+
+    def try_begin(self) -> bool:
+        return self._running.acquire(blocking=False)
+
+    def finish(self, profile: RequestProfile) -> None:
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self._max_profiles:
+            self._profiles.popitem(last=False)
+        self._running.release()
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+    def recent(self) -> list[RequestProfile]:
+        return list(reversed(self._profiles.values()))
+
+
+_profile_store: ProfileStore | None = None
+
+
+def get_profile_store() -> ProfileStore:
+    """Returns the singleton profile store"""
+    global _profile_store
+    if _profile_store is None:
+        from .config import get_settings
+
+        settings = get_settings()
+        _profile_store = ProfileStore(
+            max_profiles=settings.PROFILE_MAX_STORED,
+            sample_interval_ms=settings.PROFILE_SAMPLE_INTERVAL_MS,
+        )
+    return _profile_store
+
+
+# ==================== MIDDLEWARE ====================
+
+
+def _is_admin(headers: dict[bytes, bytes]) -> bool:
+    """
+    Run the Authorization header's token through require_admin
+
+    Only the token is checked (the role it was issued with), so deciding
+    whether to profile never costs a user status lookup.
+    """
+    # Imported lazily: auth -> config -> instrumentation -> profiling
+    from .auth import get_token_user, require_admin
+
+    scheme, _, token = headers.get(b"authorization", b"").decode().partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+    try:
+        require_admin(get_token_user(credentials))
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfileMiddleware:
+    """
+    Profiles requests carrying `X-Profile: 1` from an admin
+
+    Non-admin requests with the header are served normally, unprofiled. The
+    response carries `X-Profile-Id`; fetch the result from /diagnostics/profiles.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) != b"1" or not _is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+
+        store = get_profile_store()
+        if not store.try_begin():
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], store.sample_interval)
+        profile.watch_thread(threading.get_ident(), LOOP_THREAD)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode())
+                ]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        sampler = Sampler(profile)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await sampler.stop()
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            _active_profile.reset(token)
+            store.finish(profile)
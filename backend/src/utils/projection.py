@@ -0,0 +1,68 @@
+from typing import Iterable, List, Optional, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+
+def parse_columns(columns: str) -> List[str]:
+    """Split a PostgREST select string ("id, title, ...") into column names"""
+    return [column.strip() for column in columns.split(",") if column.strip()]
+
+
+def select_columns(fields: Optional[Iterable[str]], default: str) -> str:
+    """
+    Build the PostgREST select string for a query
+
+    Uses the requested fields when given, otherwise the broker's default
+    field set for that endpoint.
+    """
+    if not fields:
+        return default
+    return ", ".join(fields)
+
+
+def fields_query(model: Type[BaseModel], columns: str):
+    """
+    Factory for an optional ?fields= query parameter on list endpoints
+
+    Only columns from the endpoint's default field set may be requested, and the
+    model's required fields are always added so responses still validate.
+
+    Usage:
+        get_book_list_fields = fields_query(BookResponse, BOOK_LIST_COLUMNS)
+
+        @router.get("/")
+        async def get_books(fields=Depends(get_book_list_fields)): ...
+    """
+    allowed = parse_columns(columns)
+    required = [
+        name
+        for name, field in model.model_fields.items()
+        if field.is_required() and name in allowed
+    ]
+
+    def parse_fields(
+        fields: Optional[str] = Query(
+            None,
+            description=(
+                "Comma-separated list of fields to return. "
+                f"Allowed: {', '.join(allowed)}"
+            ),
+        ),
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+
+        # Keep the default column order so equal requests build equal queries
+        selected = set(requested) | set(required)
+        return [column for column in allowed if column in selected]
+
+    return parse_fields
@@ -0,0 +1,143 @@
+"""
+Read replica routing
+
+With SUPABASE_REPLICA_URL set (DATABASE_REPLICA_URL for
+DATABASE_BACKEND=postgres), each broker gets a ReadRouter in place of its
+client. Inside the read-only methods of a @replica_reads broker (Select*,
+Search*, Count*, Check* and the stats getters) the router hands out the
+replica; everywhere else, including everything a write method calls, it
+hands out the primary. Without a replica configured, brokers get the primary
+client itself and nothing changes.
+
+Replicas lag the primary, so some reads must not go there:
+
+    on_primary          marks methods whose reads must see the latest rows:
+                        service paths that check and then write (the write
+                        paths of LoanService) and broker lookups such as the
+                        user reads used for authentication. Everything they
+                        call runs on the primary.
+    after a write       a broker's reads stay on the primary for
+                        REPLICA_STICKY_SECONDS after that broker last wrote
+                        in this worker, so the response cache (cache.py) is
+                        not refilled with rows from before the write
+
+As with workload() (executors.py), the outermost marked call wins.
+"""
+
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from .config import get_settings
+from .metrics import BROKER_READS
+from .tracing import passthrough
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+READ_PREFIXES = ("Select", "Search", "Count", "Check", "get_")
+
+_target: ContextVar[Optional[str]] = ContextVar("replica_target", default=None)
+
+
+def replica_configured() -> bool:
+    settings = get_settings()
+    if settings.DATABASE_BACKEND == "postgres":
+        return bool(settings.DATABASE_REPLICA_URL)
+    return bool(settings.SUPABASE_REPLICA_URL)
+
+
+class ReadRouter:
+    """Stands in for a broker's client, picking primary or replica per call"""
+
+    def __init__(self, primary: Any, replica: Any):
+        self.primary = primary
+        self.replica = replica
+
+    def __getattr__(self, name: str) -> Any:
+        client = self.replica if _target.get() == REPLICA else self.primary
+        return getattr(client, name)
+
+
+def read_router(primary: Any, replica: Any) -> Any:
+    """The client a broker should hold: primary alone, or routed to a replica"""
+    if replica is None:
+        return primary
+    return ReadRouter(primary, replica)
+
+
+def _pinned(target: str, func):
+    @passthrough
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _target.set(_target.get() or target)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _target.reset(token)
+
+    wrapper.__replica__ = target
+    return wrapper
+
+
+def on_primary(func):
+    """Run a method, and every broker call it makes, against the primary"""
+    return _pinned(PRIMARY, func)
+
+
+def replica_reads(cls):
+    """
+    Class decorator: send a broker's read-only methods to the replica
+
+    Methods carrying their own on_primary are left alone. Every other public
+    async method counts as a write: it runs on the primary and keeps this
+    broker's reads on the primary for REPLICA_STICKY_SECONDS afterwards.
+    """
+    last_write = [float("-inf")]
+
+    def read(func):
+        @passthrough
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not replica_configured():
+                return await func(*args, **kwargs)
+            target = _target.get()
+            if target is None:
+                sticky = get_settings().REPLICA_STICKY_SECONDS
+                recent = time.monotonic() - last_write[0] < sticky
+                target = PRIMARY if recent else REPLICA
+            BROKER_READS.inc(target)
+            token = _target.set(target)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _target.reset(token)
+
+        wrapper.__replica__ = REPLICA
+        return wrapper
+
+    def write(func):
+        pinned = _pinned(PRIMARY, func)
+
+        @passthrough
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await pinned(*args, **kwargs)
+            finally:
+                last_write[0] = time.monotonic()
+
+        wrapper.__replica__ = PRIMARY
+        return wrapper
+
+    for name, member in list(vars(cls).items()):
+        if (
+            name.startswith("_")
+            or hasattr(member, "__replica__")
+            or not inspect.iscoroutinefunction(member)
+        ):
+            continue
+        setattr(cls, name, (read if name.startswith(READ_PREFIXES) else write)(member))
+    return cls
@@ -0,0 +1,397 @@
+"""
+Deadlines, retries and circuit breakers for database calls
+
+Broker calls used to have no time limit: a hung PostgREST request pinned its
+thread for good (to_thread can't cancel it), and StatsBroker answered every
+failure with zeros. Now:
+
+    deadlines   DeadlineMiddleware gives each request REQUEST_DEADLINE_SECONDS
+                until its response starts. Every round trip (ResilientTransport
+                for PostgREST, Database._run) is limited to what is left of it,
+                and to BROKER_CALL_TIMEOUT_SECONDS, so a hung call frees its
+                thread or connection instead of waiting forever. Background
+                jobs and streamed bodies get the per-call limit only.
+    retries     @resilient brokers retry their idempotent reads (the methods
+                replicas.py routes to a replica) up to BROKER_READ_RETRIES
+                times on transient errors: connection failures, timeouts,
+                Postgres unavailable. Waits use full jitter and never outlast
+                the deadline. Writes are never retried.
+    circuits    one breaker per table or RPC. After CIRCUIT_FAILURE_THRESHOLD
+                consecutive failures calls fail fast for CIRCUIT_RESET_SECONDS,
+                then a single probe decides whether to close it again.
+
+Whatever gives up raises DatabaseUnavailableError: a 503 with Retry-After,
+counted in broker_unavailable_total. Errors that are the request's fault
+(constraint violations, bad filters) pass through unchanged.
+"""
+
+import asyncio
+import functools
+import inspect
+import math
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from .config import get_settings
+from .metrics import BROKER_RETRIES, BROKER_UNAVAILABLE, CIRCUIT_REJECTIONS
+from .replicas import READ_PREFIXES
+from .tracing import REST_PATH, passthrough
+
+
+class DatabaseUnavailableError(HTTPException):
+    """Raised when a database call gave up: circuit open, deadline or outage"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0, circuit: str = ""):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database temporarily unavailable, please retry",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        self.reason = reason
+        self.circuit = circuit
+
+
+# ==================== DEADLINES ====================
+
+
+class Deadline:
+    """When the current request's database budget runs out (monotonic time)"""
+
+    def __init__(self, seconds: float):
+        self.expires_at: Optional[float] = time.monotonic() + seconds
+
+    def lift(self) -> None:
+        self.expires_at = None
+
+
+_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def deadline_left() -> Optional[float]:
+    """Seconds left before the current request's deadline, None without one"""
+    deadline = _deadline.get()
+    if deadline is None or deadline.expires_at is None:
+        return None
+    return deadline.expires_at - time.monotonic()
+
+
+def call_timeout() -> Optional[float]:
+    """
+    How long the next round trip may take
+
+    The per-call limit, capped by the request's deadline. Raises
+    DatabaseUnavailableError once the deadline has passed.
+    """
+    limit = get_settings().BROKER_CALL_TIMEOUT_SECONDS or None
+    left = deadline_left()
+    if left is None:
+        return limit
+    if left <= 0:
+        raise DatabaseUnavailableError("deadline")
+    return left if limit is None else min(limit, left)
+
+
+class DeadlineMiddleware:
+    """
+    Starts each request's deadline; lifts it once the response has started
+
+    Streaming responses (exports) keep reading after that, bounded per call.
+    The Deadline object is shared, so lifting it reaches the contexts copied
+    into worker threads and tasks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        seconds = get_settings().REQUEST_DEADLINE_SECONDS
+        if scope["type"] != "http" or seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(seconds)
+        token = _deadline.set(deadline)
+
+        async def send_and_lift(message):
+            if message["type"] == "http.response.start":
+                deadline.lift()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_lift)
+        finally:
+            _deadline.reset(token)
+
+
+# ==================== TRANSIENT ERRORS ====================
+
+# SQLSTATE classes / PostgREST codes worth retrying: connection exceptions,
+# insufficient resources, operator intervention (shutdown, cannot connect
+# now), serialization failures and deadlocks, PostgREST's connection errors
+TRANSIENT_CODES = ("08", "53", "57P", "40001", "40P01", "PGRST00")
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Could the same call succeed if simply tried again?"""
+    if isinstance(
+        exc,
+        (
+            DatabaseUnavailableError,
+            httpx.TransportError,
+            asyncio.TimeoutError,
+            TimeoutError,
+            OSError,
+        ),
+    ):
+        return True
+    # asyncpg errors carry .sqlstate; postgrest's APIError carries .code
+    code = getattr(exc, "sqlstate", None) or getattr(exc, "code", None)
+    return isinstance(code, str) and code.startswith(TRANSIENT_CODES)
+
+
+# ==================== CIRCUIT BREAKERS ====================
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one table or RPC
+
+    Used from worker threads (the PostgREST transport) as well as the event
+    loop, hence the lock.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise DatabaseUnavailableError if the call should not be made"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            retry_after = self.opened_at + self.reset_seconds - now
+            if self.state == OPEN and retry_after <= 0:
+                self.state = HALF_OPEN
+            # A probe that never reported back (cancelled) expires like a circuit
+            if self.state == HALF_OPEN and (
+                not self._probing or now - self._probe_started > self.reset_seconds
+            ):
+                # This call is the probe
+                self._probing = True
+                self._probe_started = now
+                return
+            retry_after = max(retry_after, 1.0)
+        CIRCUIT_REJECTIONS.inc(self.name)
+        raise DatabaseUnavailableError(
+            "circuit_open", retry_after=retry_after, circuit=self.name
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+_circuits: Dict[str, CircuitBreaker] = {}
+_circuits_lock = threading.Lock()
+
+
+def get_circuit(name: str) -> CircuitBreaker:
+    circuit = _circuits.get(name)
+    if circuit is None:
+        with _circuits_lock:
+            circuit = _circuits.get(name)
+            if circuit is None:
+                settings = get_settings()
+                circuit = CircuitBreaker(
+                    name,
+                    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                    reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+                )
+                _circuits[name] = circuit
+    return circuit
+
+
+def get_circuits() -> Dict[str, CircuitBreaker]:
+    return dict(_circuits)
+
+
+def reset_circuits() -> None:
+    """Forget every breaker (tests, or after changing the thresholds)"""
+    with _circuits_lock:
+        _circuits.clear()
+
+
+_STATEMENT_TOKENS = re.compile(
+    r'(\()|(\))|\b(from|into|update|join)\s+"?([a-z_][a-z0-9_]*)"?(\()?',
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=512)
+def statement_target(sql: str) -> Optional[str]:
+    """
+    Table or function a SQL statement works on, named as in PostgREST paths
+
+    The first FROM / INTO / UPDATE / JOIN target outside parentheses, so
+    "extract(month FROM request_date)" and subqueries are skipped, or the
+    first one inside them when the statement selects from a subquery only.
+    Functions called in FROM are "rpc/<name>".
+    """
+    depth = 0
+    nested = None
+    for match in _STATEMENT_TOKENS.finditer(sql):
+        opening, closing, keyword, name, call = match.groups()
+        if opening:
+            depth += 1
+        elif closing:
+            depth -= 1
+        else:
+            if call and keyword.lower() in ("from", "join"):
+                target = f"rpc/{name.lower()}"
+            else:
+                target = name.lower()
+            if depth == 0:
+                return target
+            nested = nested or target
+            if call:
+                depth += 1
+    return nested
+
+
+# ==================== POSTGREST TRANSPORT ====================
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    Applies the deadline and the table's circuit to each PostgREST request
+
+    The timeout goes into the request's httpx timeouts, so a hung call raises
+    httpx.TimeoutException in its worker thread instead of holding it.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if REST_PATH not in request.url.path:
+            return self.transport.handle_request(request)
+
+        timeout = call_timeout()
+        if timeout is not None:
+            limits = request.extensions.get("timeout") or {}
+            request.extensions["timeout"] = {
+                key: timeout if limits.get(key) is None else min(limits[key], timeout)
+                for key in ("connect", "read", "write", "pool")
+            }
+        # "loans", "rpc/desk_checkout_copies", ...
+        circuit = get_circuit(request.url.path.split(REST_PATH, 1)[-1])
+        circuit.before_call()
+        try:
+            response = self.transport.handle_request(request)
+        except Exception:
+            circuit.record_failure()
+            raise
+        if response.status_code >= 500:
+            circuit.record_failure()
+        else:
+            circuit.record_success()
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+# ==================== BROKER RETRIES ====================
+
+_guarded_call: ContextVar[bool] = ContextVar("guarded_call", default=False)
+
+
+def backoff(attempt: int) -> float:
+    """Full jitter: uniform between 0 and base * 2^attempt, capped"""
+    settings = get_settings()
+    ceiling = min(
+        settings.BROKER_RETRY_MAX_SECONDS,
+        settings.BROKER_RETRY_BASE_SECONDS * (2**attempt),
+    )
+    return random.uniform(0, ceiling)
+
+
+def _guarded(broker: str, method: str, func, retry: bool):
+    @passthrough
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        # A broker method calling another one: the outermost call retries
+        if _guarded_call.get():
+            return await func(*args, **kwargs)
+        token = _guarded_call.set(True)
+        attempt = 0
+        try:
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except DatabaseUnavailableError as exc:
+                    BROKER_UNAVAILABLE.inc(broker, method, exc.reason)
+                    raise
+                except Exception as exc:
+                    if not is_transient(exc):
+                        raise
+                    if retry and attempt < get_settings().BROKER_READ_RETRIES:
+                        delay = backoff(attempt)
+                        left = deadline_left()
+                        if left is None or delay < left:
+                            attempt += 1
+                            BROKER_RETRIES.inc(broker, method)
+                            await asyncio.sleep(delay)
+                            continue
+                    BROKER_UNAVAILABLE.inc(broker, method, "error")
+                    raise DatabaseUnavailableError("error") from exc
+        finally:
+            _guarded_call.reset(token)
+
+    return wrapper
+
+
+def resilient(cls):
+    """
+    Class decorator: retry a broker's idempotent reads and answer 503 on outages
+
+    Reads are the methods named like replica reads (Select*, Search*, Count*,
+    Check*, get_*). Every public async method maps transient failures it
+    couldn't recover from to DatabaseUnavailableError.
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(member):
+            continue
+        retry = name.startswith(READ_PREFIXES)
+        setattr(cls, name, _guarded(cls.__name__, name, member, retry))
+    return cls
@@ -0,0 +1,93 @@
+-- Indexed, paginated patron search used by the circulation desk
+-- Replaces three unbounded ILIKE scans with trigram-indexed lookups,
+-- ranks exact university IDs and email prefixes first, and pages with a keyset cursor
+-- Run this in your Supabase SQL Editor after creationDB.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Trigram indexes make '%query%' matches index-assisted instead of sequential scans
+CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm
+    ON users USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm
+    ON users USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_university_id_trgm
+    ON users USING gin (university_id gin_trgm_ops);
+
+-- Keyset ordering index (rank is computed, so only the tie-breakers are indexed)
+CREATE INDEX IF NOT EXISTS idx_users_full_name_id
+    ON users (full_name, id);
+
+CREATE OR REPLACE FUNCTION search_users(
+    query_param TEXT,
+    limit_param INT DEFAULT 20,
+    after_rank INT DEFAULT NULL,
+    after_name TEXT DEFAULT NULL,
+    after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    university_id TEXT,
+    full_name TEXT,
+    email TEXT,
+    role user_role,
+    faculty TEXT,
+    academic_year INT,
+    infractions_count INT,
+    is_blacklisted BOOLEAN,
+    blacklist_note TEXT,
+    created_at TIMESTAMPTZ,
+    search_rank INT
+) AS $$
+#variable_conflict use_column
+DECLARE
+    -- Escape LIKE wildcards so a typed '%' or '_' is matched literally
+    pattern TEXT := replace(replace(replace(query_param, '\', '\\'), '%', '\%'), '_', '\_');
+BEGIN
+    RETURN QUERY
+    WITH matches AS (
+        SELECT
+            u.id,
+            u.university_id,
+            u.full_name,
+            u.email,
+            u.role,
+            u.faculty,
+            u.academic_year,
+            u.infractions_count,
+            u.is_blacklisted,
+            u.blacklist_note,
+            u.created_at,
+            CASE
+                WHEN u.university_id = query_param THEN 0
+                WHEN lower(u.email) LIKE lower(pattern) || '%' THEN 1
+                ELSE 2
+            END AS match_rank
+        FROM users u
+        WHERE u.full_name ILIKE '%' || pattern || '%'
+           OR u.email ILIKE '%' || pattern || '%'
+           OR u.university_id ILIKE '%' || pattern || '%'
+    )
+    SELECT
+        m.id,
+        m.university_id,
+        m.full_name,
+        m.email,
+        m.role,
+        m.faculty,
+        m.academic_year,
+        m.infractions_count,
+        m.is_blacklisted,
+        m.blacklist_note,
+        m.created_at,
+        m.match_rank
+    FROM matches m
+    WHERE after_rank IS NULL
+       OR (m.match_rank, m.full_name, m.id) > (after_rank, after_name, after_id)
+    ORDER BY m.match_rank, m.full_name, m.id
+    LIMIT limit_param;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Example usage:
+-- SELECT * FROM search_users('2021', 20);
+-- SELECT * FROM search_users('2021', 20, 2, 'Omar Hassan', '3f1c...');
@@ -0,0 +1,36 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from .config import get_settings
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def dump_json(response_model: Any, data: Any, exclude_unset: bool = False) -> bytes:
+    """Serialize already-built response models once, in pydantic-core"""
+    return _adapter(response_model).dump_json(data, exclude_unset=exclude_unset)
+
+
+def json_response(response_model: Any, data: Any, exclude_unset: bool = False):
+    """
+    Return list endpoint data, optionally skipping FastAPI's second validation
+
+    Services already validate every DB row into its response model. FastAPI
+    then dumps those models to dicts, validates the dicts against the route's
+    response_model and serializes the result. With FAST_SERIALIZATION on, the
+    models are serialized straight to a JSON response instead; with it off
+    (the default, and what tests run with) data is returned unchanged so
+    FastAPI re-validates it.
+    """
+    if not get_settings().FAST_SERIALIZATION:
+        return data
+    return Response(
+        content=dump_json(response_model, data, exclude_unset=exclude_unset),
+        media_type="application/json",
+    )
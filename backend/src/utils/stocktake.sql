@@ -0,0 +1,162 @@
+-- Inventory stocktake: scan every shelf, then reconcile against book_copies
+-- Scans are stored as sorted, de-duplicated BIGINT[] chunks (one row per
+-- upload, not one per barcode) and reconciled with set operations, so a
+-- library of a few hundred thousand copies reconciles in a single statement
+-- Run this in your Supabase SQL Editor after creationDB.sql
+
+CREATE TABLE IF NOT EXISTS stocktake_sessions (
+  id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+  name TEXT NOT NULL,
+  notes TEXT,
+  status TEXT NOT NULL DEFAULT 'open'
+    CHECK (status IN ('open', 'reconciled', 'applied')),
+  created_by UUID REFERENCES users(id) ON DELETE SET NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  reconciled_at TIMESTAMPTZ,
+  applied_at TIMESTAMPTZ,
+  -- Filled in by stocktake_reconcile
+  scanned_count INTEGER,
+  expected_count INTEGER,
+  missing_count INTEGER,
+  found_lost_count INTEGER,
+  on_loan_count INTEGER,
+  unknown_count INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS stocktake_scans (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  session_id UUID REFERENCES stocktake_sessions(id) ON DELETE CASCADE NOT NULL,
+  accession_numbers BIGINT[] NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_stocktake_scans_session
+    ON stocktake_scans (session_id);
+
+-- kind:
+--   missing          expected on the shelf, not scanned, not on loan
+--                    or held for pickup                              -> propose 'lost'
+--   found_lost       scanned but marked lost                         -> propose 'available'
+--   scanned_on_loan  scanned but its loan is still active/overdue    -> review only
+--   unknown          scanned number that matches no copy             -> review only
+CREATE TABLE IF NOT EXISTS stocktake_discrepancies (
+  session_id UUID REFERENCES stocktake_sessions(id) ON DELETE CASCADE NOT NULL,
+  accession_number BIGINT NOT NULL,
+  copy_id UUID REFERENCES book_copies(id) ON DELETE CASCADE,
+  kind TEXT NOT NULL,
+  current_status book_status,
+  proposed_status book_status,
+  loan_id UUID,
+  PRIMARY KEY (session_id, accession_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_stocktake_discrepancies_kind
+    ON stocktake_discrepancies (session_id, kind);
+
+CREATE OR REPLACE FUNCTION stocktake_reconcile(target_session UUID)
+RETURNS SETOF stocktake_sessions AS $$
+BEGIN
+    DELETE FROM stocktake_discrepancies WHERE session_id = target_session;
+
+    CREATE TEMP TABLE IF NOT EXISTS stocktake_seen (
+        accession_number BIGINT PRIMARY KEY
+    ) ON COMMIT DROP;
+    TRUNCATE stocktake_seen;
+
+    INSERT INTO stocktake_seen
+    SELECT DISTINCT unnest(s.accession_numbers)
+    FROM stocktake_scans s
+    WHERE s.session_id = target_session;
+
+    INSERT INTO stocktake_discrepancies (
+        session_id, accession_number, copy_id, kind,
+        current_status, proposed_status, loan_id
+    )
+    -- Expected but not seen: everything that is neither lost, out on loan
+    -- nor held for pickup
+    SELECT target_session, c.accession_number, c.id, 'missing', c.status, 'lost', NULL
+    FROM book_copies c
+    WHERE c.status <> 'lost'
+      AND NOT EXISTS (
+          SELECT 1 FROM stocktake_seen s WHERE s.accession_number = c.accession_number
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM loans l
+          WHERE l.copy_id = c.id
+            AND l.status IN ('pending_pickup', 'active', 'overdue')
+      )
+    UNION ALL
+    -- Seen on the shelf: flag copies the catalog thinks are lost or borrowed
+    SELECT
+        target_session,
+        c.accession_number,
+        c.id,
+        CASE WHEN l.id IS NOT NULL THEN 'scanned_on_loan' ELSE 'found_lost' END,
+        c.status,
+        CASE WHEN l.id IS NOT NULL THEN NULL ELSE 'available'::book_status END,
+        l.id
+    FROM stocktake_seen s
+    JOIN book_copies c ON c.accession_number = s.accession_number
+    LEFT JOIN loans l
+      ON l.copy_id = c.id AND l.status IN ('active', 'overdue')
+    WHERE c.status = 'lost' OR l.id IS NOT NULL
+    UNION ALL
+    SELECT target_session, s.accession_number, NULL, 'unknown', NULL, NULL, NULL
+    FROM stocktake_seen s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM book_copies c WHERE c.accession_number = s.accession_number
+    );
+
+    RETURN QUERY
+    UPDATE stocktake_sessions ss
+       SET status = 'reconciled',
+           reconciled_at = NOW(),
+           scanned_count = (SELECT COUNT(*) FROM stocktake_seen),
+           expected_count = (SELECT COUNT(*) FROM book_copies WHERE status <> 'lost'),
+           missing_count = d.missing,
+           found_lost_count = d.found_lost,
+           on_loan_count = d.on_loan,
+           unknown_count = d.unknown
+      FROM (
+          SELECT
+              COUNT(*) FILTER (WHERE kind = 'missing') AS missing,
+              COUNT(*) FILTER (WHERE kind = 'found_lost') AS found_lost,
+              COUNT(*) FILTER (WHERE kind = 'scanned_on_loan') AS on_loan,
+              COUNT(*) FILTER (WHERE kind = 'unknown') AS unknown
+          FROM stocktake_discrepancies
+          WHERE session_id = target_session
+      ) d
+     WHERE ss.id = target_session
+    RETURNING ss.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply every proposed status change of a reconciled session in one UPDATE
+-- (copies whose status changed since reconciliation are left alone)
+CREATE OR REPLACE FUNCTION stocktake_apply(target_session UUID)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE book_copies c
+       SET status = d.proposed_status
+      FROM stocktake_discrepancies d
+     WHERE d.session_id = target_session
+       AND d.proposed_status IS NOT NULL
+       AND c.id = d.copy_id
+       AND c.status = d.current_status;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+
+    UPDATE stocktake_sessions
+       SET status = 'applied', applied_at = NOW()
+     WHERE id = target_session;
+
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Example usage:
+-- INSERT INTO stocktake_scans (session_id, accession_numbers)
+--     VALUES ('...', ARRAY[10001, 10002, 10005]);
+-- SELECT * FROM stocktake_reconcile('...');
+-- SELECT stocktake_apply('...');
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Iterator, List, TypeVar
+
+from .executors import to_thread
+
+T = TypeVar("T")
+
+
+def _json_default(value: Any) -> str:
+    return str(value)
+
+
+async def ndjson_chunks(pages: AsyncIterable[List[dict]]) -> AsyncIterator[str]:
+    """Encode pages of rows as newline-delimited JSON, one chunk per page"""
+    async for page in pages:
+        yield "".join(
+            json.dumps(row, default=_json_default, ensure_ascii=False) + "\n"
+            for row in page
+        )
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default, ensure_ascii=False)
+    return value
+
+
+async def csv_chunks(
+    pages: AsyncIterable[List[dict]], columns: List[str]
+) -> AsyncIterator[str]:
+    """Encode pages of rows as CSV with a header row, one chunk per page"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_csv_value(row.get(column)) for column in columns] for row in page
+        )
+        yield buffer.getvalue()
+
+
+async def iterate_in_thread(
+    iterator: Iterator[T], batch_size: int = 500
+) -> AsyncIterator[List[T]]:
+    """
+    Drain a blocking iterator (file parsing) in batches off the event loop
+
+    Each batch is produced in a worker thread of the caller's workload pool, so
+    only one batch is in memory.
+    """
+    while True:
+        batch = await to_thread(lambda: list(islice(iterator, batch_size)))
+        if not batch:
+            return
+        yield batch
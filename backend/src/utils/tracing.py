@@ -0,0 +1,247 @@
+"""
+Tracing spans for broker database calls, and the slow-call log
+
+Every PostgREST round trip becomes a span recording the table, the full filter
+chain (query string), row count and duration, tagged with the broker operation
+and the service method that called it. Broker methods set that context through
+instrument_broker (see metrics.py); the instrumented httpx transport records the
+span when the call finishes. With DATABASE_BACKEND=postgres each asyncpg
+statement is a span instead, carrying its SQL text (see database.py). Spans are kept in an in-memory ring buffer (served
+at /diagnostics/traces) and optionally appended to a JSON lines file.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+REST_PATH = "/rest/v1/"
+
+
+class BrokerCall:
+    """The broker method currently running, and who called it"""
+
+    def __init__(self, operation: str, caller: Optional[str]):
+        self.operation = operation
+        self.caller = caller
+
+
+_broker_call: ContextVar[Optional[BrokerCall]] = ContextVar("broker_call", default=None)
+
+
+# Code of decorator wrappers that only set context around the call they wrap
+# (workload pools, replica routing); caller_name looks past their frames
+_passthrough_codes: set = set()
+
+
+def passthrough(wrapper):
+    """Mark a decorator's wrapper function as transparent to caller tagging"""
+    _passthrough_codes.add(wrapper.__code__)
+    return wrapper
+
+
+def caller_name(frame) -> Optional[str]:
+    """Qualified name of the function running in frame (e.g. LoanService.get_x)"""
+    while frame is not None and frame.f_code in _passthrough_codes:
+        frame = frame.f_back
+    # A coroutine wrapped in a Task (asyncio.gather) is stepped by the event loop
+    if frame is None or frame.f_globals.get("__name__", "").startswith("asyncio"):
+        return None
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name)
+
+
+@contextmanager
+def broker_call(operation: str, caller: Optional[str]) -> Iterator[BrokerCall]:
+    """
+    Tag database calls made inside this block with a broker operation
+
+    caller is the awaiting function, usually a service method. Coroutines started
+    via asyncio.gather have no awaiting frame and inherit the enclosing caller.
+    """
+    parent = _broker_call.get()
+    if caller is None and parent is not None:
+        caller = parent.caller
+
+    call = BrokerCall(operation, caller)
+    token = _broker_call.set(call)
+    try:
+        yield call
+    finally:
+        _broker_call.reset(token)
+
+
+# ==================== SPANS ====================
+
+
+def _row_count(content_range: Optional[str]) -> Optional[int]:
+    """Rows returned, from PostgREST's Content-Range header ("0-24/*", "*/0")"""
+    if not content_range:
+        return None
+    returned = content_range.split("/", 1)[0]
+    if returned == "*":
+        return 0
+    start, _, end = returned.partition("-")
+    try:
+        return int(end) - int(start) + 1
+    except ValueError:
+        return None
+
+
+def _filters(query: bytes) -> list[str]:
+    if not query:
+        return []
+    return [unquote(part.replace("+", " ")) for part in query.decode().split("&")]
+
+
+def build_span(
+    method: str,
+    path: str,
+    query: bytes,
+    status_code: Optional[int],
+    content_range: Optional[str],
+    duration: float,
+    size: int,
+    request_path: Optional[str] = None,
+) -> dict:
+    call = _broker_call.get()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "operation": call.operation if call else None,
+        "caller": call.caller if call else None,
+        "request": request_path,
+        "method": method,
+        "table": path.split(REST_PATH, 1)[-1],
+        "filters": _filters(query),
+        "status": status_code,
+        "rows": _row_count(content_range),
+        "bytes": size,
+        "duration_ms": round(duration * 1000, 3),
+    }
+
+
+def build_statement_span(
+    sql: str,
+    target: Optional[str],
+    rows: Optional[int],
+    duration: float,
+    request_path: Optional[str] = None,
+) -> dict:
+    """Span for one asyncpg statement, shaped like a PostgREST span"""
+    call = _broker_call.get()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "operation": call.operation if call else None,
+        "caller": call.caller if call else None,
+        "request": request_path,
+        "method": sql.split(None, 1)[0].upper() if sql.strip() else "SQL",
+        "table": target,
+        "filters": [],
+        "statement": " ".join(sql.split()),
+        "status": None,
+        "rows": rows,
+        "bytes": None,
+        "duration_ms": round(duration * 1000, 3),
+    }
+
+
+class Tracer:
+    """
+    Ring buffer of recent spans, plus an optional JSON lines exporter
+
+    Spans are recorded from worker threads (asyncio.to_thread), so file writes
+    are serialized; deque appends are already thread-safe.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 1000,
+        slow_threshold_ms: float = 500.0,
+        export_path: Optional[str] = None,
+    ):
+        self.spans: deque[dict] = deque(maxlen=buffer_size)
+        self.slow_threshold_ms = slow_threshold_ms
+        self.export_path = export_path
+        self._lock = threading.Lock()
+
+    def record(self, span: dict) -> None:
+        self.spans.append(span)
+
+        if span["duration_ms"] >= self.slow_threshold_ms:
+            span["slow"] = True
+            logger.warning(
+                "Slow broker call: %.1f ms %s %s?%s (operation %s, caller %s, "
+                "request %s, rows %s)",
+                span["duration_ms"],
+                span["method"],
+                span["table"],
+                span.get("statement") or "&".join(span["filters"]),
+                span["operation"],
+                span["caller"],
+                span["request"],
+                span["rows"],
+            )
+
+        if self.export_path:
+            line = json.dumps(span, default=str) + "\n"
+            with self._lock:
+                with open(self.export_path, "a", encoding="utf-8") as exported:
+                    exported.write(line)
+
+    def recent(
+        self,
+        limit: int = 100,
+        slow_only: bool = False,
+        table: Optional[str] = None,
+        operation: Optional[str] = None,
+    ) -> list[dict]:
+        """Most recent spans first"""
+        spans = []
+        for span in reversed(list(self.spans)):
+            if slow_only and not span.get("slow"):
+                continue
+            if table and span["table"] != table:
+                continue
+            if operation and span["operation"] != operation:
+                continue
+            spans.append(span)
+            if len(spans) >= limit:
+                break
+        return spans
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+_tracer: Tracer | None = None
+
+
+def get_tracer() -> Tracer:
+    """Returns the singleton tracer"""
+    global _tracer
+    if _tracer is None:
+        # Imported lazily: config builds the instrumented client that records here
+        from .config import get_settings
+
+        settings = get_settings()
+        _tracer = Tracer(
+            buffer_size=settings.TRACE_BUFFER_SIZE,
+            slow_threshold_ms=settings.SLOW_CALL_THRESHOLD_MS,
+            export_path=settings.TRACE_EXPORT_PATH or None,
+        )
+    return _tracer
+
+
+def record_span(*args, **kwargs) -> None:
+    get_tracer().record(build_span(*args, **kwargs))
+
+
+def record_statement_span(*args, **kwargs) -> None:
+    get_tracer().record(build_statement_span(*args, **kwargs))
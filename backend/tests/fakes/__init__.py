@@ -0,0 +1,2 @@
+# Test doubles shared by the unit and integration suites
+# SqliteClient: in-process PostgREST emulator (postgrest_sqlite.py)
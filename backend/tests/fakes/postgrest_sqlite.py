@@ -0,0 +1,1288 @@
+"""
+In-process PostgREST emulator over SQLite
+
+SqliteClient stands in for supabase.Client in tests. It implements the part of
+the query builder the brokers use (select with embedded joins and exact counts,
+the eq/neq/gt/gte/lt/lte/like/ilike/is_/in_/or_ filters, order, limit and range,
+insert/upsert/update/delete, and the RPC functions in src/utils/*.sql) and runs
+every request against an in-memory SQLite copy of creationDB.sql.
+
+Unlike the MagicMock client, filters, joins, defaults and constraints really
+execute, so tests can seed thousands of rows and assert on results as well as
+on round trips: every execute() is one query, counted in client.queries,
+logged in client.log ("GET /books", "POST /rpc/search_users", ...) and recorded
+for X-DB-Queries like a real PostgREST call.
+
+Differences from Postgres worth knowing: text sorts bytewise (no collation),
+timestamps are stored as UTC ISO strings, and errors carry the Postgres /
+PostgREST codes for the cases the app can hit (23505, 23503, 22P02, PGRST...)
+but not the exact messages.
+
+Usage:
+    client = SqliteClient()
+    client.seed("books", [{"isbn": "1", "title": "T", "author": "A"}])
+    BookBroker(client).SearchBooks("t")
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Iterator, Optional
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
+from src.utils.instrumentation import record_query
+
+# ==================== SCHEMA ====================
+
+USER_ROLES = ("admin", "student", "professor", "ta")
+BOOK_STATUSES = ("available", "maintenance", "lost")
+LOAN_STATUSES = (
+    "pending",
+    "pending_pickup",
+    "active",
+    "canceled",
+    "returned",
+    "overdue",
+    "rejected",
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _new_uuid() -> str:
+    return str(uuid.uuid4())
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    One column: type is uuid, text, int, bool, json, int[] or timestamptz
+
+    default is a value or a callable; identity is the start of a GENERATED
+    ALWAYS AS IDENTITY column; references is "table.column".
+    """
+
+    type: str
+    default: Any = None
+    nullable: bool = True
+    unique: bool = False
+    references: Optional[str] = None
+    on_delete: str = "CASCADE"
+    choices: tuple[str, ...] = ()
+    identity: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Table:
+    columns: dict[str, Column]
+    primary_key: tuple[str, ...]
+    unique: tuple[tuple[str, ...], ...] = ()
+
+
+def _id() -> Column:
+    return Column("uuid", default=_new_uuid, nullable=False)
+
+
+# creationDB.sql and stocktake.sql, plus books.faculty and books.book_pic_url
+# which the brokers select (see benchmarks/stack/roles.sql)
+SCHEMA: dict[str, Table] = {
+    "loan_policies": Table(
+        {
+            "role": Column("text", nullable=False, choices=USER_ROLES),
+            "max_books": Column("int", default=3, nullable=False),
+            "loan_days": Column("int", default=7, nullable=False),
+        },
+        primary_key=("role",),
+    ),
+    "users": Table(
+        {
+            "id": _id(),
+            "university_id": Column("text", nullable=False, unique=True),
+            "full_name": Column("text", nullable=False),
+            "email": Column("text", nullable=False, unique=True),
+            "hashed_password": Column("text", nullable=False),
+            "role": Column("text", default="student", choices=USER_ROLES),
+            "faculty": Column("text"),
+            "academic_year": Column("int"),
+            "infractions_count": Column("int", default=0),
+            "is_blacklisted": Column("bool", default=False),
+            "blacklist_note": Column("text"),
+            "created_at": Column("timestamptz", default=_now),
+        },
+        primary_key=("id",),
+    ),
+    "courses": Table(
+        {
+            "code": Column("text", nullable=False),
+            "name": Column("text", nullable=False),
+            "term": Column("text"),
+            "faculty": Column("text"),
+            "course_loan_days": Column("int", default=90),
+        },
+        primary_key=("code",),
+    ),
+    "enrollments": Table(
+        {
+            "id": _id(),
+            "student_id": Column("uuid", nullable=False, references="users.id"),
+            "course_code": Column("text", nullable=False, references="courses.code"),
+            "semester": Column("text", nullable=False),
+        },
+        primary_key=("id",),
+        unique=(("student_id", "course_code"),),
+    ),
+    "books": Table(
+        {
+            "id": _id(),
+            "isbn": Column("text", nullable=False, unique=True),
+            "book_number": Column("text"),
+            "call_number": Column("text"),
+            "title": Column("text", nullable=False),
+            "author": Column("text", nullable=False),
+            "faculty": Column("text"),
+            "publisher": Column("text"),
+            "publication_year": Column("int"),
+            "book_pic_url": Column("text"),
+            "marc_data": Column("json"),
+            "created_at": Column("timestamptz", default=_now),
+        },
+        primary_key=("id",),
+    ),
+    "course_books": Table(
+        {
+            "course_code": Column("text", nullable=False, references="courses.code"),
+            "book_id": Column("uuid", nullable=False, references="books.id"),
+        },
+        primary_key=("course_code", "book_id"),
+    ),
+    "book_copies": Table(
+        {
+            "id": _id(),
+            "book_id": Column("uuid", nullable=False, references="books.id"),
+            "accession_number": Column("int", unique=True, identity=10001),
+            "is_reference": Column("bool", default=False),
+            "status": Column("text", default="available", choices=BOOK_STATUSES),
+            "created_at": Column("timestamptz", default=_now),
+        },
+        primary_key=("id",),
+    ),
+    "loans": Table(
+        {
+            "id": _id(),
+            "user_id": Column("uuid", nullable=False, references="users.id"),
+            "copy_id": Column("uuid", nullable=False, references="book_copies.id"),
+            "status": Column("text", default="pending", choices=LOAN_STATUSES),
+            "request_date": Column("timestamptz", default=_now),
+            "approval_date": Column("timestamptz"),
+            "due_date": Column("timestamptz"),
+            "return_date": Column("timestamptz"),
+        },
+        primary_key=("id",),
+    ),
+    "stocktake_sessions": Table(
+        {
+            "id": _id(),
+            "name": Column("text", nullable=False),
+            "notes": Column("text"),
+            "status": Column(
+                "text",
+                default="open",
+                nullable=False,
+                choices=("open", "reconciled", "applied"),
+            ),
+            "created_by": Column("uuid", references="users.id", on_delete="SET NULL"),
+            "created_at": Column("timestamptz", default=_now),
+            "reconciled_at": Column("timestamptz"),
+            "applied_at": Column("timestamptz"),
+            "scanned_count": Column("int"),
+            "expected_count": Column("int"),
+            "missing_count": Column("int"),
+            "found_lost_count": Column("int"),
+            "on_loan_count": Column("int"),
+            "unknown_count": Column("int"),
+        },
+        primary_key=("id",),
+    ),
+    "stocktake_scans": Table(
+        {
+            "id": Column("int", identity=1),
+            "session_id": Column(
+                "uuid", nullable=False, references="stocktake_sessions.id"
+            ),
+            "accession_numbers": Column("int[]", nullable=False),
+            "created_at": Column("timestamptz", default=_now),
+        },
+        primary_key=("id",),
+    ),
+    "stocktake_discrepancies": Table(
+        {
+            "session_id": Column(
+                "uuid", nullable=False, references="stocktake_sessions.id"
+            ),
+            "accession_number": Column("int", nullable=False),
+            "copy_id": Column("uuid", references="book_copies.id"),
+            "kind": Column("text", nullable=False),
+            "current_status": Column("text", choices=BOOK_STATUSES),
+            "proposed_status": Column("text", choices=BOOK_STATUSES),
+            "loan_id": Column("uuid"),
+        },
+        primary_key=("session_id", "accession_number"),
+    ),
+}
+
+LOAN_POLICIES = [
+    {"role": "student", "max_books": 3, "loan_days": 7},
+    {"role": "professor", "max_books": 10, "loan_days": 30},
+    {"role": "ta", "max_books": 5, "loan_days": 14},
+    {"role": "admin", "max_books": 50, "loan_days": 365},
+]
+
+SQL_TYPES = {"int": "INTEGER", "bool": "INTEGER"}
+
+
+def _ddl(name: str, table: Table) -> str:
+    lines = []
+    for column_name, column in table.columns.items():
+        line = f'"{column_name}" {SQL_TYPES.get(column.type, "TEXT")}'
+        if not column.nullable:
+            line += " NOT NULL"
+        if column.unique:
+            line += " UNIQUE"
+        if column.choices:
+            options = ", ".join(f"'{choice}'" for choice in column.choices)
+            line += f' CHECK ("{column_name}" IN ({options}))'
+        if column.references:
+            target, target_column = column.references.split(".")
+            line += (
+                f' REFERENCES "{target}"("{target_column}")'
+                f" ON DELETE {column.on_delete}"
+            )
+        lines.append(line)
+    lines.append(f"PRIMARY KEY ({', '.join(table.primary_key)})")
+    lines += [f"UNIQUE ({', '.join(columns)})" for columns in table.unique]
+    return f'CREATE TABLE "{name}" ({", ".join(lines)})'
+
+
+# ==================== ERRORS AND VALUES ====================
+
+
+def _error(code: str, message: str) -> APIError:
+    return APIError({"code": code, "message": message, "details": None, "hint": None})
+
+
+INTEGRITY_CODES = {
+    "UNIQUE": ("23505", "duplicate key value violates unique constraint"),
+    "FOREIGN KEY": ("23503", "violates foreign key constraint"),
+    "NOT NULL": ("23502", "null value violates not-null constraint"),
+    "CHECK": ("23514", "violates check constraint"),
+}
+
+
+def _integrity_error(error: sqlite3.IntegrityError) -> APIError:
+    for marker, (code, message) in INTEGRITY_CODES.items():
+        if str(error).startswith(marker):
+            return _error(code, f"{message} ({error})")
+    return _error("23000", str(error))
+
+
+def _timestamp(value) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _encode(table: str, name: str, value):
+    """Python / JSON value -> SQLite value, validated like Postgres input"""
+    column = _column(table, name)
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        value = value.value
+    try:
+        if column.type == "bool":
+            if isinstance(value, str):
+                if value.lower() not in ("true", "false", "t", "f"):
+                    raise ValueError(value)
+                return int(value.lower() in ("true", "t"))
+            return int(bool(value))
+        if column.type == "int":
+            return int(value)
+        if column.type in ("json", "int[]"):
+            return json.dumps(value)
+        if column.type == "uuid":
+            return str(uuid.UUID(str(value)))
+        if column.type == "timestamptz":
+            return _timestamp(value)
+    except (TypeError, ValueError):
+        raise _error(
+            "22P02", f'invalid input syntax for type {column.type}: "{value}"'
+        ) from None
+    value = str(value)
+    if column.choices and value not in column.choices:
+        raise _error("22P02", f'invalid input value for enum: "{value}"')
+    return value
+
+
+def _decode(table: str, row: sqlite3.Row) -> dict:
+    decoded = {}
+    for name in row.keys():
+        value = row[name]
+        column = SCHEMA[table].columns.get(name)
+        if value is not None and column is not None:
+            if column.type == "bool":
+                value = bool(value)
+            elif column.type in ("json", "int[]"):
+                value = json.loads(value)
+        decoded[name] = value
+    return decoded
+
+
+def _column(table: str, name: str) -> Column:
+    column = SCHEMA[table].columns.get(name)
+    if column is None:
+        raise _error("42703", f"column {table}.{name} does not exist")
+    return column
+
+
+# ==================== SELECT PARSING ====================
+
+
+@dataclass
+class Selection:
+    columns: list[str] = field(default_factory=list)
+    embeds: list["Embed"] = field(default_factory=list)
+
+
+@dataclass
+class Embed:
+    relation: str
+    inner: bool
+    selection: Selection
+
+
+EMBED = re.compile(r"(\w+)(?:!(\w+))?\((.*)\)", re.S)
+
+
+def _split(text: str) -> list[str]:
+    """Split on commas outside parentheses and double-quoted values"""
+    parts, depth, start, quoted, escaped = [], 0, 0, False, False
+    for index, char in enumerate(text):
+        if escaped:
+            escaped = False
+        elif quoted:
+            escaped = char == "\\"
+            quoted = char != '"'
+        elif char == '"':
+            quoted = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_select(text: str) -> Selection:
+    selection = Selection()
+    for item in _split(text):
+        match = EMBED.fullmatch(item)
+        if match:
+            relation, hint, inner = match.groups()
+            selection.embeds.append(
+                Embed(relation, hint == "inner", parse_select(inner))
+            )
+        else:
+            selection.columns.append(item)
+    return selection
+
+
+def _relationship(parent: str, child: str) -> tuple[bool, str, str]:
+    """(embeds many rows, parent join column, child join column)"""
+    if child not in SCHEMA:
+        raise _error("PGRST200", f"no relationship between '{parent}' and '{child}'")
+    for name, column in SCHEMA[parent].columns.items():
+        if column.references and column.references.split(".")[0] == child:
+            return False, name, column.references.split(".")[1]
+    for name, column in SCHEMA[child].columns.items():
+        if column.references and column.references.split(".")[0] == parent:
+            return True, column.references.split(".")[1], name
+    raise _error("PGRST200", f"no relationship between '{parent}' and '{child}'")
+
+
+# ==================== FILTERS ====================
+
+COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+@dataclass
+class Filter:
+    column: str
+    operator: str
+    value: Any
+
+
+def _parse_condition(text: str) -> Filter:
+    """One "column.operator.value" term of an or=(...) filter"""
+    column, operator, value = text.split(".", 2)
+    if operator == "not":
+        # column.not.operator.value
+        negated, value = value.split(".", 1)
+        operator = f"{operator}.{negated}"
+    if value.startswith('"') and value.endswith('"'):
+        # Reserved characters are quoted; backslash escapes " and itself
+        value = re.sub(r"\\(.)", r"\1", value[1:-1])
+    elif operator == "in":
+        value = [item.strip().strip('"') for item in value.strip("()").split(",")]
+    return Filter(column, operator, value)
+
+
+def _condition(table: str, condition) -> tuple[str, list]:
+    if isinstance(condition, list):
+        parts = [_condition(table, term) for term in condition]
+        sql = " OR ".join(f"({part})" for part, _ in parts)
+        return sql or "0", [param for _, params in parts for param in params]
+
+    name, operator, value = condition.column, condition.operator, condition.value
+    if operator.startswith("not."):
+        sql, params = _condition(table, Filter(name, operator[4:], value))
+        return f"NOT ({sql})", params
+    column = f'"{name}"'
+    _column(table, name)
+    if operator == "is":
+        literal = str(value).lower() if value is not None else "null"
+        if literal == "null":
+            return f"{column} IS NULL", []
+        return f"{column} = ?", [_encode(table, name, literal)]
+    if operator == "in":
+        if not value:
+            return "0", []
+        placeholders = ", ".join("?" * len(value))
+        return f"{column} IN ({placeholders})", [
+            _encode(table, name, item) for item in value
+        ]
+    if operator in ("like", "ilike"):
+        # PostgREST accepts * as well as % for the wildcard
+        pattern = str(value).replace("*", "%")
+        if operator == "ilike":
+            return f"lower({column}) LIKE lower(?) ESCAPE '\\'", [pattern]
+        return f"{column} LIKE ? ESCAPE '\\'", [pattern]
+    if operator in COMPARISONS:
+        return f"{column} {COMPARISONS[operator]} ?", [_encode(table, name, value)]
+    raise _error("PGRST100", f"unsupported operator {operator}")
+
+
+def _where(table: str, conditions: list) -> tuple[str, list]:
+    if not conditions:
+        return "", []
+    parts = [_condition(table, condition) for condition in conditions]
+    return " WHERE " + " AND ".join(f"({sql})" for sql, _ in parts), [
+        param for _, params in parts for param in params
+    ]
+
+
+def _split_filters(conditions: list) -> tuple[list, dict[str, list]]:
+    """Filters on this table, and filters on embedded tables by relation"""
+    own: list = []
+    embedded: dict[str, list] = {}
+    for condition in conditions:
+        if isinstance(condition, Filter) and "." in condition.column:
+            relation, column = condition.column.split(".", 1)
+            embedded.setdefault(relation, []).append(
+                Filter(column, condition.operator, condition.value)
+            )
+        else:
+            own.append(condition)
+    return own, embedded
+
+
+def _like_regex(pattern: str) -> str:
+    """LIKE pattern (% or * any run, _ one character, \\ escapes) -> regex"""
+    parts = re.findall(r"\\.|.", pattern, re.S)
+    wildcards = {"%": ".*", "*": ".*", "_": "."}
+    return "".join(
+        re.escape(part[1]) if len(part) == 2 else wildcards.get(part, re.escape(part))
+        for part in parts
+    )
+
+
+def _matches(row: dict, condition) -> bool:
+    """Python twin of _condition, for RPC results"""
+    if isinstance(condition, list):
+        return any(_matches(row, term) for term in condition)
+    value, expected = row.get(condition.column), condition.value
+    operator = condition.operator
+    if operator.startswith("not."):
+        return not _matches(row, Filter(condition.column, operator[4:], expected))
+    if operator == "is":
+        return value is None if expected in (None, "null") else value == expected
+    if operator == "in":
+        return str(value) in [str(item) for item in expected]
+    if operator in ("like", "ilike"):
+        pattern = _like_regex(str(expected))
+        flags = re.I if operator == "ilike" else 0
+        return value is not None and bool(re.fullmatch(pattern, str(value), flags))
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        expected = str(expected).lower() in ("true", "t")
+    elif isinstance(value, int):
+        expected = int(expected)
+    else:
+        value, expected = str(value), str(expected)
+    return {
+        "eq": value == expected,
+        "neq": value != expected,
+        "gt": value > expected,
+        "gte": value >= expected,
+        "lt": value < expected,
+        "lte": value <= expected,
+    }[operator]
+
+
+# ==================== RESPONSES ====================
+
+
+@dataclass
+class Response:
+    """Same fields as postgrest's APIResponse"""
+
+    data: Any
+    count: Optional[int] = None
+
+
+def _project(row: dict, selection: Selection) -> dict:
+    if not selection.columns or "*" in selection.columns:
+        projected = {
+            name: value for name, value in row.items() if not name.startswith("__")
+        }
+    else:
+        projected = {name: row[name] for name in selection.columns}
+    for embed in selection.embeds:
+        value = row[f"__{embed.relation}"]
+        if isinstance(value, list):
+            projected[embed.relation] = [
+                _project(child, embed.selection) for child in value
+            ]
+        else:
+            projected[embed.relation] = (
+                _project(value, embed.selection) if value is not None else None
+            )
+    return projected
+
+
+def _check_columns(table: str, selection: Selection) -> None:
+    for name in selection.columns:
+        if name != "*":
+            _column(table, name)
+
+
+def _check_payload(table: str, names: list[str]) -> None:
+    for name in names:
+        column = SCHEMA[table].columns.get(name)
+        if column is None:
+            raise _error("PGRST204", f"Could not find the '{name}' column of '{table}'")
+        if column.identity is not None:
+            raise _error("428C9", f'cannot insert into column "{name}"')
+
+
+# ==================== QUERY BUILDER ====================
+
+
+class QueryBuilder:
+    """supabase's table()/rpc() builder; every method returns the builder"""
+
+    def __init__(self, client: "SqliteClient", table: str, rpc_params=None):
+        self._client = client
+        self._table = table
+        self._rpc_params = rpc_params
+        self._action = "rpc" if rpc_params is not None else "select"
+        self._selection = parse_select("*")
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._returning = ReturnMethod.representation
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._filters: list = []
+        self._order: list[tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+
+    # ---- actions ----
+
+    def select(self, *columns: str, count: Optional[str] = None):
+        self._selection = parse_select(",".join(columns) or "*")
+        self._count = count
+        return self
+
+    def insert(
+        self,
+        json,
+        *,
+        count=None,
+        returning=ReturnMethod.representation,
+        upsert=False,
+        default_to_null=True,
+    ):
+        self._action, self._payload, self._returning = "insert", json, returning
+        if upsert:
+            self._action = "upsert"
+        return self
+
+    def upsert(
+        self,
+        json,
+        *,
+        count=None,
+        returning=ReturnMethod.representation,
+        ignore_duplicates=False,
+        on_conflict="",
+        default_to_null=True,
+    ):
+        self._action, self._payload, self._returning = "upsert", json, returning
+        self._ignore_duplicates = ignore_duplicates
+        self._on_conflict = on_conflict or None
+        return self
+
+    def update(self, json, *, count=None, returning=ReturnMethod.representation):
+        self._action, self._payload, self._returning = "update", json, returning
+        return self
+
+    def delete(self, *, count=None, returning=ReturnMethod.representation):
+        self._action, self._returning = "delete", returning
+        return self
+
+    # ---- filters ----
+
+    def filter(self, column: str, operator: str, criteria):
+        self._filters.append(Filter(column, operator, criteria))
+        return self
+
+    def eq(self, column, value):
+        return self.filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self.filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self.filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self.filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self.filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self.filter(column, "lte", value)
+
+    def like(self, column, pattern):
+        return self.filter(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self.filter(column, "ilike", pattern)
+
+    def is_(self, column, value):
+        return self.filter(column, "is", value)
+
+    def in_(self, column, values):
+        return self.filter(column, "in", list(values))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        self._filters.append([_parse_condition(term) for term in _split(filters)])
+        return self
+
+    # ---- modifiers ----
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst=None, **_):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def execute(self) -> Response:
+        return self._client._execute(self)
+
+
+# ==================== CLIENT ====================
+
+METHODS = {
+    "select": "GET",
+    "insert": "POST",
+    "upsert": "POST",
+    "rpc": "POST",
+    "update": "PATCH",
+    "delete": "DELETE",
+}
+
+
+class SqliteClient:
+    """Stand-in for supabase.Client over a private in-memory SQLite database"""
+
+    def __init__(self):
+        self.queries = 0
+        self.log: list[str] = []
+        self._lock = threading.RLock()
+        self._sequences: dict[tuple[str, str], int] = {}
+        self._conn = sqlite3.connect(
+            ":memory:", check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        # LIKE is case-sensitive as in Postgres; ilike lowercases both sides
+        self._conn.execute("PRAGMA case_sensitive_like = ON")
+        for name, table in SCHEMA.items():
+            self._conn.execute(_ddl(name, table))
+        self.seed("loan_policies", LOAN_POLICIES)
+
+    def table(self, name: str) -> QueryBuilder:
+        if name not in SCHEMA:
+            raise _error("42P01", f'relation "public.{name}" does not exist')
+        return QueryBuilder(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **_) -> QueryBuilder:
+        return QueryBuilder(self, fn, rpc_params=params or {})
+
+    def seed(self, table: str, rows: list[dict]) -> list[dict]:
+        """Insert rows directly, without counting a query"""
+        with self._lock, self._transaction():
+            return self._insert(table, rows, None, False)
+
+    def reset_queries(self) -> None:
+        self.queries = 0
+        self.log.clear()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ---- execution ----
+
+    def _execute(self, builder: QueryBuilder) -> Response:
+        path = f"/rpc/{builder._table}" if builder._action == "rpc" else builder._table
+        started = time.perf_counter()
+        with self._lock:
+            self.queries += 1
+            self.log.append(f"{METHODS[builder._action]} /{path.lstrip('/')}")
+            try:
+                with self._transaction():
+                    response = self._run(builder)
+            finally:
+                record_query(time.perf_counter() - started)
+        if builder._returning == ReturnMethod.minimal:
+            response.data = []
+        return response
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except sqlite3.IntegrityError as error:
+            self._conn.execute("ROLLBACK")
+            raise _integrity_error(error) from None
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _run(self, builder: QueryBuilder) -> Response:
+        table, selection = builder._table, builder._selection
+        if builder._action == "rpc":
+            return self._run_rpc(builder)
+        if builder._action == "select":
+            return self._select(builder)
+
+        if builder._action in ("insert", "upsert"):
+            rows = self._insert(
+                table,
+                builder._payload,
+                builder._on_conflict if builder._action == "upsert" else None,
+                builder._ignore_duplicates,
+                upsert=builder._action == "upsert",
+            )
+        else:
+            where, params = _where(table, builder._filters)
+            if builder._action == "update":
+                _check_payload(table, list(builder._payload))
+                assignments = ", ".join(f'"{name}" = ?' for name in builder._payload)
+                values = [
+                    _encode(table, name, value)
+                    for name, value in builder._payload.items()
+                ]
+                sql = f'UPDATE "{table}" SET {assignments}{where} RETURNING *'
+                cursor = self._conn.execute(sql, values + params)
+            else:
+                sql = f'DELETE FROM "{table}"{where} RETURNING *'
+                cursor = self._conn.execute(sql, params)
+            rows = [_decode(table, row) for row in cursor.fetchall()]
+
+        returned = Selection(selection.columns)
+        _check_columns(table, returned)
+        return Response([_project(row, returned) for row in rows])
+
+    def _insert(
+        self,
+        table: str,
+        payload,
+        on_conflict: Optional[str],
+        ignore_duplicates: bool,
+        upsert: bool = False,
+    ) -> list[dict]:
+        rows = payload if isinstance(payload, list) else [payload]
+        if not rows:
+            return []
+        spec = SCHEMA[table]
+        # Like PostgREST, keys missing from some rows of a bulk insert are NULL;
+        # columns missing from every row get their default
+        given = list(dict.fromkeys(name for row in rows for name in row))
+        _check_payload(table, given)
+        defaulted = [name for name in spec.columns if name not in given]
+        columns = ", ".join(f'"{name}"' for name in given + defaulted)
+        placeholders = ", ".join("?" * (len(given) + len(defaulted)))
+        sql = f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})'
+        if upsert:
+            target = on_conflict or ", ".join(spec.primary_key)
+            if ignore_duplicates:
+                sql += f" ON CONFLICT ({target}) DO NOTHING"
+            else:
+                updates = ", ".join(f'"{c}" = excluded."{c}"' for c in given)
+                sql += f" ON CONFLICT ({target}) DO UPDATE SET {updates}"
+        sql += " RETURNING *"
+
+        inserted = []
+        for row in rows:
+            values = [_encode(table, name, row.get(name)) for name in given]
+            values += [self._default(table, name) for name in defaulted]
+            inserted += [_decode(table, r) for r in self._conn.execute(sql, values)]
+        return inserted
+
+    def _default(self, table: str, name: str):
+        column = SCHEMA[table].columns[name]
+        if column.identity is not None:
+            key = (table, name)
+            self._sequences[key] = self._sequences.get(key, column.identity - 1) + 1
+            return self._sequences[key]
+        default = column.default() if callable(column.default) else column.default
+        return _encode(table, name, default)
+
+    def _select(self, builder: QueryBuilder) -> Response:
+        table, selection = builder._table, builder._selection
+        _check_columns(table, selection)
+        own, embedded = _split_filters(builder._filters)
+        where, params = _where(table, own)
+        order = "".join(
+            f', "{name}" IS NULL {"DESC" if desc else "ASC"}, "{name}" '
+            f'{"DESC" if desc else "ASC"}'
+            for name, desc in builder._order
+        )
+        for name, _ in builder._order:
+            _column(table, name)
+        sql = f'SELECT * FROM "{table}"{where} ORDER BY {order[2:] or "rowid"}'
+
+        # !inner embeds drop parents, so counting and paging happen afterwards
+        inner = any(embed.inner for embed in selection.embeds)
+        if not inner:
+            if builder._limit is not None or builder._offset:
+                sql += " LIMIT ? OFFSET ?"
+                params = params + [
+                    builder._limit if builder._limit is not None else -1,
+                    builder._offset,
+                ]
+        rows = [_decode(table, row) for row in self._conn.execute(sql, params)]
+        rows = self._embed(table, rows, selection, embedded)
+
+        count = None
+        if inner:
+            count = len(rows)
+            end = None if builder._limit is None else builder._offset + builder._limit
+            rows = rows[builder._offset : end]
+        elif builder._count:
+            where, params = _where(table, own)
+            count = self._conn.execute(
+                f'SELECT COUNT(*) FROM "{table}"{where}', params
+            ).fetchone()[0]
+
+        return Response([_project(row, selection) for row in rows], count)
+
+    def _embed(
+        self,
+        table: str,
+        rows: list[dict],
+        selection: Selection,
+        embedded: dict[str, list],
+    ) -> list[dict]:
+        """Resolve embedded resources with one IN query per relation"""
+        for embed in selection.embeds:
+            many, parent_key, child_key = _relationship(table, embed.relation)
+            child_table = embed.relation
+            own, nested = _split_filters(embedded.get(child_table, []))
+            keys = list(dict.fromkeys(r[parent_key] for r in rows if r[parent_key]))
+
+            children: list[dict] = []
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                where, params = _where(
+                    child_table, own + [Filter(child_key, "in", chunk)]
+                )
+                children += [
+                    _decode(child_table, row)
+                    for row in self._conn.execute(
+                        f'SELECT * FROM "{child_table}"{where} ORDER BY rowid', params
+                    )
+                ]
+            _check_columns(child_table, embed.selection)
+            children = self._embed(child_table, children, embed.selection, nested)
+
+            grouped: dict[Any, list[dict]] = {}
+            for child in children:
+                grouped.setdefault(child[child_key], []).append(child)
+            for row in rows:
+                matched = grouped.get(row[parent_key], [])
+                row[f"__{child_table}"] = (
+                    matched if many else (matched[0] if matched else None)
+                )
+            if embed.inner:
+                rows = [row for row in rows if row[f"__{child_table}"]]
+        return rows
+
+    def _run_rpc(self, builder: QueryBuilder) -> Response:
+        function = RPCS.get(builder._table)
+        if function is None:
+            raise _error("PGRST202", f"Could not find the function {builder._table}")
+        try:
+            result = function(self._conn, **builder._rpc_params)
+        except TypeError as error:
+            raise _error("PGRST202", str(error)) from None
+        if not isinstance(result, list):
+            return Response(result)
+
+        rows = [
+            row
+            for row in result
+            if all(_matches(row, condition) for condition in builder._filters)
+        ]
+        for name, desc in reversed(builder._order):
+            rows.sort(key=lambda row: (row[name] is None, row[name]), reverse=desc)
+        end = None if builder._limit is None else builder._offset + builder._limit
+        rows = rows[builder._offset : end]
+        return Response([_project(row, builder._selection) for row in rows])
+
+
+# ==================== RPC FUNCTIONS ====================
+# Python ports of src/utils/*.sql; each runs in the request's transaction
+
+
+def _rows(conn: sqlite3.Connection, table: str, sql: str, params=()) -> list[dict]:
+    return [_decode(table, row) for row in conn.execute(sql, params)]
+
+
+def _in(values) -> str:
+    return f"({', '.join('?' * len(values))})"
+
+
+def get_books_with_stats(conn, offset_param: int = 0, limit_param: int = 50):
+    rows = _rows(
+        conn,
+        "books",
+        """
+        SELECT b.*, json_object(
+            'total', COUNT(bc.id),
+            'available', COALESCE(SUM(bc.is_reference = 0
+                                      AND bc.status = 'available'), 0),
+            'reference', COALESCE(SUM(bc.is_reference = 1), 0),
+            'circulating', COALESCE(SUM(bc.is_reference = 0), 0),
+            'checked_out', COALESCE(SUM(bc.status = 'loaned'), 0)
+        ) AS copy_stats
+        FROM books b
+        LEFT JOIN book_copies bc ON bc.book_id = b.id
+        GROUP BY b.id
+        ORDER BY b.created_at DESC
+        LIMIT ? OFFSET ?
+        """,
+        (limit_param, offset_param),
+    )
+    for row in rows:
+        row["copy_stats"] = json.loads(row["copy_stats"])
+    return rows
+
+
+def search_users(
+    conn,
+    query_param: str,
+    limit_param: int = 20,
+    after_rank: Optional[int] = None,
+    after_name: Optional[str] = None,
+    after_id: Optional[str] = None,
+):
+    pattern = query_param.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return _rows(
+        conn,
+        "users",
+        r"""
+        WITH matches AS (
+            SELECT id, university_id, full_name, email, role, faculty,
+                   academic_year, infractions_count, is_blacklisted,
+                   blacklist_note, created_at,
+                   CASE
+                       WHEN university_id = :query THEN 0
+                       WHEN lower(email) LIKE lower(:pattern) || '%' ESCAPE '\'
+                           THEN 1
+                       ELSE 2
+                   END AS search_rank
+            FROM users
+            WHERE lower(full_name) LIKE '%' || lower(:pattern) || '%' ESCAPE '\'
+               OR lower(email) LIKE '%' || lower(:pattern) || '%' ESCAPE '\'
+               OR lower(university_id) LIKE '%' || lower(:pattern) || '%' ESCAPE '\'
+        )
+        SELECT * FROM matches
+        WHERE :after_rank IS NULL
+           OR (search_rank, full_name, id) > (:after_rank, :after_name, :after_id)
+        ORDER BY search_rank, full_name, id
+        LIMIT :limit
+        """,
+        {
+            "query": query_param,
+            "pattern": pattern,
+            "after_rank": after_rank,
+            "after_name": after_name,
+            "after_id": after_id,
+            "limit": limit_param,
+        },
+    )
+
+
+def _desk_outcomes(
+    conn, numbers: list[int], targets: dict, hit: str, miss: str
+) -> list[dict]:
+    copies = {
+        row["accession_number"]
+        for row in conn.execute(
+            f"SELECT accession_number FROM book_copies WHERE accession_number IN "
+            f"{_in(numbers)}",
+            numbers,
+        )
+    }
+    results = []
+    for number in numbers:
+        for target in targets.get(number) or [None]:
+            if target:
+                outcome = hit
+            else:
+                outcome = miss if number in copies else "not_found"
+            results.append(
+                {
+                    "accession_number": number,
+                    "outcome": outcome,
+                    "loan_id": target["loan_id"] if target else None,
+                    "user_id": target["user_id"] if target else None,
+                    "was_overdue": bool(target and target.get("was_overdue")),
+                }
+            )
+    return results
+
+
+def desk_return_copies(
+    conn, accession_numbers: list[int], increment_infractions: bool = False
+):
+    numbers = sorted(set(accession_numbers))
+    if not numbers:
+        return []
+    now = _now()
+    targets: dict[int, list[dict]] = {}
+    for row in conn.execute(
+        f"""
+        SELECT c.accession_number, c.id AS copy_id, l.id AS loan_id, l.user_id,
+               (l.due_date IS NOT NULL AND l.due_date < ?) AS was_overdue
+        FROM book_copies c
+        JOIN loans l ON l.copy_id = c.id AND l.status IN ('active', 'overdue')
+        WHERE c.accession_number IN {_in(numbers)}
+        """,
+        [now, *numbers],
+    ):
+        targets.setdefault(row["accession_number"], []).append(dict(row))
+
+    found = [target for rows in targets.values() for target in rows]
+    loan_ids = [target["loan_id"] for target in found]
+    copy_ids = list({target["copy_id"] for target in found})
+    if found:
+        conn.execute(
+            f"UPDATE loans SET status = 'returned', return_date = ? "
+            f"WHERE id IN {_in(loan_ids)}",
+            [now, *loan_ids],
+        )
+        conn.execute(
+            f"UPDATE book_copies SET status = 'available' WHERE id IN {_in(copy_ids)}",
+            copy_ids,
+        )
+    if increment_infractions:
+        late: dict[str, int] = {}
+        for target in found:
+            if target["was_overdue"]:
+                late[target["user_id"]] = late.get(target["user_id"], 0) + 1
+        for user_id, returns in late.items():
+            conn.execute(
+                "UPDATE users SET infractions_count = infractions_count + ? "
+                "WHERE id = ?",
+                (returns, user_id),
+            )
+    return _desk_outcomes(conn, numbers, targets, "returned", "no_open_loan")
+
+
+def desk_checkout_copies(conn, accession_numbers: list[int]):
+    numbers = sorted(set(accession_numbers))
+    if not numbers:
+        return []
+    targets: dict[int, list[dict]] = {}
+    for row in conn.execute(
+        f"""
+        UPDATE loans SET status = 'active'
+        WHERE status = 'pending_pickup'
+          AND copy_id IN (
+              SELECT id FROM book_copies WHERE accession_number IN {_in(numbers)}
+          )
+        RETURNING id AS loan_id, user_id, copy_id
+        """,
+        numbers,
+    ).fetchall():
+        accession = conn.execute(
+            "SELECT accession_number FROM book_copies WHERE id = ?", (row["copy_id"],)
+        ).fetchone()[0]
+        targets.setdefault(accession, []).append(dict(row))
+    return _desk_outcomes(conn, numbers, targets, "checked_out", "no_pending_pickup")
+
+
+def stocktake_reconcile(conn, target_session: str):
+    conn.execute(
+        "DELETE FROM stocktake_discrepancies WHERE session_id = ?", (target_session,)
+    )
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS stocktake_seen "
+        "(accession_number INTEGER PRIMARY KEY)"
+    )
+    conn.execute("DELETE FROM stocktake_seen")
+    conn.execute(
+        """
+        INSERT INTO stocktake_seen
+        SELECT DISTINCT j.value
+        FROM stocktake_scans s, json_each(s.accession_numbers) j
+        WHERE s.session_id = ?
+        """,
+        (target_session,),
+    )
+    conn.execute(
+        """
+        INSERT INTO stocktake_discrepancies (
+            session_id, accession_number, copy_id, kind,
+            current_status, proposed_status, loan_id
+        )
+        SELECT :session, c.accession_number, c.id, 'missing', c.status, 'lost', NULL
+        FROM book_copies c
+        WHERE c.status <> 'lost'
+          AND c.accession_number NOT IN (SELECT accession_number FROM stocktake_seen)
+          AND NOT EXISTS (
+              SELECT 1 FROM loans l
+              WHERE l.copy_id = c.id
+                AND l.status IN ('pending_pickup', 'active', 'overdue')
+          )
+        UNION ALL
+        SELECT :session, c.accession_number, c.id,
+               CASE WHEN l.id IS NOT NULL THEN 'scanned_on_loan' ELSE 'found_lost' END,
+               c.status,
+               CASE WHEN l.id IS NOT NULL THEN NULL ELSE 'available' END,
+               l.id
+        FROM stocktake_seen s
+        JOIN book_copies c ON c.accession_number = s.accession_number
+        LEFT JOIN loans l ON l.copy_id = c.id AND l.status IN ('active', 'overdue')
+        WHERE c.status = 'lost' OR l.id IS NOT NULL
+        UNION ALL
+        SELECT :session, s.accession_number, NULL, 'unknown', NULL, NULL, NULL
+        FROM stocktake_seen s
+        WHERE s.accession_number NOT IN (SELECT accession_number FROM book_copies)
+        """,
+        {"session": target_session},
+    )
+    return _rows(
+        conn,
+        "stocktake_sessions",
+        """
+        UPDATE stocktake_sessions
+           SET status = 'reconciled',
+               reconciled_at = :now,
+               scanned_count = (SELECT COUNT(*) FROM stocktake_seen),
+               expected_count = (
+                   SELECT COUNT(*) FROM book_copies WHERE status <> 'lost'
+               ),
+               missing_count = d.missing,
+               found_lost_count = d.found_lost,
+               on_loan_count = d.on_loan,
+               unknown_count = d.unknown
+          FROM (
+              SELECT
+                  COUNT(*) FILTER (WHERE kind = 'missing') AS missing,
+                  COUNT(*) FILTER (WHERE kind = 'found_lost') AS found_lost,
+                  COUNT(*) FILTER (WHERE kind = 'scanned_on_loan') AS on_loan,
+                  COUNT(*) FILTER (WHERE kind = 'unknown') AS unknown
+              FROM stocktake_discrepancies
+              WHERE session_id = :session
+          ) d
+         WHERE stocktake_sessions.id = :session
+        RETURNING *
+        """,
+        {"session": target_session, "now": _now()},
+    )
+
+
+def stocktake_apply(conn, target_session: str) -> int:
+    updated = conn.execute(
+        """
+        UPDATE book_copies
+           SET status = d.proposed_status
+          FROM stocktake_discrepancies d
+         WHERE d.session_id = ?
+           AND d.proposed_status IS NOT NULL
+           AND book_copies.id = d.copy_id
+           AND book_copies.status = d.current_status
+        """,
+        (target_session,),
+    ).rowcount
+    conn.execute(
+        "UPDATE stocktake_sessions SET status = 'applied', applied_at = ? "
+        "WHERE id = ?",
+        (_now(), target_session),
+    )
+    return updated
+
+
+RPCS: dict[str, Callable] = {
+    "get_books_with_stats": get_books_with_stats,
+    "search_users": search_users,
+    "desk_return_copies": desk_return_copies,
+    "desk_checkout_copies": desk_checkout_copies,
+    "stocktake_reconcile": stocktake_reconcile,
+    "stocktake_apply": stocktake_apply,
+}
@@ -70,6 +70,38 @@ class TestBookRouter:
         assert len(data) == 1
         assert data[0]["title"] == sample_book_dict["title"]
 
+    @pytest.mark.integration
+    def test_get_books_served_from_cache_with_etag(
+        self, client, mock_student_token, sample_book_dict, mock_student_user
+    ):
+        """Test repeat GET /books reuses the cached body and honours If-None-Match"""
+        # Arrange
+        app.dependency_overrides[get_current_user] = lambda: mock_student_user
+        headers = {"Authorization": mock_student_token}
+
+        with patch(
+            "src.Services.bookService.BookService.RetrieveAllBooks"
+        ) as mock_retrieve:
+            mock_retrieve.return_value = [BookResponse(**sample_book_dict)]
+
+            # Act
+            first = client.get("/books/", headers=headers)
+            second = client.get("/books/", headers=headers)
+            not_modified = client.get(
+                "/books/", headers={**headers, "If-None-Match": first.headers["ETag"]}
+            )
+
+        # Cleanup
+        app.dependency_overrides = {}
+
+        # Assert
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        mock_retrieve.assert_called_once()
+
     @pytest.mark.integration
     def test_get_books_with_pagination(
         self, client, mock_student_token, sample_book_dict, mock_student_user
@@ -93,7 +125,52 @@ class TestBookRouter:
 
         # Assert
         assert response.status_code == 200
-        mock_retrieve.assert_called_once_with(skip=0, limit=5)
+        mock_retrieve.assert_called_once_with(skip=0, limit=5, fields=None)
+
+    @pytest.mark.integration
+    def test_get_books_with_fields(
+        self, client, mock_student_token, sample_book_dict, mock_student_user
+    ):
+        """Test GET /books?fields= adds required fields and omits unfetched ones"""
+        app.dependency_overrides[get_current_user] = lambda: mock_student_user
+        row = {
+            key: sample_book_dict[key]
+            for key in ("id", "isbn", "title", "author", "created_at")
+        }
+
+        with patch(
+            "src.Services.bookService.BookService.RetrieveAllBooks"
+        ) as mock_retrieve:
+            mock_retrieve.return_value = [BookResponse(**row)]
+
+            response = client.get(
+                "/books/?fields=title", headers={"Authorization": mock_student_token}
+            )
+
+        app.dependency_overrides = {}
+
+        assert response.status_code == 200
+        assert set(response.json()[0]) == set(row)
+        mock_retrieve.assert_called_once_with(
+            skip=0, limit=10, fields=["id", "isbn", "title", "author", "created_at"]
+        )
+
+    @pytest.mark.integration
+    def test_get_books_with_unknown_field(
+        self, client, mock_student_token, mock_student_user
+    ):
+        """Test GET /books?fields= rejects fields outside the list field set"""
+        app.dependency_overrides[get_current_user] = lambda: mock_student_user
+
+        response = client.get(
+            "/books/?fields=title,marc_data",
+            headers={"Authorization": mock_student_token},
+        )
+
+        app.dependency_overrides = {}
+
+        assert response.status_code == 400
+        assert "marc_data" in response.json()["detail"]
 
     @pytest.mark.integration
     def test_get_book_by_id_found(
@@ -354,3 +431,78 @@ class TestBookRouter:
         assert len(data) == 1
         assert "copy_stats" in data[0]
         assert data[0]["copy_stats"]["total"] == 10
+
+    @pytest.mark.integration
+    def test_import_books_csv(self, client, mock_admin_user):
+        """Test POST /books/import parses an uploaded CSV and returns a report"""
+        from unittest.mock import AsyncMock
+
+        from src.Services.bookImportService import BookImportService
+        from src.utils.dependencies import get_book_import_service
+
+        book_broker = AsyncMock()
+        book_broker.SelectAllIsbns.return_value = []
+        book_broker.InsertBooksBulk.return_value = [{"id": str(uuid4()), "isbn": "111"}]
+        app.dependency_overrides[require_admin] = lambda: mock_admin_user
+        app.dependency_overrides[get_book_import_service] = lambda: (
+            BookImportService(book_broker, AsyncMock())
+        )
+
+        response = client.post(
+            "/books/import",
+            files={"file": ("catalog.csv", b"isbn,title,author\n111,Title,A\n")},
+        )
+
+        # Cleanup
+        app.dependency_overrides = {}
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 1
+        assert data["rows"][0]["status"] == "created"
+
+    @pytest.mark.integration
+    def test_import_books_unknown_format(self, client, mock_admin_user):
+        """Test POST /books/import rejects files it cannot identify"""
+        app.dependency_overrides[require_admin] = lambda: mock_admin_user
+
+        response = client.post(
+            "/books/import", files={"file": ("catalog.xlsx", b"PK...")}
+        )
+
+        # Cleanup
+        app.dependency_overrides = {}
+
+        assert response.status_code == 400
+
+    @pytest.mark.integration
+    def test_get_book_by_id_query_budget(
+        self,
+        client,
+        sample_book_dict,
+        mock_student_user,
+        mock_supabase_client,
+        assert_max_queries,
+    ):
+        """Test GET /books/{id} reports its round trips and stays within budget"""
+        # Arrange
+        from unittest.mock import MagicMock
+
+        from src.utils.dependencies import get_db_client
+
+        app.dependency_overrides[get_current_user] = lambda: mock_student_user
+        app.dependency_overrides[get_db_client] = lambda: mock_supabase_client
+        mock_supabase_client.execute.return_value = MagicMock(data=[sample_book_dict])
+
+        # Act
+        response = client.get(f"/books/{sample_book_dict['id']}")
+
+        # Cleanup
+        app.dependency_overrides = {}
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["X-DB-Queries"] == "1"
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert_max_queries(response, 1)
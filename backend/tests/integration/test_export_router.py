@@ -0,0 +1,66 @@
+"""
+Integration tests for Export Router
+Tests streaming export endpoints with mocked brokers
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.Services.exportService import ExportService
+from src.utils.auth import get_current_user, require_admin
+from src.utils.dependencies import get_export_service
+
+
+class TestExportRouter:
+    """Test suite for Export API endpoints"""
+
+    @pytest.fixture
+    def client(self):
+        """Create TestClient instance"""
+        return TestClient(app)
+
+    @pytest.fixture
+    def copy_broker(self):
+        return AsyncMock()
+
+    @pytest.fixture(autouse=True)
+    def setup_overrides(self, mock_admin_user, copy_broker):
+        """Authenticate as admin and export from a mocked copy broker"""
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+        app.dependency_overrides[require_admin] = lambda: mock_admin_user
+        app.dependency_overrides[get_export_service] = lambda: ExportService(
+            AsyncMock(), copy_broker, AsyncMock(), AsyncMock()
+        )
+        yield
+        app.dependency_overrides.clear()
+
+    @pytest.mark.integration
+    def test_export_copies_csv(self, client, copy_broker, sample_copy_dict):
+        """Test GET /export/copies?format=csv streams a CSV attachment"""
+        copy_broker.SelectCopiesPage.return_value = [sample_copy_dict]
+
+        response = client.get("/export/copies?format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        lines = response.text.splitlines()
+        assert lines[0] == "id,book_id,accession_number,is_reference,status,created_at"
+        assert len(lines) == 2
+
+    @pytest.mark.integration
+    def test_export_rejects_filters_for_books(self, client):
+        """Test loan-only filters return 400 for other tables"""
+        response = client.get("/export/books?status=active")
+
+        assert response.status_code == 400
+
+    @pytest.mark.integration
+    def test_export_unknown_table(self, client):
+        """Test an unknown table is rejected"""
+        response = client.get("/export/passwords")
+
+        assert response.status_code == 422
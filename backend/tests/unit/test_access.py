@@ -0,0 +1,144 @@
+"""
+Unit tests for user status checks on authenticated requests
+Tests the status cache, blacklist and deletion enforcement in
+get_current_active_user, and invalidation across workers
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from src.utils import access
+from src.utils.auth import get_current_active_user
+from src.utils.cache import UserStatus, UserStatusCache, get_user_status_cache
+
+TOKEN_USER = {"id": "user-1", "role": "admin"}
+
+
+@pytest.fixture
+def status_cache():
+    """A process status cache as built with DATABASE_URL set"""
+    cache = UserStatusCache(max_entries=10, ttl_seconds=30)
+    with patch("src.utils.cache._user_status_cache", cache):
+        yield cache
+
+
+def make_broker(user):
+    broker = MagicMock()
+    broker.SelectUserById = AsyncMock(return_value=user)
+    return broker
+
+
+class TestActiveUser:
+    """Test suite for get_current_active_user"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_status_is_read_once(self, status_cache):
+        """Test repeated requests from one user reuse the cached status"""
+        broker = make_broker({"id": "user-1", "role": "admin"})
+
+        for _ in range(3):
+            user = await get_current_active_user(TOKEN_USER, broker)
+
+        assert user == TOKEN_USER
+        broker.SelectUserById.assert_awaited_once_with("user-1")
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_status_is_not_cached_without_broadcast(self):
+        """Test without DATABASE_URL every request reads the user"""
+        broker = make_broker({"id": "user-1", "role": "admin"})
+        settings = MagicMock(
+            DATABASE_URL="",
+            USER_STATUS_TTL_SECONDS=30.0,
+            USER_STATUS_CACHE_MAX_ENTRIES=10,
+        )
+
+        with patch("src.utils.cache._user_status_cache", None), patch(
+            "src.utils.cache.get_settings", return_value=settings
+        ):
+            for _ in range(2):
+                await get_current_active_user(TOKEN_USER, broker)
+
+        assert broker.SelectUserById.await_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_blacklisted_user_is_rejected(self):
+        """Test a blacklisted user gets 403 even with a valid token"""
+        broker = make_broker(
+            {"id": "user-1", "role": "student", "is_blacklisted": True}
+        )
+
+        with pytest.raises(HTTPException) as error:
+            await get_current_active_user(TOKEN_USER, broker)
+
+        assert error.value.status_code == 403
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_deleted_user_is_rejected(self):
+        """Test a token for a user that no longer exists gets 401"""
+        with pytest.raises(HTTPException) as error:
+            await get_current_active_user(TOKEN_USER, make_broker(None))
+
+        assert error.value.status_code == 401
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_role_comes_from_status(self):
+        """Test a demoted admin's old token carries their current role"""
+        broker = make_broker({"id": "user-1", "role": "student"})
+
+        user = await get_current_active_user(TOKEN_USER, broker)
+
+        assert user["role"] == "student"
+
+
+class TestInvalidation:
+    """Test suite for invalidate_user_status and StatusListener"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_invalidation_forces_read_and_notifies(self, status_cache):
+        """Test a change is re-read here and broadcast to the other workers"""
+        broker = make_broker({"id": "user-1", "role": "student"})
+        database = MagicMock(execute=AsyncMock())
+        await access.load_user_status("user-1", broker)
+
+        with patch(
+            "src.utils.access.get_settings",
+            return_value=MagicMock(DATABASE_URL="postgresql://db"),
+        ), patch("src.utils.access.get_database", return_value=database):
+            await access.invalidate_user_status("user-1")
+        await access.load_user_status("user-1", broker)
+
+        assert broker.SelectUserById.await_count == 2
+        database.execute.assert_awaited_once_with(
+            "SELECT pg_notify($1, $2)", access.CHANNEL, "user-1"
+        )
+
+    @pytest.mark.unit
+    def test_notification_drops_entry(self, status_cache):
+        """Test a NOTIFY from another worker drops the cached status"""
+        cache = get_user_status_cache()
+        cache.set("user-1", UserStatus(True, False, "student"), cache.generation)
+
+        access.StatusListener("postgresql://db")._on_notify(
+            None, 1, access.CHANNEL, "user-1"
+        )
+
+        assert cache.get("user-1") is None
+
+    @pytest.mark.unit
+    def test_racing_read_is_not_cached(self):
+        """Test a status read before an invalidation isn't stored after it"""
+        cache = UserStatusCache(max_entries=10, ttl_seconds=30)
+        generation = cache.generation
+
+        cache.invalidate("user-1")
+        cache.set("user-1", UserStatus(True, False, "admin"), generation)
+
+        assert cache.get("user-1") is None
@@ -0,0 +1,132 @@
+"""
+Unit tests for token verification
+Tests the decoded JWT cache: reuse until exp, revocation (also on user changes)
+and rejected tokens
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from src.utils import auth
+from src.utils.access import invalidate_user_status
+from src.utils.cache import TokenCache, bump_revocation_version, token_key
+
+SETTINGS = MagicMock(JWT_SECRET_KEY="test-secret", JWT_ALGORITHM="HS256")
+
+
+def make_token(exp_in: float = 60) -> str:
+    payload = {"id": "user-1", "role": "student", "exp": int(time.time() + exp_in)}
+    return jwt.encode(payload, SETTINGS.JWT_SECRET_KEY, algorithm="HS256")
+
+
+@pytest.fixture
+def decode_spy():
+    with patch("src.utils.auth.get_settings", return_value=SETTINGS), patch(
+        "src.utils.auth.jwt.decode", wraps=jwt.decode
+    ) as spy:
+        yield spy
+
+
+class TestTokenCache:
+    """Test suite for TokenCache and verify_token"""
+
+    @pytest.mark.unit
+    def test_token_is_decoded_once(self, decode_spy):
+        """Test repeated requests with one token reuse the decoded payload"""
+        token = make_token()
+
+        first = auth.verify_token(token)
+        second = auth.verify_token(token)
+
+        assert first == second
+        assert first["id"] == "user-1"
+        assert decode_spy.call_count == 1
+
+    @pytest.mark.unit
+    def test_revocation_version_bump_forces_decode(self, decode_spy):
+        """Test cached payloads are dropped when the revocation version moves"""
+        token = make_token()
+        auth.verify_token(token)
+
+        bump_revocation_version()
+        auth.verify_token(token)
+
+        assert decode_spy.call_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_user_change_forces_decode(self, decode_spy):
+        """Test blacklisting, deleting or updating a user re-decodes tokens"""
+        token = make_token()
+        auth.verify_token(token)
+
+        with patch(
+            "src.utils.access.get_settings", return_value=MagicMock(DATABASE_URL="")
+        ):
+            await invalidate_user_status("user-1")
+        auth.verify_token(token)
+
+        assert decode_spy.call_count == 2
+
+    @pytest.mark.unit
+    def test_invalid_token_is_not_cached(self, decode_spy):
+        """Test rejected tokens raise 401 every time"""
+        token = make_token() + "x"
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as error:
+                auth.verify_token(token)
+            assert error.value.status_code == 401
+
+        assert decode_spy.call_count == 2
+
+    @pytest.mark.unit
+    def test_entry_expires_with_token(self):
+        """Test an entry stops being served at the token's exp"""
+        cache = TokenCache(max_entries=2)
+        key = token_key("token")
+
+        cache.set(key, {"id": "user-1"}, time.time() - 1)
+
+        assert cache.get(key) is None
+        assert cache.misses == 1
+
+    @pytest.mark.unit
+    def test_evicts_least_recently_used(self):
+        """Test the cache holds at most max_entries tokens"""
+        cache = TokenCache(max_entries=1)
+        expires_at = time.time() + 60
+
+        cache.set(token_key("a"), {"id": "a"}, expires_at)
+        cache.set(token_key("b"), {"id": "b"}, expires_at)
+
+        assert cache.get(token_key("a")) is None
+        assert cache.get(token_key("b")) == {"id": "b"}
+
+    @pytest.mark.unit
+    def test_concurrent_stale_lookups_are_misses(self):
+        """Test threads racing on the same expired token never raise"""
+        cache = TokenCache(max_entries=4)
+        key = token_key("token")
+
+        def hammer():
+            for _ in range(2000):
+                cache.set(key, {"id": "user-1"}, time.time() - 1)
+                assert cache.get(key) is None
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                for future in [pool.submit(hammer) for _ in range(8)]:
+                    future.result()
+        finally:
+            sys.setswitchinterval(interval)
+
+        assert cache.misses == 8 * 2000
@@ -8,7 +8,7 @@ from uuid import UUID, uuid4
 
 import pytest
 
-from src.Brokers.bookBroker import BookBroker
+from src.Brokers.bookBroker import BOOK_LIST_COLUMNS, BookBroker
 
 
 class TestBookBroker:
@@ -39,6 +39,35 @@ class TestBookBroker:
         assert len(result) == 1
         mock_supabase_client.table.assert_called_once_with("books")
 
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_select_all_books_list_projection(self, broker, mock_supabase_client):
+        """Test that list reads use the list field set, without marc_data"""
+        mock_response = MagicMock()
+        mock_response.data = []
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+            await broker.SelectAllBooks(skip=0, limit=10)
+
+        mock_supabase_client.select.assert_called_once_with(BOOK_LIST_COLUMNS)
+        assert "marc_data" not in BOOK_LIST_COLUMNS
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_select_all_books_requested_fields(
+        self, broker, mock_supabase_client
+    ):
+        """Test that requested fields replace the default projection"""
+        mock_response = MagicMock()
+        mock_response.data = []
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+            await broker.SelectAllBooks(fields=["id", "title"])
+
+        mock_supabase_client.select.assert_called_once_with("id, title")
+
     @pytest.mark.unit
     @pytest.mark.asyncio
     async def test_select_all_books_empty(self, broker, mock_supabase_client):
@@ -0,0 +1,131 @@
+"""
+Unit tests for BookImportService
+Tests chunked CSV import, ISBN dedupe and copy creation with mocked brokers
+"""
+
+import io
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from src.Models.Books import ImportFormat, ImportRowStatus
+from src.Services.bookImportService import BookImportService, detect_import_format
+
+
+def csv_upload(text: str) -> io.BytesIO:
+    return io.BytesIO(text.encode("utf-8"))
+
+
+class TestBookImportService:
+    """Test suite for BookImportService"""
+
+    @pytest.fixture
+    def mock_book_broker(self):
+        broker = AsyncMock()
+        broker.SelectAllIsbns.return_value = ["978-0-00-000001-1"]
+
+        async def insert(rows):
+            return [{**row, "id": str(uuid4())} for row in rows]
+
+        broker.InsertBooksBulk.side_effect = insert
+        return broker
+
+    @pytest.fixture
+    def mock_copy_broker(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def service(self, mock_book_broker, mock_copy_broker):
+        return BookImportService(mock_book_broker, mock_copy_broker, chunk_size=2)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_import_csv_dedupes_and_chunks(
+        self, service, mock_book_broker, mock_copy_broker
+    ):
+        """Test duplicates are skipped and new books are inserted in chunks"""
+        upload = csv_upload(
+            "ISBN,Title,Author,Copies\n"
+            "9780000000011,Existing,Someone,\n"  # already in the catalog
+            "111,First,A,2\n"
+            "222,Second,B,\n"
+            "111,First again,A,\n"  # duplicate within the file
+            "333,,C,\n"  # missing title
+            "444,Fourth,D,\n"
+        )
+
+        report = await service.ImportBooks(upload, ImportFormat.CSV, copies=1)
+
+        statuses = [row.status for row in report.rows]
+        assert statuses == [
+            ImportRowStatus.DUPLICATE,
+            ImportRowStatus.CREATED,
+            ImportRowStatus.CREATED,
+            ImportRowStatus.DUPLICATE,
+            ImportRowStatus.ERROR,
+            ImportRowStatus.CREATED,
+        ]
+        assert (report.total, report.created, report.duplicates, report.errors) == (
+            6,
+            3,
+            2,
+            1,
+        )
+        # Three new books in chunks of two: two insert requests, one ISBN preload
+        assert mock_book_broker.InsertBooksBulk.await_count == 2
+        mock_book_broker.SelectAllIsbns.assert_awaited_once()
+        # Row "Copies" overrides the default of one copy per title
+        assert [row.copies_created for row in report.rows if row.book_id] == [2, 1, 1]
+        assert report.copies_created == 4
+        assert mock_copy_broker.InsertCopiesBulk.await_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_chunk_is_reported(self, service, mock_book_broker):
+        """Test a failed insert marks its rows as errors without aborting"""
+        mock_book_broker.InsertBooksBulk.side_effect = Exception("db down")
+
+        report = await service.ImportBooks(
+            csv_upload("isbn,title,author\n111,First,A\n"), ImportFormat.CSV
+        )
+
+        assert report.errors == 1
+        assert "db down" in report.rows[0].error
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_row_copies_are_capped(self, service, mock_copy_broker):
+        """Test a CSV row can't ask for more copies than the query parameter may"""
+        report = await service.ImportBooks(
+            csv_upload("isbn,title,author,copies\n111,First,A,100000\n"),
+            ImportFormat.CSV,
+        )
+
+        assert report.rows[0].status == ImportRowStatus.ERROR
+        assert "Invalid copies value" in report.rows[0].error
+        mock_copy_broker.InsertCopiesBulk.assert_not_awaited()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_marcxml_entities_are_refused(self, service, mock_book_broker):
+        """Test an upload declaring XML entities is reported, not expanded"""
+        upload = io.BytesIO(
+            b'<?xml version="1.0"?>'
+            b'<!DOCTYPE collection [<!ENTITY a "aaaaaaaaaa">]>'
+            b"<collection><record><leader>&a;</leader></record></collection>"
+        )
+
+        report = await service.ImportBooks(upload, ImportFormat.MARCXML)
+
+        assert report.errors == 1
+        assert "could not be parsed" in report.rows[0].error
+        mock_book_broker.InsertBooksBulk.assert_not_awaited()
+
+    @pytest.mark.unit
+    def test_detect_import_format(self):
+        """Test the format is inferred from the file extension"""
+        assert detect_import_format("legacy.MRC") == ImportFormat.MARC
+        assert detect_import_format("catalog.xml") == ImportFormat.MARCXML
+        with pytest.raises(ValueError):
+            detect_import_format("catalog.xlsx")
@@ -42,7 +42,9 @@ class TestBookService:
         assert len(result) == 1
         assert isinstance(result[0], BookResponse)
         assert result[0].title == sample_book_dict["title"]
-        mock_broker.SelectAllBooks.assert_called_once_with(skip=0, limit=10)
+        mock_broker.SelectAllBooks.assert_called_once_with(
+            skip=0, limit=10, fields=None
+        )
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -217,7 +219,7 @@ class TestBookService:
         assert len(result) == 1
         assert isinstance(result[0], BookResponse)
         assert result[0].title == sample_book_dict["title"]
-        mock_broker.SearchBooks.assert_called_once_with(query)
+        mock_broker.SearchBooks.assert_called_once_with(query, fields=None)
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -232,7 +234,7 @@ class TestBookService:
 
         # Assert
         assert result == []
-        mock_broker.SearchBooks.assert_called_once_with(query)
+        mock_broker.SearchBooks.assert_called_once_with(query, fields=None)
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -259,4 +261,6 @@ class TestBookService:
         assert len(result) == 1
         assert result[0].copy_stats.total == 10
         assert result[0].copy_stats.available == 7
-        mock_broker.SelectAllBooksWithStats.assert_called_once_with(skip=0, limit=50)
+        mock_broker.SelectAllBooksWithStats.assert_called_once_with(
+            skip=0, limit=50, fields=None
+        )
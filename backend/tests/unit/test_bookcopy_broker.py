@@ -146,3 +146,85 @@ class TestBookCopyBroker:
 
         # Method returns dict, not int
         assert isinstance(result, dict)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_select_copies_by_accession_numbers(
+        self, broker, mock_supabase_client, sample_copy_dict, sample_book_dict
+    ):
+        """Test batch barcode lookup uses one in_() query and fills the cache"""
+        from src.utils.cache import get_accession_cache
+
+        mock_supabase_client.in_ = MagicMock(return_value=mock_supabase_client)
+        mock_response = MagicMock()
+        mock_response.data = [
+            {**sample_copy_dict, "books": sample_book_dict, "loans": []}
+        ]
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f, *args: f(*args)):
+            result = await broker.SelectCopiesByAccessionNumbers([1001, 1002])
+
+        assert result[0]["book"] == sample_book_dict
+        assert result[0]["current_loan"] is None
+        mock_supabase_client.in_.assert_any_call("accession_number", [1001, 1002])
+        assert (
+            get_accession_cache().get(sample_copy_dict["accession_number"])
+            == sample_copy_dict["id"]
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_cached_barcodes_looked_up_by_copy_id(
+        self, broker, mock_supabase_client, sample_copy_dict, sample_book_dict
+    ):
+        """Test cache hits are fetched by id, misses by barcode, deletes invalidate"""
+        from src.utils.cache import get_accession_cache
+
+        accession_number = sample_copy_dict["accession_number"]
+        get_accession_cache().set(accession_number, sample_copy_dict["id"])
+        mock_supabase_client.in_ = MagicMock(return_value=mock_supabase_client)
+        mock_supabase_client.or_ = MagicMock(return_value=mock_supabase_client)
+        mock_response = MagicMock()
+        mock_response.data = [
+            {**sample_copy_dict, "books": sample_book_dict, "loans": []}
+        ]
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f, *args: f(*args)):
+            result = await broker.SelectCopiesByAccessionNumbers(
+                [accession_number, 99999]
+            )
+            await broker.DeleteCopy(sample_copy_dict["id"])
+
+        assert [copy["id"] for copy in result] == [sample_copy_dict["id"]]
+        mock_supabase_client.or_.assert_called_once_with(
+            f"id.in.({sample_copy_dict['id']}),accession_number.in.(99999)"
+        )
+        assert get_accession_cache().get(accession_number) is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stale_cached_copy_id_looked_up_again(
+        self, broker, mock_supabase_client, sample_copy_dict, sample_book_dict
+    ):
+        """Test a cached id that no longer resolves falls back to the barcode"""
+        from src.utils.cache import get_accession_cache
+
+        accession_number = sample_copy_dict["accession_number"]
+        get_accession_cache().set(accession_number, "deleted-copy")
+        mock_supabase_client.in_ = MagicMock(return_value=mock_supabase_client)
+        mock_supabase_client.execute.side_effect = [
+            MagicMock(data=[]),
+            MagicMock(
+                data=[{**sample_copy_dict, "books": sample_book_dict, "loans": []}]
+            ),
+        ]
+
+        with patch("asyncio.to_thread", side_effect=lambda f, *args: f(*args)):
+            result = await broker.SelectCopiesByAccessionNumbers([accession_number])
+
+        assert result[0]["id"] == sample_copy_dict["id"]
+        mock_supabase_client.in_.assert_any_call("id", ["deleted-copy"])
+        mock_supabase_client.in_.assert_any_call("accession_number", [accession_number])
+        assert get_accession_cache().get(accession_number) == sample_copy_dict["id"]
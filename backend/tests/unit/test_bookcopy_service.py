@@ -7,9 +7,20 @@ from unittest.mock import AsyncMock
 from uuid import UUID, uuid4
 
 import pytest
-
-from src.Models.Books import BookCopyCreate, BookCopyResponse, BookCopyUpdate
-from src.Services.bookCopyService import BookCopyService
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+from src.main import app
+from src.Models.Books import (
+    AcquisitionItem,
+    BookCopyCreate,
+    BookCopyResponse,
+    BookCopyUpdate,
+)
+from src.Services.bookCopyService import BookCopyService, accession_ranges
+from src.utils.auth import require_admin
+from src.utils.dependencies import get_book_copy_service
+from src.utils.resilience import DatabaseUnavailableError
 
 
 class TestBookCopyService:
@@ -37,7 +48,9 @@ class TestBookCopyService:
 
         assert len(result) == 1
         assert isinstance(result[0], BookCopyResponse)
-        mock_broker.SelectAllCopies.assert_called_once_with(skip=0, limit=50)
+        mock_broker.SelectAllCopies.assert_called_once_with(
+            skip=0, limit=50, fields=None
+        )
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -133,3 +146,164 @@ class TestBookCopyService:
         result = await service.RetrieveCopyStats(book_id)
 
         assert result == stats
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_resolve_accession_numbers_keeps_scan_order(
+        self, service, mock_broker, sample_copy_dict, sample_book_dict, sample_loan_dict
+    ):
+        """Test batch resolution returns one entry per scan, including misses"""
+        accession_number = sample_copy_dict["accession_number"]
+        mock_broker.SelectCopiesByAccessionNumbers.return_value = [
+            {
+                **sample_copy_dict,
+                "book": sample_book_dict,
+                "current_loan": sample_loan_dict,
+            }
+        ]
+
+        result = await service.ResolveAccessionNumbers([99999, accession_number, 99999])
+
+        assert [entry.found for entry in result] == [False, True, False]
+        assert result[1].book_copy.id == UUID(sample_copy_dict["id"])
+        assert result[1].book.title == sample_book_dict["title"]
+        assert result[1].current_loan.id == UUID(sample_loan_dict["id"])
+        mock_broker.SelectCopiesByAccessionNumbers.assert_called_once_with(
+            [99999, accession_number]
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_acquire_copies_inserts_in_chunks_and_reports_ranges(
+        self, mock_broker
+    ):
+        """Test multi-title acquisition chunks inserts and returns accession ranges"""
+        service = BookCopyService(mock_broker, chunk_size=3)
+        first, second = uuid4(), uuid4()
+        next_number = iter(range(20001, 20100))
+
+        async def insert(rows, columns=None):
+            return [
+                {"book_id": row["book_id"], "accession_number": next(next_number)}
+                for row in rows
+            ]
+
+        mock_broker.InsertCopiesBulk.side_effect = insert
+        mock_broker.SelectExistingBookIds.return_value = {str(first), str(second)}
+
+        events = [
+            event
+            async for event in await service.AcquireCopies(
+                [
+                    AcquisitionItem(book_id=first, quantity=4),
+                    AcquisitionItem(book_id=second, quantity=2),
+                ]
+            )
+        ]
+
+        assert [
+            len(call.args[0]) for call in mock_broker.InsertCopiesBulk.call_args_list
+        ] == [3, 3]
+        assert mock_broker.InsertCopiesBulk.call_args.kwargs["columns"] == (
+            "book_id, accession_number"
+        )
+        assert [event.inserted for event in events[:-1]] == [3, 6]
+        report = events[-1]
+        assert report.total == 6 and report.inserted == 6 and report.error is None
+        assert report.titles[0].created == 4
+        assert report.titles[0].accession_ranges[0].model_dump() == {
+            "first": 20001,
+            "last": 20004,
+        }
+        assert report.titles[1].accession_ranges[0].first == 20005
+        assert report.titles[0].copies is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_copies_for_titles_stops_on_failed_chunk(self, mock_broker):
+        """Test a rejected chunk is reported without the database's message"""
+        service = BookCopyService(mock_broker, chunk_size=2)
+        book_id = uuid4()
+        mock_broker.SelectExistingBookIds.return_value = {str(book_id)}
+        mock_broker.InsertCopiesBulk.side_effect = [
+            [
+                {"book_id": str(book_id), "accession_number": 30001},
+                {"book_id": str(book_id), "accession_number": 30002},
+            ],
+            APIError({"code": "23505", "message": "duplicate key value"}),
+        ]
+
+        report = await service.AddCopiesForTitles(
+            [AcquisitionItem(book_id=book_id, quantity=5)]
+        )
+
+        assert report.inserted == 2
+        assert report.error == "Insert failed after 2 copies"
+        assert mock_broker.InsertCopiesBulk.await_count == 2
+
+    @pytest.mark.unit
+    def test_failed_acquisition_is_not_created(self, mock_broker):
+        """Test the non-streaming route answers 500 with the partial report"""
+        service = BookCopyService(mock_broker, chunk_size=1)
+        book_id = uuid4()
+        mock_broker.SelectExistingBookIds.return_value = {str(book_id)}
+        mock_broker.InsertCopiesBulk.side_effect = [
+            [{"book_id": str(book_id), "accession_number": 30001}],
+            APIError({"code": "23505", "message": "duplicate key value"}),
+        ]
+        app.dependency_overrides[get_book_copy_service] = lambda: service
+        app.dependency_overrides[require_admin] = lambda: {"id": str(uuid4())}
+        try:
+            response = TestClient(app).post(
+                "/book-copies/bulk/acquisition",
+                json={"items": [{"book_id": str(book_id), "quantity": 2}]},
+            )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 500
+        assert response.json()["inserted"] == 1
+        assert "duplicate" not in response.text
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_acquisition_outage_propagates(self, mock_broker):
+        """Test a 503 from the resilience layer isn't turned into a report"""
+        service = BookCopyService(mock_broker, chunk_size=2)
+        book_id = uuid4()
+        mock_broker.SelectExistingBookIds.return_value = {str(book_id)}
+        mock_broker.InsertCopiesBulk.side_effect = DatabaseUnavailableError("error")
+
+        with pytest.raises(DatabaseUnavailableError):
+            await service.AddCopiesForTitles(
+                [AcquisitionItem(book_id=book_id, quantity=5)]
+            )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_acquisition_rejects_unknown_books(self, mock_broker):
+        """Test unknown book ids fail validation before any insert"""
+        service = BookCopyService(mock_broker)
+        known, unknown = uuid4(), uuid4()
+        mock_broker.SelectExistingBookIds.return_value = {str(known)}
+
+        with pytest.raises(ValueError, match=str(unknown)):
+            await service.AcquireCopies(
+                [
+                    AcquisitionItem(book_id=known, quantity=1),
+                    AcquisitionItem(book_id=unknown, quantity=1),
+                ]
+            )
+
+        mock_broker.InsertCopiesBulk.assert_not_called()
+
+    @pytest.mark.unit
+    def test_accession_ranges_split_on_gaps(self):
+        """Test interleaved accession numbers are reported as several ranges"""
+        ranges = accession_ranges([10005, 10001, 10002, 10003, 10007])
+
+        assert [(r.first, r.last) for r in ranges] == [
+            (10001, 10003),
+            (10005, 10005),
+            (10007, 10007),
+        ]
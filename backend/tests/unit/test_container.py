@@ -0,0 +1,98 @@
+"""
+Unit tests for the app-scoped broker and service container
+Tests instances are built once per client, shared between services, visible
+to build hooks, and replaced in services when a broker getter is overridden
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.Services.bookService import BookService
+from src.utils.container import Container
+from src.utils.dependencies import (
+    get_book_broker,
+    get_book_service,
+    get_container,
+    get_course_broker,
+    get_db_client,
+    get_loan_broker,
+    get_loan_service,
+    reset_container,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_container():
+    reset_container()
+    yield
+    reset_container()
+
+
+class TestContainer:
+    """Test suite for Container and the dependency getters built on it"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_services_are_built_once_per_client(self, mock_supabase_client):
+        """Test repeated requests get the same service and broker objects"""
+        container = await get_container(mock_supabase_client)
+        brokers = {
+            name: container.get(name)
+            for name in ("loan_broker", "user_broker", "book_copy_broker")
+        }
+        brokers["course_broker"] = await get_course_broker(container)
+
+        first = await get_loan_service(container, **brokers)
+        second = await get_loan_service(
+            await get_container(mock_supabase_client), **brokers
+        )
+
+        assert first is second
+        assert first.loan_broker is await get_loan_broker(container)
+
+    @pytest.mark.unit
+    def test_overridden_broker_reaches_services(self, mock_supabase_client):
+        """Test overriding a broker getter also changes the services using it"""
+        app = FastAPI()
+        broker = MagicMock()
+
+        @app.get("/shelf")
+        async def shelf(service: BookService = Depends(get_book_service)):
+            return {"overridden": service.broker is broker}
+
+        app.dependency_overrides[get_db_client] = lambda: mock_supabase_client
+        app.dependency_overrides[get_book_broker] = lambda: broker
+        overridden = TestClient(app).get("/shelf").json()
+        del app.dependency_overrides[get_book_broker]
+        default = TestClient(app).get("/shelf").json()
+
+        assert overridden == {"overridden": True}
+        assert default == {"overridden": False}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_new_client_gets_new_container(self, mock_supabase_client):
+        """Test overriding the client (as tests do) rebuilds instead of reusing"""
+        original = await get_container(mock_supabase_client)
+        replaced = await get_container(MagicMock())
+
+        assert replaced is not original
+        assert replaced.get("book_broker").client is not mock_supabase_client
+
+    @pytest.mark.unit
+    def test_build_hooks_see_existing_and_new_instances(self):
+        """Test on_build reaches instances built before and after registering"""
+        container = Container(
+            "client", {"a": lambda c: ["a"], "b": lambda c: ["b", c.get("a")]}
+        )
+        container.get("a")
+        seen = []
+
+        container.on_build(lambda name, instance: seen.append(name))
+        container.build_all()
+
+        assert seen == ["a", "b"]
+        assert container.get("b")[1] is container.get("a")
@@ -46,7 +46,9 @@ class TestCourseService:
 
         assert len(result) == 1
         assert isinstance(result[0], CourseResponse)
-        mock_broker.SelectAllCourses.assert_called_once_with(skip=0, limit=50)
+        mock_broker.SelectAllCourses.assert_called_once_with(
+            skip=0, limit=50, fields=None
+        )
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -0,0 +1,156 @@
+"""
+Unit tests for the workload executors
+Tests queue limits and timeouts, routing of tagged brokers and services to
+their pools, and context propagation into worker threads
+"""
+
+import asyncio
+import threading
+from contextvars import ContextVar
+
+import pytest
+
+from src.utils.executors import (
+    AUTH,
+    CATALOG,
+    REPORTS,
+    BoundedExecutor,
+    PoolBusyError,
+    current_pool,
+    shutdown_executors,
+    to_thread,
+    workload,
+)
+from src.utils.metrics import EXECUTOR_REJECTIONS
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="")
+
+
+@pytest.fixture(autouse=True)
+def fresh_executors():
+    shutdown_executors()
+    yield
+    shutdown_executors()
+
+
+@workload(CATALOG)
+class _Broker:
+    async def Select(self):
+        return current_pool(), await to_thread(threading.current_thread)
+
+    async def Pages(self):
+        for _ in range(2):
+            yield current_pool()
+
+
+@workload(REPORTS)
+class _ReportService:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def Report(self):
+        return await self.broker.Select()
+
+    @workload(AUTH)
+    async def Login(self):
+        return current_pool()
+
+
+class TestBoundedExecutor:
+    """Test suite for slot limits, queueing and rejections"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected(self):
+        """Test calls beyond workers + queue fail fast with a 503"""
+        executor = BoundedExecutor("test", max_workers=1, max_queue=1, queue_timeout=5)
+        before = EXECUTOR_REJECTIONS.value("test", "queue_full")
+        release = asyncio.Event()
+
+        async def hold():
+            async with executor.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+
+        with pytest.raises(PoolBusyError) as error:
+            async with executor.slot():
+                pass
+        assert executor.queued == 1
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "1"
+        assert EXECUTOR_REJECTIONS.value("test", "queue_full") == before + 1
+        assert (executor.active, executor.queued) == (0, 0)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Test a call waiting longer than the timeout gives up"""
+        executor = BoundedExecutor(
+            "test", max_workers=1, max_queue=4, queue_timeout=0.05
+        )
+
+        async with executor.slot():
+            with pytest.raises(PoolBusyError) as error:
+                await executor.run(lambda: None)
+
+        assert error.value.reason == "timeout"
+        assert await executor.run(lambda: "free again") == "free again"
+        executor.shutdown()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_run_copies_context(self):
+        """Test contextvars (query stats, traces) reach the worker thread"""
+        executor = BoundedExecutor("test", max_workers=2, max_queue=2, queue_timeout=1)
+        _request_id.set("abc")
+
+        assert await executor.run(_request_id.get) == "abc"
+        executor.shutdown()
+
+
+class TestWorkloadRouting:
+    """Test suite for @workload tagging"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_broker_runs_on_its_pool(self):
+        """Test a tagged broker's blocking calls use its pool's threads"""
+        pool, thread = await _Broker().Select()
+
+        assert pool == CATALOG
+        assert thread.name.startswith("catalog-pool")
+        assert current_pool() is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_outermost_tag_wins(self):
+        """Test a broker called by a report service runs on the reports pool"""
+        service = _ReportService(_Broker())
+
+        pool, thread = await service.Report()
+
+        assert pool == REPORTS
+        assert thread.name.startswith("reports-pool")
+        assert await service.Login() == AUTH
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_async_generators_are_routed_per_step(self):
+        """Test streaming methods are routed without leaking into the consumer"""
+        seen = []
+        async for pool in _Broker().Pages():
+            seen.append((pool, current_pool()))
+
+        assert seen == [(CATALOG, None), (CATALOG, None)]
+
+    @pytest.mark.unit
+    def test_unknown_pool_is_rejected(self):
+        """Test typos in pool names fail at import time"""
+        with pytest.raises(ValueError):
+            workload("circulaton")
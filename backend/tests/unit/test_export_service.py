@@ -0,0 +1,97 @@
+"""
+Unit tests for ExportService
+Tests keyset paging and NDJSON/CSV encoding with mocked brokers
+"""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.Models.Exports import ExportFormat, ExportResource
+from src.Services.exportService import ExportService
+
+
+async def collect(chunks) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+
+class TestExportService:
+    """Test suite for ExportService"""
+
+    @pytest.fixture
+    def mock_book_broker(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_loan_broker(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def service(self, mock_book_broker, mock_loan_broker):
+        """Create ExportService with a small page size"""
+        return ExportService(
+            mock_book_broker, AsyncMock(), AsyncMock(), mock_loan_broker, page_size=2
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_pages_until_short_page(self, service, mock_book_broker):
+        """Test paging passes the last id on and stops after a short page"""
+        mock_book_broker.SelectBooksPage.side_effect = [
+            [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}],
+            [{"id": "c", "title": "C"}],
+        ]
+
+        body = await collect(
+            service.ExportRows(ExportResource.BOOKS, ExportFormat.NDJSON)
+        )
+
+        assert [json.loads(line)["id"] for line in body.splitlines()] == [
+            "a",
+            "b",
+            "c",
+        ]
+        calls = mock_book_broker.SelectBooksPage.await_args_list
+        assert calls[0].kwargs == {"after_id": None, "limit": 2}
+        assert calls[1].kwargs == {"after_id": "b", "limit": 2}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_csv_export_with_loan_filters(
+        self, service, mock_loan_broker, sample_loan_dict
+    ):
+        """Test CSV has a header row and loan filters reach the broker"""
+        mock_loan_broker.SelectLoansPage.return_value = [sample_loan_dict]
+
+        body = await collect(
+            service.ExportRows(
+                ExportResource.LOANS, ExportFormat.CSV, status="returned"
+            )
+        )
+
+        lines = body.splitlines()
+        assert lines[0].startswith("id,user_id,copy_id,status")
+        assert lines[1].startswith(sample_loan_dict["id"])
+        assert len(lines) == 2
+        assert mock_loan_broker.SelectLoansPage.await_args.kwargs["status"] == (
+            "returned"
+        )
+
+    @pytest.mark.unit
+    def test_filters_rejected_for_other_tables(self, service):
+        """Test loan filters are rejected before streaming starts"""
+        with pytest.raises(ValueError, match="only supported for loan exports"):
+            service.ExportRows(
+                ExportResource.BOOKS, ExportFormat.CSV, status="returned"
+            )
+
+    @pytest.mark.unit
+    def test_malformed_date_rejected(self, service, mock_loan_broker):
+        """Test a bad date is a ValueError (400) before the stream starts"""
+        with pytest.raises(ValueError, match="from_date must be a date"):
+            service.ExportRows(
+                ExportResource.LOANS, ExportFormat.NDJSON, from_date="2026-13-01"
+            )
+
+        mock_loan_broker.SelectLoansPage.assert_not_called()
@@ -0,0 +1,144 @@
+"""
+Unit tests for worker startup and shutdown
+Tests readiness reporting, cache preloading, background jobs, the dashboard
+rollup, request draining and aborting on a failed startup
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app, lifespan
+from src.Services.statsService import StatsService
+from src.utils.cache import BOOKS, get_catalog_versions, get_response_cache
+from src.utils.container import Container
+from src.utils.lifecycle import PeriodicJob, preload_caches, reset_lifecycle
+from src.utils.metrics import JOB_RUNS, REQUESTS_IN_FLIGHT
+
+
+@pytest.fixture
+def lifecycle():
+    yield reset_lifecycle()
+    reset_lifecycle()
+
+
+@pytest.fixture
+def settings():
+    return MagicMock(
+        OVERDUE_JOB_INTERVAL_SECONDS=3600.0,
+        STATS_ROLLUP_INTERVAL_SECONDS=0.0,
+        SHUTDOWN_DRAIN_TIMEOUT_SECONDS=1.0,
+        METRICS_SNAPSHOT_PATH="",
+        DATABASE_URL="",
+    )
+
+
+@pytest.fixture
+def container():
+    services = {
+        name: MagicMock() for name in ("loan_service", "course_service", "book_service")
+    }
+    services["loan_service"].get_all_loan_policies = AsyncMock(return_value=[])
+    services["loan_service"].mark_overdue_loans = AsyncMock(return_value=[])
+    services["course_service"].RetrieveAllCourses = AsyncMock(return_value=[])
+    services["book_service"].RetrieveAllBooks = AsyncMock(return_value=[])
+    services["book_service"].RetrieveBooksWithStats = AsyncMock(
+        side_effect=RuntimeError("timeout")
+    )
+    return Container(
+        MagicMock(), {name: (lambda c, s=s: s) for name, s in services.items()}
+    )
+
+
+class TestLifecycle:
+    """Test suite for Lifecycle and the probe endpoints"""
+
+    @pytest.mark.unit
+    def test_readyz_follows_startup_and_draining(self, lifecycle):
+        """Test /readyz is 503 until the pool is warm and again while draining"""
+        client = TestClient(app)
+
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").status_code == 503
+        lifecycle.pool_ready = True
+        assert client.get("/readyz").json()["status"] == "ready"
+        lifecycle.draining = True
+        assert client.get("/readyz").status_code == 503
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_preload_fills_response_cache(self, container):
+        """Test hot reads are cached under the plain path key and failures kept"""
+        loaded = await preload_caches(container)
+
+        assert loaded["/books/"] is True
+        assert loaded["/books/with-stats"] is False
+        entry = get_response_cache().get("/books/?", get_catalog_versions([BOOKS]))
+        assert entry is not None and entry.body == b"[]"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_startup_and_shutdown(self, lifecycle, container, settings):
+        """Test startup starts the enabled jobs and shutdown waits for requests"""
+        with patch("src.utils.lifecycle.warm_hashing", AsyncMock()) as warm_hashing:
+            await lifecycle.startup(container, settings)
+        await asyncio.sleep(0)
+        assert lifecycle.ready
+        warm_hashing.assert_awaited_once()
+        assert [job.name for job in lifecycle.jobs] == ["mark_overdue_loans"]
+        container.get("loan_service").mark_overdue_loans.assert_awaited_once()
+
+        REQUESTS_IN_FLIGHT.inc()
+        asyncio.get_running_loop().call_later(0.1, REQUESTS_IN_FLIGHT.dec)
+        await lifecycle.shutdown(settings)
+
+        assert REQUESTS_IN_FLIGHT.value() == 0
+        assert lifecycle.status()["draining"] is True
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_startup_aborts_the_worker(self, lifecycle):
+        """Test the lifespan re-raises a startup failure after cleaning up"""
+        lifecycle.startup = AsyncMock(side_effect=ConnectionRefusedError())
+
+        with patch("src.main.get_db_client", AsyncMock()), patch(
+            "src.main.close_database", AsyncMock()
+        ) as close_database, pytest.raises(ConnectionRefusedError):
+            async with lifespan(app):
+                pass
+
+        close_database.assert_awaited_once()
+
+
+class TestBackgroundJobs:
+    """Test suite for PeriodicJob and the dashboard rollup"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_run_is_counted(self):
+        """Test a raising job is logged and counted instead of stopping"""
+        before = JOB_RUNS.value("flaky", "error")
+        job = PeriodicJob("flaky", 60, AsyncMock(side_effect=RuntimeError("down")))
+
+        assert await job.run_once() is False
+        assert JOB_RUNS.value("flaky", "error") == before + 1
+        assert job.last_success is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_dashboard_serves_fresh_rollup(self):
+        """Test the dashboard reuses the rollup until it is too old"""
+        broker = AsyncMock()
+        broker.get_total_books.return_value = 5
+        service = StatsService(broker, rollup_max_age=60)
+
+        await service.refresh_dashboard_stats()
+        broker.get_total_books.return_value = 6
+        cached = await service.get_dashboard_stats()
+        service.rollup_max_age = 0
+        fresh = await service.get_dashboard_stats()
+
+        assert cached["books"]["total_books"] == 5
+        assert fresh["books"]["total_books"] == 6
@@ -152,3 +152,47 @@ class TestLoanBroker:
 
         # Just check that it doesn't raise an error
         assert result is not None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_select_loans_page_keyset_with_filters(
+        self, broker, mock_supabase_client, sample_loan_dict
+    ):
+        """Test export paging continues after the last id and applies filters"""
+        mock_supabase_client.gt = MagicMock(return_value=mock_supabase_client)
+        mock_supabase_client.order = MagicMock(return_value=mock_supabase_client)
+        mock_supabase_client.limit = MagicMock(return_value=mock_supabase_client)
+        mock_response = MagicMock()
+        mock_response.data = [sample_loan_dict]
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+            result = await broker.SelectLoansPage(
+                after_id="last-id", limit=500, status="returned"
+            )
+
+        assert result == [sample_loan_dict]
+        mock_supabase_client.eq.assert_called_once_with("status", "returned")
+        mock_supabase_client.gt.assert_called_once_with("id", "last-id")
+        mock_supabase_client.order.assert_called_once_with("id")
+        mock_supabase_client.limit.assert_called_once_with(500)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_desk_return_copies_calls_rpc(self, broker, mock_supabase_client):
+        """Test desk returns are sent as one RPC with the whole batch"""
+        mock_supabase_client.rpc = MagicMock(return_value=mock_supabase_client)
+        mock_response = MagicMock()
+        mock_response.data = [
+            {"accession_number": 1001, "outcome": "returned", "was_overdue": True}
+        ]
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+            result = await broker.DeskReturnCopies([1001, 1002], True)
+
+        assert result == mock_response.data
+        mock_supabase_client.rpc.assert_called_once_with(
+            "desk_return_copies",
+            {"accession_numbers": [1001, 1002], "increment_infractions": True},
+        )
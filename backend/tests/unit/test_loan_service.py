@@ -8,7 +8,7 @@ from uuid import uuid4
 
 import pytest
 
-from src.Models.Loans import LoanResponse, LoanStatus
+from src.Models.Loans import DeskAction, DeskOutcome, LoanResponse, LoanStatus
 from src.Services.loanService import LoanService
 
 
@@ -56,7 +56,9 @@ class TestLoanService:
 
         assert len(result) == 1
         assert isinstance(result[0], LoanResponse)
-        mock_loan_broker.SelectAllLoans.assert_called_once_with(skip=0, limit=50)
+        mock_loan_broker.SelectAllLoans.assert_called_once_with(
+            skip=0, limit=50, fields=None
+        )
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -240,3 +242,78 @@ class TestLoanService:
 
         assert result is not None
         assert isinstance(result, LoanResponse)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_process_desk_batch_return(self, service, mock_loan_broker):
+        """Test desk returns keep scan order, dedupe scans and count skips"""
+        loan_id, user_id = str(uuid4()), str(uuid4())
+        mock_loan_broker.DeskReturnCopies.return_value = [
+            {
+                "accession_number": 1002,
+                "outcome": "no_open_loan",
+                "loan_id": None,
+                "user_id": None,
+                "was_overdue": False,
+            },
+            {
+                "accession_number": 1001,
+                "outcome": "returned",
+                "loan_id": loan_id,
+                "user_id": user_id,
+                "was_overdue": True,
+            },
+        ]
+
+        result = await service.process_desk_batch(
+            DeskAction.RETURN, [1001, 1002, 1001, 1003], increment_infractions=True
+        )
+
+        mock_loan_broker.DeskReturnCopies.assert_called_once_with(
+            [1001, 1002, 1003], True
+        )
+        assert [item.accession_number for item in result.items] == [1001, 1002, 1003]
+        assert result.items[0].outcome == DeskOutcome.RETURNED
+        assert result.items[0].was_overdue is True
+        assert result.items[2].outcome == DeskOutcome.NOT_FOUND
+        assert result.processed == 1
+        assert result.skipped == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_process_desk_batch_checkout(self, service, mock_loan_broker):
+        """Test desk checkouts go through the checkout RPC"""
+        mock_loan_broker.DeskCheckoutCopies.return_value = [
+            {
+                "accession_number": 1001,
+                "outcome": "checked_out",
+                "loan_id": str(uuid4()),
+                "user_id": str(uuid4()),
+                "was_overdue": False,
+            }
+        ]
+
+        result = await service.process_desk_batch(DeskAction.CHECKOUT, [1001])
+
+        mock_loan_broker.DeskCheckoutCopies.assert_called_once_with([1001])
+        mock_loan_broker.DeskReturnCopies.assert_not_called()
+        assert result.processed == 1
+        assert result.skipped == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_mark_overdue_loans(
+        self, service, mock_loan_broker, sample_loan_dict
+    ):
+        """Test active loans past their due date are switched to overdue"""
+        mock_loan_broker.SelectOverdueLoans.return_value = [sample_loan_dict]
+        mock_loan_broker.UpdateLoan.return_value = {
+            **sample_loan_dict,
+            "status": "overdue",
+        }
+
+        result = await service.mark_overdue_loans()
+
+        assert [loan.status for loan in result] == [LoanStatus.OVERDUE]
+        update_data = mock_loan_broker.UpdateLoan.call_args[0][1]
+        assert update_data == {"status": "overdue"}
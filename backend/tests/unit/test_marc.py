@@ -0,0 +1,96 @@
+"""
+Unit tests for the MARC readers
+Tests ISO 2709 and MARCXML parsing and the MARC -> book mapping
+"""
+
+import io
+
+import pytest
+
+from src.utils.marc import MarcError, iter_iso2709, iter_marcxml, marc_to_book
+
+
+def build_iso2709(fields: list[tuple[str, str]]) -> bytes:
+    """Encode (tag, data) pairs as one ISO 2709 record"""
+    directory = b""
+    data = b""
+    for tag, value in fields:
+        encoded = value.encode("utf-8") + b"\x1e"
+        directory += f"{tag}{len(encoded):04d}{len(data):05d}".encode()
+        data += encoded
+    directory += b"\x1e"
+    base_address = 24 + len(directory)
+    length = base_address + len(data) + 1
+    leader = f"{length:05d}nam a22{base_address:05d}   4500".encode()
+    return leader + directory + data + b"\x1d"
+
+
+SAMPLE_FIELDS = [
+    ("001", "LEGACY-42"),
+    ("008", "990101s1999    xxu           000 0 eng d"),
+    ("020", "  \x1fa0306406152 (pbk.)"),
+    ("100", "1 \x1faKnuth, Donald E."),
+    ("245", "14\x1faThe art of programming :\x1fbfundamentals /"),
+    ("260", "  \x1faReading :\x1fbAddison-Wesley,\x1fc1997."),
+    ("050", "00\x1faQA76.6\x1fb.K64"),
+]
+
+
+class TestMarc:
+    """Test suite for MARC parsing"""
+
+    @pytest.mark.unit
+    def test_iso2709_record_maps_to_book(self):
+        """Test a binary record is decoded and mapped onto book columns"""
+        stream = io.BytesIO(build_iso2709(SAMPLE_FIELDS) * 2)
+
+        records = list(iter_iso2709(stream))
+        book = marc_to_book(records[0])
+
+        assert len(records) == 2
+        assert book["isbn"] == "0306406152"
+        assert book["title"] == "The art of programming fundamentals"
+        assert book["author"] == "Knuth, Donald E."
+        assert book["publisher"] == "Addison-Wesley"
+        assert book["publication_year"] == 1997
+        assert book["call_number"] == "QA76.6 .K64"
+        assert book["book_number"] == "LEGACY-42"
+        assert book["marc_data"]["fields"][0] == {"001": "LEGACY-42"}
+
+    @pytest.mark.unit
+    def test_iso2709_bad_record_is_reported(self):
+        """Test a corrupt record is yielded as an error and reading continues"""
+        stream = io.BytesIO(b"abcde junk\x1d" + build_iso2709(SAMPLE_FIELDS))
+
+        records = list(iter_iso2709(stream))
+
+        assert isinstance(records[0], MarcError)
+        assert marc_to_book(records[1])["isbn"] == "0306406152"
+
+    @pytest.mark.unit
+    def test_marcxml_collection(self):
+        """Test records are read from a MARCXML collection"""
+        xml = b"""<?xml version="1.0"?>
+        <collection xmlns="http://www.loc.gov/MARC21/slim">
+          <record>
+            <leader>00000nam a2200000 a 4500</leader>
+            <controlfield tag="008">990101s2005    xxu</controlfield>
+            <datafield tag="020" ind1=" " ind2=" ">
+              <subfield code="a">9780131103627</subfield>
+            </datafield>
+            <datafield tag="245" ind1="1" ind2="0">
+              <subfield code="a">The C programming language.</subfield>
+            </datafield>
+            <datafield tag="100" ind1="1" ind2=" ">
+              <subfield code="a">Kernighan, Brian W.</subfield>
+            </datafield>
+          </record>
+        </collection>"""
+
+        books = [marc_to_book(record) for record in iter_marcxml(io.BytesIO(xml))]
+
+        assert len(books) == 1
+        assert books[0]["isbn"] == "9780131103627"
+        assert books[0]["title"] == "The C programming language"
+        assert books[0]["author"] == "Kernighan, Brian W."
+        assert books[0]["publication_year"] == 2005
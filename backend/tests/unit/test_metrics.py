@@ -0,0 +1,109 @@
+"""
+Unit tests for the metrics subsystem
+Tests histogram rendering, broker instrumentation and the /metrics endpoint
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils.metrics import (
+    BROKER_ERRORS,
+    BROKER_LATENCY,
+    Histogram,
+    instrument_broker,
+    render_metrics,
+)
+
+
+@instrument_broker
+class _FakeBroker:
+    async def SelectThing(self, value):
+        return value
+
+    async def FailThing(self):
+        raise ValueError("boom")
+
+    async def _private(self):
+        return None
+
+
+class TestHistogram:
+    """Test suite for Histogram"""
+
+    @pytest.mark.unit
+    def test_buckets_are_cumulative(self):
+        """Test bucket counts accumulate and +Inf equals the total count"""
+        histogram = Histogram(
+            "test_seconds", "test", labels=("route",), buckets=(0.1, 1.0)
+        )
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        lines = histogram.render()
+
+        assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'test_seconds_count{route="/a"} 3' in lines
+
+    @pytest.mark.unit
+    def test_label_values_are_escaped(self):
+        """Test quotes in label values don't break the exposition format"""
+        histogram = Histogram("test_seconds", "test", labels=("route",), buckets=(1.0,))
+        histogram.observe(0.5, 'say "hi"')
+
+        assert 'test_seconds_count{route="say \\"hi\\""} 1' in histogram.render()
+
+
+class TestInstrumentBroker:
+    """Test suite for the broker class decorator"""
+
+    @pytest.mark.unit
+    async def test_records_latency_per_method(self):
+        """Test public async methods are timed and still return their result"""
+        before = BROKER_LATENCY.count("_FakeBroker", "SelectThing")
+
+        result = await _FakeBroker().SelectThing(42)
+
+        assert result == 42
+        assert BROKER_LATENCY.count("_FakeBroker", "SelectThing") == before + 1
+
+    @pytest.mark.unit
+    async def test_counts_errors(self):
+        """Test exceptions are counted and re-raised"""
+        before = BROKER_ERRORS.value("_FakeBroker", "FailThing")
+
+        with pytest.raises(ValueError):
+            await _FakeBroker().FailThing()
+
+        assert BROKER_ERRORS.value("_FakeBroker", "FailThing") == before + 1
+
+    @pytest.mark.unit
+    async def test_private_methods_not_wrapped(self):
+        """Test underscore methods are left alone"""
+        await _FakeBroker()._private()
+
+        assert BROKER_LATENCY.count("_FakeBroker", "_private") == 0
+
+
+class TestMetricsEndpoint:
+    """Test suite for GET /metrics"""
+
+    @pytest.mark.unit
+    def test_exposes_route_and_cache_metrics(self):
+        """Test the scrape includes per-route latency keyed by route template"""
+        client = TestClient(app)
+        client.get("/docs")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'route="/docs"' in body
+        assert "http_requests_in_flight" in body
+        assert 'cache_hit_ratio{cache="response"}' in body
+        assert "# TYPE broker_call_duration_seconds histogram" in body
+        assert render_metrics().startswith("# HELP")
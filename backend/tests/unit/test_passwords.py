@@ -0,0 +1,54 @@
+"""
+Unit tests for password hashing
+Tests verification, rehash detection and the round trip through the hashing
+process pool
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from src.utils.executors import shutdown_executors
+from src.utils.passwords import _verify, hash_password, verify_password
+
+CHEAP = "pbkdf2:sha256:1000"
+CHEAPER = "pbkdf2:sha256:500"
+
+
+class TestPasswordHashing:
+    """Test suite for hash verification and upgrades"""
+
+    @pytest.mark.unit
+    def test_verify_keeps_current_hash(self):
+        """Test a hash made with the configured method is not replaced"""
+        hashed = generate_password_hash("secret", CHEAP)
+
+        assert _verify(hashed, "secret", CHEAP) == (True, None)
+        assert _verify(hashed, "wrong", CHEAP) == (False, None)
+
+    @pytest.mark.unit
+    def test_verify_rehashes_when_cost_changes(self):
+        """Test a valid password with an older cost gets a new hash"""
+        hashed = generate_password_hash("secret", CHEAPER)
+
+        valid, new_hash = _verify(hashed, "secret", CHEAP)
+
+        assert valid is True
+        assert new_hash.startswith(f"{CHEAP}$")
+        assert check_password_hash(new_hash, "secret")
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_round_trip_through_process_pool(self):
+        """Test hashing and verifying in the worker processes"""
+        settings = MagicMock(PASSWORD_HASH_METHOD=CHEAP)
+        try:
+            with patch("src.utils.passwords.get_settings", return_value=settings):
+                hashed = await hash_password("secret")
+                result = await verify_password(hashed, "secret")
+        finally:
+            shutdown_executors()
+
+        assert hashed.startswith(f"{CHEAP}$")
+        assert result == (True, None)
@@ -0,0 +1,157 @@
+"""
+Unit tests for the asyncpg broker backend
+Tests SQL building helpers, result shaping and backend selection with a
+mocked Database (no Postgres needed)
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.Brokers.bookBroker import BookBroker
+from src.Brokers.pgBookBroker import PgBookBroker
+from src.Brokers.pgBookCopyBroker import PgBookCopyBroker
+from src.Brokers.pgStatsBroker import PgStatsBroker
+from src.utils.database import (
+    Database,
+    column_list,
+    ident,
+    insert_rows,
+    to_json,
+    update_rows,
+)
+from src.utils.dependencies import get_book_broker, get_container
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock(spec=Database)
+    db.fetch = AsyncMock(return_value=[])
+    db.fetchrow = AsyncMock(return_value=None)
+    db.fetchval = AsyncMock(return_value=0)
+    db.execute = AsyncMock(return_value="INSERT 0 1")
+    return db
+
+
+class TestDatabaseHelpers:
+    """Test suite for identifier quoting, JSON shaping and write SQL"""
+
+    @pytest.mark.unit
+    def test_ident_rejects_non_identifiers(self):
+        """Test only plain lowercase identifiers are interpolated"""
+        assert ident("book_pic_url") == '"book_pic_url"'
+        with pytest.raises(ValueError):
+            ident("title; DROP TABLE books")
+        assert column_list("id, title", alias="b") == 'b."id", b."title"'
+
+    @pytest.mark.unit
+    def test_to_json_matches_postgrest_values(self):
+        """Test UUIDs, timestamps and numerics come back as PostgREST sends them"""
+        book_id = uuid4()
+        created = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+        assert to_json(book_id) == str(book_id)
+        assert to_json(created) == "2026-01-02T03:04:05+00:00"
+        assert to_json(Decimal("3")) == 3
+        assert to_json([book_id]) == [str(book_id)]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_insert_rows_is_one_statement(self, mock_db):
+        """Test a bulk insert sends every row as one jsonb parameter"""
+        rows = [{"isbn": "1", "title": "A"}, {"isbn": "2", "author": "B"}]
+
+        await insert_rows(mock_db, "books", rows, on_conflict="isbn")
+
+        sql, payload = mock_db.fetch.call_args[0]
+        assert sql == (
+            'INSERT INTO "books" ("isbn", "title", "author") '
+            'SELECT "isbn", "title", "author" '
+            'FROM jsonb_populate_recordset(NULL::"books", $1) '
+            'ON CONFLICT ("isbn") DO NOTHING RETURNING *'
+        )
+        assert payload == rows
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_update_rows_numbers_where_after_values(self, mock_db):
+        """Test the values take $1 and the WHERE parameters follow"""
+        await update_rows(mock_db, "loans", {"status": "active"}, "id = $2", "x")
+
+        sql, values, loan_id = mock_db.fetch.call_args[0]
+        assert sql.startswith('UPDATE "loans" SET ("status") = ')
+        assert sql.endswith("WHERE id = $2 RETURNING *")
+        assert (values, loan_id) == ({"status": "active"}, "x")
+
+
+class TestPgBrokers:
+    """Test suite for Pg broker result shaping"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_books_with_stats_is_one_query(self, mock_db):
+        """Test the stats page is a single grouped query"""
+        broker = PgBookBroker(mock_db)
+
+        await broker.SelectAllBooksWithStats(10, 20, fields=["id", "title"])
+
+        mock_db.fetch.assert_awaited_once()
+        sql, skip, limit = mock_db.fetch.call_args[0]
+        assert sql.startswith('SELECT b."id", b."title", ')
+        assert "GROUP BY b.id" in sql
+        assert (skip, limit) == (10, 20)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_copies_by_accession_numbers_use_cache(self, mock_db):
+        """Test resolved copies are cached and later looked up by copy id"""
+        copy_id = str(uuid4())
+        mock_db.fetch.return_value = [
+            {"id": copy_id, "accession_number": 10001, "book": {}, "current_loan": None}
+        ]
+        broker = PgBookCopyBroker(mock_db)
+
+        copies = await broker.SelectCopiesByAccessionNumbers([10001])
+        await broker.SelectCopiesByAccessionNumbers([10001, 10002])
+
+        assert copies[0]["current_loan"] is None
+        first, second = mock_db.fetch.call_args_list
+        assert first[0][1:3] == ([], [10001])
+        assert second[0][1:3] == ([copy_id], [10002])
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stats_keep_defaults_and_raise_errors(self, mock_db):
+        """Test grouped counts fill the default buckets and errors aren't zeros"""
+        mock_db.fetch.return_value = [{"status": "active", "count": 4}]
+        broker = PgStatsBroker(mock_db)
+
+        by_status = await broker.get_loans_by_status()
+        mock_db.fetchval.side_effect = RuntimeError("relation does not exist")
+
+        assert by_status == {
+            "pending": 0,
+            "active": 4,
+            "returned": 0,
+            "overdue": 0,
+            "rejected": 0,
+        }
+        with pytest.raises(RuntimeError):
+            await broker.get_total_books()
+
+
+class TestBackendSelection:
+    """Test suite for picking brokers from the injected client"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_broker_matches_client(self, mock_db, mock_supabase_client):
+        """Test a Database gets the asyncpg broker and anything else Supabase's"""
+        pg_broker = await get_book_broker(await get_container(mock_db))
+        broker = await get_book_broker(await get_container(mock_supabase_client))
+
+        assert isinstance(pg_broker, PgBookBroker)
+        assert isinstance(broker, BookBroker)
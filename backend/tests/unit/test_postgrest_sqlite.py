@@ -0,0 +1,233 @@
+"""
+Unit tests for the SQLite-backed PostgREST emulator
+Tests builder semantics, embedded joins and constraints, then runs real brokers
+against seeded data
+"""
+
+import pytest
+from postgrest.exceptions import APIError
+
+from src.Brokers.bookBroker import BookBroker
+from src.Brokers.loanBroker import LoanBroker
+from src.Brokers.stocktakeBroker import StocktakeBroker
+
+
+@pytest.fixture
+def library(sqlite_client):
+    """Twenty books with two copies each and one user with two loans"""
+    books = sqlite_client.seed(
+        "books",
+        [
+            {
+                "isbn": f"978-{index:04d}",
+                "title": f"Data Systems {index}" if index % 2 else f"Calculus {index}",
+                "author": "Omar Hassan",
+            }
+            for index in range(20)
+        ],
+    )
+    copies = sqlite_client.seed(
+        "book_copies", [{"book_id": book["id"]} for book in books for _ in range(2)]
+    )
+    user = sqlite_client.seed(
+        "users",
+        [
+            {
+                "university_id": "21-000001",
+                "full_name": "Sara Nagy",
+                "email": "sara@eui.edu",
+                "hashed_password": "hash",
+            }
+        ],
+    )[0]
+    sqlite_client.seed(
+        "loans",
+        [
+            {"user_id": user["id"], "copy_id": copies[0]["id"], "status": "active"},
+            {
+                "user_id": user["id"],
+                "copy_id": copies[2]["id"],
+                "status": "overdue",
+                "due_date": "2020-01-01T00:00:00",
+            },
+        ],
+    )
+    return {"books": books, "copies": copies, "user": user}
+
+
+class TestQueryBuilder:
+    """Test suite for select, filters and writes"""
+
+    @pytest.mark.unit
+    def test_or_ilike_count_and_range(self, sqlite_client, library):
+        """Test or_ with ilike filters, exact counts and paging"""
+        response = (
+            sqlite_client.table("books")
+            .select("id, title", count="exact")
+            .or_("title.ilike.%DATA%,isbn.ilike.%none%")
+            .order("title", desc=True)
+            .range(0, 2)
+            .execute()
+        )
+
+        assert response.count == 10
+        assert [book["title"] for book in response.data] == [
+            "Data Systems 9",
+            "Data Systems 7",
+            "Data Systems 5",
+        ]
+        assert sqlite_client.log == ["GET /books"]
+
+    @pytest.mark.unit
+    def test_inner_embed_drops_unmatched_parents(self, sqlite_client, library):
+        """Test !inner removes parents without a match and !left keeps them"""
+        inner = (
+            sqlite_client.table("book_copies")
+            .select("id, loans!inner(id, users!inner(full_name))")
+            .eq("loans.status", "overdue")
+            .execute()
+        )
+        left = (
+            sqlite_client.table("book_copies")
+            .select("id, loans!left(id)")
+            .eq("book_id", library["books"][0]["id"])
+            .execute()
+        )
+
+        assert [copy["id"] for copy in inner.data] == [library["copies"][2]["id"]]
+        assert inner.data[0]["loans"][0]["users"] == {"full_name": "Sara Nagy"}
+        assert [len(copy["loans"]) for copy in left.data] == [1, 0]
+
+    @pytest.mark.unit
+    def test_insert_applies_defaults(self, sqlite_client, library):
+        """Test ids, identity accession numbers and column defaults are filled in"""
+        copy = (
+            sqlite_client.table("book_copies")
+            .insert({"book_id": library["books"][0]["id"]})
+            .execute()
+            .data[0]
+        )
+
+        assert copy["accession_number"] == 10041
+        assert copy["status"] == "available"
+        assert copy["is_reference"] is False
+        assert copy["id"]
+
+    @pytest.mark.unit
+    def test_constraints_raise_api_errors(self, sqlite_client, library):
+        """Test unique, enum and column errors surface like PostgREST's"""
+        duplicate = {"isbn": "978-0000", "title": "Copy", "author": "A"}
+
+        with pytest.raises(APIError) as unique:
+            sqlite_client.table("books").insert(duplicate).execute()
+        with pytest.raises(APIError) as enum:
+            sqlite_client.table("loans").select("id").eq("status", "lent").execute()
+        with pytest.raises(APIError) as column:
+            sqlite_client.table("books").select("id, edition").execute()
+
+        assert unique.value.code == "23505"
+        assert enum.value.code == "22P02"
+        assert column.value.code == "42703"
+
+    @pytest.mark.unit
+    def test_upsert_ignore_duplicates_returns_new_rows(self, sqlite_client, library):
+        """Test rows that hit the conflict target are skipped"""
+        response = (
+            sqlite_client.table("books")
+            .upsert(
+                [
+                    {"isbn": "978-0000", "title": "Existing", "author": "A"},
+                    {"isbn": "978-9999", "title": "New", "author": "A"},
+                ],
+                on_conflict="isbn",
+                ignore_duplicates=True,
+            )
+            .execute()
+        )
+
+        assert [book["isbn"] for book in response.data] == ["978-9999"]
+
+
+class TestBrokersOnSqlite:
+    """Test suite running real brokers against the emulator"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_books_is_case_insensitive(self, sqlite_client, library):
+        """Test SearchBooks matches title, author or ISBN ignoring case"""
+        result = await BookBroker(sqlite_client).SearchBooks("data systems 1")
+
+        assert sorted(book["title"] for book in result) == [
+            "Data Systems 1",
+            "Data Systems 11",
+            "Data Systems 13",
+            "Data Systems 15",
+            "Data Systems 17",
+            "Data Systems 19",
+        ]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_books_with_stats_rpc(self, sqlite_client, library):
+        """Test get_books_with_stats aggregates copies in one round trip"""
+        result = await BookBroker(sqlite_client).SelectAllBooksWithStats(0, 5)
+
+        assert len(result) == 5
+        assert all(book["copy_stats"]["total"] == 2 for book in result)
+        assert sqlite_client.log == ["POST /rpc/get_books_with_stats"]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_loans_with_book_info_is_one_query(self, sqlite_client, library):
+        """Test the joined loan list is a single request however many loans"""
+        loans = await LoanBroker(sqlite_client).SelectLoansByUserWithBookInfo(
+            library["user"]["id"]
+        )
+
+        assert {loan["copy_accession_number"] for loan in loans} == {10001, 10003}
+        assert sqlite_client.queries == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_desk_return_rpc(self, sqlite_client, library):
+        """Test desk_return_copies closes loans and counts late returns"""
+        outcomes = await LoanBroker(sqlite_client).DeskReturnCopies(
+            [10001, 10003, 10002, 1], increment_infractions=True
+        )
+
+        by_number = {row["accession_number"]: row for row in outcomes}
+        assert by_number[10001]["outcome"] == "returned"
+        assert by_number[10003]["was_overdue"] is True
+        assert by_number[10002]["outcome"] == "no_open_loan"
+        assert by_number[1]["outcome"] == "not_found"
+        user = (
+            sqlite_client.table("users")
+            .select("infractions_count")
+            .eq("id", library["user"]["id"])
+            .execute()
+        )
+        assert user.data == [{"infractions_count": 1}]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stocktake_skips_copies_out_or_held(self, sqlite_client, library):
+        """Test unscanned copies on loan or awaiting pickup aren't missing"""
+        copies = library["copies"]
+        sqlite_client.seed(
+            "loans",
+            [
+                {
+                    "user_id": library["user"]["id"],
+                    "copy_id": copies[4]["id"],
+                    "status": "pending_pickup",
+                }
+            ],
+        )
+        session = sqlite_client.seed("stocktake_sessions", [{"name": "Stacks"}])[0]
+        scanned = [copy["accession_number"] for copy in copies[5:]]
+        broker = StocktakeBroker(sqlite_client)
+        await broker.InsertScanChunk(session["id"], scanned)
+
+        result = await broker.ReconcileSession(session["id"])
+
+        assert result["missing_count"] == 2
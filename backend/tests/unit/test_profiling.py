@@ -0,0 +1,146 @@
+"""
+Unit tests for on-demand request profiling
+Tests sample categorization, thread sampling and the X-Profile middleware
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils.profiling import (
+    APP,
+    BROKER,
+    BROKER_THREAD,
+    IDLE,
+    JWT,
+    LOOP_THREAD,
+    PYDANTIC,
+    ProfileStore,
+    RequestProfile,
+    Sampler,
+    categorize,
+)
+
+
+class TestCategorize:
+    """Test suite for attributing samples to categories"""
+
+    @pytest.mark.unit
+    def test_innermost_match_wins(self):
+        """Test validation inside an endpoint is counted as pydantic"""
+        stack = [
+            "src.routers.bookRouter.get_books",
+            "pydantic.main.BaseModel.model_validate",
+        ]
+        assert categorize(stack, LOOP_THREAD) == PYDANTIC
+
+    @pytest.mark.unit
+    def test_jwt_decoding(self):
+        """Test verify_token and python-jose frames are counted as jwt"""
+        assert categorize(["src.utils.auth.verify_token"], LOOP_THREAD) == JWT
+        assert categorize(["jose.jwt.decode"], LOOP_THREAD) == JWT
+
+    @pytest.mark.unit
+    def test_worker_threads_are_broker_waits(self):
+        """Test samples from threads running PostgREST calls count as broker"""
+        assert categorize(["ssl.SSLSocket.recv_into"], BROKER_THREAD) == BROKER
+
+    @pytest.mark.unit
+    def test_idle_and_app(self):
+        """Test a parked event loop is idle and everything else is app"""
+        assert categorize(["selectors.EpollSelector.select"], LOOP_THREAD) == IDLE
+        assert categorize(["src.Services.x.y"], LOOP_THREAD) == APP
+
+
+class TestRequestProfile:
+    """Test suite for RequestProfile sampling"""
+
+    @pytest.mark.unit
+    def test_samples_only_watched_threads(self):
+        """Test samples are weighted by elapsed time and folded per stack"""
+        profile = RequestProfile("GET", "/books/", interval=0.001)
+        profile.watch_thread(threading.get_ident(), LOOP_THREAD)
+
+        profile.sample(0.002)
+
+        [stack] = profile.stacks
+        assert stack.startswith(f"{LOOP_THREAD};")
+        assert "test_samples_only_watched_threads" in stack
+        assert profile.collapsed() == f"{stack} 2000\n"
+        assert profile.summary()["samples"] == 1
+        assert profile.summary()["time_ms_by_category"] == {APP: 2.0}
+
+    @pytest.mark.unit
+    def test_store_is_bounded(self):
+        """Test only the most recent profiles are kept"""
+        store = ProfileStore(max_profiles=1)
+        for path in ("/a", "/b"):
+            assert store.try_begin()
+            store.finish(RequestProfile("GET", path, interval=0.001))
+
+        assert [profile.path for profile in store.recent()] == ["/b"]
+
+    @pytest.mark.unit
+    def test_one_profile_at_a_time(self):
+        """Test a second profile can't start while one is running"""
+        store = ProfileStore()
+        assert store.try_begin()
+        assert not store.try_begin()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sampler_stops_off_the_event_loop(self):
+        """Test stopping the sampler joins its thread without blocking the loop"""
+        sampler = Sampler(RequestProfile("GET", "/books/", interval=0.001))
+        sampler.start()
+        joined_on = []
+        join = sampler.join
+
+        def record_join(*args, **kwargs):
+            joined_on.append(threading.get_ident())
+            join(*args, **kwargs)
+
+        with patch.object(sampler, "join", side_effect=record_join):
+            await sampler.stop()
+
+        assert not sampler.is_alive()
+        assert joined_on and joined_on[0] != threading.get_ident()
+
+
+class TestProfileMiddleware:
+    """Test suite for the X-Profile header"""
+
+    @pytest.mark.unit
+    def test_admin_request_is_profiled(self, mock_admin_user):
+        """Test an admin request with X-Profile: 1 gets a stored profile"""
+        store = ProfileStore()
+        payload = {"id": mock_admin_user["id"], "role": "admin"}
+        with patch("src.utils.profiling._profile_store", store), patch(
+            "src.utils.auth.verify_token", return_value=payload
+        ):
+            response = TestClient(app).get(
+                "/docs", headers={"X-Profile": "1", "Authorization": "Bearer t"}
+            )
+
+        profile = store.get(response.headers["X-Profile-Id"])
+        assert profile.path == "/docs"
+        assert profile.status == 200
+
+    @pytest.mark.unit
+    def test_non_admin_header_is_ignored(self, mock_student_user):
+        """Test non-admins are served normally without profiling"""
+        store = ProfileStore()
+        payload = {"id": mock_student_user["id"], "role": "student"}
+        with patch("src.utils.profiling._profile_store", store), patch(
+            "src.utils.auth.verify_token", return_value=payload
+        ):
+            response = TestClient(app).get(
+                "/docs", headers={"X-Profile": "1", "Authorization": "Bearer t"}
+            )
+
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert store.recent() == []
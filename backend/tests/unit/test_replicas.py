@@ -0,0 +1,107 @@
+"""
+Unit tests for read replica routing
+Tests which client broker reads and writes get, read-after-write stickiness,
+on_primary pinning and caller tagging through the routing wrappers
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.utils.executors import CATALOG, workload
+from src.utils.metrics import instrument_broker
+from src.utils.replicas import on_primary, read_router, replica_reads
+from src.utils.tracing import _broker_call
+
+PRIMARY = SimpleNamespace(name="primary")
+REPLICA = SimpleNamespace(name="replica")
+
+
+@workload(CATALOG)
+@replica_reads
+@instrument_broker
+class _CopyBroker:
+    def __init__(self, client):
+        self.client = client
+
+    async def SelectCopy(self):
+        return self.client.name
+
+    async def UpdateCopy(self):
+        return self.client.name
+
+    async def CountCopies(self):
+        return _broker_call.get().caller
+
+
+class _CopyService:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def count(self):
+        return await self.broker.CountCopies()
+
+    @on_primary
+    async def check_and_update(self):
+        checked = await self.broker.SelectCopy()
+        await self.broker.UpdateCopy()
+        return checked
+
+
+def replica_settings(sticky: float = 0.0):
+    return patch(
+        "src.utils.replicas.get_settings",
+        return_value=MagicMock(
+            DATABASE_BACKEND="supabase",
+            SUPABASE_REPLICA_URL="https://replica.example.co",
+            REPLICA_STICKY_SECONDS=sticky,
+        ),
+    )
+
+
+class TestReplicaRouting:
+    """Test suite for ReadRouter, replica_reads and on_primary"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reads_use_replica_and_writes_primary(self):
+        """Test Select* runs on the replica and other methods on the primary"""
+        broker = _CopyBroker(read_router(PRIMARY, REPLICA))
+
+        with replica_settings():
+            assert await broker.SelectCopy() == "replica"
+            assert await broker.UpdateCopy() == "primary"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reads_stick_to_primary_after_write(self):
+        """Test a broker's reads stay on the primary right after it writes"""
+        broker = _CopyBroker(read_router(PRIMARY, REPLICA))
+
+        with replica_settings(sticky=60):
+            await broker.UpdateCopy()
+            assert await broker.SelectCopy() == "primary"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_on_primary_pins_reads(self):
+        """Test reads made inside an on_primary service method use the primary"""
+        service = _CopyService(_CopyBroker(read_router(PRIMARY, REPLICA)))
+
+        with replica_settings():
+            assert await service.check_and_update() == "primary"
+
+    @pytest.mark.unit
+    def test_no_replica_keeps_client(self):
+        """Test brokers get the primary client itself without a replica"""
+        assert read_router(PRIMARY, None) is PRIMARY
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_caller_seen_through_wrappers(self):
+        """Test broker calls are tagged with the service method, not a wrapper"""
+        service = _CopyService(_CopyBroker(read_router(PRIMARY, REPLICA)))
+
+        with replica_settings():
+            assert await service.count() == "_CopyService.count"
@@ -0,0 +1,170 @@
+"""
+Unit tests for database resilience
+Tests read retries, 503s for writes and outages, circuit breakers, request
+deadlines and the per-statement circuits of the asyncpg backend
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.utils.database import Database
+from src.utils.metrics import BROKER_RETRIES, BROKER_UNAVAILABLE
+from src.utils.resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    DatabaseUnavailableError,
+    Deadline,
+    _deadline,
+    call_timeout,
+    get_circuit,
+    resilient,
+    statement_target,
+)
+
+
+@resilient
+class _ShelfBroker:
+    def __init__(self, call):
+        self.call = call
+
+    async def SelectShelf(self):
+        return await self.call()
+
+    async def UpdateShelf(self):
+        return await self.call()
+
+
+def resilience_settings(**overrides):
+    values = {
+        "BROKER_CALL_TIMEOUT_SECONDS": 10.0,
+        "BROKER_READ_RETRIES": 2,
+        "BROKER_RETRY_BASE_SECONDS": 0.0,
+        "BROKER_RETRY_MAX_SECONDS": 0.0,
+        "CIRCUIT_FAILURE_THRESHOLD": 2,
+        "CIRCUIT_RESET_SECONDS": 30.0,
+        **overrides,
+    }
+    return patch("src.utils.resilience.get_settings", return_value=MagicMock(**values))
+
+
+class TestRetries:
+    """Test suite for the resilient broker decorator"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_read_retried_after_transient_error(self):
+        """Test a read that hits a dropped connection is tried again"""
+        call = AsyncMock(side_effect=[ConnectionResetError("reset"), "shelf"])
+        before = BROKER_RETRIES.value("_ShelfBroker", "SelectShelf")
+
+        with resilience_settings():
+            result = await _ShelfBroker(call).SelectShelf()
+
+        assert result == "shelf"
+        assert call.await_count == 2
+        assert BROKER_RETRIES.value("_ShelfBroker", "SelectShelf") == before + 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_write_not_retried_and_answers_503(self):
+        """Test a write failing transiently is not repeated and maps to a 503"""
+        call = AsyncMock(side_effect=ConnectionResetError("reset"))
+        before = BROKER_UNAVAILABLE.value("_ShelfBroker", "UpdateShelf", "error")
+
+        with resilience_settings(), pytest.raises(DatabaseUnavailableError) as error:
+            await _ShelfBroker(call).UpdateShelf()
+
+        call.assert_awaited_once()
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "1"
+        assert (
+            BROKER_UNAVAILABLE.value("_ShelfBroker", "UpdateShelf", "error")
+            == before + 1
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_request_errors_pass_through(self):
+        """Test errors that retrying can't fix reach the caller unchanged"""
+        call = AsyncMock(side_effect=ValueError("bad filter"))
+
+        with resilience_settings(), pytest.raises(ValueError):
+            await _ShelfBroker(call).SelectShelf()
+
+        call.assert_awaited_once()
+
+
+class TestCircuitBreaker:
+    """Test suite for CircuitBreaker"""
+
+    @pytest.mark.unit
+    def test_opens_fails_fast_and_recovers(self):
+        """Test repeated failures open the circuit until one probe succeeds"""
+        circuit = CircuitBreaker("loans", failure_threshold=2, reset_seconds=30)
+        circuit.record_failure()
+        circuit.record_failure()
+
+        with pytest.raises(DatabaseUnavailableError) as error:
+            circuit.before_call()
+        circuit.opened_at -= 30
+        circuit.before_call()
+        with pytest.raises(DatabaseUnavailableError):
+            # Only one probe at a time
+            circuit.before_call()
+        circuit.record_success()
+
+        assert error.value.reason == "circuit_open"
+        assert error.value.headers["Retry-After"] == "30"
+        assert circuit.state == CLOSED
+
+    @pytest.mark.unit
+    def test_statement_target(self):
+        """Test SQL is keyed by its table or function, skipping subqueries"""
+        assert statement_target("SELECT count(*) FROM books") == "books"
+        assert (
+            statement_target("SELECT extract(month FROM request_date)::int FROM loans")
+            == "loans"
+        )
+        assert (
+            statement_target("SELECT * FROM desk_checkout_copies($1)")
+            == "rpc/desk_checkout_copies"
+        )
+        assert statement_target('INSERT INTO "users" (id) VALUES ($1)') == "users"
+        assert statement_target("SELECT 1") is None
+
+
+class TestDeadlines:
+    """Test suite for request deadlines and the asyncpg round trip"""
+
+    @pytest.mark.unit
+    def test_passed_deadline_fails_fast(self):
+        """Test no call starts once the request's deadline has passed"""
+        token = _deadline.set(Deadline(-1))
+        try:
+            with resilience_settings():
+                with pytest.raises(DatabaseUnavailableError) as error:
+                    call_timeout()
+        finally:
+            _deadline.reset(token)
+
+        assert error.value.reason == "deadline"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_database_calls_are_bounded_and_counted(self):
+        """Test statements get a timeout and transient failures trip the circuit"""
+        db = Database("postgresql://db")
+        db._pool = MagicMock(fetchval=AsyncMock(side_effect=ConnectionResetError()))
+
+        with resilience_settings(CIRCUIT_FAILURE_THRESHOLD=1):
+            with pytest.raises(ConnectionResetError):
+                await db.fetchval("SELECT count(*) FROM books")
+            with pytest.raises(DatabaseUnavailableError):
+                await db.fetchval("SELECT count(*) FROM books")
+
+        db._pool.fetchval.assert_awaited_once_with(
+            "SELECT count(*) FROM books", timeout=10.0
+        )
+        assert get_circuit("books").state == OPEN
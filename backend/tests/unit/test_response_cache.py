@@ -0,0 +1,82 @@
+"""
+Unit tests for the catalog response cache
+Tests LRU/TTL behaviour, version invalidation and ETag matching
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.utils.cache import (
+    BOOKS,
+    COPIES,
+    ResponseCache,
+    bump_catalog_version,
+    etag_matches,
+    get_catalog_versions,
+    make_etag,
+)
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache"""
+
+    @pytest.mark.unit
+    def test_hit_after_set(self):
+        """Test a stored body is returned while versions are unchanged"""
+        cache = ResponseCache(max_entries=4, ttl_seconds=30)
+        versions = get_catalog_versions([BOOKS])
+        stored = cache.set("/books/?", b"[]", versions)
+
+        entry = cache.get("/books/?", versions)
+
+        assert entry is stored
+        assert entry.etag == make_etag(b"[]")
+        assert cache.hits == 1
+
+    @pytest.mark.unit
+    def test_version_bump_invalidates(self):
+        """Test a write to a dependent scope makes the entry stale"""
+        cache = ResponseCache()
+        cache.set("/books/with-stats?", b"[]", get_catalog_versions([BOOKS, COPIES]))
+
+        bump_catalog_version(COPIES)
+
+        assert (
+            cache.get("/books/with-stats?", get_catalog_versions([BOOKS, COPIES]))
+            is None
+        )
+        assert cache.misses == 1
+
+    @pytest.mark.unit
+    def test_expired_entry_is_miss(self):
+        """Test entries expire after the TTL"""
+        cache = ResponseCache(ttl_seconds=10)
+        with patch("src.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("/courses/?", b"[]", ())
+        with patch("src.utils.cache.time.monotonic", return_value=111.0):
+            assert cache.get("/courses/?", ()) is None
+
+    @pytest.mark.unit
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays bounded and evicts the oldest entry"""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", b"1", ())
+        cache.set("b", b"2", ())
+        cache.get("a", ())
+        cache.set("c", b"3", ())
+
+        assert cache.get("b", ()) is None
+        assert cache.get("a", ()) is not None
+        assert cache.get("c", ()) is not None
+
+    @pytest.mark.unit
+    def test_etag_matches(self):
+        """Test If-None-Match parsing"""
+        etag = make_etag(b"[]")
+
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('"other"', etag)
@@ -0,0 +1,55 @@
+"""
+Unit tests for list response serialization
+Tests the FAST_SERIALIZATION fast path against FastAPI's validated output
+"""
+
+import json
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from fastapi import Response
+
+from src.Models.Books import BookCopyStats, BookWithStatsResponse
+from src.utils.config import get_settings
+from src.utils.serialization import dump_json, json_response
+
+
+class TestSerialization:
+    """Test suite for json_response / dump_json"""
+
+    @pytest.fixture
+    def books(self, sample_book_dict):
+        book_data = {k: v for k, v in sample_book_dict.items() if k != "marc_data"}
+        return [BookWithStatsResponse(**book_data, copy_stats=BookCopyStats(total=2))]
+
+    @pytest.mark.unit
+    def test_validation_mode_returns_data_unchanged(self, books):
+        """Test that with the fast path off FastAPI still validates the result"""
+        with patch.object(get_settings(), "FAST_SERIALIZATION", False):
+            result = json_response(List[BookWithStatsResponse], books)
+
+        assert result is books
+
+    @pytest.mark.unit
+    def test_fast_mode_serializes_directly(self, books):
+        """Test that with the fast path on a ready JSON response is returned"""
+        with patch.object(get_settings(), "FAST_SERIALIZATION", True):
+            result = json_response(
+                List[BookWithStatsResponse], books, exclude_unset=True
+            )
+
+        assert isinstance(result, Response)
+        assert result.media_type == "application/json"
+        data = json.loads(result.body)
+        assert data[0]["title"] == books[0].title
+        assert data[0]["copy_stats"] == {"total": 2}
+
+    @pytest.mark.unit
+    def test_dump_json_matches_model_dump(self, books):
+        """Test the fast path produces the same JSON as pydantic's model dump"""
+        body = dump_json(List[BookWithStatsResponse], books, exclude_unset=True)
+
+        assert json.loads(body) == [
+            book.model_dump(mode="json", exclude_unset=True) for book in books
+        ]
@@ -0,0 +1,56 @@
+"""
+Unit tests for StocktakeBroker
+Tests database operations with mocked Supabase client
+"""
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from src.Brokers.stocktakeBroker import StocktakeBroker
+
+
+class TestStocktakeBroker:
+    """Test suite for StocktakeBroker database operations"""
+
+    @pytest.fixture
+    def broker(self, mock_supabase_client):
+        """Create StocktakeBroker instance with mocked client"""
+        return StocktakeBroker(mock_supabase_client)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_insert_scan_chunk_stores_one_array_row(
+        self, broker, mock_supabase_client
+    ):
+        """Test a whole chunk of scans is written as a single row"""
+        session_id = uuid4()
+
+        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+            await broker.InsertScanChunk(session_id, [10001, 10002, 10003])
+
+        mock_supabase_client.table.assert_called_once_with("stocktake_scans")
+        row = mock_supabase_client.insert.call_args[0][0]
+        assert row == {
+            "session_id": str(session_id),
+            "accession_numbers": [10001, 10002, 10003],
+        }
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_apply_session_calls_rpc(self, broker, mock_supabase_client):
+        """Test applying a session is one RPC returning the updated count"""
+        session_id = uuid4()
+        mock_supabase_client.rpc = MagicMock(return_value=mock_supabase_client)
+        mock_response = MagicMock()
+        mock_response.data = 7
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+            result = await broker.ApplySession(session_id)
+
+        assert result == 7
+        mock_supabase_client.rpc.assert_called_once_with(
+            "stocktake_apply", {"target_session": str(session_id)}
+        )
@@ -0,0 +1,204 @@
+"""
+Unit tests for StocktakeService
+Tests business logic with mocked dependencies
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.Models.Stocktake import DiscrepancyKind, StocktakeSessionCreate
+from src.Services.stocktakeService import StocktakeService
+from src.utils.auth import require_admin
+from src.utils.dependencies import get_stocktake_service
+
+
+class TestStocktakeService:
+    """Test suite for StocktakeService business logic"""
+
+    @pytest.fixture
+    def mock_broker(self):
+        """Create mocked StocktakeBroker"""
+        return AsyncMock()
+
+    @pytest.fixture
+    def service(self, mock_broker):
+        """Create StocktakeService instance with mocked broker"""
+        return StocktakeService(mock_broker)
+
+    @pytest.fixture
+    def session_dict(self):
+        """Sample open stocktake session"""
+        return {
+            "id": str(uuid4()),
+            "name": "Annual inventory",
+            "notes": None,
+            "status": "open",
+            "created_by": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_open_session(self, service, mock_broker, session_dict):
+        """Test opening a session records who started it"""
+        mock_broker.InsertSession.return_value = session_dict
+        admin_id = uuid4()
+
+        result = await service.OpenSession(
+            StocktakeSessionCreate(name="Annual inventory"), admin_id
+        )
+
+        assert result.name == "Annual inventory"
+        inserted = mock_broker.InsertSession.call_args[0][0]
+        assert inserted["status"] == "open"
+        assert inserted["created_by"] == str(admin_id)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_scans_stores_sorted_unique_chunk(
+        self, service, mock_broker, session_dict
+    ):
+        """Test a scan chunk is de-duplicated and sorted before it is stored"""
+        mock_broker.SelectSessionById.return_value = session_dict
+        session_id = session_dict["id"]
+
+        receipt = await service.AddScans(session_id, [10005, 10001, 10005, 10003])
+
+        mock_broker.InsertScanChunk.assert_called_once_with(
+            session_id, [10001, 10003, 10005]
+        )
+        mock_broker.UpdateSession.assert_not_called()
+        assert receipt.received == 4
+        assert receipt.stored == 3
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_scans_reopens_reconciled_session(
+        self, service, mock_broker, session_dict
+    ):
+        """Test new scans make an earlier reconciliation stale"""
+        session_dict["status"] = "reconciled"
+        mock_broker.SelectSessionById.return_value = session_dict
+
+        await service.AddScans(session_dict["id"], [10001])
+
+        mock_broker.UpdateSession.assert_called_once_with(
+            session_dict["id"], {"status": "open"}
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_scans_to_applied_session_fails(
+        self, service, mock_broker, session_dict
+    ):
+        """Test applied sessions no longer accept scans"""
+        session_dict["status"] = "applied"
+        mock_broker.SelectSessionById.return_value = session_dict
+
+        with pytest.raises(ValueError, match="already been applied"):
+            await service.AddScans(session_dict["id"], [10001])
+
+        mock_broker.InsertScanChunk.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reconcile_returns_counts(self, service, mock_broker, session_dict):
+        """Test reconciliation returns the session with its counts"""
+        mock_broker.SelectSessionById.return_value = session_dict
+        mock_broker.ReconcileSession.return_value = {
+            **session_dict,
+            "status": "reconciled",
+            "scanned_count": 3,
+            "expected_count": 4,
+            "missing_count": 1,
+            "found_lost_count": 0,
+            "on_loan_count": 0,
+            "unknown_count": 0,
+        }
+
+        result = await service.Reconcile(session_dict["id"])
+
+        assert result.status == "reconciled"
+        assert result.missing_count == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_retrieve_discrepancies_by_kind(
+        self, service, mock_broker, session_dict
+    ):
+        """Test discrepancies can be filtered by kind"""
+        mock_broker.SelectSessionById.return_value = session_dict
+        mock_broker.SelectDiscrepancies.return_value = [
+            {
+                "accession_number": 10002,
+                "copy_id": str(uuid4()),
+                "kind": "missing",
+                "current_status": "available",
+                "proposed_status": "lost",
+                "loan_id": None,
+            }
+        ]
+
+        result = await service.RetrieveDiscrepancies(
+            session_dict["id"], DiscrepancyKind.MISSING
+        )
+
+        assert result[0].kind == DiscrepancyKind.MISSING
+        mock_broker.SelectDiscrepancies.assert_called_once_with(
+            session_dict["id"], "missing", skip=0, limit=100
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_apply_requires_reconciled_session(
+        self, service, mock_broker, session_dict
+    ):
+        """Test changes can only be applied after reconciling"""
+        mock_broker.SelectSessionById.return_value = session_dict
+
+        with pytest.raises(ValueError, match="Only reconciled"):
+            await service.ApplyChanges(session_dict["id"])
+
+        mock_broker.ApplySession.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_apply_changes(self, service, mock_broker, session_dict):
+        """Test applying reports how many copies changed status"""
+        reconciled = {**session_dict, "status": "reconciled"}
+        applied = {**session_dict, "status": "applied"}
+        mock_broker.SelectSessionById.side_effect = [reconciled, applied]
+        mock_broker.ApplySession.return_value = 12
+
+        result = await service.ApplyChanges(session_dict["id"])
+
+        assert result.copies_updated == 12
+        assert result.session.status == "applied"
+
+    @pytest.mark.unit
+    def test_unknown_session_is_404_on_every_route(self, service, mock_broker):
+        """Test a missing session is a 404, not a 400 like state errors"""
+        mock_broker.SelectSessionById.return_value = None
+        session_id = uuid4()
+        app.dependency_overrides[get_stocktake_service] = lambda: service
+        app.dependency_overrides[require_admin] = lambda: {"id": str(uuid4())}
+        client = TestClient(app)
+        try:
+            responses = [
+                client.post(
+                    f"/stocktake/{session_id}/scans", json={"accession_numbers": [1]}
+                ),
+                client.post(f"/stocktake/{session_id}/reconcile"),
+                client.get(f"/stocktake/{session_id}/discrepancies"),
+                client.post(f"/stocktake/{session_id}/apply"),
+            ]
+        finally:
+            app.dependency_overrides.clear()
+
+        assert [response.status_code for response in responses] == [404] * 4
+        assert responses[0].json()["detail"] == "Stocktake session not found"
@@ -0,0 +1,158 @@
+"""
+Unit tests for broker call tracing
+Tests span contents, caller tagging, the slow-call log and the ring buffer
+"""
+
+import asyncio
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src.utils.database import Database
+from src.utils.instrumentation import InstrumentedTransport
+from src.utils.metrics import instrument_broker
+from src.utils.tracing import Tracer
+
+
+def _postgrest_client() -> httpx.Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json=[{"id": 1}, {"id": 2}], headers={"Content-Range": "0-1/*"}
+        )
+
+    return httpx.Client(
+        transport=InstrumentedTransport(httpx.MockTransport(handler)),
+        base_url="https://example.supabase.co/rest/v1/",
+    )
+
+
+@instrument_broker
+class _LoanBroker:
+    def __init__(self, client: httpx.Client):
+        self.client = client
+
+    async def SelectPending(self):
+        def _fetch():
+            return self.client.get(
+                "loans", params={"select": "id", "status": "eq.pending"}
+            )
+
+        return await asyncio.to_thread(_fetch)
+
+
+class _LoanService:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def get_pending(self):
+        return await self.broker.SelectPending()
+
+    async def get_pending_twice(self):
+        return await asyncio.gather(
+            self.broker.SelectPending(), self.broker.SelectPending()
+        )
+
+
+class TestSpans:
+    """Test suite for spans recorded by the instrumented transport"""
+
+    @pytest.mark.unit
+    async def test_span_has_table_filters_rows_and_caller(self):
+        """Test a broker call is traced with its operation and service method"""
+        tracer = Tracer()
+        with patch("src.utils.tracing._tracer", tracer):
+            await _LoanService(_LoanBroker(_postgrest_client())).get_pending()
+
+        [span] = tracer.recent()
+        assert span["operation"] == "_LoanBroker.SelectPending"
+        assert span["caller"] == "_LoanService.get_pending"
+        assert span["method"] == "GET"
+        assert span["table"] == "loans"
+        assert span["filters"] == ["select=id", "status=eq.pending"]
+        assert span["rows"] == 2
+        assert span["status"] == 200
+
+    @pytest.mark.unit
+    async def test_gathered_calls_are_still_traced(self):
+        """Test calls started through asyncio.gather keep their operation"""
+        tracer = Tracer()
+        with patch("src.utils.tracing._tracer", tracer):
+            await _LoanService(_LoanBroker(_postgrest_client())).get_pending_twice()
+
+        spans = tracer.recent()
+        assert len(spans) == 2
+        assert {span["operation"] for span in spans} == {"_LoanBroker.SelectPending"}
+
+    @pytest.mark.unit
+    def test_calls_outside_rest_api_are_not_traced(self):
+        """Test auth/storage calls through the same client are ignored"""
+        tracer = Tracer()
+        client = _postgrest_client()
+        with patch("src.utils.tracing._tracer", tracer):
+            client.get("https://example.supabase.co/auth/v1/user")
+
+        assert tracer.recent() == []
+
+    @pytest.mark.unit
+    async def test_asyncpg_statements_are_traced(self, caplog):
+        """Test each asyncpg statement is a span with its target, rows and SQL"""
+        tracer = Tracer(slow_threshold_ms=0.0)
+        db = Database("postgresql://db")
+        db._pool = MagicMock(
+            fetch=AsyncMock(return_value=[{"id": 1}, {"id": 2}]),
+            execute=AsyncMock(return_value="UPDATE 3"),
+        )
+
+        with patch("src.utils.tracing._tracer", tracer):
+            with caplog.at_level(logging.WARNING, logger="src.utils.tracing"):
+                await db.fetch("SELECT id\n  FROM loans WHERE status = $1", "pending")
+                await db.execute("UPDATE loans SET status = $1", "returned")
+
+        update, select = tracer.recent()
+        assert select["method"] == "SELECT"
+        assert select["table"] == "loans"
+        assert select["rows"] == 2
+        assert select["statement"] == "SELECT id FROM loans WHERE status = $1"
+        assert update["rows"] == 3
+        assert update["slow"] is True
+        assert "UPDATE loans SET status = $1" in caplog.text
+
+
+class TestTracer:
+    """Test suite for the Tracer ring buffer and slow-call log"""
+
+    @pytest.mark.unit
+    def test_slow_calls_are_logged_and_flagged(self, caplog):
+        """Test calls over the threshold are logged with their filter chain"""
+        tracer = Tracer(slow_threshold_ms=0.0)
+        client = _postgrest_client()
+
+        with patch("src.utils.tracing._tracer", tracer):
+            with caplog.at_level(logging.WARNING, logger="src.utils.tracing"):
+                client.get("loans", params={"status": "eq.pending"})
+
+        assert tracer.recent(slow_only=True)[0]["slow"] is True
+        assert "loans?status=eq.pending" in caplog.text
+
+    @pytest.mark.unit
+    def test_buffer_is_bounded_and_newest_first(self):
+        """Test only the most recent spans are kept"""
+        tracer = Tracer(buffer_size=2)
+        for index in range(3):
+            tracer.record({"duration_ms": 1.0, "table": f"t{index}", "operation": None})
+
+        assert [span["table"] for span in tracer.recent()] == ["t2", "t1"]
+        assert [span["table"] for span in tracer.recent(table="t1")] == ["t1"]
+
+    @pytest.mark.unit
+    def test_exports_json_lines(self, tmp_path):
+        """Test spans are appended to the export file"""
+        export = tmp_path / "spans.jsonl"
+        tracer = Tracer(export_path=str(export))
+
+        tracer.record({"duration_ms": 1.0, "table": "books", "operation": None})
+
+        assert json.loads(export.read_text().splitlines()[0])["table"] == "books"
@@ -7,6 +7,7 @@ from unittest.mock import MagicMock, patch
 from uuid import UUID
 
 import pytest
+from postgrest.exceptions import APIError
 
 from src.Brokers.userBroker import UserBroker
 
@@ -35,7 +36,7 @@ class TestUserBroker:
         mock_response.data = [user_with_loans]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.SelectAllUsers(skip=0, limit=50)
 
         assert len(result) == 1
@@ -52,7 +53,7 @@ class TestUserBroker:
         mock_response.data = [sample_user_dict]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.SelectUserById(user_id)
 
         assert result == sample_user_dict
@@ -69,7 +70,7 @@ class TestUserBroker:
         mock_response.data = [sample_user_dict]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.SelectUserByEmail(email)
 
         assert result == sample_user_dict
@@ -86,7 +87,7 @@ class TestUserBroker:
         mock_response.data = [sample_user_dict]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.SelectUserByUniversityId(university_id)
 
         assert result == sample_user_dict
@@ -102,7 +103,7 @@ class TestUserBroker:
         mock_response.data = [sample_user_dict]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.InsertUser(user_data)
 
         assert result == sample_user_dict
@@ -121,7 +122,7 @@ class TestUserBroker:
         mock_response.data = [updated_user]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.UpdateUser(user_id, update_data)
 
         assert result == updated_user
@@ -138,7 +139,7 @@ class TestUserBroker:
         mock_response.data = [sample_user_dict]
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.DeleteUser(user_id)
 
         assert result is True
@@ -148,14 +149,147 @@ class TestUserBroker:
     async def test_search_users_found(
         self, broker, mock_supabase_client, sample_user_dict
     ):
-        """Test successful user search"""
+        """Test successful user search through the search_users RPC"""
         query = "Test"
         mock_response = MagicMock()
-        mock_response.data = [sample_user_dict]
-        mock_supabase_client.or_.return_value = mock_supabase_client
+        mock_response.data = [{**sample_user_dict, "search_rank": 2}]
+        mock_supabase_client.rpc.return_value = mock_supabase_client
         mock_supabase_client.execute.return_value = mock_response
 
-        with patch("asyncio.to_thread", side_effect=lambda f: f()):
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
             result = await broker.SearchUsers(query)
 
-        assert result == [sample_user_dict]
+        assert result == [{**sample_user_dict, "search_rank": 2}]
+        mock_supabase_client.rpc.assert_called_once_with(
+            "search_users", {"query_param": query, "limit_param": 20}
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_users_passes_cursor(self, broker, mock_supabase_client):
+        """Test that the keyset cursor is forwarded to the RPC"""
+        cursor = {"rank": 1, "full_name": "Omar", "id": "abc"}
+        mock_response = MagicMock()
+        mock_response.data = []
+        mock_supabase_client.rpc.return_value = mock_supabase_client
+        mock_supabase_client.execute.return_value = mock_response
+
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
+            result = await broker.SearchUsers("om", limit=5, cursor=cursor)
+
+        assert result == []
+        mock_supabase_client.rpc.assert_called_once_with(
+            "search_users",
+            {
+                "query_param": "om",
+                "limit_param": 5,
+                "after_rank": 1,
+                "after_name": "Omar",
+                "after_id": "abc",
+            },
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_users_fallback_pages_like_rpc(self, sqlite_client):
+        """Test the fallback ranks and pages exactly as the search_users RPC"""
+        sqlite_client.seed(
+            "users",
+            [
+                {
+                    "university_id": university_id,
+                    "full_name": full_name,
+                    "email": email,
+                    "hashed_password": "hash",
+                }
+                for university_id, full_name, email in [
+                    ("2021", "Zed Exact", "zed@eui.edu"),
+                    ("21-1", "Amr", "2021amr@eui.edu"),
+                    ("21-2", "Amr", "2021amr2@eui.edu"),
+                    ("21-3", "Amr", "amr2021@eui.edu"),
+                    ("2021-4", "Bassem", "bassem@eui.edu"),
+                    ("21-5", "Class of 2021", "class@eui.edu"),
+                    ("21-6", "Nobody", "nobody@eui.edu"),
+                ]
+            ],
+        )
+        broker = UserBroker(sqlite_client)
+
+        async def pages(search):
+            rows, cursor = [], None
+            while True:
+                page = await search(cursor)
+                rows += [(row["search_rank"], row["id"]) for row in page]
+                if len(page) < 2:
+                    return rows
+                last = page[-1]
+                cursor = {
+                    "rank": last["search_rank"],
+                    "full_name": last["full_name"],
+                    "id": last["id"],
+                }
+
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f, *a: f(*a)):
+            expected = await pages(
+                lambda cursor: broker.SearchUsers("2021", limit=2, cursor=cursor)
+            )
+            fallback = await pages(
+                lambda cursor: broker._search_users_fallback(
+                    "2021", 2, cursor, "id, full_name"
+                )
+            )
+
+        assert len(expected) == 6
+        assert expected[0][0] == 0
+        assert fallback == expected
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_users_fallback_matches_literally(self, sqlite_client):
+        """Test reserved characters and LIKE wildcards in the query match as text"""
+        sqlite_client.seed(
+            "users",
+            [
+                {
+                    "university_id": university_id,
+                    "full_name": full_name,
+                    "email": email,
+                    "hashed_password": "hash",
+                }
+                for university_id, full_name, email in [
+                    ("21-1", "Nour (a,b)", "nour@eui.edu"),
+                    ("21-2", "Nour ab", "nour.ab@eui.edu"),
+                    ("21-3", "Scored 50% less", "hala@eui.edu"),
+                    ("21-4", "Scored 500", "omar@eui.edu"),
+                ]
+            ],
+        )
+        broker = UserBroker(sqlite_client)
+
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f, *a: f(*a)):
+            for query, name in (("a,b", "Nour (a,b)"), ("50%", "Scored 50% less")):
+                expected = await broker.SearchUsers(query, limit=10)
+                fallback = await broker._search_users_fallback(
+                    query, 10, None, "id, full_name"
+                )
+
+                assert [row["full_name"] for row in fallback] == [name]
+                assert [row["id"] for row in fallback] == [
+                    row["id"] for row in expected
+                ]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_users_falls_back_only_without_rpc(
+        self, broker, mock_supabase_client
+    ):
+        """Test errors other than a missing search_users RPC are raised"""
+        mock_supabase_client.rpc.side_effect = APIError(
+            {"code": "42501", "message": "permission denied"}
+        )
+
+        with patch("src.Brokers.userBroker.to_thread", side_effect=lambda f: f()):
+            with pytest.raises(APIError):
+                await broker.SearchUsers("2021")
+
+        mock_supabase_client.table.assert_not_called()
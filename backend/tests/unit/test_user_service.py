@@ -3,7 +3,7 @@ Unit tests for UserService
 Tests business logic with mocked UserBroker
 """
 
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 from uuid import UUID, uuid4
 
 import pytest
@@ -37,7 +37,9 @@ class TestUserService:
 
         assert len(result) == 1
         assert isinstance(result[0], UserResponse)
-        mock_broker.SelectAllUsers.assert_called_once_with(skip=0, limit=50)
+        mock_broker.SelectAllUsers.assert_called_once_with(
+            skip=0, limit=50, fields=None
+        )
 
     @pytest.mark.unit
     @pytest.mark.asyncio
@@ -134,6 +136,71 @@ class TestUserService:
         assert result is True
         mock_broker.DeleteUser.assert_called_once_with(user_id)
 
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_authenticate_user_upgrades_old_hash(
+        self, service, mock_broker, sample_user_dict
+    ):
+        """Test a valid login with an outdated hash stores the new hash"""
+        mock_broker.SelectUserByEmail.return_value = {
+            **sample_user_dict,
+            "hashed_password": "pbkdf2:sha256:1000$salt$hash",
+        }
+
+        with patch(
+            "src.Services.userService.verify_password",
+            AsyncMock(return_value=(True, "scrypt:32768:8:1$salt$hash")),
+        ):
+            result = await service.AuthenticateUser("a@b.c", "secret")
+
+        assert result is not None
+        mock_broker.UpdateUser.assert_called_once_with(
+            UUID(sample_user_dict["id"]),
+            {"hashed_password": "scrypt:32768:8:1$salt$hash"},
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_rehash_logs_user_id_not_email(
+        self, service, mock_broker, sample_user_dict, caplog
+    ):
+        """Test a failed hash upgrade still logs in and keeps the email out of logs"""
+        mock_broker.SelectUserByEmail.return_value = {
+            **sample_user_dict,
+            "hashed_password": "pbkdf2:sha256:1000$salt$hash",
+        }
+        mock_broker.UpdateUser.side_effect = RuntimeError("timeout")
+
+        with patch(
+            "src.Services.userService.verify_password",
+            AsyncMock(return_value=(True, "scrypt:32768:8:1$salt$hash")),
+        ):
+            result = await service.AuthenticateUser("a@b.c", "secret")
+
+        assert result is not None
+        assert sample_user_dict["id"] in caplog.text
+        assert "a@b.c" not in caplog.text
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_authenticate_user_wrong_password(
+        self, service, mock_broker, sample_user_dict
+    ):
+        """Test a wrong password is rejected and nothing is rehashed"""
+        mock_broker.SelectUserByEmail.return_value = {
+            **sample_user_dict,
+            "hashed_password": "scrypt:32768:8:1$salt$hash",
+        }
+
+        with patch(
+            "src.Services.userService.verify_password",
+            AsyncMock(return_value=(False, None)),
+        ):
+            result = await service.AuthenticateUser("a@b.c", "wrong")
+
+        assert result is None
+        mock_broker.UpdateUser.assert_not_called()
+
     @pytest.mark.unit
     @pytest.mark.asyncio
     async def test_search_users_found(self, service, mock_broker, sample_user_dict):
@@ -146,3 +213,43 @@ class TestUserService:
         assert len(result) == 1
         assert isinstance(result[0], UserResponse)
         mock_broker.SearchUsers.assert_called_once_with(query)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_users_page_returns_next_cursor(
+        self, service, mock_broker, sample_user_dict
+    ):
+        """Test that a full page yields a cursor that round-trips to the broker"""
+        mock_broker.SearchUsers.return_value = [{**sample_user_dict, "search_rank": 1}]
+
+        users, next_cursor = await service.SearchUsersPage("test", limit=1)
+
+        assert len(users) == 1
+        assert next_cursor is not None
+
+        mock_broker.SearchUsers.return_value = []
+        users, last_cursor = await service.SearchUsersPage(
+            "test", limit=1, cursor=next_cursor
+        )
+
+        assert users == []
+        assert last_cursor is None
+        mock_broker.SearchUsers.assert_called_with(
+            "test",
+            limit=1,
+            fields=None,
+            cursor={
+                "rank": 1,
+                "full_name": sample_user_dict["full_name"],
+                "id": sample_user_dict["id"],
+            },
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_search_users_page_invalid_cursor(self, service, mock_broker):
+        """Test that a malformed cursor is rejected"""
+        with pytest.raises(ValueError, match="Invalid search cursor"):
+            await service.SearchUsersPage("test", cursor="not-a-cursor")
+
+        mock_broker.SearchUsers.assert_not_called()